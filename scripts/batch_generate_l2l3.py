@@ -102,8 +102,12 @@ def _run_phase(
 
 
 def phase1_l2_base(config: Config, db_path: Path, all_dates: list[str]) -> None:
-    """Phase 1: Generate industry_snapshot + market_snapshot for missing dates."""
-    from src.data.l2_pipeline import run_l2_snapshot
+    """Phase 1: Generate industry_snapshot + market_snapshot for missing dates.
+
+    缺失区间一次性交给 run_l2_snapshot_range（窗口批量读取、单事务写入），
+    区间内已存在的交易日按相同口径重算覆盖。
+    """
+    from src.data.l2_pipeline import run_l2_snapshot_range
 
     missing = _missing_dates(db_path, "industry_snapshot", all_dates)
     # Also check market_snapshot
@@ -114,15 +118,27 @@ def phase1_l2_base(config: Config, db_path: Path, all_dates: list[str]) -> None:
         print("Phase 1: No missing dates for L2 base. Skipping.")
         return
 
-    def run_fn(trade_date: str) -> None:
-        run_l2_snapshot(
-            trade_date=trade_date,
-            source="tushare",
-            config=config,
-            strict_sw31=False,
-        )
-
-    _run_phase(1, combined, "L2 base (industry_snapshot + market_snapshot)", run_fn)
+    print(f"\n{'='*60}")
+    print("Phase 1: L2 base (industry_snapshot + market_snapshot)")
+    print(f"Range: {combined[0]} ~ {combined[-1]} ({len(combined)} missing dates)")
+    print(f"{'='*60}")
+    t0 = time.time()
+    result = run_l2_snapshot_range(
+        start_date=combined[0],
+        end_date=combined[-1],
+        source="tushare",
+        config=config,
+        strict_sw31=False,
+    )
+    failed_dates = result.failed_trade_dates
+    total = len(result.trade_dates)
+    print(
+        f"\nPhase 1 done: {total - len(failed_dates)}/{total} success, "
+        f"{len(failed_dates)} failed, {time.time() - t0:.1f}s total"
+    )
+    if failed_dates:
+        print(f"  Failed dates: {failed_dates[:20]}{'...' if len(failed_dates) > 20 else ''}")
+    print(f"  Report: {result.range_report_path}")
 
 
 def phase2_mss(config: Config, db_path: Path, all_dates: list[str]) -> None:
@@ -319,13 +319,16 @@ class PersistentDuckDBWriter:
     """持久化 DuckDB 写入器。
 
     全程保持单一连接，避免频繁 open/close 导致的锁竞争。
-    支持按 trade_date 分区去重写入。
+    支持按 trade_date 分区去重写入；raw_daily 在同一事务内维护 market_daily_agg。
     """
 
     def __init__(self, db_path: Path) -> None:
+        from src.db.helpers import WriteSession
+
         self.db_path = db_path
         db_path.parent.mkdir(parents=True, exist_ok=True)
         self._conn = duckdb.connect(str(db_path))
+        self._session = WriteSession(self._conn)
         self._known_tables: set[str] = set()
         self._total_written = 0
 
@@ -354,10 +357,9 @@ class PersistentDuckDBWriter:
         df = pd.DataFrame.from_records(records)
         conn = self._conn
 
-        conn.register("incoming_df", df)
-        try:
-            # 用事务包裹删分区 + 插入，避免中途失败导致数据不一致。
-            conn.execute("BEGIN TRANSACTION")
+        # 用事务包裹删分区 + 插入（raw_daily 连同聚合行），避免中途失败导致数据不一致。
+        with self._session.batch():
+            conn.register("incoming_df", df)
             try:
                 # 建表（首次）
                 if table_name not in self._known_tables:
@@ -377,12 +379,12 @@ class PersistentDuckDBWriter:
                 conn.execute(
                     f"INSERT INTO {table_name} BY NAME SELECT * FROM incoming_df"
                 )
-                conn.execute("COMMIT")
-            except Exception:
-                conn.execute("ROLLBACK")
-                raise
-        finally:
-            conn.unregister("incoming_df")
+            finally:
+                conn.unregister("incoming_df")
+            if table_name == "raw_daily":
+                from src.data.market_daily_agg import write_market_daily_agg
+
+                write_market_daily_agg(self._session, df)
 
         count = len(df)
         self._total_written += count
@@ -6,9 +6,11 @@
   python scripts/export_duckdb_to_parquet.py --layer l2     # 仅导出 L2
   python scripts/export_duckdb_to_parquet.py --dry-run      # 仅统计不写入
 
-存储结构（对齐 data-layer-algorithm.md §2.3）：
-  {parquet_path}/l1/{table_name}/{trade_date}.parquet
-  {parquet_path}/l2/{table_name}/{trade_date}.parquet
+存储结构（对齐 data-layer-algorithm.md §2.3，写入见 src/db/parquet_lake.py）：
+  {parquet_path}/l1/{table_name}/year=YYYY/month=MM/{trade_date}.parquet
+  {parquet_path}/l2/{table_name}/year=YYYY/month=MM/{trade_date}.parquet
+  {parquet_path}/{layer}/{table_name}/_manifest.json
+已在清单中的交易日跳过（增量导出）；导出后可用 eq compact-parquet 合并为月度文件。
 """
 
 from __future__ import annotations
@@ -21,9 +23,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 import duckdb
-import pandas as pd
 
 from src.config.config import Config
+from src.db.parquet_lake import load_manifest, write_trade_date_partitions
 
 
 L1_TABLES = [
@@ -63,7 +65,7 @@ def _export_table(
     output_dir: Path,
     dry_run: bool,
 ) -> tuple[int, int]:
-    """导出一张表的所有数据到按日期分区的 Parquet 文件。
+    """导出一张表的所有数据到 Parquet 湖（year/month 分区 + 清单）。
 
     Returns: (total_rows, file_count)
     """
@@ -92,9 +94,9 @@ def _export_table(
         if dry_run:
             print(f"  {table_name}: {total_rows} rows → 1 file (dry-run)")
             return (total_rows, 1)
-        table_dir.mkdir(parents=True, exist_ok=True)
-        df = conn.execute(f"SELECT * FROM {table_name}").df()
-        df.to_parquet(table_dir / "latest.parquet", index=False)
+        write_trade_date_partitions(
+            table_dir, conn.execute(f"SELECT * FROM {table_name}").to_arrow_table()
+        )
         print(f"  {table_name}: {total_rows} rows → 1 file")
         return (total_rows, 1)
 
@@ -107,11 +109,13 @@ def _export_table(
         print(f"  {table_name}: {total_rows} rows, {len(date_list)} dates (dry-run)")
         return (total_rows, len(date_list))
 
-    table_dir.mkdir(parents=True, exist_ok=True)
-
-    # 已存在的文件跳过（增量导出）
-    existing_files = {p.stem for p in table_dir.glob("*.parquet")}
-    new_dates = [d for d in date_list if d not in existing_files]
+    # 清单中已有的交易日跳过（增量导出；旧版平铺文件由清单扫描一并计入）
+    exported_dates = {
+        str(value)
+        for entry in load_manifest(table_dir)["files"].values()
+        for value in entry.get("trade_dates", [])
+    }
+    new_dates = [d for d in date_list if d not in exported_dates]
     skipped = len(date_list) - len(new_dates)
 
     if not new_dates:
@@ -125,20 +129,16 @@ def _export_table(
     for batch_start in range(0, len(new_dates), batch_size):
         batch_dates = new_dates[batch_start : batch_start + batch_size]
         placeholders = ",".join(["?"] * len(batch_dates))
-        batch_df = conn.execute(
+        batch_table = conn.execute(
             f"SELECT * FROM {table_name} WHERE CAST(trade_date AS VARCHAR) IN ({placeholders})",
             batch_dates,
-        ).df()
+        ).to_arrow_table()
 
-        if batch_df.empty:
+        if batch_table.num_rows == 0:
             continue
 
-        for trade_date_val, group in batch_df.groupby("trade_date"):
-            file_name = str(trade_date_val).strip()
-            if not file_name:
-                continue
-            group.to_parquet(table_dir / f"{file_name}.parquet", index=False)
-            file_count += 1
+        # 整批一次写入：每个交易日一个分区文件，清单每批更新一次
+        file_count += len(write_trade_date_partitions(table_dir, batch_table))
 
         elapsed = time.time() - t0
         done = batch_start + len(batch_dates)
@@ -157,7 +157,7 @@ def _export_table(
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Export DuckDB → per-date Parquet files")
+    parser = argparse.ArgumentParser(description="Export DuckDB → partitioned Parquet lake")
     parser.add_argument("--layer", choices=["l1", "l2", "all"], default="all")
     parser.add_argument("--dry-run", action="store_true", help="Only count, don't write")
     args = parser.parse_args()
@@ -17,8 +17,10 @@
 逻辑:
     1. 从 raw_trade_cal 读取窗口内所有开市日
     2. 跳过已有 integrated_recommendation 记录的日期
-    3. 串行执行: IRS -> PAS -> Validation -> Integration(top_down)
-    4. 输出进度与汇总
+    3. IRS 以 run_irs_range 对待处理区间一次批量评分（单次读取、单事务写入）
+    4. PAS 以 run_pas_range 对待处理区间顺序推进滚动状态批量评分（按块读写）
+    5. 逐日串行执行: Validation -> Integration(top_down)
+    6. 输出进度与汇总
 """
 from __future__ import annotations
 
@@ -34,8 +36,8 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 import duckdb
 
 from src.config.config import Config
-from src.algorithms.irs.pipeline import run_irs_daily
-from src.algorithms.pas.pipeline import run_pas_daily
+from src.algorithms.irs.pipeline import run_irs_range
+from src.algorithms.pas.pipeline import run_pas_range
 from src.algorithms.validation.pipeline import run_validation_gate
 from src.integration.pipeline import run_integrated_daily
 
@@ -114,14 +116,43 @@ def main() -> int:
     failed = 0
     failed_dates: list[str] = []
 
+    # IRS：区间一次批量评分，轮动状态在区间内顺序传递
+    irs_result = run_irs_range(
+        start_date=need_process[0], end_date=need_process[-1], config=config
+    )
+    irs_errors = irs_result.errors
+    irs_dates = set(irs_result.trade_dates)
+    print(json.dumps({
+        "event": "irs_range_complete",
+        "trade_dates": len(irs_result.trade_dates),
+        "count": irs_result.count,
+        "failed_dates": irs_result.failed_trade_dates[:20],
+        "seconds": round(time.time() - t0, 1),
+    }), flush=True)
+
+    # PAS：区间一次推进滚动状态，逐日评分与 run_pas_daily 一致
+    pas_started = time.time()
+    pas_result = run_pas_range(
+        start_date=need_process[0], end_date=need_process[-1], config=config
+    )
+    pas_dates = set(pas_result.trade_dates)
+    print(json.dumps({
+        "event": "pas_range_complete",
+        "trade_dates": len(pas_result.trade_dates),
+        "count": pas_result.count,
+        "state_persisted": pas_result.state_persisted,
+        "seconds": round(time.time() - pas_started, 1),
+    }), flush=True)
+
     for i, trade_date in enumerate(need_process, 1):
         t_start = time.time()
         try:
-            # IRS
-            run_irs_daily(trade_date=trade_date, config=config)
-
-            # PAS
-            run_pas_daily(trade_date=trade_date, config=config)
+            if trade_date not in irs_dates:
+                raise ValueError("industry_snapshot_empty_for_trade_date")
+            if trade_date in irs_errors:
+                raise ValueError(f"irs_failed: {irs_errors[trade_date]}")
+            if trade_date not in pas_dates:
+                raise ValueError("raw_daily_empty_for_trade_date")
 
             # Validation
             with duckdb.connect(db_path, read_only=True) as conn:
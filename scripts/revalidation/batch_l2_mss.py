@@ -7,8 +7,9 @@
 逻辑:
     1. 从 raw_trade_cal 读取窗口内所有开市日
     2. 跳过已有 mss_panorama 记录的日期
-    3. 对每个缺失日期串行执行: L2 -> MSS
-    4. 输出进度与汇总
+    3. 对缺失 L2 的日期逐日串行生成 market_snapshot
+    4. MSS 以 run_mss_range 对待处理区间一次批量评分（温度历史流式传递、单事务写入）
+    5. 输出进度与汇总
 """
 from __future__ import annotations
 
@@ -25,7 +26,7 @@ import duckdb
 
 from src.config.config import Config
 from src.data.l2_pipeline import run_l2_snapshot
-from src.algorithms.mss.pipeline import run_mss_scoring
+from src.algorithms.mss.pipeline import run_mss_range
 
 
 def get_open_trade_dates(db_path: str, start: str, end: str) -> list[str]:
@@ -111,36 +112,25 @@ def main() -> int:
     failed = 0
     failed_dates: list[str] = []
 
-    for i, trade_date in enumerate(need_any, 1):
+    for i, trade_date in enumerate(need_l2, 1):
         t_start = time.time()
         try:
-            # L2
-            if trade_date not in existing_l2 and not args.skip_l2:
-                run_l2_snapshot(
-                    trade_date=trade_date,
-                    source="tushare",
-                    config=config,
-                    strict_sw31=True,
-                )
-
-            # MSS
-            if trade_date not in existing_mss:
-                run_mss_scoring(
-                    trade_date=trade_date,
-                    config=config,
-                    threshold_mode="adaptive",
-                )
-
+            run_l2_snapshot(
+                trade_date=trade_date,
+                source="tushare",
+                config=config,
+                strict_sw31=True,
+            )
             elapsed = time.time() - t_start
             success += 1
 
             # 进度输出（每 10 个或第一个）
-            if i == 1 or i % 10 == 0 or i == len(need_any):
+            if i == 1 or i % 10 == 0 or i == len(need_l2):
                 total_elapsed = time.time() - t0
                 rate = success / total_elapsed if total_elapsed > 0 else 0
-                eta = (len(need_any) - i) / rate if rate > 0 else 0
+                eta = (len(need_l2) - i) / rate if rate > 0 else 0
                 print(
-                    f"[{i}/{len(need_any)}] {trade_date} ok "
+                    f"[L2 {i}/{len(need_l2)}] {trade_date} ok "
                     f"({elapsed:.1f}s) "
                     f"rate={rate:.2f}/s "
                     f"ETA={eta/60:.0f}min",
@@ -151,7 +141,34 @@ def main() -> int:
             failed += 1
             failed_dates.append(trade_date)
             elapsed = time.time() - t_start
-            print(f"[{i}/{len(need_any)}] {trade_date} FAILED ({elapsed:.1f}s): {exc}", flush=True)
+            print(
+                f"[L2 {i}/{len(need_l2)}] {trade_date} FAILED ({elapsed:.1f}s): {exc}",
+                flush=True,
+            )
+
+    # MSS：区间一次批量评分，温度历史在区间内顺序传递
+    if need_mss:
+        t_mss = time.time()
+        mss_result = run_mss_range(
+            start_date=need_mss[0],
+            end_date=need_mss[-1],
+            config=config,
+            threshold_mode="adaptive",
+        )
+        scored = set(mss_result.trade_dates) - set(mss_result.failed_trade_dates)
+        for trade_date in need_mss:
+            if trade_date in scored:
+                success += 1
+            elif trade_date not in failed_dates:
+                failed += 1
+                failed_dates.append(trade_date)
+        print(json.dumps({
+            "event": "mss_range_complete",
+            "trade_dates": len(mss_result.trade_dates),
+            "count": mss_result.count,
+            "failed_dates": mss_result.failed_trade_dates[:20],
+            "seconds": round(time.time() - t_mss, 1),
+        }), flush=True)
 
     total_time = time.time() - t0
     print(json.dumps({
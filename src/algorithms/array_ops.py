@@ -0,0 +1,31 @@
+"""
+算法层共用的数组运算（纯 numpy，无逐列 / 逐股票 Python 循环）。
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def trailing_run_lengths(flags: np.ndarray) -> np.ndarray:
+    """统计每列末尾连续为 True 的行数（行为时间轴，列为股票）。
+
+    一维输入视为单列，返回长度为 1 的数组。实现：翻转时间轴后用 argmax
+    定位每列首个 False；整列为 True 时 argmax 返回 0，需要单独取全长。
+    """
+    matrix = np.asarray(flags, dtype=bool)
+    if matrix.ndim == 1:
+        matrix = matrix[:, None]
+    if matrix.ndim != 2:
+        raise ValueError(f"flags must be 1-D or 2-D, got {matrix.ndim}-D")
+    rows = matrix.shape[0]
+    if rows == 0:
+        return np.zeros(matrix.shape[1], dtype=np.int64)
+    breaks = ~matrix[::-1]
+    first_break = breaks.argmax(axis=0)
+    return np.where(breaks.any(axis=0), first_break, rows).astype(np.int64)
+
+
+def trailing_sign_runs(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """每列末尾连续上涨（>0）与连续下跌（<0）的天数，NaN 视为中断。"""
+    matrix = np.asarray(values, dtype=float)
+    return trailing_run_lengths(matrix > 0.0), trailing_run_lengths(matrix < 0.0)
@@ -0,0 +1,62 @@
+"""
+A 股板块涨跌停幅度判定（铁律#5：主板 10% / 创业板·科创板 20% / ST 5%）。
+
+PAS 全市场涨停阈值、回测 / 交易的涨跌停拦截共用同一口径：
+- 名称含 "ST"（不区分大小写，含 *ST）→ 5%
+- 代码前三位为 300 / 301 / 688 / 689 → 20%
+- 其余 → 10%
+
+批量接口按整列字符串向量化判定，不逐股票走 Python 循环。
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+LIMIT_RATIO_MAIN_BOARD = 0.10
+LIMIT_RATIO_GEM_STAR = 0.20
+LIMIT_RATIO_ST = 0.05
+GEM_STAR_PREFIXES = ("300", "301", "688", "689")
+
+
+def _as_text(values: Iterable[object] | pd.Series) -> pd.Series:
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    return series.fillna("").astype(str).reset_index(drop=True)
+
+
+def st_mask(stock_names: Iterable[object] | pd.Series) -> np.ndarray:
+    """名称含 ST 的布尔掩码（缺失名称视为非 ST）。"""
+    names = _as_text(stock_names)
+    return names.str.upper().str.contains("ST", regex=False).to_numpy(dtype=bool)
+
+
+def gem_star_mask(stock_codes: Iterable[object] | pd.Series) -> np.ndarray:
+    """创业板 / 科创板（20% 涨跌幅）代码的布尔掩码。"""
+    codes = _as_text(stock_codes).str.strip()
+    return codes.str[:3].isin(GEM_STAR_PREFIXES).to_numpy(dtype=bool)
+
+
+def limit_ratios(
+    stock_codes: Iterable[object] | pd.Series,
+    stock_names: Iterable[object] | pd.Series | None = None,
+) -> np.ndarray:
+    """批量返回每只股票的涨跌停幅度，ST 优先于板块。"""
+    gem = gem_star_mask(stock_codes)
+    ratios = np.where(gem, LIMIT_RATIO_GEM_STAR, LIMIT_RATIO_MAIN_BOARD)
+    if stock_names is not None:
+        st = st_mask(stock_names)
+        if len(st) != len(ratios):
+            raise ValueError("stock_codes and stock_names length mismatch")
+        ratios = np.where(st, LIMIT_RATIO_ST, ratios)
+    return ratios.astype(float)
+
+
+def resolve_limit_ratio(*, stock_code: str, stock_name: str = "") -> float:
+    """单只股票的涨跌停幅度（逐笔撮合路径使用，口径与 limit_ratios 一致）。"""
+    if "ST" in str(stock_name).upper():
+        return LIMIT_RATIO_ST
+    if str(stock_code).strip()[:3] in GEM_STAR_PREFIXES:
+        return LIMIT_RATIO_GEM_STAR
+    return LIMIT_RATIO_MAIN_BOARD
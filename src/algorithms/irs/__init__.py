@@ -2,14 +2,21 @@
 """Industry rotation tracking with 6-factor scoring."""
 
 from src.algorithms.irs.calculator import DefaultIrsCalculator, IrsCalculator
-from src.algorithms.irs.pipeline import IrsRunResult, run_irs_daily
+from src.algorithms.irs.pipeline import (
+    IrsRangeRunResult,
+    IrsRunResult,
+    run_irs_daily,
+    run_irs_range,
+)
 from src.algorithms.irs.repository import DuckDbIrsRepository, IrsRepository
 
 __all__ = [
     "DefaultIrsCalculator",
     "DuckDbIrsRepository",
     "IrsCalculator",
+    "IrsRangeRunResult",
     "IrsRepository",
     "IrsRunResult",
     "run_irs_daily",
+    "run_irs_range",
 ]
@@ -13,12 +13,14 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
 import json
 from pathlib import Path
 from typing import Any
 
 import duckdb
+import numpy as np
 import pandas as pd
 
 from src.config.config import Config
@@ -27,6 +29,7 @@ from src.db.helpers import (
     column_exists as _column_exists,
     duckdb_type as _duckdb_type,
     ensure_columns as _ensure_columns,
+    open_write_session,
     persist_by_trade_date as _persist,
     table_exists as _table_exists,
 )
@@ -46,6 +49,30 @@ SUPPORTED_CONTRACT_VERSION = "nc-v1"
 EPS = 1e-9
 SW31_EXPECTED_COUNT = 31
 
+# 有界回看：z-score 取最近 120 个交易日；gene 因子 EWM(alpha=0.1) 再预热 120 个交易日
+# （截断误差 ≤ 0.9^120 ≈ 3e-6），覆盖 5/10/20 日滚动窗口。日历日裁剪只用于下推过滤。
+IRS_ZSCORE_WINDOW = 120
+IRS_EWM_WARMUP_DAYS = 120
+IRS_LOOKBACK_TRADE_DAYS = IRS_ZSCORE_WINDOW + IRS_EWM_WARMUP_DAYS
+IRS_LOOKBACK_CALENDAR_DAYS = IRS_LOOKBACK_TRADE_DAYS * 2
+# 轮动状态只用最近 20 个评分（含当日）
+IRS_ROTATION_HISTORY_DAYS = 19
+IRS_NUMERIC_COLUMNS = (
+    "industry_pct_chg",
+    "industry_amount",
+    "industry_turnover",
+    "industry_pe_ttm",
+    "industry_pb",
+    "rise_count",
+    "fall_count",
+    "new_100d_high_count",
+    "new_100d_low_count",
+    "limit_up_count",
+    "top5_limit_up",
+    "stock_count",
+    "stale_days",
+)
+
 FACTOR_WEIGHTS = {
     "relative_strength": 0.25,
     "continuity_factor": 0.20,
@@ -62,6 +89,18 @@ STYLE_WEIGHTS = {
 }
 
 
+@dataclass(frozen=True)
+class IrsRangeRunResult:
+    start_date: str
+    end_date: str
+    trade_dates: list[str]
+    count: int
+    factor_intermediate_count: int
+    failed_trade_dates: list[str]
+    errors: dict[str, str]
+    range_report_path: Path
+
+
 @dataclass(frozen=True)
 class IrsRunResult:
     trade_date: str
@@ -312,54 +351,283 @@ def _score_with_history(
     return (_zscore_to_score(value, mean, std), mean, std)
 
 
-def run_irs_daily(
-    *,
-    trade_date: str,
-    config: Config,
-    artifacts_dir: Path | None = None,
-    require_sw31: bool = False,
-) -> IrsRunResult:
-    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
-    if not database_path.exists():
-        raise FileNotFoundError("duckdb_not_found")
+def _lookback_start_date(trade_date: str) -> str:
+    start = pd.Timestamp(trade_date) - pd.Timedelta(days=IRS_LOOKBACK_CALENDAR_DAYS)
+    return start.strftime("%Y%m%d")
 
-    baseline_map = _load_baseline_map(config)
 
-    with duckdb.connect(str(database_path), read_only=True) as connection:
-        if not _table_exists(connection, "industry_snapshot"):
-            raise ValueError("industry_snapshot_table_missing")
+def _trim_to_lookback(history: pd.DataFrame, *, trade_days: int) -> pd.DataFrame:
+    # 只保留最近 trade_days 个交易日（日历日裁剪之后的精确截断）
+    if history.empty:
+        return history
+    dates = sorted(history["trade_date"].astype(str).unique().tolist())
+    if len(dates) <= trade_days:
+        return history
+    return history[history["trade_date"].astype(str) >= dates[-trade_days]]
 
-        source = connection.execute(
-            "SELECT * FROM industry_snapshot WHERE trade_date = ?",
-            [trade_date],
-        ).df()
-        history = connection.execute(
-            "SELECT * FROM industry_snapshot WHERE trade_date <= ? "
-            "ORDER BY trade_date, industry_code",
-            [trade_date],
-        ).df()
 
-        if _table_exists(connection, "raw_index_daily"):
-            benchmark_history = connection.execute(
-                "SELECT trade_date, pct_chg FROM raw_index_daily "
-                "WHERE trade_date <= ? ORDER BY trade_date",
-                [trade_date],
-            ).df()
-        else:
-            benchmark_history = pd.DataFrame.from_records([])
+def _score_wide(
+    panel: pd.DataFrame,
+    *,
+    baseline_map: dict[str, tuple[float, float]],
+    baseline_key: str,
+) -> tuple[pd.Series, pd.Series, pd.Series]:
+    """日期 × 行业宽表末行的 z-score 映射，返回 (score, mean, std)，口径同 _score_with_history。"""
+    value = panel.iloc[-1]
+    if baseline_key in baseline_map:
+        base_mean, base_std = baseline_map[baseline_key]
+        mean = pd.Series(float(base_mean), index=panel.columns)
+        std = pd.Series(float(base_std), index=panel.columns)
+    else:
+        tail = panel.tail(IRS_ZSCORE_WINDOW)
+        mean = tail.mean().fillna(0.0)
+        std = tail.std(ddof=0).fillna(0.0)
+    flat = std.abs() <= EPS
+    z = (value - mean) / std.where(~flat, 1.0)
+    score = (((z + 3.0) / 6.0) * 100.0).clip(lower=0.0, upper=100.0).where(~flat, 50.0)
+    return (score, mean, std)
 
-        if _table_exists(connection, "irs_industry_daily"):
-            irs_history = connection.execute(
-                "SELECT trade_date, industry_code, industry_score, irs_score "
-                "FROM irs_industry_daily WHERE trade_date < ? ORDER BY trade_date",
-                [trade_date],
-            ).df()
-        else:
-            irs_history = pd.DataFrame.from_records([])
 
-    if source.empty:
-        raise ValueError("industry_snapshot_empty_for_trade_date")
+def _compute_industry_factors(
+    *,
+    source: pd.DataFrame,
+    history: pd.DataFrame,
+    trade_date: str,
+    benchmark_map: dict[Any, Any],
+    baseline_map: dict[str, tuple[float, float]],
+    created_at: str,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """全部行业一次性计算六因子：长表透视为 观测序号 × 行业 宽表，逐列滚动 / EWM 向量化。
+
+    宽表行为各行业自身的第 k 个有效交易日（末行对齐为当日），与逐行业序列口径完全一致；
+    基准收益、全市场成交额等按交易日的截面量先在长表上映射。返回 (行业评分行, 因子中间表)。
+    """
+    codes = [
+        str(code or "UNKNOWN")
+        for code in source.get("industry_code", pd.Series(["UNKNOWN"] * len(source))).tolist()
+    ]
+    work = history.copy()
+    for column in IRS_NUMERIC_COLUMNS:
+        if column not in work.columns:
+            work[column] = 0.0
+        work[column] = pd.to_numeric(work[column], errors="coerce").fillna(0.0)
+    work["industry_code"] = work["industry_code"].astype(str)
+    work["trade_date"] = work["trade_date"].astype(str)
+    work = work.sort_values("trade_date", kind="stable")
+    if "top5_pct_chg" in work.columns:
+        work["top5_pct_avg"] = work["top5_pct_chg"].map(_avg_json_list)
+    else:
+        work["top5_pct_avg"] = 0.0
+    # 全市场成交额按当日全部行业（含历史行业）汇总
+    work["market_amount"] = work.groupby("trade_date")["industry_amount"].transform("sum")
+    work["benchmark_pct_chg"] = work["trade_date"].map(benchmark_map).fillna(0.0)
+    work["obs"] = -work.groupby("industry_code").cumcount(ascending=False)
+    wide = work.set_index(["obs", "industry_code"])[
+        [*IRS_NUMERIC_COLUMNS, "top5_pct_avg", "market_amount", "benchmark_pct_chg"]
+    ].unstack("industry_code")
+    wide = wide.sort_index()
+
+    def _panel(column: str) -> pd.DataFrame:
+        return wide[column].reindex(columns=codes)
+
+    present = _panel("stock_count").notna()
+    stock_count = _panel("stock_count").clip(lower=1.0)
+    rise_ratio = _panel("rise_count") / stock_count
+    fall_ratio = _panel("fall_count") / stock_count
+    new_high_ratio = _panel("new_100d_high_count") / stock_count
+    new_low_ratio = _panel("new_100d_low_count") / stock_count
+
+    relative_strength_raw = _panel("industry_pct_chg") - _panel("benchmark_pct_chg")
+
+    net_breadth = rise_ratio - fall_ratio
+    net_new_high = new_high_ratio - new_low_ratio
+    continuity_raw = (
+        0.6 * net_breadth.rolling(window=5, min_periods=1).sum()
+        + 0.4 * net_new_high.rolling(window=5, min_periods=1).sum()
+    ).where(present)
+
+    amount = _panel("industry_amount")
+    amount_delta = amount.diff().fillna(0.0).where(present)
+    amount_avg_20 = amount.rolling(window=20, min_periods=1).mean().clip(lower=EPS)
+    relative_volume = (amount / amount_avg_20).where(present)
+    flow_share = amount / _panel("market_amount").clip(lower=EPS)
+    flow_share_mean_20 = flow_share.rolling(window=20, min_periods=1).mean().clip(lower=EPS)
+    crowding_ratio = flow_share / flow_share_mean_20
+    net_inflow_10d = amount_delta.rolling(window=10, min_periods=1).sum().where(present)
+    capital_flow_raw = 0.5 * net_inflow_10d + 0.3 * flow_share + 0.2 * relative_volume
+
+    style_buckets = [
+        str(value or "balanced").strip().lower()
+        for value in source.get("style_bucket", pd.Series(["balanced"] * len(source))).tolist()
+    ]
+    style_weights = [
+        STYLE_WEIGHTS.get(bucket, STYLE_WEIGHTS["balanced"]) for bucket in style_buckets
+    ]
+    w_pe = pd.Series([weight[0] for weight in style_weights], index=codes)
+    w_pb = pd.Series([weight[1] for weight in style_weights], index=codes)
+    valuation_raw = (-_panel("industry_pe_ttm")).mul(w_pe, axis=1) + (
+        -_panel("industry_pb")
+    ).mul(w_pb, axis=1)
+
+    leader_raw = 0.6 * _panel("top5_pct_avg") + 0.4 * (_panel("top5_limit_up") / 5.0)
+
+    gene_limit_ratio = _panel("limit_up_count") / stock_count
+    gene_high_ratio = _panel("new_100d_high_count") / stock_count
+    gene_raw = (
+        0.6 * gene_limit_ratio.ewm(alpha=0.1, adjust=False).mean()
+        + 0.4 * gene_high_ratio.ewm(alpha=0.1, adjust=False).mean()
+    ).where(present)
+
+    net_inflow_score, _, _ = _score_wide(
+        net_inflow_10d, baseline_map=baseline_map, baseline_key="irs_capital_flow_net_inflow_10d"
+    )
+    flow_share_score, _, _ = _score_wide(
+        flow_share, baseline_map=baseline_map, baseline_key="irs_capital_flow_flow_share"
+    )
+    relative_volume_score, _, _ = _score_wide(
+        relative_volume, baseline_map=baseline_map, baseline_key="irs_capital_flow_relative_volume"
+    )
+    crowding_penalty = 6.0 * (crowding_ratio.iloc[-1] - 1.2).clip(lower=0.0)
+    capital_flow_score = (
+        0.5 * net_inflow_score
+        + 0.3 * flow_share_score
+        + 0.2 * relative_volume_score
+        - crowding_penalty
+    ).clip(lower=0.0, upper=100.0)
+    capital_flow_tail = capital_flow_raw.tail(IRS_ZSCORE_WINDOW)
+    cf_mean = capital_flow_tail.mean().fillna(0.0)
+    cf_std = capital_flow_tail.std(ddof=0).fillna(0.0)
+
+    relative_strength_score, rs_mean, rs_std = _score_wide(
+        relative_strength_raw, baseline_map=baseline_map, baseline_key="irs_relative_strength_raw"
+    )
+    continuity_score, cont_mean, cont_std = _score_wide(
+        continuity_raw, baseline_map=baseline_map, baseline_key="irs_continuity_raw"
+    )
+    valuation_score, valuation_mean, valuation_std = _score_wide(
+        valuation_raw, baseline_map=baseline_map, baseline_key="irs_valuation_raw"
+    )
+    leader_score, leader_mean, leader_std = _score_wide(
+        leader_raw, baseline_map=baseline_map, baseline_key="irs_leader_raw"
+    )
+    gene_score, gene_mean, gene_std = _score_wide(
+        gene_raw, baseline_map=baseline_map, baseline_key="irs_gene_raw"
+    )
 
+    industry_score = (
+        relative_strength_score * FACTOR_WEIGHTS["relative_strength"]
+        + continuity_score * FACTOR_WEIGHTS["continuity_factor"]
+        + capital_flow_score * FACTOR_WEIGHTS["capital_flow"]
+        + valuation_score * FACTOR_WEIGHTS["valuation"]
+        + leader_score * FACTOR_WEIGHTS["leader_score"]
+        + gene_score * FACTOR_WEIGHTS["gene_score"]
+    ).round(4)
+
+    sample_days = present.sum().astype(int)
+    stale_values = source.get("stale_days", pd.Series([0] * len(source))).tolist()
+    stale_days = pd.Series([int(float(value or 0)) for value in stale_values], index=codes)
+    quality_flag = pd.Series("normal", index=codes).mask(sample_days < 60, "cold_start")
+    quality_flag = quality_flag.mask(stale_days > 0, "stale")
+
+    def _text(column: str, fallback: str) -> list[str]:
+        values = source.get(column, pd.Series([fallback] * len(source))).tolist()
+        return [str(value or fallback) for value in values]
+
+    scores = pd.DataFrame(
+        {
+            "trade_date": trade_date,
+            "industry_code": codes,
+            "industry_name": _text("industry_name", "未知行业"),
+            "industry_score": industry_score.to_numpy(),
+            "irs_score": industry_score.to_numpy(),
+            "quality_flag": quality_flag.to_numpy(),
+            "sample_days": sample_days.to_numpy(),
+            "relative_strength": relative_strength_score.round(4).to_numpy(),
+            "continuity_factor": continuity_score.round(4).to_numpy(),
+            "capital_flow": capital_flow_score.round(4).to_numpy(),
+            "valuation": valuation_score.round(4).to_numpy(),
+            "leader_score": leader_score.round(4).to_numpy(),
+            "gene_score": gene_score.round(4).to_numpy(),
+            "data_quality": _text("data_quality", "normal"),
+            "stale_days": stale_days.to_numpy(),
+            "source_trade_date": _text("source_trade_date", trade_date),
+            "contract_version": SUPPORTED_CONTRACT_VERSION,
+            "created_at": created_at,
+        }
+    )
+    factors = pd.DataFrame(
+        {
+            "trade_date": trade_date,
+            "industry_code": codes,
+            "relative_strength_raw": relative_strength_raw.iloc[-1].round(6).to_numpy(),
+            "continuity_factor_raw": continuity_raw.iloc[-1].round(6).to_numpy(),
+            "capital_flow_raw": capital_flow_raw.iloc[-1].round(6).to_numpy(),
+            "valuation_raw": valuation_raw.iloc[-1].round(6).to_numpy(),
+            "leader_score_raw": leader_raw.iloc[-1].round(6).to_numpy(),
+            "gene_score_raw": gene_raw.iloc[-1].round(6).to_numpy(),
+            "relative_strength_mean": rs_mean.round(6).to_numpy(),
+            "relative_strength_std": rs_std.round(6).to_numpy(),
+            "continuity_factor_mean": cont_mean.round(6).to_numpy(),
+            "continuity_factor_std": cont_std.round(6).to_numpy(),
+            "capital_flow_mean": cf_mean.round(6).to_numpy(),
+            "capital_flow_std": cf_std.round(6).to_numpy(),
+            "valuation_mean": valuation_mean.round(6).to_numpy(),
+            "valuation_std": valuation_std.round(6).to_numpy(),
+            "leader_score_mean": leader_mean.round(6).to_numpy(),
+            "leader_score_std": leader_std.round(6).to_numpy(),
+            "gene_score_mean": gene_mean.round(6).to_numpy(),
+            "gene_score_std": gene_std.round(6).to_numpy(),
+            "created_at": created_at,
+        }
+    )
+    return (scores, factors)
+
+
+IRS_OUTPUT_COLUMNS = (
+    "trade_date",
+    "industry_code",
+    "industry_name",
+    "industry_score",
+    "irs_score",
+    "rank",
+    "rotation_status",
+    "rotation_slope",
+    "rotation_detail",
+    "allocation_advice",
+    "allocation_mode",
+    "quality_flag",
+    "sample_days",
+    "relative_strength",
+    "continuity_factor",
+    "capital_flow",
+    "valuation",
+    "leader_score",
+    "gene_score",
+    "neutrality",
+    "recommendation",
+    "data_quality",
+    "stale_days",
+    "source_trade_date",
+    "contract_version",
+    "created_at",
+)
+
+
+@dataclass(frozen=True)
+class _IrsDayScore:
+    frame: pd.DataFrame
+    factor_frame: pd.DataFrame
+    source_industry_count: int
+    source_has_all: bool
+    output_industry_count: int
+    output_has_all: bool
+    allocation_missing_count: int
+    sw31_pass: bool
+    gate_status: str
+    gate_reason: str
+
+
+def _check_source_freshness(source: pd.DataFrame, *, config: Config) -> None:
     # 数据新鲜度阻断：任一行业 stale_days 超过阈值时拒绝计算。
     if "stale_days" in source.columns:
         max_stale = int(pd.to_numeric(source["stale_days"], errors="coerce").fillna(0).max())
@@ -370,11 +638,40 @@ def run_irs_daily(
                 stale_days=max_stale,
             )
 
-    target_artifacts_dir = artifacts_dir or (
-        Path("artifacts") / ("spiral-s3c" if require_sw31 else "spiral-s2c") / trade_date
-    )
-    coverage_report_path = target_artifacts_dir / "irs_allocation_coverage_report.md"
 
+def _benchmark_map(benchmark_history: pd.DataFrame) -> dict[Any, Any]:
+    if benchmark_history.empty or not {"trade_date", "pct_chg"} <= set(benchmark_history.columns):
+        return {}
+    return benchmark_history.set_index("trade_date")["pct_chg"].to_dict()
+
+
+def _score_history_map(irs_history: pd.DataFrame) -> dict[str, list[float]]:
+    score_history_by_industry: dict[str, list[float]] = {}
+    if irs_history.empty:
+        return score_history_by_industry
+    local_hist = irs_history.copy()
+    if "industry_score" not in local_hist.columns and "irs_score" in local_hist.columns:
+        local_hist["industry_score"] = local_hist["irs_score"]
+    for tup in local_hist.itertuples(index=False):
+        code = str(getattr(tup, "industry_code", "")).strip()
+        if not code:
+            continue
+        score_history_by_industry.setdefault(code, []).append(
+            float(getattr(tup, "industry_score", 0.0) or 0.0)
+        )
+    return score_history_by_industry
+
+
+def _score_irs_trade_date(
+    *,
+    trade_date: str,
+    source: pd.DataFrame,
+    history: pd.DataFrame,
+    benchmark_map: dict[Any, Any],
+    baseline_map: dict[str, tuple[float, float]],
+    score_history_by_industry: dict[str, list[float]],
+) -> _IrsDayScore:
+    """单个交易日：六因子 → 排名 / 配置建议 → 轮动状态 → SW31 覆盖判定（不落库）。"""
     source_codes = sorted(
         {
             str(code).strip()
@@ -384,234 +681,15 @@ def run_irs_daily(
     )
     source_has_all = "ALL" in source_codes
 
-    for column in (
-        "industry_pct_chg",
-        "industry_amount",
-        "industry_turnover",
-        "industry_pe_ttm",
-        "industry_pb",
-        "rise_count",
-        "fall_count",
-        "new_100d_high_count",
-        "new_100d_low_count",
-        "limit_up_count",
-        "top5_limit_up",
-        "stock_count",
-        "stale_days",
-    ):
-        if column not in history.columns:
-            history[column] = 0.0
-        history[column] = pd.to_numeric(history[column], errors="coerce").fillna(0.0)
-
-    market_amount_by_date = (
-        history.groupby("trade_date")["industry_amount"].sum().to_dict()
-        if not history.empty
-        else {}
-    )
-
-    benchmark_map = (
-        benchmark_history.set_index("trade_date")["pct_chg"].to_dict()
-        if not benchmark_history.empty and {"trade_date", "pct_chg"} <= set(benchmark_history.columns)
-        else {}
-    )
-
-    output_rows: list[dict[str, object]] = []
-    factor_rows: list[dict[str, object]] = []
     created_at = pd.Timestamp.utcnow().isoformat()
-
-    # 行业层计算保留逐行业语义，循环体内部全部使用向量化序列运算。
-    for row in source.itertuples(index=False):
-        item = row._asdict()
-        industry_code = str(item.get("industry_code", "UNKNOWN") or "UNKNOWN")
-        industry_name = str(item.get("industry_name", "未知行业") or "未知行业")
-
-        industry_hist = history[history["industry_code"].astype(str) == industry_code].copy()
-        if industry_hist.empty:
-            industry_hist = source[source["industry_code"].astype(str) == industry_code].copy()
-        industry_hist = industry_hist.sort_values("trade_date")
-        sample_days = int(len(industry_hist))
-
-        stock_count = industry_hist["stock_count"].clip(lower=1.0)
-        rise_ratio = industry_hist["rise_count"] / stock_count
-        fall_ratio = industry_hist["fall_count"] / stock_count
-        new_high_ratio = industry_hist["new_100d_high_count"] / stock_count
-        new_low_ratio = industry_hist["new_100d_low_count"] / stock_count
-
-        benchmark_series = industry_hist["trade_date"].map(benchmark_map).fillna(0.0)
-        relative_strength_raw_series = (
-            pd.to_numeric(industry_hist["industry_pct_chg"], errors="coerce").fillna(0.0)
-            - benchmark_series
-        )
-        relative_strength_raw = float(relative_strength_raw_series.iloc[-1])
-
-        net_breadth = rise_ratio - fall_ratio
-        net_new_high = new_high_ratio - new_low_ratio
-        continuity_raw_series = (
-            0.6 * net_breadth.rolling(window=5, min_periods=1).sum()
-            + 0.4 * net_new_high.rolling(window=5, min_periods=1).sum()
-        )
-        continuity_raw = float(continuity_raw_series.iloc[-1])
-
-        amount_series = pd.to_numeric(industry_hist["industry_amount"], errors="coerce").fillna(0.0)
-        amount_delta = amount_series.diff().fillna(0.0)
-        amount_avg_20 = amount_series.rolling(window=20, min_periods=1).mean().clip(lower=EPS)
-        relative_volume = amount_series / amount_avg_20
-
-        market_amount_total = industry_hist["trade_date"].map(market_amount_by_date).fillna(amount_series)
-        flow_share = amount_series / market_amount_total.clip(lower=EPS)
-        flow_share_mean_20 = flow_share.rolling(window=20, min_periods=1).mean().clip(lower=EPS)
-        crowding_ratio = flow_share / flow_share_mean_20
-
-        net_inflow_10d = amount_delta.rolling(window=10, min_periods=1).sum()
-        net_inflow_score, _, _ = _score_with_history(
-            value=float(net_inflow_10d.iloc[-1]),
-            history_series=net_inflow_10d,
-            baseline_map=baseline_map,
-            baseline_key="irs_capital_flow_net_inflow_10d",
-        )
-        flow_share_score, _, _ = _score_with_history(
-            value=float(flow_share.iloc[-1]),
-            history_series=flow_share,
-            baseline_map=baseline_map,
-            baseline_key="irs_capital_flow_flow_share",
-        )
-        relative_volume_score, _, _ = _score_with_history(
-            value=float(relative_volume.iloc[-1]),
-            history_series=relative_volume,
-            baseline_map=baseline_map,
-            baseline_key="irs_capital_flow_relative_volume",
-        )
-        capital_flow_raw_series = (
-            0.5 * net_inflow_10d + 0.3 * flow_share + 0.2 * relative_volume
-        )
-        cf_mean, cf_std = _series_mean_std(capital_flow_raw_series.tail(120))
-
-        crowding_penalty = 6.0 * max(float(crowding_ratio.iloc[-1]) - 1.2, 0.0)
-        capital_flow_score = _clip(
-            0.5 * net_inflow_score + 0.3 * flow_share_score + 0.2 * relative_volume_score - crowding_penalty,
-            0.0,
-            100.0,
-        )
-
-        style_bucket = str(item.get("style_bucket", "balanced") or "balanced").strip().lower()
-        w_pe, w_pb = STYLE_WEIGHTS.get(style_bucket, STYLE_WEIGHTS["balanced"])
-        pe_series = pd.to_numeric(industry_hist["industry_pe_ttm"], errors="coerce").fillna(0.0)
-        pb_series = pd.to_numeric(industry_hist["industry_pb"], errors="coerce").fillna(0.0)
-        valuation_raw_series = w_pe * (-pe_series) + w_pb * (-pb_series)
-        valuation_raw = float(valuation_raw_series.iloc[-1])
-
-        top5_limit_ratio = pd.to_numeric(industry_hist["top5_limit_up"], errors="coerce").fillna(0.0) / 5.0
-        top5_pct_avg = industry_hist["top5_pct_chg"].map(_avg_json_list)
-        leader_raw_series = 0.6 * top5_pct_avg + 0.4 * top5_limit_ratio
-        leader_raw = float(leader_raw_series.iloc[-1])
-
-        gene_limit_ratio = pd.to_numeric(industry_hist["limit_up_count"], errors="coerce").fillna(0.0) / stock_count
-        gene_high_ratio = pd.to_numeric(industry_hist["new_100d_high_count"], errors="coerce").fillna(0.0) / stock_count
-        gene_raw_series = (
-            0.6 * gene_limit_ratio.ewm(alpha=0.1, adjust=False).mean()
-            + 0.4 * gene_high_ratio.ewm(alpha=0.1, adjust=False).mean()
-        )
-        gene_raw = float(gene_raw_series.iloc[-1])
-
-        relative_strength_score, rs_mean, rs_std = _score_with_history(
-            value=relative_strength_raw,
-            history_series=relative_strength_raw_series,
-            baseline_map=baseline_map,
-            baseline_key="irs_relative_strength_raw",
-        )
-        continuity_score, cont_mean, cont_std = _score_with_history(
-            value=continuity_raw,
-            history_series=continuity_raw_series,
-            baseline_map=baseline_map,
-            baseline_key="irs_continuity_raw",
-        )
-        valuation_score, valuation_mean, valuation_std = _score_with_history(
-            value=valuation_raw,
-            history_series=valuation_raw_series,
-            baseline_map=baseline_map,
-            baseline_key="irs_valuation_raw",
-        )
-        leader_score, leader_mean, leader_std = _score_with_history(
-            value=leader_raw,
-            history_series=leader_raw_series,
-            baseline_map=baseline_map,
-            baseline_key="irs_leader_raw",
-        )
-        gene_score, gene_mean, gene_std = _score_with_history(
-            value=gene_raw,
-            history_series=gene_raw_series,
-            baseline_map=baseline_map,
-            baseline_key="irs_gene_raw",
-        )
-
-        industry_score = round(
-            relative_strength_score * FACTOR_WEIGHTS["relative_strength"]
-            + continuity_score * FACTOR_WEIGHTS["continuity_factor"]
-            + capital_flow_score * FACTOR_WEIGHTS["capital_flow"]
-            + valuation_score * FACTOR_WEIGHTS["valuation"]
-            + leader_score * FACTOR_WEIGHTS["leader_score"]
-            + gene_score * FACTOR_WEIGHTS["gene_score"],
-            4,
-        )
-
-        stale_days = int(float(item.get("stale_days", 0) or 0))
-        quality_flag = "stale" if stale_days > 0 else ("cold_start" if sample_days < 60 else "normal")
-
-        output_rows.append(
-            {
-                "trade_date": trade_date,
-                "industry_code": industry_code,
-                "industry_name": industry_name,
-                "industry_score": industry_score,
-                "irs_score": industry_score,
-                "quality_flag": quality_flag,
-                "sample_days": sample_days,
-                "relative_strength": round(relative_strength_score, 4),
-                "continuity_factor": round(continuity_score, 4),
-                "capital_flow": round(capital_flow_score, 4),
-                "valuation": round(valuation_score, 4),
-                "leader_score": round(leader_score, 4),
-                "gene_score": round(gene_score, 4),
-                "data_quality": str(item.get("data_quality", "normal") or "normal"),
-                "stale_days": stale_days,
-                "source_trade_date": str(item.get("source_trade_date", trade_date) or trade_date),
-                "contract_version": SUPPORTED_CONTRACT_VERSION,
-                "created_at": created_at,
-            }
-        )
-
-        factor_rows.append(
-            {
-                "trade_date": trade_date,
-                "industry_code": industry_code,
-                "relative_strength_raw": round(relative_strength_raw, 6),
-                "continuity_factor_raw": round(continuity_raw, 6),
-                "capital_flow_raw": round(
-                    0.5 * float(net_inflow_10d.iloc[-1])
-                    + 0.3 * float(flow_share.iloc[-1])
-                    + 0.2 * float(relative_volume.iloc[-1]),
-                    6,
-                ),
-                "valuation_raw": round(valuation_raw, 6),
-                "leader_score_raw": round(leader_raw, 6),
-                "gene_score_raw": round(gene_raw, 6),
-                "relative_strength_mean": round(rs_mean, 6),
-                "relative_strength_std": round(rs_std, 6),
-                "continuity_factor_mean": round(cont_mean, 6),
-                "continuity_factor_std": round(cont_std, 6),
-                "capital_flow_mean": round(cf_mean, 6),
-                "capital_flow_std": round(cf_std, 6),
-                "valuation_mean": round(valuation_mean, 6),
-                "valuation_std": round(valuation_std, 6),
-                "leader_score_mean": round(leader_mean, 6),
-                "leader_score_std": round(leader_std, 6),
-                "gene_score_mean": round(gene_mean, 6),
-                "gene_score_std": round(gene_std, 6),
-                "created_at": created_at,
-            }
-        )
-
-    frame = pd.DataFrame.from_records(output_rows)
+    frame, factor_frame = _compute_industry_factors(
+        source=source,
+        history=history,
+        trade_date=trade_date,
+        benchmark_map=benchmark_map,
+        baseline_map=baseline_map,
+        created_at=created_at,
+    )
     if frame.empty:
         raise ValueError("irs_empty_after_semantic_scoring")
 
@@ -635,19 +713,6 @@ def run_irs_daily(
         axis=1,
     )
 
-    score_history_by_industry: dict[str, list[float]] = {}
-    if not irs_history.empty:
-        local_hist = irs_history.copy()
-        if "industry_score" not in local_hist.columns and "irs_score" in local_hist.columns:
-            local_hist["industry_score"] = local_hist["irs_score"]
-        for tup in local_hist.itertuples(index=False):
-            code = str(getattr(tup, "industry_code", "")).strip()
-            if not code:
-                continue
-            score_history_by_industry.setdefault(code, []).append(
-                float(getattr(tup, "industry_score", 0.0) or 0.0)
-            )
-
     rotation_statuses: list[str] = []
     rotation_slopes: list[float] = []
     rotation_details: list[str] = []
@@ -685,7 +750,6 @@ def run_irs_daily(
         and len(output_codes) == SW31_EXPECTED_COUNT
         and allocation_missing_count == 0
     )
-    gate_status = "PASS" if sw31_pass else "FAIL"
     gate_reason = (
         "ok"
         if sw31_pass
@@ -695,66 +759,123 @@ def run_irs_daily(
             f"allocation_missing_count={allocation_missing_count}"
         )
     )
-    _write_coverage_report(
-        path=coverage_report_path,
-        trade_date=trade_date,
-        require_sw31=require_sw31,
+    return _IrsDayScore(
+        frame=frame[list(IRS_OUTPUT_COLUMNS)],
+        factor_frame=factor_frame,
         source_industry_count=len(source_codes),
         source_has_all=source_has_all,
         output_industry_count=len(output_codes),
         output_has_all=output_has_all,
         allocation_missing_count=allocation_missing_count,
-        gate_status=gate_status,
+        sw31_pass=sw31_pass,
+        gate_status="PASS" if sw31_pass else "FAIL",
         gate_reason=gate_reason,
     )
-    if require_sw31 and not sw31_pass:
-        raise ValueError(f"irs_sw31_coverage_gate_failed: {gate_reason}")
-
-    frame = frame[
-        [
-            "trade_date",
-            "industry_code",
-            "industry_name",
-            "industry_score",
-            "irs_score",
-            "rank",
-            "rotation_status",
-            "rotation_slope",
-            "rotation_detail",
-            "allocation_advice",
-            "allocation_mode",
-            "quality_flag",
-            "sample_days",
-            "relative_strength",
-            "continuity_factor",
-            "capital_flow",
-            "valuation",
-            "leader_score",
-            "gene_score",
-            "neutrality",
-            "recommendation",
-            "data_quality",
-            "stale_days",
-            "source_trade_date",
-            "contract_version",
-            "created_at",
-        ]
-    ]
 
-    count = _persist(
-        database_path=database_path,
-        table_name="irs_industry_daily",
-        frame=frame,
-        trade_date=trade_date,
+
+def run_irs_daily(
+    *,
+    trade_date: str,
+    config: Config,
+    artifacts_dir: Path | None = None,
+    require_sw31: bool = False,
+) -> IrsRunResult:
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        raise FileNotFoundError("duckdb_not_found")
+
+    baseline_map = _load_baseline_map(config)
+
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        if not _table_exists(connection, "industry_snapshot"):
+            raise ValueError("industry_snapshot_table_missing")
+
+        source = connection.execute(
+            "SELECT * FROM industry_snapshot WHERE trade_date = ?",
+            [trade_date],
+        ).df()
+        # 只读有界回看窗口，日常开销与库内历史长度无关
+        lookback_start = _lookback_start_date(trade_date)
+        history = _trim_to_lookback(
+            connection.execute(
+                "SELECT * FROM industry_snapshot WHERE trade_date <= ? AND trade_date >= ? "
+                "ORDER BY trade_date, industry_code",
+                [trade_date, lookback_start],
+            ).df(),
+            trade_days=IRS_LOOKBACK_TRADE_DAYS,
+        )
+        if not history.empty:
+            lookback_start = str(history["trade_date"].astype(str).min())
+
+        if _table_exists(connection, "raw_index_daily"):
+            benchmark_history = connection.execute(
+                "SELECT trade_date, pct_chg FROM raw_index_daily "
+                "WHERE trade_date <= ? AND trade_date >= ? ORDER BY trade_date",
+                [trade_date, lookback_start],
+            ).df()
+        else:
+            benchmark_history = pd.DataFrame.from_records([])
+
+        if _table_exists(connection, "irs_industry_daily"):
+            irs_history = connection.execute(
+                "SELECT trade_date, industry_code, industry_score, irs_score "
+                "FROM irs_industry_daily WHERE trade_date < ? AND trade_date >= ? "
+                "ORDER BY trade_date",
+                [trade_date, lookback_start],
+            ).df()
+        else:
+            irs_history = pd.DataFrame.from_records([])
+
+    if source.empty:
+        raise ValueError("industry_snapshot_empty_for_trade_date")
+    _check_source_freshness(source, config=config)
+
+    target_artifacts_dir = artifacts_dir or (
+        Path("artifacts") / ("spiral-s3c" if require_sw31 else "spiral-s2c") / trade_date
     )
+    coverage_report_path = target_artifacts_dir / "irs_allocation_coverage_report.md"
 
-    factor_frame = pd.DataFrame.from_records(factor_rows)
-    _persist(
-        database_path=database_path,
-        table_name="irs_factor_intermediate",
-        frame=factor_frame,
+    scored = _score_irs_trade_date(
         trade_date=trade_date,
+        source=source,
+        history=history,
+        benchmark_map=_benchmark_map(benchmark_history),
+        baseline_map=baseline_map,
+        score_history_by_industry=_score_history_map(irs_history),
     )
+    _write_coverage_report(
+        path=coverage_report_path,
+        trade_date=trade_date,
+        require_sw31=require_sw31,
+        source_industry_count=scored.source_industry_count,
+        source_has_all=scored.source_has_all,
+        output_industry_count=scored.output_industry_count,
+        output_has_all=scored.output_has_all,
+        allocation_missing_count=scored.allocation_missing_count,
+        gate_status=scored.gate_status,
+        gate_reason=scored.gate_reason,
+    )
+    if require_sw31 and not scored.sw31_pass:
+        raise ValueError(f"irs_sw31_coverage_gate_failed: {scored.gate_reason}")
+
+    frame = scored.frame
+    factor_frame = scored.factor_frame
+    # 行业评分与因子中间表在同一连接、同一事务内写入
+    with open_write_session(database_path) as session, session.batch():
+        count = _persist(
+            database_path=database_path,
+            table_name="irs_industry_daily",
+            frame=frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        _persist(
+            database_path=database_path,
+            table_name="irs_factor_intermediate",
+            frame=factor_frame,
+            trade_date=trade_date,
+            session=session,
+        )
 
     artifact_path = target_artifacts_dir / "irs_factor_intermediate_sample.parquet"
     artifact_path.parent.mkdir(parents=True, exist_ok=True)
@@ -768,3 +889,193 @@ def run_irs_daily(
         factor_intermediate_sample_path=artifact_path,
         coverage_report_path=coverage_report_path,
     )
+
+
+def _recent_scores(
+    scores_by_date: dict[str, dict[str, float]],
+    score_dates: list[str],
+    *,
+    industry_codes: set[str],
+    window_start: str,
+    trade_date: str,
+) -> dict[str, list[float]]:
+    # 与逐日查询 irs_industry_daily[window_start, trade_date) 等价；轮动状态只用最近
+    # IRS_ROTATION_HISTORY_DAYS 个历史评分，从后向前收集到当日各行业凑满即停止
+    history: dict[str, list[float]] = {}
+    pending = set(industry_codes)
+    lo = bisect_left(score_dates, window_start)
+    for index in range(bisect_left(score_dates, trade_date) - 1, lo - 1, -1):
+        if not pending:
+            break
+        for code, score in scores_by_date.get(score_dates[index], {}).items():
+            bucket = history.setdefault(code, [])
+            if len(bucket) < IRS_ROTATION_HISTORY_DAYS:
+                bucket.append(score)
+                if len(bucket) == IRS_ROTATION_HISTORY_DAYS:
+                    pending.discard(code)
+    return {code: list(reversed(bucket)) for code, bucket in history.items()}
+
+
+def run_irs_range(
+    *,
+    start_date: str,
+    end_date: str,
+    config: Config,
+    artifacts_dir: Path | None = None,
+    require_sw31: bool = False,
+) -> IrsRangeRunResult:
+    """区间批量 IRS：一次读取区间 + 回看窗口，逐日复用同一引擎，单事务批量写入。
+
+    每个交易日的因子窗口、基准收益与逐日 run_irs_daily 完全相同（结果逐行一致）；
+    轮动状态依赖的历史评分以内存状态向后传递：区间内已算出的交易日覆盖库中旧值，
+    失败交易日保留库中旧值（与逐日执行时该日未落库一致）。
+    """
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        raise FileNotFoundError("duckdb_not_found")
+
+    baseline_map = _load_baseline_map(config)
+    load_start = _lookback_start_date(start_date)
+
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        if not _table_exists(connection, "industry_snapshot"):
+            raise ValueError("industry_snapshot_table_missing")
+        snapshots = connection.execute(
+            "SELECT * FROM industry_snapshot WHERE trade_date <= ? AND trade_date >= ? "
+            "ORDER BY trade_date, industry_code",
+            [end_date, load_start],
+        ).df()
+        if _table_exists(connection, "raw_index_daily"):
+            benchmark_history = connection.execute(
+                "SELECT trade_date, pct_chg FROM raw_index_daily "
+                "WHERE trade_date <= ? AND trade_date >= ? ORDER BY trade_date",
+                [end_date, load_start],
+            ).df()
+        else:
+            benchmark_history = pd.DataFrame.from_records([])
+        if _table_exists(connection, "irs_industry_daily"):
+            irs_history = connection.execute(
+                "SELECT trade_date, industry_code, industry_score, irs_score "
+                "FROM irs_industry_daily WHERE trade_date < ? AND trade_date >= ? "
+                "ORDER BY trade_date",
+                [end_date, load_start],
+            ).df()
+        else:
+            irs_history = pd.DataFrame.from_records([])
+
+    snapshot_dates = snapshots["trade_date"].astype(str).to_numpy()
+    all_dates = sorted(set(snapshot_dates.tolist()))
+    trade_dates = [value for value in all_dates if start_date <= value <= end_date]
+    benchmark_map = _benchmark_map(benchmark_history)
+
+    scores_by_date: dict[str, dict[str, float]] = {}
+    if not irs_history.empty:
+        for score_date, group in irs_history.groupby(
+            irs_history["trade_date"].astype(str), sort=False
+        ):
+            scores_by_date[str(score_date)] = _last_scores(_score_history_map(group))
+    score_dates = sorted(set(scores_by_date) | set(trade_dates))
+
+    target_artifacts_dir = artifacts_dir or (
+        Path("artifacts")
+        / ("spiral-s3c" if require_sw31 else "spiral-s2c")
+        / f"{start_date}_{end_date}"
+    )
+    frames: list[pd.DataFrame] = []
+    factor_frames: list[pd.DataFrame] = []
+    failed_trade_dates: list[str] = []
+    errors: dict[str, str] = {}
+    gates: dict[str, dict[str, object]] = {}
+
+    for trade_date in trade_dates:
+        # 与 run_irs_daily 相同的窗口：日历日裁剪后取最近 IRS_LOOKBACK_TRADE_DAYS 个交易日
+        position = bisect_left(all_dates, trade_date)
+        window_start = max(
+            all_dates[max(0, position - IRS_LOOKBACK_TRADE_DAYS + 1)],
+            _lookback_start_date(trade_date),
+        )
+        lo = int(np.searchsorted(snapshot_dates, window_start, side="left"))
+        hi = int(np.searchsorted(snapshot_dates, trade_date, side="right"))
+        day_lo = int(np.searchsorted(snapshot_dates, trade_date, side="left"))
+        history = snapshots.iloc[lo:hi]
+        source = snapshots.iloc[day_lo:hi].reset_index(drop=True)
+        try:
+            _check_source_freshness(source, config=config)
+            scored = _score_irs_trade_date(
+                trade_date=trade_date,
+                source=source,
+                history=history,
+                benchmark_map=benchmark_map,
+                baseline_map=baseline_map,
+                score_history_by_industry=_recent_scores(
+                    scores_by_date,
+                    score_dates,
+                    industry_codes=set(source["industry_code"].astype(str).str.strip()),
+                    window_start=str(history["trade_date"].astype(str).min()),
+                    trade_date=trade_date,
+                ),
+            )
+            if require_sw31 and not scored.sw31_pass:
+                raise ValueError(f"irs_sw31_coverage_gate_failed: {scored.gate_reason}")
+        except (DataNotReadyError, ValueError) as exc:
+            failed_trade_dates.append(trade_date)
+            errors[trade_date] = str(exc)
+            continue
+        gates[trade_date] = {
+            "gate_status": scored.gate_status,
+            "gate_reason": scored.gate_reason,
+            "output_industry_count": scored.output_industry_count,
+        }
+        frames.append(scored.frame)
+        factor_frames.append(scored.factor_frame)
+        # 当日评分写入内存状态，供后续交易日的轮动状态使用
+        scores_by_date[trade_date] = _last_scores(_score_history_map(scored.frame))
+
+    count = 0
+    factor_count = 0
+    if frames:
+        frame = pd.concat(frames, ignore_index=True)
+        factor_frame = pd.concat(factor_frames, ignore_index=True)
+        # 全区间评分与因子中间表在同一连接、同一事务内写入（按 trade_date 整体替换）
+        with open_write_session(database_path) as session, session.batch():
+            count = session.write_frame("irs_industry_daily", frame)
+            factor_count = session.write_frame("irs_factor_intermediate", factor_frame)
+        sample_path = target_artifacts_dir / "irs_factor_intermediate_sample.parquet"
+        sample_path.parent.mkdir(parents=True, exist_ok=True)
+        factor_frame.to_parquet(sample_path, index=False)
+
+    range_report_path = target_artifacts_dir / "irs_range_report.json"
+    range_report_path.parent.mkdir(parents=True, exist_ok=True)
+    range_report_path.write_text(
+        json.dumps(
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "require_sw31": require_sw31,
+                "trade_date_count": len(trade_dates),
+                "irs_industry_daily_count": count,
+                "irs_factor_intermediate_count": factor_count,
+                "failed_trade_dates": failed_trade_dates,
+                "errors": errors,
+                "gates": gates,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    return IrsRangeRunResult(
+        start_date=start_date,
+        end_date=end_date,
+        trade_dates=trade_dates,
+        count=count,
+        factor_intermediate_count=factor_count,
+        failed_trade_dates=failed_trade_dates,
+        errors=errors,
+        range_report_path=range_report_path,
+    )
+
+
+def _last_scores(score_history_by_industry: dict[str, list[float]]) -> dict[str, float]:
+    # 单个交易日内同一行业只取最后一条（逐日查询按 trade_date 排序后同样逐条追加）
+    return {code: scores[-1] for code, scores in score_history_by_industry.items() if scores}
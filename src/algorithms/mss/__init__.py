@@ -9,7 +9,12 @@ from src.algorithms.mss.engine import (
     detect_cycle,
     detect_trend,
 )
-from src.algorithms.mss.pipeline import MssRunResult, run_mss_scoring
+from src.algorithms.mss.pipeline import (
+    MssRangeRunResult,
+    MssRunResult,
+    run_mss_range,
+    run_mss_scoring,
+)
 from src.algorithms.mss.probe import MssProbeResult, run_mss_probe
 from src.algorithms.mss.repository import DuckDbMssRepository, MssRepository
 
@@ -23,6 +28,7 @@ __all__ = [
     "MssInputSnapshot",
     "MssPanorama",
     "MssProbeResult",
+    "MssRangeRunResult",
     "MssRepository",
     "MssRunResult",
     "MssScoreResult",
@@ -30,5 +36,6 @@ __all__ = [
     "detect_cycle",
     "detect_trend",
     "run_mss_probe",
+    "run_mss_range",
     "run_mss_scoring",
 ]
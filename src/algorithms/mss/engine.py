@@ -17,10 +17,12 @@
 from __future__ import annotations
 
 import math
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Mapping, Sequence
 
+from src.algorithms.rolling_stats import SortedWindow, quantile_sorted
 from src.config.exceptions import DataNotReadyError
 from src.models.enums import MssCycle, Trend
 
@@ -117,18 +119,7 @@ def _quantile(values: Sequence[float], q: float) -> float:
             continue
         if math.isfinite(parsed):
             normalized_values.append(parsed)
-    sorted_values = sorted(normalized_values)
-    if not sorted_values:
-        return 0.0
-    if len(sorted_values) == 1:
-        return float(sorted_values[0])
-    pos = (len(sorted_values) - 1) * q
-    lower = int(math.floor(pos))
-    upper = int(math.ceil(pos))
-    if lower == upper:
-        return float(sorted_values[lower])
-    weight = pos - lower
-    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight)
+    return quantile_sorted(sorted(normalized_values), q)
 
 
 def _resolve_adaptive_cycle_thresholds(temperature_history: Sequence[float]) -> dict[str, float]:
@@ -140,13 +131,17 @@ def _resolve_adaptive_cycle_thresholds(temperature_history: Sequence[float]) ->
             continue
         if math.isfinite(parsed):
             history.append(parsed)
-    if len(history) < ADAPTIVE_MIN_SAMPLES:
+    return _adaptive_thresholds_from_sorted(sorted(history))
+
+
+def _adaptive_thresholds_from_sorted(sorted_history: Sequence[float]) -> dict[str, float]:
+    if len(sorted_history) < ADAPTIVE_MIN_SAMPLES:
         return dict(DEFAULT_CYCLE_THRESHOLDS)
 
-    t30 = _quantile(history, 0.30)
-    t45 = _quantile(history, 0.45)
-    t60 = _quantile(history, 0.60)
-    t75 = _quantile(history, 0.75)
+    t30 = quantile_sorted(sorted_history, 0.30)
+    t45 = quantile_sorted(sorted_history, 0.45)
+    t60 = quantile_sorted(sorted_history, 0.60)
+    t75 = quantile_sorted(sorted_history, 0.75)
     if not (t30 <= t45 <= t60 <= t75):
         return dict(DEFAULT_CYCLE_THRESHOLDS)
     return {"t30": t30, "t45": t45, "t60": t60, "t75": t75}
@@ -157,14 +152,18 @@ def resolve_cycle_thresholds(
     *,
     threshold_mode: str = "adaptive",
 ) -> dict[str, float]:
+    if _normalize_threshold_mode(threshold_mode) == "fixed":
+        return dict(DEFAULT_CYCLE_THRESHOLDS)
+    return _resolve_adaptive_cycle_thresholds(temperature_history)
+
+
+def _normalize_threshold_mode(threshold_mode: str) -> str:
     normalized_mode = str(threshold_mode or "adaptive").strip().lower() or "adaptive"
     if normalized_mode not in VALID_THRESHOLD_MODES:
         raise ValueError(
             f"unsupported threshold_mode: {threshold_mode}; allowed={sorted(VALID_THRESHOLD_MODES)}"
         )
-    if normalized_mode == "fixed":
-        return dict(DEFAULT_CYCLE_THRESHOLDS)
-    return _resolve_adaptive_cycle_thresholds(temperature_history)
+    return normalized_mode
 
 
 @dataclass(frozen=True)
@@ -445,21 +444,36 @@ def _compute_rank_percentile(
             continue
         if math.isfinite(parsed):
             history.append(parsed)
-    history.append(float(temperature))
-    if not history:
-        return (1, 100.0)
-    rank = 1 + sum(1 for item in history if item > float(temperature))
-    percentile = 100.0 * sum(1 for item in history if item <= float(temperature)) / float(len(history))
-    return (int(rank), float(round(_clamp(percentile, 0.0, 100.0), 4)))
+    return _rank_percentile_sorted(temperature=temperature, sorted_history=sorted(history))
 
 
-def calculate_mss_score(
-    snapshot: MssInputSnapshot,
+def _rank_percentile_sorted(
     *,
-    temperature_history: Sequence[float] | None = None,
-    threshold_mode: str = "adaptive",
-    stale_hard_limit_days: int = 3,
-) -> MssScoreResult:
+    temperature: float,
+    sorted_history: Sequence[float],
+) -> tuple[int, float]:
+    # 当日温度计入样本：名次 = 1 + 严格更高的个数，百分位 = 不高于当日的占比
+    value = float(temperature)
+    not_above = bisect_right(sorted_history, value) + 1
+    total = len(sorted_history) + 1
+    rank = 1 + (total - not_above)
+    percentile = 100.0 * not_above / float(total)
+    return (int(rank), float(round(_clamp(percentile, 0.0, 100.0), 4)))
+
+
+@dataclass(frozen=True)
+class _MssFactors:
+    temperature: float
+    market_coefficient: float
+    profit_effect: float
+    loss_effect: float
+    continuity_factor: float
+    extreme_factor: float
+    volatility_factor: float
+    extreme_direction_bias: float
+
+
+def _score_factors(snapshot: MssInputSnapshot, *, stale_hard_limit_days: int) -> _MssFactors:
     # 数据新鲜度阻断：stale_days 超过阈值时拒绝计算。
     if snapshot.stale_days > stale_hard_limit_days:
         raise DataNotReadyError(
@@ -567,22 +581,34 @@ def calculate_mss_score(
         100.0,
     )
     temperature = float(round(temperature, 4))
-
-    history = [float(value) for value in (temperature_history or [])]
-    trend, trend_quality = _detect_trend_and_quality([*history, temperature])
-    cycle = detect_cycle(
-        temperature,
-        trend,
-        thresholds=resolve_cycle_thresholds(history, threshold_mode=threshold_mode),
+    return _MssFactors(
+        temperature=temperature,
+        market_coefficient=market_coefficient,
+        profit_effect=profit_effect,
+        loss_effect=loss_effect,
+        continuity_factor=continuity_factor,
+        extreme_factor=extreme_factor,
+        volatility_factor=volatility_factor,
+        extreme_direction_bias=extreme_direction_bias,
     )
+
+
+def _build_panorama(
+    snapshot: MssInputSnapshot,
+    factors: _MssFactors,
+    *,
+    trend: str,
+    trend_quality: str,
+    thresholds: Mapping[str, float],
+    rank_percentile: tuple[int, float],
+) -> MssPanorama:
+    temperature = factors.temperature
+    cycle = detect_cycle(temperature, trend, thresholds=thresholds)
     if cycle not in VALID_CYCLES:
         cycle = "unknown"
 
     neutrality = _clamp(1.0 - abs(temperature - 50.0) / 50.0, 0.0, 1.0)
-    mss_rank, mss_percentile = _compute_rank_percentile(
-        temperature=temperature,
-        temperature_history=history,
-    )
+    mss_rank, mss_percentile = rank_percentile
 
     return MssPanorama(
         trade_date=snapshot.trade_date,
@@ -595,14 +621,91 @@ def calculate_mss_score(
         mss_percentile=mss_percentile,
         position_advice=_position_advice_for_cycle(cycle),
         neutrality=float(round(neutrality, 4)),
-        mss_market_coefficient=float(round(market_coefficient, 4)),
-        mss_profit_effect=float(round(profit_effect, 4)),
-        mss_loss_effect=float(round(loss_effect, 4)),
-        mss_continuity_factor=float(round(continuity_factor, 4)),
-        mss_extreme_factor=float(round(extreme_factor, 4)),
-        mss_volatility_factor=float(round(volatility_factor, 4)),
-        mss_extreme_direction_bias=float(round(extreme_direction_bias, 4)),
+        mss_market_coefficient=float(round(factors.market_coefficient, 4)),
+        mss_profit_effect=float(round(factors.profit_effect, 4)),
+        mss_loss_effect=float(round(factors.loss_effect, 4)),
+        mss_continuity_factor=float(round(factors.continuity_factor, 4)),
+        mss_extreme_factor=float(round(factors.extreme_factor, 4)),
+        mss_volatility_factor=float(round(factors.volatility_factor, 4)),
+        mss_extreme_direction_bias=float(round(factors.extreme_direction_bias, 4)),
         data_quality=snapshot.data_quality,
         stale_days=snapshot.stale_days,
         source_trade_date=snapshot.source_trade_date or snapshot.trade_date,
     )
+
+
+def calculate_mss_score(
+    snapshot: MssInputSnapshot,
+    *,
+    temperature_history: Sequence[float] | None = None,
+    threshold_mode: str = "adaptive",
+    stale_hard_limit_days: int = 3,
+) -> MssScoreResult:
+    factors = _score_factors(snapshot, stale_hard_limit_days=stale_hard_limit_days)
+    temperature = factors.temperature
+
+    history = [float(value) for value in (temperature_history or [])]
+    trend, trend_quality = _detect_trend_and_quality([*history, temperature])
+    thresholds = resolve_cycle_thresholds(history, threshold_mode=threshold_mode)
+    return _build_panorama(
+        snapshot,
+        factors,
+        trend=trend,
+        trend_quality=trend_quality,
+        thresholds=thresholds,
+        rank_percentile=_compute_rank_percentile(
+            temperature=temperature,
+            temperature_history=history,
+        ),
+    )
+
+
+class TemperatureHistoryWindow:
+    """最近 ADAPTIVE_LOOKBACK 条 mss_panorama 温度记录的流式窗口（区间批量评分用）。
+
+    与逐日 run_mss_scoring 读取的历史一致：窗口按记录条数滑动，空值 / 非有限值占位
+    但不参与计算。同时维护时间序与有序副本，自适应分位阈值与名次 / 百分位在有序副本上
+    二分定位，趋势只需最近 TREND_TAIL 个有效温度（EMA / 标准差均只看最近 20 个）。
+    """
+
+    TREND_TAIL = 20
+
+    def __init__(self, values: Sequence[float | None] = (), *, lookback: int = ADAPTIVE_LOOKBACK):
+        self.lookback = int(lookback)
+        self._window = SortedWindow(self.lookback, values)
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    def push(self, value: float | None) -> None:
+        self._window.push(value)
+
+    def values(self) -> list[float]:
+        return self._window.values()
+
+    def score(
+        self,
+        snapshot: MssInputSnapshot,
+        *,
+        threshold_mode: str = "adaptive",
+        stale_hard_limit_days: int = 3,
+    ) -> MssPanorama:
+        """以窗口为历史评分（与 calculate_mss_score(values()) 结果一致），不推进窗口。"""
+        factors = _score_factors(snapshot, stale_hard_limit_days=stale_hard_limit_days)
+        temperature = factors.temperature
+        tail = self._window.recent(self.TREND_TAIL)
+        trend, trend_quality = _detect_trend_and_quality([*tail, temperature])
+        if _normalize_threshold_mode(threshold_mode) == "fixed":
+            thresholds = dict(DEFAULT_CYCLE_THRESHOLDS)
+        else:
+            thresholds = _adaptive_thresholds_from_sorted(self._window.sorted_values)
+        return _build_panorama(
+            snapshot,
+            factors,
+            trend=trend,
+            trend_quality=trend_quality,
+            thresholds=thresholds,
+            rank_percentile=_rank_percentile_sorted(
+                temperature=temperature, sorted_history=self._window.sorted_values
+            ),
+        )
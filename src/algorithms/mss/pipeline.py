@@ -18,16 +18,26 @@ import duckdb
 import pandas as pd
 
 from src.algorithms.mss.engine import (
+    ADAPTIVE_LOOKBACK,
     MssInputSnapshot,
     MssPanorama,
+    TemperatureHistoryWindow,
     calculate_mss_score,
     resolve_cycle_thresholds,
 )
+from src.config.config import Config
+from src.config.exceptions import DataNotReadyError
+from src.db.helpers import (
+    column_exists as _column_exists,
+    open_write_connection,
+    open_write_session,
+    table_exists as _table_exists,
+)
+from src.db.parquet_lake import write_trade_date_partitions
+from src.db.writer_client import submit_to_writer
 
 # 向后兼容别名
 MssScoreResult = MssPanorama
-from src.config.config import Config
-from src.db.helpers import column_exists as _column_exists, table_exists as _table_exists
 
 # DESIGN_TRACE:
 # - docs/design/core-algorithms/mss/mss-algorithm.md (§3, §4, §5)
@@ -59,6 +69,18 @@ class MssRunResult:
     consumption_path: Path
 
 
+@dataclass(frozen=True)
+class MssRangeRunResult:
+    start_date: str
+    end_date: str
+    threshold_mode: str
+    trade_dates: list[str]
+    count: int
+    failed_trade_dates: list[str]
+    errors: dict[str, str]
+    range_report_path: Path
+
+
 def _write_json(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(
@@ -310,8 +332,11 @@ def _persist_mss_panorama(
     frame: pd.DataFrame,
     trade_date: str,
 ) -> int:
-    database_path.parent.mkdir(parents=True, exist_ok=True)
-    with duckdb.connect(str(database_path)) as connection:
+    if submit_to_writer(
+        database_path, table_name="mss_panorama", frame=frame, partition_value=trade_date
+    ):
+        return int(len(frame))
+    with open_write_connection(database_path) as connection:
         connection.register("incoming_df", frame)
         connection.execute(
             "CREATE TABLE IF NOT EXISTS mss_panorama AS "
@@ -391,19 +416,14 @@ def run_mss_scoring(
                 raise RuntimeError("market_snapshot_not_found")
 
             history: list[float] = []
-            if _table_exists(connection, "mss_panorama"):
-                history_column = (
-                    "mss_temperature"
-                    if _column_exists(connection, "mss_panorama", "mss_temperature")
-                    else ("mss_score" if _column_exists(connection, "mss_panorama", "mss_score") else "")
-                )
-                if history_column:
-                    history_rows = connection.execute(
-                        f"SELECT {history_column} FROM mss_panorama WHERE trade_date < ? "
-                        "ORDER BY trade_date DESC LIMIT 252",
-                        [trade_date],
-                    ).fetchall()
-                    history = [float(item[0]) for item in reversed(history_rows) if item and item[0] is not None]
+            history_column = _history_column(connection)
+            if history_column:
+                history_rows = connection.execute(
+                    f"SELECT {history_column} FROM mss_panorama WHERE trade_date < ? "
+                    "ORDER BY trade_date DESC LIMIT 252",
+                    [trade_date],
+                ).fetchall()
+                history = [float(item[0]) for item in reversed(history_rows) if item and item[0] is not None]
 
         snapshot = MssInputSnapshot.from_record(snapshot_frame.iloc[0].to_dict())
         history_samples = int(len(history))
@@ -470,11 +490,14 @@ def run_mss_scoring(
             score=score,
         )
 
-        parquet_root.mkdir(parents=True, exist_ok=True)
-        result_frame.to_parquet(parquet_root / "mss_panorama.parquet", index=False)
-        factor_intermediate_frame.to_parquet(
-            parquet_root / "mss_factor_intermediate.parquet",
-            index=False,
+        # L3 按交易日追加到 Parquet 湖，同日重算整体替换
+        write_trade_date_partitions(
+            parquet_root / "mss_panorama", result_frame, trade_date=trade_date
+        )
+        write_trade_date_partitions(
+            parquet_root / "mss_factor_intermediate",
+            factor_intermediate_frame,
+            trade_date=trade_date,
         )
     except Exception as exc:  # pragma: no cover - validated through contract tests
         if not errors:
@@ -550,3 +573,137 @@ def run_mss_scoring(
         gate_report_path=gate_report_path,
         consumption_path=consumption_path,
     )
+
+
+def _history_column(connection: duckdb.DuckDBPyConnection) -> str:
+    if not _table_exists(connection, "mss_panorama"):
+        return ""
+    if _column_exists(connection, "mss_panorama", "mss_temperature"):
+        return "mss_temperature"
+    if _column_exists(connection, "mss_panorama", "mss_score"):
+        return "mss_score"
+    return ""
+
+
+def run_mss_range(
+    *,
+    start_date: str,
+    end_date: str,
+    config: Config,
+    threshold_mode: str = "adaptive",
+    artifacts_dir: Path | None = None,
+) -> MssRangeRunResult:
+    """区间批量 MSS：一次读取区间快照与温度历史，流式窗口逐日评分，单事务写入。
+
+    温度历史以 TemperatureHistoryWindow 向后传递（有序副本二分求分位阈值与名次），
+    结果与逐日 run_mss_scoring 顺序执行逐行一致：区间内已算出的交易日覆盖库中旧值，
+    失败交易日沿用库中旧值（与逐日执行时该日未落库一致）。只写 mss_panorama 与 L3
+    Parquet 分区，不生成逐日产物文件，区间汇总写入 mss_range_report.json。
+    """
+    resolved_threshold_mode = _normalize_threshold_mode(threshold_mode)
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        raise FileNotFoundError("duckdb_not_found")
+
+    existing: dict[str, float | None] = {}
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        if not _table_exists(connection, "market_snapshot"):
+            raise ValueError("market_snapshot_table_missing")
+        # 同一交易日多条快照时与逐日一致取 created_at 最新的一条
+        snapshots = connection.execute(
+            "SELECT * FROM market_snapshot WHERE trade_date >= ? AND trade_date <= ? "
+            "QUALIFY ROW_NUMBER() OVER (PARTITION BY trade_date ORDER BY created_at DESC) = 1 "
+            "ORDER BY trade_date",
+            [start_date, end_date],
+        ).df()
+        history_column = _history_column(connection)
+        if history_column:
+            seed_rows = connection.execute(
+                f"SELECT {history_column} FROM mss_panorama WHERE trade_date < ? "
+                f"ORDER BY trade_date DESC LIMIT {ADAPTIVE_LOOKBACK}",
+                [start_date],
+            ).fetchall()
+            existing_rows = connection.execute(
+                f"SELECT trade_date, {history_column} FROM mss_panorama "
+                "WHERE trade_date >= ? AND trade_date <= ? ORDER BY trade_date",
+                [start_date, end_date],
+            ).fetchall()
+        else:
+            seed_rows, existing_rows = [], []
+
+    # 逐日查询丢弃空值后再取有效温度；窗口以 None 占位保持同样的 252 条记录口径
+    window = TemperatureHistoryWindow(
+        [None if row[0] is None else float(row[0]) for row in reversed(seed_rows)]
+    )
+    for row in existing_rows:
+        existing[str(row[0])] = None if row[1] is None else float(row[1])
+
+    records = {
+        str(record["trade_date"]): record for record in snapshots.to_dict(orient="records")
+    }
+    trade_dates = sorted(records)
+    scores: list[MssPanorama] = []
+    factor_frames: list[pd.DataFrame] = []
+    failed_trade_dates: list[str] = []
+    errors: dict[str, str] = {}
+
+    for trade_date in sorted(set(trade_dates) | set(existing)):
+        record = records.get(trade_date)
+        if record is None:
+            # 区间内只有历史评分、没有快照的交易日：逐日路径同样把它作为历史读取
+            if trade_date in existing:
+                window.push(existing[trade_date])
+            continue
+        try:
+            snapshot = MssInputSnapshot.from_record(record)
+            score = window.score(snapshot, threshold_mode=resolved_threshold_mode)
+        except (DataNotReadyError, ValueError) as exc:
+            failed_trade_dates.append(trade_date)
+            errors[trade_date] = str(exc)
+            if trade_date in existing:
+                window.push(existing[trade_date])
+            continue
+        window.push(score.mss_temperature)
+        scores.append(score)
+        factor_frames.append(
+            _build_factor_intermediate_frame(trade_date=trade_date, snapshot=snapshot, score=score)
+        )
+
+    count = 0
+    if scores:
+        frame = pd.DataFrame.from_records([score.to_storage_record() for score in scores])
+        factor_frame = pd.concat(factor_frames, ignore_index=True)
+        # 全区间温度在同一连接、同一事务内写入（按 trade_date 整体替换）
+        with open_write_session(database_path) as session, session.batch():
+            count = session.write_frame("mss_panorama", frame)
+        parquet_root = Path(config.parquet_path) / "l3"
+        write_trade_date_partitions(parquet_root / "mss_panorama", frame)
+        write_trade_date_partitions(parquet_root / "mss_factor_intermediate", factor_frame)
+
+    target_artifacts_dir = artifacts_dir or (
+        Path("artifacts") / "spiral-s1a" / f"{start_date}_{end_date}"
+    )
+    range_report_path = target_artifacts_dir / "mss_range_report.json"
+    _write_json(
+        range_report_path,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "threshold_mode": resolved_threshold_mode,
+            "trade_date_count": len(trade_dates),
+            "mss_panorama_count": count,
+            "failed_trade_dates": failed_trade_dates,
+            "errors": errors,
+            "cycles": {score.trade_date: score.mss_cycle for score in scores},
+        },
+    )
+    return MssRangeRunResult(
+        start_date=start_date,
+        end_date=end_date,
+        threshold_mode=resolved_threshold_mode,
+        trade_dates=trade_dates,
+        count=count,
+        failed_trade_dates=failed_trade_dates,
+        errors=errors,
+        range_report_path=range_report_path,
+    )
@@ -19,6 +19,7 @@ from src.algorithms.mss.engine import MssInputSnapshot, MssPanorama
 from src.db.helpers import (
     column_exists,
     ensure_columns,
+    open_write_connection,
     table_exists,
 )
 
@@ -102,8 +103,7 @@ class DuckDbMssRepository:
 
     def save_panorama(self, panorama: MssPanorama, trade_date: str) -> int:
         frame = pd.DataFrame.from_records([panorama.to_storage_record()])
-        self._database_path.parent.mkdir(parents=True, exist_ok=True)
-        with duckdb.connect(str(self._database_path)) as conn:
+        with open_write_connection(self._database_path) as conn:
             table_columns = ensure_columns(conn, "mss_panorama", frame)
             aligned = frame.copy()
             for col in table_columns:
@@ -1,9 +1,20 @@
 # PAS - Price Action Signals
 """Stock opportunity scoring and risk-reward analysis."""
 
-from src.algorithms.pas.pipeline import PasRunResult, run_pas_daily
+from src.algorithms.pas.pipeline import (
+    PasRangeRunResult,
+    PasRunResult,
+    PasStateRebuildResult,
+    rebuild_pas_rolling_state,
+    run_pas_daily,
+    run_pas_range,
+)
 
 __all__ = [
+    "PasRangeRunResult",
     "PasRunResult",
+    "PasStateRebuildResult",
+    "rebuild_pas_rolling_state",
     "run_pas_daily",
+    "run_pas_range",
 ]
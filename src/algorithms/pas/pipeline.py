@@ -21,9 +21,22 @@ from src.config.config import Config
 from src.db.helpers import (
     duckdb_type as _duckdb_type,
     ensure_columns as _ensure_columns,
+    open_write_session,
     persist_by_trade_date as _persist,
     table_exists as _table_exists,
 )
+from src.algorithms.board_limits import limit_ratios
+from src.algorithms.pas.rolling_state import (
+    PAS_STATE_WARMUP_TRADE_DAYS,
+    PAS_STRUCTURE_WINDOWS,
+    PAS_TREND_WINDOWS,
+    PasRollingState,
+    load_pas_rolling_state,
+    pas_state_slots,
+    persist_pas_rolling_state,
+    select_pas_state_slots,
+)
+from src.db.storage_backend import open_read_connection
 from src.models.enums import PasDirection
 
 # DESIGN_TRACE:
@@ -38,6 +51,9 @@ DESIGN_TRACE = {
 
 SUPPORTED_CONTRACT_VERSION = "nc-v1"
 EPS = 1e-9
+PAS_REPLAY_CHUNK_TRADE_DAYS = 60
+_BAR_COLUMNS = ("open", "high", "low", "close", "vol", "amount")
+_HISTORY_COLUMNS = "stock_code, trade_date, open, high, low, close, vol, amount"
 
 
 @dataclass(frozen=True)
@@ -49,10 +65,23 @@ class PasRunResult:
     factor_intermediate_sample_path: Path
 
 
+@dataclass(frozen=True)
+class PasRangeRunResult:
+    start_date: str
+    end_date: str
+    trade_dates: list[str]
+    count: int
+    factor_intermediate_count: int
+    factor_intermediate_sample_path: Path
+    state_persisted: bool
 
 
-def _clip(value: float, low: float, high: float) -> float:
-    return float(max(low, min(high, value)))
+@dataclass(frozen=True)
+class PasStateRebuildResult:
+    as_of_trade_date: str
+    replayed_trade_dates: int
+    stock_count: int
+
 
 
 def _to_opportunity_grade(score: float) -> str:
@@ -77,27 +106,6 @@ def _choose_adaptive_window(volatility_20d: float, turnover_rate: float, window_
     return 60
 
 
-def _consecutive_count(flags: pd.Series) -> int:
-    count = 0
-    for value in reversed(flags.tolist()):
-        if not bool(value):
-            break
-        count += 1
-    return count
-
-
-def _score_from_history(value: float, series: pd.Series) -> float:
-    values = pd.to_numeric(series, errors="coerce").dropna()
-    if values.empty:
-        return 50.0
-    mean = float(values.tail(120).mean())
-    std = float(values.tail(120).std(ddof=0))
-    if abs(std) <= EPS:
-        return 50.0
-    z = (float(value) - mean) / std
-    return _clip(((z + 3.0) / 6.0) * 100.0, 0.0, 100.0)
-
-
 def _series_clip(series: pd.Series, low: float, high: float) -> pd.Series:
     return pd.to_numeric(series, errors="coerce").fillna(0.0).clip(lower=low, upper=high)
 
@@ -111,139 +119,156 @@ def _coalesce_float(value: float | int | None, fallback: float) -> float:
     return number
 
 
-def _limit_up_pct(stock_code: str, name: str = "") -> float:
-    """按板块返回涨跌停幅度（铁律#5）。
-
-    主板 10% / 创业板·科创板 20% / ST 5%。
-    """
-    if name and ("ST" in name.upper()):
-        return 0.05
-    prefix = stock_code[:3] if len(stock_code) >= 3 else ""
-    if prefix in ("300", "301"):
-        return 0.20
-    if prefix in ("688", "689"):
-        return 0.20
-    return 0.10
-
-
 # ---------------------------------------------------------------------------
 # 向量化辅助
 # ---------------------------------------------------------------------------
 
 def _vec_zscore(values: np.ndarray, means: np.ndarray, stds: np.ndarray) -> np.ndarray:
-    """向量化 z-score → 0-100 评分，与 _score_from_history 语义一致。"""
+    """向量化 z-score → 0-100 评分，Z 值按 ±3 线性映射，标准差为 0 时取 50。"""
     valid = np.abs(stds) > EPS
     z = np.where(valid, (values - means) / np.maximum(np.abs(stds), EPS), 0.0)
     scores = np.clip(((z + 3.0) / 6.0) * 100.0, 0.0, 100.0)
     return np.where(valid, scores, 50.0)
 
 
-def _vec_consecutive_at_end(pct_chg_arr: np.ndarray, positive: bool) -> int:
-    """统计数组末尾连续满足条件的天数。"""
-    flags = pct_chg_arr > 0.0 if positive else pct_chg_arr < 0.0
-    if len(flags) == 0 or not flags[-1]:
-        return 0
-    fp = np.where(~flags)[0]
-    return int(len(flags) - 1 - fp[-1]) if len(fp) > 0 else int(len(flags))
+def _limit_up_thresholds(frame: pd.DataFrame) -> np.ndarray:
+    """涨停判定阈值（铁律#5：主板10%/创业板·科创板20%/ST 5%，留 0.5% 容差）。"""
+    names = frame["name"] if "name" in frame.columns else None
+    return limit_ratios(frame["_sc"], names) - 0.005
+
+
+def _prepare_bars(frame: pd.DataFrame) -> pd.DataFrame:
+    """行情数值清洗：缺列 / 缺失值填 0，股票代码去空白。"""
+    frame = frame.copy()
+    for column in _BAR_COLUMNS:
+        if column not in frame.columns:
+            frame[column] = 0.0
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0.0)
+    frame["_sc"] = frame["stock_code"].astype(str).str.strip()
+    return frame
+
+
+def _advance_state(
+    state: PasRollingState, trade_date: str, bars: pd.DataFrame
+) -> pd.DataFrame:
+    return state.advance(
+        trade_date,
+        stock_codes=bars["_sc"].tolist(),
+        open_=bars["open"].to_numpy(dtype=float),
+        high=bars["high"].to_numpy(dtype=float),
+        low=bars["low"].to_numpy(dtype=float),
+        close=bars["close"].to_numpy(dtype=float),
+        vol=bars["vol"].to_numpy(dtype=float),
+        limit_thresholds=_limit_up_thresholds(bars),
+    )
 
 
-def _grp_transform(g, col: str, window: int, stat: str) -> pd.Series:
-    """groupby().transform 快捷封装。"""
-    if stat == "mean":
-        return g[col].transform(lambda x: x.rolling(window, min_periods=1).mean())
-    if stat == "max":
-        return g[col].transform(lambda x: x.rolling(window, min_periods=1).max())
-    if stat == "min":
-        return g[col].transform(lambda x: x.rolling(window, min_periods=1).min())
-    if stat == "std0":
-        return g[col].transform(
-            lambda x: x.rolling(window, min_periods=1).std(ddof=0)
-        ).fillna(0.0)
-    raise ValueError(f"unsupported stat: {stat}")
+def _replay_trade_dates(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    after_trade_date: str,
+    until_trade_date: str,
+    inclusive: bool = False,
+    limit: int | None = None,
+) -> list[str]:
+    upper = "<=" if inclusive else "<"
+    sql = (
+        f"SELECT DISTINCT trade_date FROM raw_daily WHERE trade_date {upper} ? "
+        "AND trade_date > ? ORDER BY trade_date DESC"
+    )
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    rows = connection.execute(sql, [until_trade_date, after_trade_date]).fetchall()
+    return sorted(str(row[0]) for row in rows if row[0] is not None)
+
+
+def _replay_state(
+    connection: duckdb.DuckDBPyConnection,
+    state: PasRollingState,
+    trade_dates: list[str],
+) -> None:
+    """按交易日顺序把 raw_daily 回放进状态（分块读取）。"""
+    for offset in range(0, len(trade_dates), PAS_REPLAY_CHUNK_TRADE_DAYS):
+        chunk = trade_dates[offset : offset + PAS_REPLAY_CHUNK_TRADE_DAYS]
+        history = connection.execute(
+            f"SELECT {_HISTORY_COLUMNS} FROM raw_daily WHERE trade_date >= ? AND trade_date <= ?"
+            " ORDER BY trade_date, stock_code",
+            [chunk[0], chunk[-1]],
+        ).df()
+        history["trade_date"] = history["trade_date"].astype(str)
+        for day, bars in history.groupby("trade_date", sort=True):
+            _advance_state(state, str(day), _prepare_bars(bars))
+
+
+def _load_state_before(
+    connection: duckdb.DuckDBPyConnection, *, trade_date: str
+) -> tuple[PasRollingState, str]:
+    """取 trade_date 前一交易日的状态：缺口内交易日增量回放，无状态或缺口过长时有界预热。"""
+    state, state_scope = load_pas_rolling_state(connection, before_trade_date=trade_date)
+    replay_dates = _replay_trade_dates(
+        connection,
+        after_trade_date=state.as_of_trade_date,
+        until_trade_date=trade_date,
+        limit=PAS_STATE_WARMUP_TRADE_DAYS,
+    )
+    if len(state) > 0 and len(replay_dates) >= PAS_STATE_WARMUP_TRADE_DAYS:
+        state = PasRollingState()
+    _replay_state(connection, state, replay_dates)
+    return state, state_scope
 
 
-# ---------------------------------------------------------------------------
-# 主函数
-# ---------------------------------------------------------------------------
+def rebuild_pas_rolling_state(*, config: Config, end_date: str) -> PasStateRebuildResult:
+    """从 raw_daily 首个交易日起全量重放 PAS 滚动状态至 end_date（不写评分表）。
 
-def run_pas_daily(
-    *,
-    trade_date: str,
-    config: Config,
-    artifacts_dir: Path | None = None,
-) -> PasRunResult:
+    日常推进与缺口回放 / 有界预热的结果应与全量重放一致，本函数用于校验与修复。
+    """
     database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
     if not database_path.exists():
         raise FileNotFoundError("duckdb_not_found")
 
-    with duckdb.connect(str(database_path), read_only=True) as connection:
+    state = PasRollingState()
+    with open_read_connection(database_path, config=config) as connection:
         if not _table_exists(connection, "raw_daily"):
             raise ValueError("raw_daily_table_missing")
+        replay_dates = _replay_trade_dates(
+            connection, after_trade_date="", until_trade_date=end_date, inclusive=True
+        )
+        if not replay_dates:
+            raise ValueError("raw_daily_empty_for_trade_date")
+        _, state_scope = select_pas_state_slots(
+            connection, before_trade_date=replay_dates[-1]
+        )
+        _replay_state(connection, state, replay_dates)
+
+    with open_write_session(database_path) as session:
+        persist_pas_rolling_state(session, state=state, state_scope=state_scope)
+    return PasStateRebuildResult(
+        as_of_trade_date=state.as_of_trade_date,
+        replayed_trade_dates=len(replay_dates),
+        stock_count=len(state),
+    )
 
-        _cols = "ts_code, stock_code, trade_date, open, high, low, close, vol, amount"
-        source = connection.execute(
-            f"SELECT {_cols} FROM raw_daily WHERE trade_date = ? ORDER BY stock_code",
-            [trade_date],
-        ).df()
-        # 性能优化：仅拉取最近 150 个交易日（覆盖 max rolling window 120 + 30 安全余量）
-        lookback_dates = connection.execute(
-            "SELECT DISTINCT trade_date FROM raw_daily WHERE trade_date <= ? ORDER BY trade_date DESC LIMIT 150",
-            [trade_date],
-        ).fetchall()
-        if lookback_dates:
-            earliest = lookback_dates[-1][0]
-            _hist_cols = "stock_code, trade_date, open, high, low, close, vol, amount"
-            history = connection.execute(
-                f"SELECT {_hist_cols} FROM raw_daily WHERE trade_date >= ? AND trade_date <= ?"
-                " ORDER BY trade_date, stock_code",
-                [earliest, trade_date],
-            ).df()
-        else:
-            history = source.copy()
-
-    if source.empty:
-        raise ValueError("raw_daily_empty_for_trade_date")
-
-    for column in ("open", "high", "low", "close", "vol", "amount"):
-        if column not in source.columns:
-            source[column] = 0.0
-        source[column] = pd.to_numeric(source[column], errors="coerce").fillna(0.0)
 
-        if column not in history.columns:
-            history[column] = 0.0
-        history[column] = pd.to_numeric(history[column], errors="coerce").fillna(0.0)
+def _score_pas_trade_date(
+    *, trade_date: str, source: pd.DataFrame, state: PasRollingState
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """单个交易日：推进滚动状态 → 三因子评分 / 方向 / 风险收益（不落库）。
 
+    source 为已清洗的当日行情（_prepare_bars）。
+    """
     # ===================================================================
-    # 向量化计算（pivot-based rolling，消除 groupby.transform 瓶颈）
+    # 向量化计算（滚动状态推进一日，窗口统计直接取自状态）
     # ===================================================================
     created_at = pd.Timestamp.utcnow().isoformat()
 
     # --- 1. 源数据元信息 ---
-    source["_sc"] = source["stock_code"].astype(str).str.strip()
     _idx = source["_sc"].values
     _ts_col = (
         source["ts_code"].astype(str).str.strip()
         if "ts_code" in source.columns
         else pd.Series([""] * len(source), index=source.index)
     )
-    _name_col = (
-        source["name"].fillna("").astype(str).str.strip()
-        if "name" in source.columns
-        else pd.Series([""] * len(source), index=source.index)
-    )
-
-    # 涨跌停幅度向量化（铁律#5：主板10%/创业板·科创板20%/ST 5%）
-    _codes_arr = _idx.astype(str)
-    _names_arr = _name_col.values.astype(str)
-    _bl = np.full(len(source), 0.10)
-    _st_mask = np.array(["ST" in n.upper() for n in _names_arr])
-    _gem_mask = np.array(
-        [len(c) >= 3 and c[:3] in ("300", "301", "688", "689") for c in _codes_arr]
-    )
-    _bl[_st_mask] = 0.05
-    _bl[~_st_mask & _gem_mask] = 0.20
-    _blt = _bl - 0.005  # 涨停判定阈值（留 0.5% 容差）
-    _blt_ser = pd.Series(dict(zip(_idx, _blt)))  # stock_code → threshold
+    _blt = _limit_up_thresholds(source)
 
     _stale_arr = (
         pd.to_numeric(source["stale_days"], errors="coerce").fillna(0).astype(int).values
@@ -251,158 +276,46 @@ def run_pas_daily(
         else np.zeros(len(source), dtype=int)
     )
 
-    # --- 2. Pivot 历史数据到宽表（trade_date × stock_code）---
-    history["_sc"] = history["stock_code"].astype(str).str.strip()
-    hist = history.set_index(["trade_date", "_sc"]).sort_index()
-    # 仅保留当日存在的股票
-    _source_set = set(_idx)
-    hist = hist.loc[hist.index.get_level_values("_sc").isin(_source_set)]
-
-    def _unstack(col: str) -> pd.DataFrame:
-        return hist[col].unstack(level="_sc")
-
-    wc = _unstack("close")
-    wh = _unstack("high")
-    wl = _unstack("low")
-    wv = _unstack("vol").fillna(0.0)
-    wa = _unstack("amount").fillna(0.0)
-    wo = _unstack("open")
-
-    # --- 3. 衍生宽表序列 ---
-    wpct = wc.pct_change(fill_method=None).fillna(0.0)
-    _wo_safe = wo.replace(0.0, np.nan)
-    wret = ((wc - wo) / _wo_safe).fillna(0.0)
-
-    # --- 4. Rolling 统计（所有列并行，C 级向量化）---
-    wvol20 = wpct.rolling(20, min_periods=1).std(ddof=0).fillna(0.0)
-    wvolavg = wv.rolling(20, min_periods=1).mean()
-
-    # 牛基因因子
-    _blt_row = _blt_ser.reindex(wc.columns).fillna(0.095)
-    wlu = wpct.ge(_blt_row, axis="columns").astype(float)
-    wlur = wlu.rolling(120, min_periods=1).mean()
-
-    wrh60 = wc.rolling(60, min_periods=1).max()
-    wnh = (wc >= wrh60).astype(float)
-    wnhr = wnh.rolling(60, min_periods=1).mean()
-
-    wpcp = wpct.clip(lower=0.0)
-    wmaxpct = (wpcp.rolling(120, min_periods=1).max() / 0.30).clip(0.0, 1.0)
-
-    wbg = 0.4 * wlur + 0.4 * wnhr + 0.2 * wmaxpct
-
-    # 结构因子
-    whs1 = wh.shift(1)
-    wh20p = whs1.rolling(20, min_periods=1).max()
-    wh60p = whs1.rolling(60, min_periods=1).max()
-
-    _wbr = np.maximum(wh20p.values, wh60p.values)
-    _wbr_s = pd.DataFrame(_wbr, index=wh20p.index, columns=wh20p.columns)
-    _wbr_abs = _wbr_s.abs().replace(0.0, EPS)
-    _wbsn = (((wc - _wbr_s) / _wbr_abs).clip(-0.2, 0.2) + 0.2) / 0.4
-    _wbsn = _wbsn.clip(0.0, 1.0)
-
-    w_str: dict[int, pd.DataFrame] = {}
-    for _w in (20, 60, 120):
-        _wwh = wh.rolling(_w, min_periods=1).max()
-        _wwl = wl.rolling(_w, min_periods=1).min()
-        _rng = (_wwh - _wwl).clip(lower=EPS)
-        _pos = ((wc - _wwl) / _rng).clip(0.0, 1.0)
-        w_str[_w] = 0.7 * _pos + 0.3 * _wbsn
-
-    # 行为因子
-    _wva_safe = wvolavg.clip(lower=EPS)
-    wvq = (wv / _wva_safe).clip(0.0, 2.0) / 2.0
-    wpcomp = ((wret + 0.1) / 0.2).clip(0.0, 1.0)
-    wuf = (wpct > 0.0).astype(float)
-
-    w_beh: dict[int, pd.DataFrame] = {}
-    for _tw in (10, 20, 40):
-        _wtc = wuf.rolling(_tw, min_periods=1).mean().clip(0.0, 1.0)
-        w_beh[_tw] = 0.4 * wvq + 0.4 * wpcomp + 0.2 * _wtc
-
-    # 低价线
-    wls1 = wl.shift(1)
-    wl20p = wls1.rolling(20, min_periods=1).min()
-    wl20 = wl.rolling(20, min_periods=1).min()
-
-    # --- 5. z-score 基线（仅计算最后一行的 rolling(120) 均值/标准差）---
-    _zn = min(len(wbg), 120)  # 可用行数
-
-    def _tail_mean_std(wdf: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
-        """tail-only 均值/标准差，等价于 rolling(120, min_periods=1) 最后一行。"""
-        tail = wdf.iloc[-_zn:]
-        return tail.mean(), tail.std(ddof=0).fillna(0.0)
-
-    wbg_rm_s, wbg_rs_s = _tail_mean_std(wbg)
-
-    w_str_rm_s: dict[int, pd.Series] = {}
-    w_str_rs_s: dict[int, pd.Series] = {}
-    for _w in (20, 60, 120):
-        w_str_rm_s[_w], w_str_rs_s[_w] = _tail_mean_std(w_str[_w])
-
-    w_beh_rm_s: dict[int, pd.Series] = {}
-    w_beh_rs_s: dict[int, pd.Series] = {}
-    for _tw in (10, 20, 40):
-        w_beh_rm_s[_tw], w_beh_rs_s[_tw] = _tail_mean_std(w_beh[_tw])
-
-    # --- 6. 连涨/连跌天数（向量化）---
-    _wpct_last_col = wpct.iloc[-1]  # 最后一行
-    _wpct_vals = wpct.values  # ndarray 以避免逐列 Series 开销
-    _col_indices = {c: i for i, c in enumerate(wpct.columns)}
-    _cu_arr = np.zeros(len(_idx), dtype=float)
-    _cd_arr = np.zeros(len(_idx), dtype=float)
-    for i, sc in enumerate(_idx):
-        ci = _col_indices.get(sc)
-        if ci is not None:
-            _pv = _wpct_vals[:, ci]
-            # 去除 NaN
-            _mask = ~np.isnan(_pv)
-            _pv_clean = _pv[_mask]
-            _cu_arr[i] = _vec_consecutive_at_end(_pv_clean, positive=True)
-            _cd_arr[i] = _vec_consecutive_at_end(_pv_clean, positive=False)
-
-    # --- 7. 提取最后一行 & 对齐到 source 顺序 ---
-    def _last_row(wdf: pd.DataFrame) -> np.ndarray:
-        """取宽表最后一行，按 _idx 对齐。"""
-        return wdf.iloc[-1].reindex(_idx).values.astype(float)
-
-    def _ser_align(ser: pd.Series, default: float = 0.0) -> np.ndarray:
-        """将 Series 按 _idx 对齐为 ndarray。"""
-        return np.nan_to_num(ser.reindex(_idx).values.astype(float), nan=default)
-
-    _close = np.nan_to_num(_last_row(wc), nan=0.0)
-    _high = np.nan_to_num(_last_row(wh), nan=0.0)
-    _low = np.nan_to_num(_last_row(wl), nan=0.0)
-    _vol = np.nan_to_num(_last_row(wv), nan=0.0)
-    _amount = np.nan_to_num(_last_row(wa), nan=0.0)
-    _open = np.nan_to_num(_last_row(wo), nan=0.0)
-    _ret_ratio = np.nan_to_num(_last_row(wret), nan=0.0)
-    _v20d = np.nan_to_num(_last_row(wvol20), nan=0.0)
-    _h20p = np.where(np.isnan(_last_row(wh20p)), _high, _last_row(wh20p))
-    _h60p = np.where(np.isnan(_last_row(wh60p)), _high, _last_row(wh60p))
-    _l20p = np.where(np.isnan(_last_row(wl20p)), _low, _last_row(wl20p))
-    _l20v = np.where(np.isnan(_last_row(wl20)), _low, _last_row(wl20))
-    _bg_raw = np.nan_to_num(_last_row(wbg), nan=0.0)
-    _bg_rm = _ser_align(wbg_rm_s)
-    _bg_rs = _ser_align(wbg_rs_s)
-    _vq = np.nan_to_num(_last_row(wvq), nan=0.5)
-    _pc = np.nan_to_num(_last_row(wpcomp), nan=0.5)
-
-    # 结构/行为因子各窗口最后一行
+    # --- 2. 推进滚动状态，取当日窗口统计（按 source 顺序对齐）---
+    factors = _advance_state(state, trade_date, source)
+
+    def _col(name: str, default: float | None = None) -> np.ndarray:
+        values = factors[name].to_numpy(dtype=float)
+        return values if default is None else np.nan_to_num(values, nan=default)
+
+    _close = source["close"].to_numpy(dtype=float)
+    _high = source["high"].to_numpy(dtype=float)
+    _low = source["low"].to_numpy(dtype=float)
+    _amount = source["amount"].to_numpy(dtype=float)
+    _open = source["open"].to_numpy(dtype=float)
+    _ret_ratio = _col("return_ratio", 0.0)
+    _v20d = _col("volatility_20d", 0.0)
+    _h20p = np.where(np.isnan(_col("high_20d_prior")), _high, _col("high_20d_prior"))
+    _h60p = np.where(np.isnan(_col("high_60d_prior")), _high, _col("high_60d_prior"))
+    _l20p = np.where(np.isnan(_col("low_20d_prior")), _low, _col("low_20d_prior"))
+    _l20v = np.where(np.isnan(_col("low_20d")), _low, _col("low_20d"))
+    _bg_raw = _col("bull_gene_raw", 0.0)
+    _bg_rm = _col("bull_gene_mean", 0.0)
+    _bg_rs = _col("bull_gene_std", 0.0)
+    _vq = _col("volume_quality", 0.5)
+    _pc = _col("price_component", 0.5)
+    _cu_arr = _col("up_streak", 0.0)
+    _cd_arr = _col("down_streak", 0.0)
+
+    # 结构/行为因子各窗口
     _str_last: dict[int, np.ndarray] = {}
     _str_rm_last: dict[int, np.ndarray] = {}
     _str_rs_last: dict[int, np.ndarray] = {}
-    for _w in (20, 60, 120):
-        _str_last[_w] = np.nan_to_num(_last_row(w_str[_w]), nan=0.5)
-        _str_rm_last[_w] = _ser_align(w_str_rm_s[_w], 0.5)
-        _str_rs_last[_w] = _ser_align(w_str_rs_s[_w])
+    for _w in PAS_STRUCTURE_WINDOWS:
+        _str_last[_w] = _col(f"structure_{_w}", 0.5)
+        _str_rm_last[_w] = _col(f"structure_{_w}_mean", 0.5)
+        _str_rs_last[_w] = _col(f"structure_{_w}_std", 0.0)
 
     _beh_rm_last: dict[int, np.ndarray] = {}
     _beh_rs_last: dict[int, np.ndarray] = {}
-    for _tw in (10, 20, 40):
-        _beh_rm_last[_tw] = _ser_align(w_beh_rm_s[_tw], 0.5)
-        _beh_rs_last[_tw] = _ser_align(w_beh_rs_s[_tw])
+    for _tw in PAS_TREND_WINDOWS:
+        _beh_rm_last[_tw] = _col(f"behavior_{_tw}_mean", 0.5)
+        _beh_rs_last[_tw] = _col(f"behavior_{_tw}_std", 0.0)
 
     # --- 8. 自适应窗口（向量化）---
     _tr = _amount / np.maximum(_close * 10000.0, 1.0)
@@ -411,8 +324,7 @@ def run_pas_daily(
     _aw[(_v20d <= 0.020) & (_tr <= 3.0)] = 120
     _tw_arr = np.clip(np.round(_aw / 3).astype(int), 10, 40)
 
-    _hd_ser = (~wc.isna()).sum(axis=0)
-    _hd = np.array([_hd_ser.get(sc, 1) for sc in _idx], dtype=int)
+    _hd = factors["history_days"].to_numpy(dtype=int)
     _sd = np.minimum(_hd, _aw)
     _qf = np.where(_stale_arr > 0, "stale", np.where(_sd < _aw, "cold_start", "normal"))
 
@@ -537,13 +449,6 @@ def run_pas_daily(
         ]
     ]
 
-    count = _persist(
-        database_path=database_path,
-        table_name="stock_pas_daily",
-        frame=frame,
-        trade_date=trade_date,
-    )
-
     factor_frame = pd.DataFrame(
         {
             "trade_date": trade_date,
@@ -558,13 +463,61 @@ def run_pas_daily(
             "created_at": created_at,
         }
     )
-    _persist(
-        database_path=database_path,
-        table_name="pas_factor_intermediate",
-        frame=factor_frame,
-        trade_date=trade_date,
+    return frame, factor_frame
+
+
+# ---------------------------------------------------------------------------
+# 主函数
+# ---------------------------------------------------------------------------
+
+def run_pas_daily(
+    *,
+    trade_date: str,
+    config: Config,
+    artifacts_dir: Path | None = None,
+) -> PasRunResult:
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        raise FileNotFoundError("duckdb_not_found")
+
+    with open_read_connection(database_path, config=config) as connection:
+        if not _table_exists(connection, "raw_daily"):
+            raise ValueError("raw_daily_table_missing")
+
+        _cols = "ts_code, stock_code, trade_date, open, high, low, close, vol, amount"
+        source = connection.execute(
+            f"SELECT {_cols} FROM raw_daily WHERE trade_date = ? ORDER BY stock_code",
+            [trade_date],
+        ).df()
+        # 滚动窗口由 PAS 状态表逐日推进：正常情况下只读取当日行情
+        if not source.empty:
+            state, state_scope = _load_state_before(connection, trade_date=trade_date)
+
+    if source.empty:
+        raise ValueError("raw_daily_empty_for_trade_date")
+
+    frame, factor_frame = _score_pas_trade_date(
+        trade_date=trade_date, source=_prepare_bars(source), state=state
     )
 
+    # 个股评分、因子中间表与滚动状态在同一连接、同一事务内写入
+    with open_write_session(database_path) as session, session.batch():
+        count = _persist(
+            database_path=database_path,
+            table_name="stock_pas_daily",
+            frame=frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        _persist(
+            database_path=database_path,
+            table_name="pas_factor_intermediate",
+            frame=factor_frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        persist_pas_rolling_state(session, state=state, state_scope=state_scope)
+
     target_artifacts_dir = artifacts_dir or (Path("artifacts") / "spiral-s2c" / trade_date)
     artifact_path = target_artifacts_dir / "pas_factor_intermediate_sample.parquet"
     artifact_path.parent.mkdir(parents=True, exist_ok=True)
@@ -577,3 +530,94 @@ def run_pas_daily(
         factor_intermediate_frame=factor_frame,
         factor_intermediate_sample_path=artifact_path,
     )
+
+
+def run_pas_range(
+    *,
+    start_date: str,
+    end_date: str,
+    config: Config,
+    artifacts_dir: Path | None = None,
+) -> PasRangeRunResult:
+    """区间批量 PAS：滚动状态一次推进到区间起点，随后逐日推进并评分，分块批量写入。
+
+    每个交易日的评分与逐日 run_pas_daily 顺序执行逐行一致；行情按
+    PAS_REPLAY_CHUNK_TRADE_DAYS 个交易日一块读取，每块的 stock_pas_daily /
+    pas_factor_intermediate 在一个事务内写入。区间终点状态仅在不早于已有状态槽时
+    写回（历史回补不覆盖日常推进的最新状态）。
+    """
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        raise FileNotFoundError("duckdb_not_found")
+
+    with open_read_connection(database_path, config=config) as connection:
+        if not _table_exists(connection, "raw_daily"):
+            raise ValueError("raw_daily_table_missing")
+        trade_dates = [
+            item
+            for item in _replay_trade_dates(
+                connection,
+                after_trade_date="",
+                until_trade_date=end_date,
+                inclusive=True,
+            )
+            if item >= start_date
+        ]
+        if not trade_dates:
+            raise ValueError("raw_daily_empty_for_trade_date")
+        state, state_scope = _load_state_before(connection, trade_date=trade_dates[0])
+        persist_state = all(
+            as_of <= trade_dates[-1] for as_of in pas_state_slots(connection).values()
+        )
+
+    count = 0
+    factor_count = 0
+    factor_frame = pd.DataFrame()
+    for offset in range(0, len(trade_dates), PAS_REPLAY_CHUNK_TRADE_DAYS):
+        chunk = trade_dates[offset : offset + PAS_REPLAY_CHUNK_TRADE_DAYS]
+        with open_read_connection(
+            database_path, config=config, start_date=chunk[0], end_date=chunk[-1]
+        ) as connection:
+            bars = connection.execute(
+                f"SELECT ts_code, {_HISTORY_COLUMNS} FROM raw_daily "
+                "WHERE trade_date >= ? AND trade_date <= ? ORDER BY trade_date, stock_code",
+                [chunk[0], chunk[-1]],
+            ).df()
+        bars["trade_date"] = bars["trade_date"].astype(str)
+        frames: list[pd.DataFrame] = []
+        factor_frames: list[pd.DataFrame] = []
+        for trade_date, source in bars.groupby("trade_date", sort=True):
+            frame, factor_frame = _score_pas_trade_date(
+                trade_date=str(trade_date),
+                source=_prepare_bars(source.reset_index(drop=True)),
+                state=state,
+            )
+            frames.append(frame)
+            factor_frames.append(factor_frame)
+        is_last_chunk = offset + PAS_REPLAY_CHUNK_TRADE_DAYS >= len(trade_dates)
+        # 每块评分与因子中间表同一事务写入；区间终点状态随最后一块写入
+        with open_write_session(database_path) as session, session.batch():
+            count += session.write_frame("stock_pas_daily", pd.concat(frames, ignore_index=True))
+            factor_count += session.write_frame(
+                "pas_factor_intermediate", pd.concat(factor_frames, ignore_index=True)
+            )
+            if is_last_chunk and persist_state:
+                persist_pas_rolling_state(session, state=state, state_scope=state_scope)
+
+    target_artifacts_dir = artifacts_dir or (
+        Path("artifacts") / "spiral-s2c" / f"{start_date}_{end_date}"
+    )
+    artifact_path = target_artifacts_dir / "pas_factor_intermediate_sample.parquet"
+    artifact_path.parent.mkdir(parents=True, exist_ok=True)
+    # 样本取区间最后一个交易日的因子中间表
+    factor_frame.to_parquet(artifact_path, index=False)
+
+    return PasRangeRunResult(
+        start_date=start_date,
+        end_date=end_date,
+        trade_dates=trade_dates,
+        count=count,
+        factor_intermediate_count=factor_count,
+        factor_intermediate_sample_path=artifact_path,
+        state_persisted=persist_state,
+    )
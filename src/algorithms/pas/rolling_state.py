@@ -0,0 +1,428 @@
+"""PAS 个股滚动状态：逐交易日推进的近 150 日行情窗口，替代每次回读 150 日行情再透视。
+
+run_pas_daily 此前每次读取近 150 个交易日的 raw_daily、透视为宽表并做十余次
+rolling(120)，却只使用最后一行。本模块为每只股票维护最近 PAS_SAMPLE_WINDOW_DAYS
+个交易日的开 / 高 / 低 / 收 / 量窗口，当日推进后在内存中按同一宽表口径计算窗口统计
+（20/60/120 日高低点、20 日波动率与均量、120 日涨停率 / 最大涨幅、60 日新高率、
+10/20/40 日上涨占比、各因子 120 日 Z-Score 基线），日常运行只需读取当日行情。
+
+评分口径与回读 150 日宽表完全一致：窗口统计只看状态窗口内的交易日，早于窗口起点的
+行情不参与（等价于在 150 日宽表上 rolling(min_periods=1)），因此推进满
+PAS_STATE_WARMUP_TRADE_DAYS 日后的状态与任意更长历史的重放结果相同。
+
+窗口按全市场交易日对齐（与宽表透视一致）：当日无行情的股票记为缺失日（价格 NaN、
+成交量 0），新出现的股票按"此前均为缺失日"初始化。连续
+PAS_STATE_WARMUP_TRADE_DAYS 日无行情的股票从状态中移除，其窗口此时已与新股初始化
+完全一致。
+
+持久化：pas_rolling_state 表（每只股票一行，窗口存为 DOUBLE[n] 定长数组），
+保留两个状态槽（state_scope），当日推进写入"非基准"槽，便于同日重跑。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.algorithms.array_ops import trailing_sign_runs
+from src.db.helpers import WriteSession, table_exists
+from src.db.writer_client import RemoteWriteSession
+
+PAS_STATE_TABLE = "pas_rolling_state"
+PAS_STATE_SLOTS = ("slot_a", "slot_b")
+PAS_SAMPLE_WINDOW_DAYS = 150
+PAS_BASELINE_WINDOW = 120
+# 状态窗口即评分读取深度：推进满该天数后与任意更长历史的重放一致
+PAS_STATE_WARMUP_TRADE_DAYS = PAS_SAMPLE_WINDOW_DAYS
+PAS_STRUCTURE_WINDOWS = (20, 60, 120)
+PAS_TREND_WINDOWS = (10, 20, 40)
+EPS = 1e-9
+
+# 窗口名 → 缺失日取值（价格缺失为 NaN，成交量记 0）
+_RING_SPECS: dict[str, float] = {
+    "open": np.nan,
+    "high": np.nan,
+    "low": np.nan,
+    "close": np.nan,
+    "vol": 0.0,
+}
+_COUNTER_COLUMNS = ("idle_days",)
+
+
+def _finite(values: np.ndarray) -> np.ndarray:
+    # 与 pandas rolling 一致：滚动统计把 ±inf（前收盘为 0）视为缺失
+    return np.where(np.isinf(values), np.nan, values)
+
+
+def _rolling_extreme(values: np.ndarray, window: int, reduce: np.ufunc) -> np.ndarray:
+    """沿时间轴（行）的滚动最大 / 最小值，跳过 NaN，窗口不足时取已有行（min_periods=1）。
+
+    分块前缀 / 后缀累积（van Herk / Gil-Werman），复杂度与窗口宽度无关。
+    """
+    rows, columns = values.shape
+    window = min(window, rows)
+    padded_rows = -(-(rows + window - 1) // window) * window
+    padded = np.full((padded_rows, columns), np.nan)
+    padded[window - 1 : window - 1 + rows] = values
+    blocks = padded.reshape(-1, window, columns)
+    prefix = reduce.accumulate(blocks, axis=1).reshape(padded_rows, columns)
+    suffix = reduce.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded_rows, columns)
+    return reduce(suffix[:rows], prefix[window - 1 : window - 1 + rows])
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """沿时间轴的滚动均值，跳过 NaN（min_periods=1），窗口内全部缺失时为 NaN。"""
+    valid = ~np.isnan(values)
+    totals = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    totals[window:] = totals[window:] - totals[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    shifted = np.full_like(values, np.nan)
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def _mean_std(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """各列跳过 NaN 的均值 / 总体标准差（ddof=0）；全部缺失时均值 NaN、标准差 0。"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, np.where(valid, values, 0.0).sum(axis=0) / count, np.nan)
+        deviation = np.where(valid, values - mean, 0.0)
+        std = np.sqrt((deviation * deviation).sum(axis=0) / count)
+    return mean, np.where(count > 0, std, 0.0)
+
+
+def _panel_factors(
+    *,
+    closes: np.ndarray,
+    opens: np.ndarray,
+    highs: np.ndarray,
+    lows: np.ndarray,
+    vols: np.ndarray,
+    limit_thresholds: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """在（交易日 × 股票）宽表上计算当日（最后一行）窗口统计与 Z-Score 基线。
+
+    口径同按交易日透视的宽表：各窗口 rolling(min_periods=1)，基线取最后 120 行的
+    均值 / 总体标准差。
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.full_like(closes, np.nan)
+        pct[1:] = closes[1:] / closes[:-1] - 1.0
+        pct = np.where(np.isnan(pct), 0.0, pct)
+        return_ratio = (closes - opens) / np.where(opens == 0.0, np.nan, opens)
+        return_ratio = np.where(np.isnan(return_ratio), 0.0, return_ratio)
+        finite_pct = _finite(pct)
+        volume_avg = _rolling_mean(vols, 20)
+
+        # 牛股基因：120 日涨停率 + 60 日新高率 + 120 日最大涨幅
+        limit_up_rate = _rolling_mean((pct >= limit_thresholds[None, :]).astype(float), 120)
+        new_high = (closes >= _rolling_extreme(closes, 60, np.fmax)).astype(float)
+        new_high_rate = _rolling_mean(new_high, 60)
+        max_pct = np.clip(
+            _rolling_extreme(np.clip(finite_pct, 0.0, None), 120, np.fmax) / 0.30, 0.0, 1.0
+        )
+        bull_gene = 0.4 * limit_up_rate + 0.4 * new_high_rate + 0.2 * max_pct
+
+        # 结构因子：区间位置 + 前高突破强度
+        prior_highs = _shift(highs)
+        high_20_prior = _rolling_extreme(prior_highs, 20, np.fmax)
+        high_60_prior = _rolling_extreme(prior_highs, 60, np.fmax)
+        breakout_ref = np.maximum(high_20_prior, high_60_prior)
+        breakout_abs = np.abs(breakout_ref)
+        breakout_abs = np.where(breakout_abs == 0.0, EPS, breakout_abs)
+        breakout = np.clip(
+            (np.clip((closes - breakout_ref) / breakout_abs, -0.2, 0.2) + 0.2) / 0.4, 0.0, 1.0
+        )
+        structure: dict[int, np.ndarray] = {}
+        for window in PAS_STRUCTURE_WINDOWS:
+            window_high = _rolling_extreme(highs, window, np.fmax)
+            window_low = _rolling_extreme(lows, window, np.fmin)
+            span = np.clip(window_high - window_low, EPS, None)
+            position = np.clip((closes - window_low) / span, 0.0, 1.0)
+            structure[window] = 0.7 * position + 0.3 * breakout
+
+        # 行为因子：量能 + K 线位置 + 上涨占比
+        volume_quality = np.clip(vols / np.clip(volume_avg, EPS, None), 0.0, 2.0) / 2.0
+        price_component = np.clip((return_ratio + 0.1) / 0.2, 0.0, 1.0)
+        up_flags = (pct > 0.0).astype(float)
+        behavior: dict[int, np.ndarray] = {}
+        for trend_window in PAS_TREND_WINDOWS:
+            up_share = np.clip(_rolling_mean(up_flags, trend_window), 0.0, 1.0)
+            behavior[trend_window] = 0.4 * volume_quality + 0.4 * price_component + 0.2 * up_share
+
+    tail = slice(-PAS_BASELINE_WINDOW, None)
+    # 宽表首日涨跌幅记 0：连涨 / 连跌天数不超过窗口深度 - 1
+    up_streak, down_streak = trailing_sign_runs(pct)
+    _, volatility_20d = _mean_std(finite_pct[-20:])
+    bull_gene_mean, bull_gene_std = _mean_std(bull_gene[tail])
+    result: dict[str, np.ndarray] = {
+        "volatility_20d": volatility_20d,
+        "high_20d_prior": high_20_prior[-1],
+        "high_60d_prior": high_60_prior[-1],
+        "low_20d_prior": _rolling_extreme(_shift(lows[-21:]), 20, np.fmin)[-1],
+        "low_20d": _rolling_extreme(lows[-20:], 20, np.fmin)[-1],
+        "return_ratio": return_ratio[-1],
+        "volume_quality": volume_quality[-1],
+        "price_component": price_component[-1],
+        "bull_gene_raw": bull_gene[-1],
+        "bull_gene_mean": bull_gene_mean,
+        "bull_gene_std": bull_gene_std,
+        "up_streak": up_streak,
+        "down_streak": down_streak,
+        "history_days": (~np.isnan(closes)).sum(axis=0),
+    }
+    for window in PAS_STRUCTURE_WINDOWS:
+        mean, std = _mean_std(structure[window][tail])
+        result[f"structure_{window}"] = structure[window][-1]
+        result[f"structure_{window}_mean"] = mean
+        result[f"structure_{window}_std"] = std
+    for trend_window in PAS_TREND_WINDOWS:
+        mean, std = _mean_std(behavior[trend_window][tail])
+        result[f"behavior_{trend_window}_mean"] = mean
+        result[f"behavior_{trend_window}_std"] = std
+    return result
+
+
+class PasRollingState:
+    """全市场个股 PAS 滚动状态（可变，advance() 原地推进一个交易日）。"""
+
+    def __init__(self) -> None:
+        self.as_of_trade_date = ""
+        self.history_days = 0
+        self.stock_codes = np.empty(0, dtype=object)
+        self.rings = {
+            name: np.empty((0, PAS_SAMPLE_WINDOW_DAYS), dtype=np.float64) for name in _RING_SPECS
+        }
+        self.counters = {name: np.empty(0, dtype=np.int64) for name in _COUNTER_COLUMNS}
+        self.limit_threshold = np.empty(0, dtype=np.float64)
+        self._rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return int(len(self.stock_codes))
+
+    def _ensure_rows(self, codes: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+        # 新代码追加到末尾，窗口按缺失日初始化（早于首个推进日的位置不参与统计）
+        new_codes = [code for code in dict.fromkeys(codes.tolist()) if code not in self._rows]
+        if new_codes:
+            start = len(self)
+            added = len(new_codes)
+            for name, missing_value in _RING_SPECS.items():
+                block = np.full((added, PAS_SAMPLE_WINDOW_DAYS), missing_value, dtype=np.float64)
+                self.rings[name] = np.vstack([self.rings[name], block])
+            for name in _COUNTER_COLUMNS:
+                self.counters[name] = np.concatenate(
+                    [self.counters[name], np.zeros(added, dtype=np.int64)]
+                )
+            self.limit_threshold = np.concatenate(
+                [self.limit_threshold, np.full(added, np.nan, dtype=np.float64)]
+            )
+            self.stock_codes = np.concatenate([self.stock_codes, np.array(new_codes, dtype=object)])
+            for offset, code in enumerate(new_codes):
+                self._rows[code] = start + offset
+        rows = np.fromiter(
+            (self._rows[code] for code in codes.tolist()), dtype=np.int64, count=len(codes)
+        )
+        self.limit_threshold[rows] = thresholds
+        return rows
+
+    def _push(self, name: str, values: np.ndarray) -> None:
+        ring = self.rings[name]
+        ring[:, :-1] = ring[:, 1:]
+        ring[:, -1] = values
+
+    def advance(
+        self,
+        trade_date: str,
+        *,
+        stock_codes: Sequence[str],
+        open_: Sequence[float],
+        high: Sequence[float],
+        low: Sequence[float],
+        close: Sequence[float],
+        vol: Sequence[float],
+        limit_thresholds: Sequence[float],
+    ) -> pd.DataFrame:
+        """推进一个交易日，返回 stock_codes 各行（按输入顺序）当日的窗口统计。
+
+        输入行情应已做数值清洗（缺失值填 0，与 raw_daily 读取口径一致）；
+        同一代码出现多行时以最后一行推进状态。
+        """
+        if self.as_of_trade_date and trade_date <= self.as_of_trade_date:
+            raise ValueError(
+                f"pas rolling state already advanced to {self.as_of_trade_date}: {trade_date}"
+            )
+        codes = np.asarray(list(stock_codes), dtype=object)
+        keep = ~pd.Index(codes).duplicated(keep="last")
+        rows = self._ensure_rows(
+            codes[keep], np.asarray(limit_thresholds, dtype=np.float64)[keep]
+        )
+        size = len(self)
+
+        def _today(values: Sequence[float], fill: float) -> np.ndarray:
+            column = np.full(size, fill, dtype=np.float64)
+            column[rows] = np.asarray(values, dtype=np.float64)[keep]
+            return column
+
+        close_today = _today(close, np.nan)
+        self._push("open", _today(open_, np.nan))
+        self._push("high", _today(high, np.nan))
+        self._push("low", _today(low, np.nan))
+        self._push("close", close_today)
+        self._push("vol", _today(vol, 0.0))
+        self.history_days += 1
+
+        self.counters["idle_days"] = np.where(
+            np.isnan(close_today), self.counters["idle_days"] + 1, 0
+        )
+        self.as_of_trade_date = trade_date
+
+        # 只对当日出现的股票取窗口（宽表仅含当日股票），输出按输入顺序对齐
+        out_rows = np.fromiter(
+            (self._rows[code] for code in codes.tolist()), dtype=np.int64, count=len(codes)
+        )
+        unique_rows, positions = np.unique(out_rows, return_inverse=True)
+        depth = min(self.history_days, PAS_SAMPLE_WINDOW_DAYS)
+
+        def _panel(name: str) -> np.ndarray:
+            return np.ascontiguousarray(self.rings[name][unique_rows, -depth:].T)
+
+        factors = _panel_factors(
+            closes=_panel("close"),
+            opens=_panel("open"),
+            highs=_panel("high"),
+            lows=_panel("low"),
+            vols=_panel("vol"),
+            limit_thresholds=self.limit_threshold[unique_rows],
+        )
+        result: dict[str, np.ndarray] = {"stock_code": codes}
+        result.update({name: values[positions] for name, values in factors.items()})
+
+        self._prune()
+        return pd.DataFrame(result)
+
+    def _prune(self) -> None:
+        stale = self.counters["idle_days"] >= PAS_STATE_WARMUP_TRADE_DAYS
+        if not stale.any():
+            return
+        keep = ~stale
+        self.stock_codes = self.stock_codes[keep]
+        self.rings = {name: ring[keep] for name, ring in self.rings.items()}
+        self.counters = {name: values[keep] for name, values in self.counters.items()}
+        self.limit_threshold = self.limit_threshold[keep]
+        self._rows = {code: row for row, code in enumerate(self.stock_codes.tolist())}
+
+    def to_table(self, *, state_scope: str) -> pa.Table:
+        """状态表行：各窗口按时间正序（旧 → 新）存为定长 DOUBLE 数组。"""
+        size = len(self)
+        columns: dict[str, pa.Array] = {
+            "state_scope": pa.array([state_scope] * size, type=pa.string()),
+            "stock_code": pa.array(self.stock_codes.tolist(), type=pa.string()),
+            "as_of_trade_date": pa.array([self.as_of_trade_date] * size, type=pa.string()),
+            "history_days": pa.array(np.full(size, self.history_days, dtype=np.int64)),
+            "limit_threshold": pa.array(self.limit_threshold),
+        }
+        for name in _COUNTER_COLUMNS:
+            columns[name] = pa.array(self.counters[name])
+        for name in _RING_SPECS:
+            columns[f"{name}_window"] = pa.FixedSizeListArray.from_arrays(
+                pa.array(self.rings[name].ravel()), PAS_SAMPLE_WINDOW_DAYS
+            )
+        return pa.table(columns)
+
+    @classmethod
+    def from_table(cls, table: pa.Table) -> PasRollingState:
+        state = cls()
+        if table.num_rows == 0:
+            return state
+        size = table.num_rows
+        state.as_of_trade_date = str(table["as_of_trade_date"][0].as_py())
+        state.history_days = int(table["history_days"][0].as_py())
+        state.stock_codes = np.array(table["stock_code"].to_pylist(), dtype=object)
+        state.limit_threshold = (
+            table["limit_threshold"].to_numpy().astype(np.float64, copy=True)
+        )
+        for name in _COUNTER_COLUMNS:
+            state.counters[name] = table[name].to_numpy().astype(np.int64, copy=True)
+        for name in _RING_SPECS:
+            values = table[f"{name}_window"].combine_chunks().flatten()
+            # DuckDB / Arrow 导出的数组可能只读，状态需可写副本
+            state.rings[name] = (
+                values.to_numpy(zero_copy_only=False).astype(np.float64, copy=True)
+                .reshape(size, PAS_SAMPLE_WINDOW_DAYS)
+            )
+        state._rows = {code: row for row, code in enumerate(state.stock_codes.tolist())}
+        return state
+
+
+def pas_state_slots(connection: duckdb.DuckDBPyConnection) -> dict[str, str]:
+    """状态槽 → 该槽状态日（表不存在时为空）。"""
+    if not table_exists(connection, PAS_STATE_TABLE):
+        return {}
+    rows = connection.execute(
+        f"SELECT state_scope, MAX(as_of_trade_date) FROM {PAS_STATE_TABLE} GROUP BY state_scope"
+    ).fetchall()
+    return {str(scope): str(as_of) for scope, as_of in rows if scope in PAS_STATE_SLOTS}
+
+
+def select_pas_state_slots(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    before_trade_date: str,
+) -> tuple[str | None, str]:
+    """返回 (基准槽, 写入槽)：基准为早于 before_trade_date 的最新状态槽。
+
+    写入槽取"基准槽以外"的槽：同日重跑时基准仍为前一交易日状态；
+    无可用基准时优先空槽，否则覆盖较旧的槽。
+    """
+    slots = pas_state_slots(connection)
+    candidates = {scope: as_of for scope, as_of in slots.items() if as_of < before_trade_date}
+    if not candidates:
+        target = next(
+            (scope for scope in PAS_STATE_SLOTS if scope not in slots),
+            min(slots, key=slots.__getitem__) if slots else PAS_STATE_SLOTS[0],
+        )
+        return None, target
+    base = max(candidates, key=candidates.__getitem__)
+    return base, next(scope for scope in PAS_STATE_SLOTS if scope != base)
+
+
+def load_pas_rolling_state(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    before_trade_date: str,
+) -> tuple[PasRollingState, str]:
+    """读取早于 before_trade_date 的最新状态（无则为空状态），并返回写入槽。"""
+    base, target = select_pas_state_slots(connection, before_trade_date=before_trade_date)
+    if base is None:
+        return PasRollingState(), target
+    table = connection.execute(
+        f"SELECT * FROM {PAS_STATE_TABLE} WHERE state_scope = ? ORDER BY stock_code",
+        [base],
+    ).to_arrow_table()
+    return PasRollingState.from_table(table), target
+
+
+def persist_pas_rolling_state(
+    session: WriteSession | RemoteWriteSession,
+    *,
+    state: PasRollingState,
+    state_scope: str,
+) -> int:
+    """整体替换一个状态槽，返回写入行数。"""
+    return session.write_frame(
+        PAS_STATE_TABLE,
+        state.to_table(state_scope=state_scope),
+        trade_date=state_scope,
+        partition_key="state_scope",
+    )
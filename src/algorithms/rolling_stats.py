@@ -0,0 +1,91 @@
+"""
+滑动窗口顺序统计（逐日推进 / 区间回补共用）。
+
+- quantile_sorted：有序序列的线性插值分位数（(n - 1) × q 定位）
+- SortedWindow：定长滑动窗口 + 有序副本，插入 / 淘汰 / 分位 / 名次均二分定位，
+  每步 O(log n) 定位（列表搬移为连续内存拷贝），取代每步对整个窗口重新排序
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from collections.abc import Iterable, Sequence
+from itertools import islice
+
+
+def quantile_sorted(sorted_values: Sequence[float], q: float) -> float:
+    """升序序列的线性插值分位数；空序列返回 0.0。"""
+    if len(sorted_values) == 0:
+        return 0.0
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    pos = (len(sorted_values) - 1) * q
+    lower = int(math.floor(pos))
+    upper = int(math.ceil(pos))
+    if lower == upper:
+        return float(sorted_values[lower])
+    weight = pos - lower
+    return float(sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight)
+
+
+class SortedWindow:
+    """按到达顺序淘汰的定长窗口，同时维护有效值的有序副本。
+
+    窗口按条数滑动：None / NaN / inf 占用一个位置但不进入有序副本，与"先按记录条数
+    截取最近 maxlen 条、再过滤空值"的口径一致。
+    """
+
+    def __init__(self, maxlen: int, values: Iterable[float | None] = ()) -> None:
+        if maxlen <= 0:
+            raise ValueError(f"maxlen must be positive, got {maxlen}")
+        self.maxlen = int(maxlen)
+        self._rows: deque[float] = deque()
+        self._finite: deque[float] = deque()
+        self._sorted: list[float] = []
+        for value in values:
+            self.push(value)
+
+    def __len__(self) -> int:
+        return len(self._finite)
+
+    @property
+    def sorted_values(self) -> Sequence[float]:
+        """有效值升序视图（只读，随 push 原地变化）。"""
+        return self._sorted
+
+    def push(self, value: float | None) -> None:
+        parsed = float("nan") if value is None else float(value)
+        self._rows.append(parsed)
+        if math.isfinite(parsed):
+            self._finite.append(parsed)
+            insort(self._sorted, parsed)
+        if len(self._rows) > self.maxlen:
+            evicted = self._rows.popleft()
+            if math.isfinite(evicted):
+                self._finite.popleft()
+                del self._sorted[bisect_left(self._sorted, evicted)]
+
+    def values(self) -> list[float]:
+        """有效值（到达顺序）。"""
+        return list(self._finite)
+
+    def recent(self, count: int) -> list[float]:
+        """最近 count 个有效值（到达顺序）。"""
+        if count <= 0:
+            return []
+        tail = list(islice(reversed(self._finite), count))
+        tail.reverse()
+        return tail
+
+    def quantile(self, q: float) -> float:
+        return quantile_sorted(self._sorted, q)
+
+    def count_at_most(self, value: float) -> int:
+        """窗口内不大于 value 的有效值个数。"""
+        return bisect_right(self._sorted, float(value))
+
+    def count_above(self, value: float) -> int:
+        """窗口内严格大于 value 的有效值个数。"""
+        return len(self._sorted) - self.count_at_most(value)
+
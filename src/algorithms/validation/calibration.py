@@ -19,6 +19,7 @@ import duckdb
 import pandas as pd
 
 from src.config.config import Config
+from src.data.market_daily_agg import market_daily_agg_available
 from src.db.helpers import table_exists as _table_exists
 
 DESIGN_TRACE = {
@@ -67,7 +68,8 @@ def _load_calibration_series(
 ) -> tuple[pd.DataFrame, str]:
     """加载 MSS 因子值与真实收益序列。
 
-    从 mss_panorama + raw_daily 联合查询。
+    从 mss_panorama + 全市场逐日聚合联合查询：优先读 market_daily_agg，
+    缺表或交易日范围窄于 raw_daily 时回退到 raw_daily 现算。
     优先使用 pct_chg 列；若不存在则从 close 计算日度收益率。
     返回 (DataFrame[trade_date, mss_score, market_pct_chg], return_source)。
     """
@@ -77,31 +79,42 @@ def _load_calibration_series(
 
     with duckdb.connect(str(database_path), read_only=True) as conn:
         has_mss = _table_exists(conn, "mss_panorama")
+        has_agg = market_daily_agg_available(conn)
         has_daily = _table_exists(conn, "raw_daily")
-        if not has_mss or not has_daily:
+        if not has_mss or not (has_agg or has_daily):
             return empty, "real_pct_chg"
 
-        # 检查 raw_daily 是否有 pct_chg 列（模拟客户端可能无此列）
-        cols = {str(r[0]) for r in conn.execute(
-            "SELECT column_name FROM information_schema.columns WHERE table_name = 'raw_daily'"
-        ).fetchall()}
-        use_pct_chg = "pct_chg" in cols
-        if use_pct_chg:
-            return_expr = "AVG(CAST(pct_chg AS DOUBLE))"
-            where_clause = "WHERE pct_chg IS NOT NULL"
+        if has_agg:
+            # 聚合表 pct_chg_count 全为 0 说明 raw_daily 无 pct_chg 列（模拟客户端）
+            row = conn.execute(
+                "SELECT COALESCE(MAX(pct_chg_count), 0) FROM market_daily_agg"
+            ).fetchone()
+            use_pct_chg = bool(row and int(row[0]) > 0)
+            return_expr = "mean_pct_chg" if use_pct_chg else "mean_close"
+            market_return_sql = (
+                f"SELECT trade_date, {return_expr} AS market_pct_chg FROM market_daily_agg"
+            )
         else:
-            # 回退：从 close 列计算市场平均收盘价，外层再算日度收益率
-            return_expr = "AVG(CAST(close AS DOUBLE))"
-            where_clause = "WHERE close IS NOT NULL"
+            # 检查 raw_daily 是否有 pct_chg 列（模拟客户端可能无此列）
+            cols = {str(r[0]) for r in conn.execute(
+                "SELECT column_name FROM information_schema.columns WHERE table_name = 'raw_daily'"
+            ).fetchall()}
+            use_pct_chg = "pct_chg" in cols
+            if use_pct_chg:
+                return_expr = "AVG(CAST(pct_chg AS DOUBLE))"
+                where_clause = "WHERE pct_chg IS NOT NULL"
+            else:
+                # 回退：从 close 列计算市场平均收盘价，外层再算日度收益率
+                return_expr = "AVG(CAST(close AS DOUBLE))"
+                where_clause = "WHERE close IS NOT NULL"
+            market_return_sql = (
+                f"SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
+                f"{return_expr} AS market_pct_chg "
+                f"FROM raw_daily {where_clause} GROUP BY trade_date"
+            )
 
         frame = conn.execute(
-            "WITH market_return AS ("
-            f"  SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
-            f"         {return_expr} AS market_pct_chg "
-            f"  FROM raw_daily "
-            f"  {where_clause} "
-            "  GROUP BY trade_date"
-            "), mss_daily AS ("
+            f"WITH market_return AS ({market_return_sql}), mss_daily AS ("
             "  SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
             "         MAX(mss_score) AS mss_score "
             "  FROM mss_panorama "
@@ -24,9 +24,11 @@ import duckdb
 import pandas as pd
 
 from src.config.config import Config
+from src.data.market_daily_agg import market_daily_agg_available
 from src.db.helpers import (
     duckdb_type as _duckdb_type,
     ensure_columns as _ensure_columns,
+    open_write_session,
     persist_by_trade_date as _persist,
     table_exists as _table_exists,
 )
@@ -208,13 +210,21 @@ def _load_market_future_returns(
     with duckdb.connect(str(database_path), read_only=True) as connection:
         if not _table_exists(connection, "mss_panorama"):
             return pd.DataFrame(columns=["trade_date", "mss_score", "future_return_5d"])
-        if not _table_exists(connection, "raw_daily"):
+        # 全市场平均收盘价优先读 market_daily_agg（L1 落盘时增量维护），
+        # 缺表或范围窄于 raw_daily 时回退 raw_daily
+        if market_daily_agg_available(connection):
+            market_close_sql = (
+                "SELECT trade_date, mean_close AS market_close FROM market_daily_agg"
+            )
+        elif _table_exists(connection, "raw_daily"):
+            market_close_sql = (
+                "SELECT CAST(trade_date AS VARCHAR) AS trade_date, AVG(close) AS market_close "
+                "FROM raw_daily GROUP BY trade_date"
+            )
+        else:
             return pd.DataFrame(columns=["trade_date", "mss_score", "future_return_5d"])
         frame = connection.execute(
-            "WITH market_close AS ("
-            "  SELECT CAST(trade_date AS VARCHAR) AS trade_date, AVG(close) AS market_close "
-            "  FROM raw_daily GROUP BY trade_date"
-            "), mss_daily AS ("
+            f"WITH market_close AS ({market_close_sql}), mss_daily AS ("
             "  SELECT CAST(trade_date AS VARCHAR) AS trade_date, MAX(mss_score) AS mss_score "
             "  FROM mss_panorama "
             "  WHERE CAST(trade_date AS VARCHAR) <= ? "
@@ -970,36 +980,43 @@ def run_validation_gate(
         ]
     )
 
-    _persist(
-        database_path=database_path,
-        table_name="validation_factor_report",
-        frame=factor_report_frame,
-        trade_date=trade_date,
-    )
-    _persist(
-        database_path=database_path,
-        table_name="validation_weight_report",
-        frame=weight_report_frame,
-        trade_date=trade_date,
-    )
-    count = _persist(
-        database_path=database_path,
-        table_name="validation_gate_decision",
-        frame=gate_frame,
-        trade_date=trade_date,
-    )
-    _persist(
-        database_path=database_path,
-        table_name="validation_weight_plan",
-        frame=weight_plan_frame,
-        trade_date=trade_date,
-    )
-    _persist(
-        database_path=database_path,
-        table_name="validation_run_manifest",
-        frame=run_manifest_frame,
-        trade_date=trade_date,
-    )
+    # 验证产物五张表在同一连接、同一事务内写入
+    with open_write_session(database_path) as session, session.batch():
+        _persist(
+            database_path=database_path,
+            table_name="validation_factor_report",
+            frame=factor_report_frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        _persist(
+            database_path=database_path,
+            table_name="validation_weight_report",
+            frame=weight_report_frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        count = _persist(
+            database_path=database_path,
+            table_name="validation_gate_decision",
+            frame=gate_frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        _persist(
+            database_path=database_path,
+            table_name="validation_weight_plan",
+            frame=weight_plan_frame,
+            trade_date=trade_date,
+            session=session,
+        )
+        _persist(
+            database_path=database_path,
+            table_name="validation_run_manifest",
+            frame=run_manifest_frame,
+            trade_date=trade_date,
+            session=session,
+        )
 
     target_artifacts_dir = artifacts_dir or (Path("artifacts") / "spiral-s2c" / trade_date)
     target_artifacts_dir.mkdir(parents=True, exist_ok=True)
@@ -23,13 +23,8 @@ import numpy as np
 import pandas as pd
 
 from src.backtest.pipeline import (
-    LIMIT_RATIO_GEM_STAR,
-    LIMIT_RATIO_MAIN_BOARD,
-    LIMIT_RATIO_ST,
     MIN_FILL_PROBABILITY,
     QUEUE_PARTICIPATION_RATE,
-    _build_prev_close_lookup,
-    _build_price_lookup,
     _clip,
     _compute_daily_return_distribution,
     _compute_max_drawdown_days,
@@ -46,8 +41,10 @@ from src.backtest.pipeline import (
     _resolve_fee_tier,
     _resolve_limit_ratio,
 )
+from src.backtest.price_store import PriceStore
 from src.config.config import Config
 from src.db.helpers import table_exists as _table_exists
+from src.db.storage_backend import open_read_connection
 
 
 @dataclass(frozen=True)
@@ -293,8 +290,7 @@ def run_simplified_backtest(
     *,
     signals_by_date: dict[str, list[str]],
     trading_days: list[str],
-    price_lookup: dict[tuple[str, str], dict[str, float]],
-    prev_close_lookup: dict[tuple[str, str], float],
+    price_store: PriceStore,
     stock_profiles: dict[str, dict[str, str]],
     config: Config,
     strategy_name: str,
@@ -330,12 +326,12 @@ def run_simplified_backtest(
             if replay_day < can_sell_date:
                 continue
 
-            price = price_lookup.get((replay_day, stock_code))
+            price = price_store.bar(replay_day, stock_code)
             if not price:
                 continue
             stock_name = str(stock_profiles.get(stock_code, {}).get("stock_name", ""))
             limit_ratio = _resolve_limit_ratio(stock_code=stock_code, stock_name=stock_name)
-            prev_close = prev_close_lookup.get((replay_day, stock_code))
+            prev_close = price_store.prev_close(replay_day, stock_code)
             if _is_limit_down(price=price, prev_close=prev_close, limit_ratio=limit_ratio):
                 continue
 
@@ -379,12 +375,12 @@ def run_simplified_backtest(
             if not stock_code or stock_code in positions:
                 continue
 
-            price = price_lookup.get((replay_day, stock_code))
+            price = price_store.bar(replay_day, stock_code)
             if not price:
                 continue
             stock_name = str(stock_profiles.get(stock_code, {}).get("stock_name", ""))
             limit_ratio = _resolve_limit_ratio(stock_code=stock_code, stock_name=stock_name)
-            prev_close = prev_close_lookup.get((replay_day, stock_code))
+            prev_close = price_store.prev_close(replay_day, stock_code)
             if _is_one_word_board(price):
                 continue
             if _is_limit_up(price=price, prev_close=prev_close, limit_ratio=limit_ratio):
@@ -441,7 +437,7 @@ def run_simplified_backtest(
         # 3) 盯市
         market_value = 0.0
         for stock_code, pos in positions.items():
-            p = price_lookup.get((replay_day, stock_code), {})
+            p = price_store.bar(replay_day, stock_code) or {}
             close_price = float(p.get("close", 0.0) or 0.0)
             if close_price <= 0.0:
                 close_price = float(p.get("open", 0.0) or 0.0)
@@ -492,12 +488,14 @@ def run_benchmark_comparison(
         raise FileNotFoundError(f"DuckDB not found: {db_path}")
 
     # 读取公共数据
-    trading_days = _read_trading_days(database_path=db_path, start_date=start_date, end_date=end_date)
+    trading_days = _read_trading_days(
+        database_path=db_path, start_date=start_date, end_date=end_date, config=config
+    )
     if not trading_days:
         raise ValueError("No trading days found in window")
 
     # 需要额外的前置窗口来计算技术指标（MA20 需要 20 个交易日前置）
-    with duckdb.connect(str(db_path), read_only=True) as conn:
+    with open_read_connection(db_path, config=config, end_date=start_date) as conn:
         warmup_frame = conn.execute(
             "SELECT DISTINCT trade_date FROM raw_trade_cal "
             "WHERE trade_date < ? AND CAST(is_open AS INTEGER) = 1 "
@@ -506,10 +504,11 @@ def run_benchmark_comparison(
         ).df()
     warmup_start = str(warmup_frame["trade_date"].min()) if not warmup_frame.empty else start_date
 
-    price_frame = _read_price_frame(database_path=db_path, start_date=warmup_start, end_date=end_date)
-    price_lookup = _build_price_lookup(price_frame)
-    prev_close_lookup = _build_prev_close_lookup(price_frame)
-    stock_profiles = _read_stock_profiles(database_path=db_path)
+    price_frame = _read_price_frame(
+        database_path=db_path, start_date=warmup_start, end_date=end_date, config=config
+    )
+    price_store = PriceStore.from_frame(price_frame)
+    stock_profiles = _read_stock_profiles(database_path=db_path, config=config)
 
     # 读取 MSS 推荐信号
     with duckdb.connect(str(db_path), read_only=True) as conn:
@@ -542,8 +541,7 @@ def run_benchmark_comparison(
     mss_result = run_simplified_backtest(
         signals_by_date=mss_signals_by_date,
         trading_days=trading_days,
-        price_lookup=price_lookup,
-        prev_close_lookup=prev_close_lookup,
+        price_store=price_store,
         stock_profiles=stock_profiles,
         config=config,
         strategy_name="MSS_Integrated",
@@ -558,8 +556,7 @@ def run_benchmark_comparison(
     random_result = run_simplified_backtest(
         signals_by_date=random_signals,
         trading_days=trading_days,
-        price_lookup=price_lookup,
-        prev_close_lookup=prev_close_lookup,
+        price_store=price_store,
         stock_profiles=stock_profiles,
         config=config,
         strategy_name="Random_Baseline",
@@ -575,8 +572,7 @@ def run_benchmark_comparison(
     technical_result = run_simplified_backtest(
         signals_by_date=tech_signals,
         trading_days=trading_days,
-        price_lookup=price_lookup,
-        prev_close_lookup=prev_close_lookup,
+        price_store=price_store,
         stock_profiles=stock_profiles,
         config=config,
         strategy_name="Technical_MA_RSI_MACD",
@@ -17,13 +17,18 @@ from typing import Any
 import duckdb
 import pandas as pd
 
+from src.algorithms.rolling_stats import quantile_sorted
 from src.analysis.benchmark_comparison import (
     BenchmarkComparisonResult,
     format_benchmark_report,
     run_benchmark_comparison,
 )
 from src.config.config import Config
-from src.db.helpers import column_exists as _table_has_column, table_exists as _table_exists
+from src.db.helpers import (
+    column_exists as _table_has_column,
+    open_write_connection,
+    table_exists as _table_exists,
+)
 
 # DESIGN_TRACE:
 # - Governance/SpiralRoadmap/planA/SPIRAL-S3A-S4B-EXECUTABLE-ROADMAP.md (§5 S3b)
@@ -110,13 +115,13 @@ def _trim_by_quantile(values: list[float], quantile: float) -> list[float]:
         return []
     if quantile <= 0.0 or quantile >= 0.5:
         return values
-    series = pd.Series(values, dtype="float64").dropna()
-    if series.empty:
+    kept = [float(v) for v in values if v is not None and not pd.isna(v)]
+    if not kept:
         return []
-    lower = float(series.quantile(quantile))
-    upper = float(series.quantile(1.0 - quantile))
-    trimmed = series[(series >= lower) & (series <= upper)]
-    return [float(v) for v in trimmed.tolist()]
+    ordered = sorted(kept)
+    lower = quantile_sorted(ordered, quantile)
+    upper = quantile_sorted(ordered, 1.0 - quantile)
+    return [v for v in kept if lower <= v <= upper]
 
 
 
@@ -128,7 +133,7 @@ def _persist_trade_date_table(
     frame: pd.DataFrame,
     trade_date: str,
 ) -> None:
-    with duckdb.connect(str(database_path)) as connection:
+    with open_write_connection(database_path) as connection:
         connection.register("incoming_df", frame)
         connection.execute(
             f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM incoming_df WHERE 1=0"
@@ -145,7 +150,7 @@ def _persist_metric_date_table(
     frame: pd.DataFrame,
     metric_date: str,
 ) -> None:
-    with duckdb.connect(str(database_path)) as connection:
+    with open_write_connection(database_path) as connection:
         connection.register("incoming_df", frame)
         connection.execute(
             f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM incoming_df WHERE 1=0"
@@ -21,9 +21,21 @@ from typing import Any
 import duckdb
 import pandas as pd
 
+from src.algorithms.board_limits import resolve_limit_ratio as _resolve_limit_ratio
+from src.backtest.price_store import (
+    PREV_CLOSE_LOOKBACK_DAYS,
+    PriceStore,
+    read_prev_close_lookup,
+)
 from src.config.config import Config
 from src.data.fetch_batch_pipeline import read_fetch_status
-from src.db.helpers import column_exists as _table_has_column, table_exists as _table_exists
+from src.db.helpers import (
+    column_exists as _table_has_column,
+    open_write_connection,
+    table_exists as _table_exists,
+)
+from src.db.storage_backend import open_read_connection
+from src.db.writer_client import submit_to_writer
 
 # DESIGN_TRACE:
 # - Governance/SpiralRoadmap/planA/SPIRAL-S3A-S4B-EXECUTABLE-ROADMAP.md (§5 S3)
@@ -41,9 +53,6 @@ DESIGN_TRACE = {
 
 SUPPORTED_ENGINE = {"qlib", "local_vectorized", "backtrader_compat"}
 SUPPORTED_CONTRACT_VERSION = "nc-v1"
-LIMIT_RATIO_MAIN_BOARD = 0.10
-LIMIT_RATIO_GEM_STAR = 0.20
-LIMIT_RATIO_ST = 0.05
 LIMIT_PRICE_TOLERANCE_RATIO = 0.001
 MIN_FILL_PROBABILITY = 0.35
 QUEUE_PARTICIPATION_RATE = 0.15
@@ -248,7 +257,15 @@ def _persist(
     delete_key: str,
     delete_value: str,
 ) -> None:
-    with duckdb.connect(str(database_path)) as connection:
+    if submit_to_writer(
+        database_path,
+        table_name=table_name,
+        frame=frame,
+        partition_value=delete_value,
+        partition_key=delete_key,
+    ):
+        return
+    with open_write_connection(database_path) as connection:
         table_exists_row = connection.execute(
             "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
             [table_name],
@@ -462,8 +479,16 @@ def _filter_quality_gate_by_signal_dates(
     return (filtered_gate, missing_gate_dates)
 
 
-def _read_trading_days(*, database_path: Path, start_date: str, end_date: str) -> list[str]:
-    with duckdb.connect(str(database_path), read_only=True) as connection:
+def _read_trading_days(
+    *,
+    database_path: Path,
+    start_date: str,
+    end_date: str,
+    config: Config | None = None,
+) -> list[str]:
+    with open_read_connection(
+        database_path, config=config, start_date=start_date, end_date=end_date
+    ) as connection:
         row = connection.execute(
             "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'raw_trade_cal'"
         ).fetchone()
@@ -486,9 +511,12 @@ def _read_window_table_counts(
     database_path: Path,
     start_date: str,
     end_date: str,
+    config: Config | None = None,
 ) -> dict[str, int]:
     counts = {name: 0 for name in WINDOW_TABLE_DATE_COLUMNS}
-    with duckdb.connect(str(database_path), read_only=True) as connection:
+    with open_read_connection(
+        database_path, config=config, start_date=start_date, end_date=end_date
+    ) as connection:
         for table_name, date_column in WINDOW_TABLE_DATE_COLUMNS.items():
             if not _table_exists(connection, table_name):
                 continue
@@ -514,8 +542,10 @@ def _check_core_signal_columns(integrated_frame: pd.DataFrame) -> list[str]:
     return violations
 
 
-def _read_stock_profiles(*, database_path: Path) -> dict[str, dict[str, str]]:
-    with duckdb.connect(str(database_path), read_only=True) as connection:
+def _read_stock_profiles(
+    *, database_path: Path, config: Config | None = None
+) -> dict[str, dict[str, str]]:
+    with open_read_connection(database_path, config=config) as connection:
         row = connection.execute(
             "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'raw_stock_basic'"
         ).fetchone()
@@ -559,9 +589,15 @@ def _next_trade_day(trading_days: list[str], trade_date: str) -> str | None:
 
 
 def _read_price_frame(
-    *, database_path: Path, start_date: str, end_date: str
+    *,
+    database_path: Path,
+    start_date: str,
+    end_date: str,
+    config: Config | None = None,
 ) -> pd.DataFrame:
-    with duckdb.connect(str(database_path), read_only=True) as connection:
+    with open_read_connection(
+        database_path, config=config, start_date=start_date, end_date=end_date
+    ) as connection:
         row = connection.execute(
             "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'raw_daily'"
         ).fetchone()
@@ -583,57 +619,25 @@ def _read_price_frame(
     return frame
 
 
-def _build_price_lookup(price_frame: pd.DataFrame) -> dict[tuple[str, str], dict[str, float]]:
-    if price_frame.empty:
-        return {}
-    working = price_frame.copy()
-    working["trade_date"] = working["trade_date"].astype(str)
-    working["stock_code"] = working["stock_code"].astype(str)
-    for col in ("open", "high", "low", "close", "vol", "amount"):
-        working[col] = pd.to_numeric(working[col], errors="coerce").fillna(0.0)
-    working = working.drop_duplicates(subset=["trade_date", "stock_code"], keep="last")
-    # 通过多列索引一次性构建 (trade_date, stock_code) -> OHLCVA 查找表，
-    # 避免回放主循环内反复 DataFrame 过滤。
-    lookup: dict[tuple[str, str], dict[str, float]] = (
-        working.set_index(["trade_date", "stock_code"])[["open", "high", "low", "close", "vol", "amount"]]
-        .to_dict("index")
-    )
-    return lookup
-
-
-def _build_prev_close_lookup(price_frame: pd.DataFrame) -> dict[tuple[str, str], float]:
-    if price_frame.empty:
+def _read_prev_close_seed(
+    *,
+    database_path: Path,
+    start_date: str,
+    stock_codes: list[str],
+    config: Config | None = None,
+) -> dict[str, float]:
+    """窗口内各股票在 start_date 之前的最后收盘价，作为其首条行情的昨收。"""
+    if not stock_codes:
         return {}
-    working = price_frame.copy()
-    working["trade_date"] = working["trade_date"].astype(str)
-    working["stock_code"] = working["stock_code"].astype(str)
-    working["close"] = pd.to_numeric(working["close"], errors="coerce").fillna(0.0)
-    working = working.sort_values(by=["stock_code", "trade_date"])
-    working["prev_close"] = working.groupby("stock_code")["close"].shift(1)
-
-    # 先向量化计算昨收，再收敛成字典供涨跌停判定直接读取。
-    valid = working[working["prev_close"].notna() & (working["prev_close"] > 0.0)].copy()
-    valid["stock_code"] = valid["stock_code"].str.strip()
-    valid["trade_date"] = valid["trade_date"].str.strip()
-    valid = valid[(valid["stock_code"] != "") & (valid["trade_date"] != "")]
-    lookup: dict[tuple[str, str], float] = dict(
-        zip(
-            zip(valid["trade_date"], valid["stock_code"]),
-            valid["prev_close"].astype(float),
+    lookback_start = (
+        pd.Timestamp(start_date) - pd.Timedelta(days=PREV_CLOSE_LOOKBACK_DAYS)
+    ).strftime("%Y%m%d")
+    with open_read_connection(
+        database_path, config=config, start_date=lookback_start, end_date=start_date
+    ) as connection:
+        return read_prev_close_lookup(
+            connection, trade_date=start_date, stock_codes=stock_codes
         )
-    )
-    return lookup
-
-
-def _resolve_limit_ratio(*, stock_code: str, stock_name: str) -> float:
-    normalized_name = str(stock_name).upper()
-    if "ST" in normalized_name:
-        return LIMIT_RATIO_ST
-
-    normalized_code = str(stock_code).strip()
-    if normalized_code.startswith(("300", "301", "688", "689")):
-        return LIMIT_RATIO_GEM_STAR
-    return LIMIT_RATIO_MAIN_BOARD
 
 
 def _price_tolerance(limit_price: float) -> float:
@@ -943,6 +947,7 @@ def run_backtest(
             database_path=database_path,
             start_date=start_date,
             end_date=end_date,
+            config=config,
         )
     has_local_l1_window_coverage = (
         int(window_table_counts.get("raw_trade_cal", 0)) > 0
@@ -1096,23 +1101,30 @@ def run_backtest(
             database_path=database_path,
             start_date=start_date,
             end_date=end_date,
+            config=config,
         )
         if not replay_days:
             add_error("P0", "calendar", "raw_trade_cal_open_days_missing")
 
-    price_lookup: dict[tuple[str, str], dict[str, float]] = {}
-    prev_close_lookup: dict[tuple[str, str], float] = {}
+    price_store = PriceStore.empty()
     stock_profile_lookup: dict[str, dict[str, str]] = {}
     if not errors:
         price_frame = _read_price_frame(
             database_path=database_path,
             start_date=start_date,
             end_date=end_date,
+            config=config,
+        )
+        window_codes = price_frame["stock_code"].astype(str).str.strip().unique().tolist()
+        prev_close_seed = _read_prev_close_seed(
+            database_path=database_path,
+            start_date=start_date,
+            stock_codes=window_codes,
+            config=config,
         )
-        price_lookup = _build_price_lookup(price_frame)
-        prev_close_lookup = _build_prev_close_lookup(price_frame)
-        stock_profile_lookup = _read_stock_profiles(database_path=database_path)
-        if not price_lookup:
+        price_store = PriceStore.from_frame(price_frame, prev_close_seed=prev_close_seed)
+        stock_profile_lookup = _read_stock_profiles(database_path=database_path, config=config)
+        if len(price_store) == 0:
             add_error("P0", "market_data", "raw_daily_missing_for_backtest_window")
 
     def calc_fees(amount: float, direction: str) -> tuple[float, float, float, float]:
@@ -1180,13 +1192,13 @@ def run_backtest(
                 if replay_day < can_sell_date:
                     continue
 
-                price = price_lookup.get((replay_day, stock_code))
+                price = price_store.bar(replay_day, stock_code)
                 if not price:
                     missing_price_exit_count += 1
                     continue
                 stock_name = str(stock_profile_lookup.get(stock_code, {}).get("stock_name", "")).strip()
                 limit_ratio = _resolve_limit_ratio(stock_code=stock_code, stock_name=stock_name)
-                prev_close = prev_close_lookup.get((replay_day, stock_code))
+                prev_close = price_store.prev_close(replay_day, stock_code)
                 if _is_limit_down(price=price, prev_close=prev_close, limit_ratio=limit_ratio):
                     limit_down_blocked_count += 1
                     continue
@@ -1268,7 +1280,7 @@ def run_backtest(
                     t1_guard_blocked_count += 1
                     continue
 
-                price = price_lookup.get((replay_day, stock_code))
+                price = price_store.bar(replay_day, stock_code)
                 if not price:
                     missing_price_entry_count += 1
                     trade_rows.append(
@@ -1303,7 +1315,7 @@ def run_backtest(
                     continue
                 stock_name = str(stock_profile_lookup.get(stock_code, {}).get("stock_name", "")).strip()
                 limit_ratio = _resolve_limit_ratio(stock_code=stock_code, stock_name=stock_name)
-                prev_close = prev_close_lookup.get((replay_day, stock_code))
+                prev_close = price_store.prev_close(replay_day, stock_code)
                 if _is_one_word_board(price):
                     one_word_board_blocked_count += 1
                     trade_rows.append(
@@ -1415,7 +1427,7 @@ def run_backtest(
                     held_shares = max(0.0, float(held_pos.get("shares", 0.0) or 0.0))
                     if held_shares <= 0.0:
                         continue
-                    held_price = price_lookup.get((replay_day, held_code))
+                    held_price = price_store.bar(replay_day, held_code)
                     mark_price = 0.0
                     if held_price:
                         mark_price = float(held_price.get("open", 0.0) or 0.0)
@@ -1572,7 +1584,7 @@ def run_backtest(
             # 3) 逐日盯市权益曲线，用于最大回撤与收益分布统计。
             market_value = 0.0
             for stock_code, pos in positions.items():
-                price = price_lookup.get((replay_day, stock_code), {})
+                price = price_store.bar(replay_day, stock_code) or {}
                 close_price = float(price.get("close", 0.0) or 0.0)
                 if close_price <= 0.0:
                     close_price = float(price.get("open", 0.0) or 0.0)
@@ -0,0 +1,244 @@
+"""
+列式行情存储：回测 / 基准对比 / 纸面交易共用的 (trade_date, stock_code) → OHLCVA 查找。
+
+布局：
+  - 交易日、股票代码各自编码为 int32 下标（代码按 Categorical 编码，只保存一份字符串）
+  - 各行情字段为 (交易日数, 股票数) 的二维 float64 数组，缺失行为 NaN
+  - 昨收为同布局二维数组：取该股上一条有行情记录的收盘价，不大于 0 视为缺失
+
+查找为两次下标定位 + 数组索引，取代逐行 dict 的查找表；单条行情仍以
+dict[str, float] 返回，撮合 / 成本函数无需改动。
+
+read_prev_close_lookup 为窗口外的昨收查询（纸面交易当日 / 回测窗口首日）：
+只读前一开市日的行情分区，当日无记录（停牌复牌、新股）的股票再在有界回看窗口内
+取最后一条收盘价，与 LAG(close) 逐股前一条记录口径一致，耗时与历史长度无关。
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.db.helpers import column_exists, table_exists
+
+PRICE_FIELDS = ("open", "high", "low", "close", "vol", "amount")
+# 昨收回看窗口（日历日）：停牌超过该窗口的复牌股视为无昨收
+PREV_CLOSE_LOOKBACK_DAYS = 400
+
+
+class PriceStore:
+    """按交易日 × 股票二维布局保存的行情查找表。"""
+
+    def __init__(
+        self,
+        *,
+        trade_dates: list[str],
+        stock_codes: list[str],
+        fields: tuple[str, ...],
+        values: np.ndarray,
+        present: np.ndarray,
+    ) -> None:
+        self.trade_dates = trade_dates
+        self.stock_codes = stock_codes
+        self.fields = fields
+        self.values = values
+        self.present = present
+        self._date_index = {date: index for index, date in enumerate(trade_dates)}
+        self._code_index = {code: index for index, code in enumerate(stock_codes)}
+        self._prev_close: np.ndarray | None = None
+        self._seed: np.ndarray | None = None
+
+    @classmethod
+    def empty(cls, *, fields: tuple[str, ...] = PRICE_FIELDS) -> PriceStore:
+        return cls(
+            trade_dates=[],
+            stock_codes=[],
+            fields=fields,
+            values=np.zeros((len(fields), 0, 0)),
+            present=np.zeros((0, 0), dtype=bool),
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        *,
+        fields: tuple[str, ...] = PRICE_FIELDS,
+        prev_close_seed: Mapping[str, float] | None = None,
+    ) -> PriceStore:
+        """由 trade_date / stock_code / 行情字段长表构建；同键重复行取最后一条。
+
+        prev_close_seed 为各股票在首个交易日之前的最后收盘价（read_prev_close_lookup），
+        用作其窗口内首条行情的昨收。
+        """
+        if frame.empty:
+            return cls.empty(fields=fields)
+        dates = pd.Categorical(frame["trade_date"].astype(str).str.strip())
+        codes = pd.Categorical(frame["stock_code"].astype(str).str.strip())
+        date_ids = dates.codes.astype(np.int32)
+        code_ids = codes.codes.astype(np.int32)
+        shape = (len(dates.categories), len(codes.categories))
+
+        values = np.full((len(fields), *shape), np.nan)
+        for position, field in enumerate(fields):
+            column = pd.to_numeric(frame[field], errors="coerce").fillna(0.0)
+            # 花式索引赋值按顺序写入，重复键保留最后一条
+            values[position, date_ids, code_ids] = column.to_numpy(dtype=float)
+        present = np.zeros(shape, dtype=bool)
+        present[date_ids, code_ids] = True
+        store = cls(
+            trade_dates=[str(date) for date in dates.categories],
+            stock_codes=[str(code) for code in codes.categories],
+            fields=fields,
+            values=values,
+            present=present,
+        )
+        if prev_close_seed:
+            store._seed = np.array(
+                [float(prev_close_seed.get(code, np.nan)) for code in store.stock_codes]
+            )
+        return store
+
+    def __len__(self) -> int:
+        return int(self.present.sum())
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.present.nbytes)
+
+    def _locate(self, trade_date: str, stock_code: str) -> tuple[int, int] | None:
+        row = self._date_index.get(trade_date)
+        col = self._code_index.get(stock_code)
+        if row is None or col is None or not self.present[row, col]:
+            return None
+        return row, col
+
+    def bar(self, trade_date: str, stock_code: str) -> dict[str, float] | None:
+        """单只股票单日行情；无记录返回 None。"""
+        located = self._locate(trade_date, stock_code)
+        if located is None:
+            return None
+        row, col = located
+        return dict(zip(self.fields, self.values[:, row, col].tolist(), strict=True))
+
+    def prev_close(self, trade_date: str, stock_code: str) -> float | None:
+        """当日有行情时返回该股上一条行情的收盘价（须大于 0），否则 None。"""
+        located = self._locate(trade_date, stock_code)
+        if located is None:
+            return None
+        if self._prev_close is None:
+            self._prev_close = self._build_prev_close()
+        value = float(self._prev_close[located])
+        return value if value > 0.0 else None
+
+    def _build_prev_close(self) -> np.ndarray:
+        close = self.values[self.fields.index("close")]
+        rows = np.arange(close.shape[0])[:, None]
+        last_row = np.maximum.accumulate(np.where(self.present, rows, -1), axis=0)
+        prev_row = np.vstack([np.full((1, close.shape[1]), -1), last_row[:-1]])
+        cols = np.broadcast_to(np.arange(close.shape[1]), close.shape)
+        prev_close = close[np.maximum(prev_row, 0), cols]
+        seed = self._seed if self._seed is not None else np.nan
+        return np.where(prev_row >= 0, prev_close, seed)
+
+
+def _stock_code_expr(connection: duckdb.DuckDBPyConnection) -> str | None:
+    has_stock_code = column_exists(connection, "raw_daily", "stock_code")
+    has_ts_code = column_exists(connection, "raw_daily", "ts_code")
+    if has_stock_code and has_ts_code:
+        return "COALESCE(NULLIF(stock_code, ''), SPLIT_PART(ts_code, '.', 1))"
+    if has_stock_code:
+        return "stock_code"
+    if has_ts_code:
+        return "SPLIT_PART(ts_code, '.', 1)"
+    return None
+
+
+def _previous_open_day(
+    connection: duckdb.DuckDBPyConnection, *, trade_date: str, lookback_start: str
+) -> str | None:
+    """trade_date 之前最近一个有行情的交易日；交易日历只用于收窄扫描下界。"""
+    floor = lookback_start
+    if table_exists(connection, "raw_trade_cal"):
+        row = connection.execute(
+            "SELECT MAX(trade_date) FROM raw_trade_cal "
+            "WHERE trade_date < ? AND trade_date >= ? AND CAST(is_open AS INTEGER) = 1",
+            [trade_date, lookback_start],
+        ).fetchone()
+        if row and row[0] is not None:
+            floor = str(row[0])
+    row = connection.execute(
+        "SELECT MAX(trade_date) FROM raw_daily WHERE trade_date < ? AND trade_date >= ?",
+        [trade_date, floor],
+    ).fetchone()
+    return str(row[0]) if row and row[0] is not None else None
+
+
+def read_prev_close_lookup(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    trade_date: str,
+    stock_codes: Iterable[str] | None = None,
+) -> dict[str, float]:
+    """trade_date 之前各股票最后一条行情的收盘价（只保留大于 0 的有效值）。
+
+    stock_codes 缺省时取 trade_date 当日有行情的股票。先读前一开市日（raw_trade_cal
+    定位）的行情分区；该日无记录的股票再在 PREV_CLOSE_LOOKBACK_DAYS 日历日内按
+    交易日取最后一条。
+    """
+    if not table_exists(connection, "raw_daily"):
+        return {}
+    code_expr = _stock_code_expr(connection)
+    if code_expr is None:
+        return {}
+    if stock_codes is None:
+        codes = [
+            str(item[0]).strip()
+            for item in connection.execute(
+                f"SELECT DISTINCT {code_expr} FROM raw_daily WHERE trade_date = ?",
+                [trade_date],
+            ).fetchall()
+        ]
+    else:
+        codes = [str(code).strip() for code in stock_codes]
+    codes = [code for code in dict.fromkeys(codes) if code]
+    if not codes:
+        return {}
+
+    lookback_start = (
+        pd.Timestamp(trade_date) - pd.Timedelta(days=PREV_CLOSE_LOOKBACK_DAYS)
+    ).strftime("%Y%m%d")
+    previous_day = _previous_open_day(
+        connection, trade_date=trade_date, lookback_start=lookback_start
+    )
+    closes: dict[str, float | None] = {}
+    if previous_day is not None:
+        rows = connection.execute(
+            f"SELECT {code_expr} AS stock_code, close FROM raw_daily WHERE trade_date = ?",
+            [previous_day],
+        ).fetchall()
+        wanted = set(codes)
+        for code, close in rows:
+            code = str(code).strip()
+            if code in wanted:
+                closes[code] = close
+    # 前一开市日无记录：停牌复牌 / 新股，回看窗口内取最后一条
+    missing = [code for code in codes if code not in closes]
+    if missing:
+        rows = connection.execute(
+            f"SELECT stock_code, ARG_MAX_NULL(close, trade_date) FROM ("
+            f"SELECT {code_expr} AS stock_code, trade_date, close FROM raw_daily "
+            "WHERE trade_date < ? AND trade_date >= ?"
+            ") WHERE stock_code IN (SELECT UNNEST(?)) GROUP BY stock_code",
+            [trade_date, lookback_start, missing],
+        ).fetchall()
+        closes.update({str(code).strip(): close for code, close in rows})
+
+    lookup: dict[str, float] = {}
+    for code in codes:
+        value = pd.to_numeric(closes.get(code), errors="coerce")
+        if value is not None and not pd.isna(value) and float(value) > 0.0:
+            lookup[code] = float(value)
+    return lookup
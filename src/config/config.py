@@ -157,6 +157,14 @@ if BaseSettings:
         tushare_rate_limit_per_min: int = 120             # 全局限速（次/分钟）
         tushare_primary_rate_limit_per_min: int = 0       # 主通道限速（0=使用全局值）
         tushare_fallback_rate_limit_per_min: int = 0      # 备用通道限速
+        tushare_rate_limit_burst: int = 1                 # 令牌桶突发容量（1=固定间隔）
+        tushare_rate_limit_scope: str = "process"         # 限流共享范围：process / host
+        tushare_channel_schedule: str = "failover"        # 通道调度：failover / balanced
+        tushare_channel_breaker_failures: int = 3         # 连续失败多少次熔断通道（balanced）
+        tushare_channel_breaker_cooldown_seconds: float = 30.0  # 熔断冷却时间（秒）
+        tushare_fetch_concurrency: int = 4                # L1 单日数据集并发拉取线程数（1=串行）
+        tushare_range_row_cap: int = 6000                 # 区间拉取单次调用行数上限（超出自动分块）
+        tushare_fetch_batch_mode: str = "range"           # fetch-batch 采集方式：range / daily
 
         # ---- 存储路径 ----
         data_path: str = ""           # 数据根目录（为空时使用 DEFAULT_DATA_PATH）
@@ -173,6 +181,12 @@ if BaseSettings:
         stale_hard_limit_days: int = 3           # 数据过期硬限（天）
         enable_intraday_incremental: bool = False # 是否启用日内增量采集
         streamlit_port: int = 8501               # GUI 端口
+        duckdb_writer_group_commit_ms: int = 20  # 单写入服务：组提交聚合窗口（毫秒）
+        duckdb_writer_max_batch: int = 64        # 单写入服务：单次组提交最多请求数
+        duckdb_writer_idle_close_ms: int = 200   # 单写入服务：空闲多久后释放写连接（毫秒）
+        storage_backend_l1: str = "duckdb"       # L1 存储后端：duckdb / parquet / hybrid
+        storage_backend_l2: str = "duckdb"       # L2 读取后端：duckdb / parquet / hybrid
+        storage_backend_l3: str = "duckdb"       # L3 读取后端：duckdb / parquet / hybrid
 
         # ---- 交易参数 ----
         trading_max_industry_rank: int = 5       # 行业排名上限
@@ -287,6 +301,14 @@ else:
         tushare_rate_limit_per_min: int = 120
         tushare_primary_rate_limit_per_min: int = 0
         tushare_fallback_rate_limit_per_min: int = 0
+        tushare_rate_limit_burst: int = 1
+        tushare_rate_limit_scope: str = "process"
+        tushare_channel_schedule: str = "failover"
+        tushare_channel_breaker_failures: int = 3
+        tushare_channel_breaker_cooldown_seconds: float = 30.0
+        tushare_fetch_concurrency: int = 4
+        tushare_range_row_cap: int = 6000
+        tushare_fetch_batch_mode: str = "range"
 
         data_path: str = ""
         duckdb_dir: str = ""
@@ -301,6 +323,12 @@ else:
         stale_hard_limit_days: int = 3
         enable_intraday_incremental: bool = False
         streamlit_port: int = 8501
+        duckdb_writer_group_commit_ms: int = 20
+        duckdb_writer_max_batch: int = 64
+        duckdb_writer_idle_close_ms: int = 200
+        storage_backend_l1: str = "duckdb"
+        storage_backend_l2: str = "duckdb"
+        storage_backend_l3: str = "duckdb"
         trading_max_industry_rank: int = 5
         trading_min_irs_score: float = 50.0
         trading_min_pas_score: float = 60.0
@@ -383,6 +411,18 @@ else:
                 tushare_fallback_rate_limit_per_min=int(
                     os.getenv("TUSHARE_FALLBACK_RATE_LIMIT_PER_MIN", "0")
                 ),
+                tushare_rate_limit_burst=int(os.getenv("TUSHARE_RATE_LIMIT_BURST", "1")),
+                tushare_rate_limit_scope=os.getenv("TUSHARE_RATE_LIMIT_SCOPE", "process"),
+                tushare_channel_schedule=os.getenv("TUSHARE_CHANNEL_SCHEDULE", "failover"),
+                tushare_channel_breaker_failures=int(
+                    os.getenv("TUSHARE_CHANNEL_BREAKER_FAILURES", "3")
+                ),
+                tushare_channel_breaker_cooldown_seconds=float(
+                    os.getenv("TUSHARE_CHANNEL_BREAKER_COOLDOWN_SECONDS", "30.0")
+                ),
+                tushare_fetch_concurrency=int(os.getenv("TUSHARE_FETCH_CONCURRENCY", "4")),
+                tushare_range_row_cap=int(os.getenv("TUSHARE_RANGE_ROW_CAP", "6000")),
+                tushare_fetch_batch_mode=os.getenv("TUSHARE_FETCH_BATCH_MODE", "range"),
                 data_path=storage["data_path"],
                 duckdb_dir=storage["duckdb_dir"],
                 parquet_path=storage["parquet_path"],
@@ -399,6 +439,16 @@ else:
                 ).strip().lower()
                 in {"1", "true", "y", "yes"},
                 streamlit_port=int(os.getenv("STREAMLIT_PORT", "8501")),
+                duckdb_writer_group_commit_ms=int(
+                    os.getenv("DUCKDB_WRITER_GROUP_COMMIT_MS", "20")
+                ),
+                duckdb_writer_max_batch=int(os.getenv("DUCKDB_WRITER_MAX_BATCH", "64")),
+                duckdb_writer_idle_close_ms=int(
+                    os.getenv("DUCKDB_WRITER_IDLE_CLOSE_MS", "200")
+                ),
+                storage_backend_l1=os.getenv("STORAGE_BACKEND_L1", "duckdb"),
+                storage_backend_l2=os.getenv("STORAGE_BACKEND_L2", "duckdb"),
+                storage_backend_l3=os.getenv("STORAGE_BACKEND_L3", "duckdb"),
                 trading_max_industry_rank=int(
                     os.getenv("TRADING_MAX_INDUSTRY_RANK", "5")
                 ),
@@ -1,8 +1,10 @@
 """批量数据拉取流水线（S3a）：支持断点续传、多线程并行、失败重试。
 
-将日期范围切分为 batch window，每个 batch 内逐个交易日调用 run_l1_collection。
+将日期范围切分为 batch window，每个 batch 默认调用 run_l1_window_collection
+按区间整窗拉取（tushare_fetch_batch_mode=daily 时逐个交易日调用 run_l1_collection）。
 进度持久化到 JSON，中断后可从上次进度继续。
 失败的 batch 可通过 run_fetch_retry() 单独重试。
+并行 worker 共享同一组通道令牌桶（shared_channel_rate_limiter），合计速率不超过配额。
 """
 
 from __future__ import annotations
@@ -19,7 +21,9 @@ from typing import Any
 
 from src.config.config import Config
 from src.data.fetcher import TuShareFetcher
-from src.data.l1_pipeline import run_l1_collection
+from src.data.l1_pipeline import run_l1_collection, run_l1_window_collection
+from src.data.rate_limiter import shared_channel_rate_limiter
+from src.db.process_lock import duckdb_lock_wait_snapshot
 
 # DESIGN_TRACE:
 # - Governance/SpiralRoadmap/planA/SPIRAL-S3A-S4B-EXECUTABLE-ROADMAP.md (§5 S3a)
@@ -322,6 +326,8 @@ def _write_throughput_benchmark(
     execution_mode: str,
     records: list[BatchExecutionRecord],
     wall_seconds: float,
+    rate_limit_stats: dict[str, dict[str, float]] | None = None,
+    lock_wait_stats: dict[str, float] | None = None,
 ) -> None:
     processed_batches = len(records)
     serial_seconds = sum(max(0.0, item.elapsed_seconds) for item in records)
@@ -361,11 +367,65 @@ def _write_throughput_benchmark(
     else:
         lines.append("- per_batch_details: none")
 
+    if rate_limit_stats:
+        lines.append("- rate_limit_channels:")
+        for channel_name, stats in sorted(rate_limit_stats.items()):
+            lines.append(
+                f"  - channel={channel_name} "
+                f"rate_per_min={int(stats.get('rate_per_min', 0))} "
+                f"burst={int(stats.get('burst', 1))} "
+                f"acquired={int(stats.get('acquired', 0))} "
+                f"waited={int(stats.get('waited', 0))} "
+                f"wait_seconds_total={float(stats.get('wait_seconds_total', 0.0)):.6f} "
+                f"wait_seconds_max={float(stats.get('wait_seconds_max', 0.0)):.6f}"
+            )
+    else:
+        lines.append("- rate_limit_channels: none")
+
+    if lock_wait_stats:
+        lines.append(
+            "- duckdb_lock_wait: "
+            f"acquired={int(lock_wait_stats.get('acquired', 0))} "
+            f"waited={int(lock_wait_stats.get('waited', 0))} "
+            f"timeouts={int(lock_wait_stats.get('timeouts', 0))} "
+            f"wait_seconds_total={float(lock_wait_stats.get('wait_seconds_total', 0.0)):.6f} "
+            f"wait_seconds_max={float(lock_wait_stats.get('wait_seconds_max', 0.0)):.6f}"
+        )
+    else:
+        lines.append("- duckdb_lock_wait: none")
+
     lines.append("")
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text("\n".join(lines), encoding="utf-8")
 
 
+def _rate_limit_stats_delta(
+    baseline: dict[str, dict[str, float]],
+    current: dict[str, dict[str, float]],
+) -> dict[str, dict[str, float]]:
+    # 共享令牌桶的统计是进程累计值，吞吐报告只统计本次运行的增量
+    cumulative_keys = ("acquired", "waited", "wait_seconds_total")
+    delta: dict[str, dict[str, float]] = {}
+    for channel_name, stats in current.items():
+        before = baseline.get(channel_name, {})
+        item = dict(stats)
+        for key in cumulative_keys:
+            item[key] = float(stats.get(key, 0.0)) - float(before.get(key, 0.0))
+        delta[channel_name] = item
+    return delta
+
+
+def _lock_wait_stats_delta(
+    baseline: dict[str, float],
+    current: dict[str, float],
+) -> dict[str, float]:
+    # 进程锁等待统计同为进程累计值；wait_seconds_max 无法求增量，沿用累计最大值
+    delta = dict(current)
+    for key in ("acquired", "waited", "timeouts", "wait_seconds_total"):
+        delta[key] = float(current.get(key, 0.0)) - float(baseline.get(key, 0.0))
+    return delta
+
+
 def _write_retry_report(
     path: Path,
     *,
@@ -478,6 +538,17 @@ def _iter_trade_dates(start_date: str, end_date: str) -> list[str]:
     return dates
 
 
+FETCH_BATCH_MODES = ("range", "daily")
+
+
+def _normalize_fetch_batch_mode(mode: str | None) -> str:
+    value = str(mode or "range").strip().lower() or "range"
+    if value not in FETCH_BATCH_MODES:
+        supported = ", ".join(FETCH_BATCH_MODES)
+        raise ValueError(f"invalid tushare_fetch_batch_mode: {mode!r}; supported: {supported}")
+    return value
+
+
 def _is_open_marker(marker: Any) -> bool:
     if marker is None:
         return True
@@ -548,26 +619,35 @@ def _execute_batch_window(
             trade_dates=len(trade_dates),
             open_trade_dates=len(trade_dates),
         )
-    fetcher = TuShareFetcher(config=config, max_retries=3)
+    # 所有 worker 从同一组通道令牌桶取令牌，避免各自限速导致合计超出配额
+    fetcher = TuShareFetcher(
+        config=config,
+        max_retries=3,
+        rate_limiter=shared_channel_rate_limiter(config),
+    )
     open_trade_dates = 0
     try:
-        open_dates = _load_open_trade_dates_for_window(
-            fetcher=fetcher,
-            start_date=window.start_date,
-            end_date=window.end_date,
+        fetch_mode = _normalize_fetch_batch_mode(
+            getattr(config, "tushare_fetch_batch_mode", "range")
         )
-        open_trade_dates = len(open_dates)
-        for index, trade_date in enumerate(open_dates, start=1):
-            if trade_date_callback is not None:
-                trade_date_callback(trade_date, index, open_trade_dates)
-            result = run_l1_collection(
-                trade_date=trade_date,
+        if fetch_mode == "range":
+            window_result = run_l1_window_collection(
+                start_date=window.start_date,
+                end_date=window.end_date,
                 source="tushare",
                 config=config,
                 fetcher=fetcher,
+                trade_date_callback=trade_date_callback,
             )
-            if result.has_error:
-                error_text = _read_error_manifest_text(result.error_manifest_path)
+            open_trade_dates = len(window_result.trade_dates)
+            failed = window_result.first_failed
+            if window_result.has_error:
+                error_text = (
+                    _read_error_manifest_text(failed.error_manifest_path)
+                    if failed is not None
+                    else _read_error_manifest_text(window_result.artifacts_dir / "raw_counts.json")
+                )
+                failed_label = failed.trade_date if failed is not None else window.start_date
                 return BatchExecutionRecord(
                     batch_id=window.batch_id,
                     start_date=window.start_date,
@@ -576,8 +656,36 @@ def _execute_batch_window(
                     elapsed_seconds=perf_counter() - started,
                     trade_dates=len(trade_dates),
                     open_trade_dates=open_trade_dates,
-                    error=f"trade_date={trade_date} {error_text}",
+                    error=f"trade_date={failed_label} {error_text}",
+                )
+        else:
+            open_dates = _load_open_trade_dates_for_window(
+                fetcher=fetcher,
+                start_date=window.start_date,
+                end_date=window.end_date,
+            )
+            open_trade_dates = len(open_dates)
+            for index, trade_date in enumerate(open_dates, start=1):
+                if trade_date_callback is not None:
+                    trade_date_callback(trade_date, index, open_trade_dates)
+                result = run_l1_collection(
+                    trade_date=trade_date,
+                    source="tushare",
+                    config=config,
+                    fetcher=fetcher,
                 )
+                if result.has_error:
+                    error_text = _read_error_manifest_text(result.error_manifest_path)
+                    return BatchExecutionRecord(
+                        batch_id=window.batch_id,
+                        start_date=window.start_date,
+                        end_date=window.end_date,
+                        status="failed",
+                        elapsed_seconds=perf_counter() - started,
+                        trade_dates=len(trade_dates),
+                        open_trade_dates=open_trade_dates,
+                        error=f"trade_date={trade_date} {error_text}",
+                    )
     except Exception as exc:
         return BatchExecutionRecord(
             batch_id=window.batch_id,
@@ -689,6 +797,10 @@ def run_fetch_batch(
 
     processed = 0
     execution_records: list[BatchExecutionRecord] = []
+    rate_limit_baseline = (
+        shared_channel_rate_limiter(config).snapshot() if has_live_token else {}
+    )
+    lock_wait_baseline = duckdb_lock_wait_snapshot()
     started = perf_counter()
     stop_after_limit = None if stop_after_batches is None else max(0, int(stop_after_batches))
     pending_windows: list[BatchWindow] = []
@@ -849,6 +961,11 @@ def run_fetch_batch(
         execution_mode=execution_mode,
         records=execution_records,
         wall_seconds=wall_seconds,
+        rate_limit_stats=_rate_limit_stats_delta(
+            rate_limit_baseline,
+            shared_channel_rate_limiter(config).snapshot() if has_live_token else {},
+        ),
+        lock_wait_stats=_lock_wait_stats_delta(lock_wait_baseline, duckdb_lock_wait_snapshot()),
     )
     _write_retry_report(
         retry_report_path,
@@ -1,7 +1,9 @@
 """数据拉取层：TuShare API 封装、重试、限流、双通道故障转移。
 
 核心组件：
-- TuShareFetcher: 带重试 + 限流 + 双通道 failover 的数据拉取器
+- TuShareFetcher: 带重试 + 限流 + 双通道调度的数据拉取器
+  （限流由 src.data.rate_limiter 的通道令牌桶提供，可跨 fetcher 共享）
+  通道调度支持 failover（主备严格顺序）与 balanced（按限速加权分流 + 熔断）两种模式
 - RealTuShareClient: 真实 TuShare SDK 适配器（支持 tushare / tinyshare）
 - SimulatedTuShareClient: 确定性离线模拟客户端（用于契约测试）
 """
@@ -11,10 +13,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, timedelta
 import importlib
+import threading
 import time
 from typing import Any, Callable, Protocol
 
+import pyarrow as pa
+
 from src.config.config import Config
+from src.data.rate_limiter import ChannelRateLimiter, build_channel_rate_limiter
+from src.data.record_batch import as_arrow_table, normalize_tushare_fields
 
 # DESIGN_TRACE:
 # - docs/design/core-infrastructure/data-layer/data-layer-api.md (§2 数据采集 API, §3 适配器与重试)
@@ -25,6 +32,17 @@ DESIGN_TRACE = {
 }
 
 
+CHANNEL_SCHEDULES = ("failover", "balanced")
+
+
+def normalize_channel_schedule(schedule: str | None) -> str:
+    value = str(schedule or "failover").strip().lower() or "failover"
+    if value not in CHANNEL_SCHEDULES:
+        supported = ", ".join(CHANNEL_SCHEDULES)
+        raise ValueError(f"invalid tushare_channel_schedule: {schedule!r}; supported: {supported}")
+    return value
+
+
 class FetchClient(Protocol):
     def call(self, api_name: str, params: dict[str, Any]) -> Any:
         ...
@@ -38,6 +56,23 @@ class FetchAttempt:
     error: str = ""
 
 
+@dataclass
+class ChannelHealth:
+    """单通道健康度：延迟 / 错误率 EWMA、连续失败计数与熔断状态。"""
+
+    name: str
+    weight: float
+    calls: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    latency_ewma_seconds: float | None = None
+    error_rate_ewma: float = 0.0
+    ejected_until: float | None = None
+    ejections: int = 0
+    # 平滑加权轮询（smooth weighted round-robin）的当前权重
+    current_weight: float = 0.0
+
+
 class FetchError(RuntimeError):
     def __init__(self, api_name: str, attempts: list[FetchAttempt]) -> None:
         self.api_name = api_name
@@ -50,8 +85,11 @@ class SimulatedTuShareClient:
     """确定性离线模拟客户端，用于 S0b 契约测试。
 
     返回固定的模拟数据，不依赖网络。当 Config 中无任何 token 时自动启用。
+    daily / daily_basic / limit_list / index_daily 同时支持 start_date/end_date 区间请求。
     """
 
+    _RANGE_APIS = frozenset({"daily", "daily_basic", "limit_list", "index_daily"})
+
     _SIMULATED_CLOSED_TRADE_DAYS = frozenset(
         {
             # New year closure.
@@ -106,6 +144,24 @@ class SimulatedTuShareClient:
         return day.weekday() < 5
 
     def call(self, api_name: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        if (
+            api_name in self._RANGE_APIS
+            and not str(params.get("trade_date", "")).strip()
+            and str(params.get("start_date", "")).strip()
+        ):
+            start_date = str(params["start_date"]).strip()
+            end_date = str(params.get("end_date") or start_date).strip()
+            day_params = {
+                key: value
+                for key, value in params.items()
+                if key not in {"start_date", "end_date"}
+            }
+            range_rows: list[dict[str, Any]] = []
+            for trade_date in self._iter_trade_dates(start_date=start_date, end_date=end_date):
+                if self._is_open_trade_day(trade_date):
+                    range_rows.extend(self.call(api_name, {**day_params, "trade_date": trade_date}))
+            return range_rows
+
         if api_name == "daily":
             trade_date = str(params.get("trade_date", ""))
             if not trade_date:
@@ -258,7 +314,8 @@ class RealTuShareClient:
     """真实 TuShare SDK 适配器，用于生产环境数据拉取。
 
     支持 tushare / tinyshare 两种 SDK，可配置第三方网关 http_url。
-    自动将 TuShare DataFrame 输出转为 list[dict] 并补全 stock_code 字段。
+    call_table() 将 TuShare DataFrame 输出转为 Arrow Table，
+    并按列补全 trade_date / stock_code 字段；call() 保留 list[dict] 契约。
     """
 
     _API_METHOD_MAP = {
@@ -306,6 +363,10 @@ class RealTuShareClient:
             setattr(self._pro, "_DataApi__http_url", gateway_http_url)
 
     def call(self, api_name: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        return self.call_table(api_name, params).to_pylist()
+
+    def call_table(self, api_name: str, params: dict[str, Any]) -> pa.Table:
+        """列式拉取：SDK 返回的 DataFrame 直接转为 Arrow Table，字段补全按列完成。"""
         method_name = self._API_METHOD_MAP.get(api_name)
         if method_name is None:
             raise ValueError(f"unsupported api_name: {api_name}")
@@ -315,70 +376,29 @@ class RealTuShareClient:
         if method is None:
             raise RuntimeError(f"tushare api not available: {method_name}")
         payload = method(**params)
-        rows = self._normalize_records(payload)
-        return self._normalize_fields(api_name=api_name, rows=rows, request_params=params)
-
-    def _normalize_records(self, payload: Any) -> list[dict[str, Any]]:
-        if payload is None:
-            return []
-        if isinstance(payload, list):
-            return [row for row in payload if isinstance(row, dict)]
-        if hasattr(payload, "to_dict"):
-            records = payload.to_dict(orient="records")
-            return [row for row in records if isinstance(row, dict)]
-        raise TypeError(f"unsupported payload type from tushare: {type(payload)!r}")
-
-    def _normalize_fields(
-        self,
-        *,
-        api_name: str,
-        rows: list[dict[str, Any]],
-        request_params: dict[str, Any],
-    ) -> list[dict[str, Any]]:
-        normalized: list[dict[str, Any]] = []
-        requested_trade_date = str(
-            request_params.get("trade_date", "")
-            or request_params.get("start_date", "")
-            or request_params.get("end_date", "")
-        ).strip()
-        for row in rows:
-            item = dict(row)
-            if api_name == "trade_cal" and not item.get("trade_date"):
-                cal_date = str(item.get("cal_date", "")).strip()
-                if cal_date:
-                    item["trade_date"] = cal_date
-            if (
-                api_name in {"daily", "daily_basic", "index_daily", "limit_list", "index_member"}
-                and not str(item.get("trade_date", "")).strip()
-                and requested_trade_date
-            ):
-                item["trade_date"] = requested_trade_date
-            ts_code = str(item.get("ts_code", ""))
-            if (
-                api_name in {"daily", "daily_basic", "limit_list", "stock_basic"}
-                and not item.get("stock_code")
-                and len(ts_code) >= 6
-            ):
-                item["stock_code"] = ts_code[:6]
-            if api_name == "index_member":
-                con_code = str(item.get("con_code", "")).strip()
-                if not ts_code and con_code:
-                    item["ts_code"] = con_code
-                    ts_code = con_code
-                if not item.get("stock_code") and len(ts_code) >= 6:
-                    item["stock_code"] = ts_code[:6]
-            normalized.append(item)
-        return normalized
+        try:
+            table = as_arrow_table(payload)
+        except TypeError as exc:
+            raise TypeError(f"unsupported payload type from tushare: {type(payload)!r}") from exc
+        return normalize_tushare_fields(table, api_name=api_name, request_params=params)
 
 
 class TuShareFetcher:
     """带重试、限流、双通道故障转移的 TuShare 数据拉取器。
 
     初始化时根据 Config 自动构建 primary + fallback 两个通道。
-    每次调用按通道限流等待，主通道失败自动切换兜底通道。
+    每次调用按通道令牌桶限流等待，失败自动切换到其它通道。
+    传入 rate_limiter 时多个 fetcher（如并行 worker）共享同一组令牌桶。
     重试轨迹记录在 retry_report 中，便于诊断。
+
+    通道调度（tushare_channel_schedule）：
+    - failover: 始终先走 primary，失败才走 fallback（默认，兼容旧行为）
+    - balanced: 按各通道 *_rate_limit_per_min 加权轮询分流，充分使用兜底 token 配额；
+      连续失败达到阈值的通道被熔断剔除一段冷却期，冷却后放行一次试探调用（半开）
     """
 
+    channel_ewma_alpha = 0.2
+
     def __init__(
         self,
         client: FetchClient | None = None,
@@ -387,6 +407,7 @@ class TuShareFetcher:
         config: Config | None = None,
         now_fn: Callable[[], float] | None = None,
         sleep_fn: Callable[[float], None] | None = None,
+        rate_limiter: ChannelRateLimiter | None = None,
     ) -> None:
         self._clients: list[tuple[str, FetchClient]] = []
         if client is not None:
@@ -433,51 +454,85 @@ class TuShareFetcher:
         self.client = self._clients[0][1]
         self.max_retries = max(1, max_retries)
         self.retry_report: list[FetchAttempt] = []
+        # 只有真实 TuShare 通道需要限流；模拟/自定义客户端不受配额约束
+        self._rate_limited_channels = {
+            channel_name
+            for channel_name, channel_client in self._clients
+            if isinstance(channel_client, RealTuShareClient)
+        }
+        if rate_limiter is not None:
+            self._rate_limiter = rate_limiter
+        elif config is not None:
+            self._rate_limiter = build_channel_rate_limiter(
+                config,
+                now_fn=now_fn,
+                sleep_fn=sleep_fn,
+            )
+        else:
+            self._rate_limiter = ChannelRateLimiter({})
         self._now_fn = now_fn or time.monotonic
-        self._sleep_fn = sleep_fn or time.sleep
-        self._channel_last_call_at: dict[str, float] = {}
-        self._channel_min_interval_seconds: dict[str, float] = {}
+        self.channel_schedule = "failover"
+        self.breaker_failure_threshold = 3
+        self.breaker_cooldown_seconds = 30.0
         if config is not None:
-            global_rate_limit = max(0, int(config.tushare_rate_limit_per_min))
-            primary_rate_limit = max(0, int(config.tushare_primary_rate_limit_per_min))
-            fallback_rate_limit = max(0, int(config.tushare_fallback_rate_limit_per_min))
-            for channel_name, channel_client in self._clients:
-                if not isinstance(channel_client, RealTuShareClient):
-                    self._channel_min_interval_seconds[channel_name] = 0.0
-                    continue
-                if channel_name == "primary":
-                    rate_limit = primary_rate_limit if primary_rate_limit > 0 else global_rate_limit
-                elif channel_name == "fallback":
-                    rate_limit = fallback_rate_limit if fallback_rate_limit > 0 else global_rate_limit
-                else:
-                    rate_limit = global_rate_limit
-                self._channel_min_interval_seconds[channel_name] = (
-                    60.0 / rate_limit if rate_limit > 0 else 0.0
-                )
-        else:
-            for channel_name, _ in self._clients:
-                self._channel_min_interval_seconds[channel_name] = 0.0
+            self.channel_schedule = normalize_channel_schedule(
+                getattr(config, "tushare_channel_schedule", "failover")
+            )
+            self.breaker_failure_threshold = max(
+                1, int(getattr(config, "tushare_channel_breaker_failures", 3))
+            )
+            self.breaker_cooldown_seconds = max(
+                0.0, float(getattr(config, "tushare_channel_breaker_cooldown_seconds", 30.0))
+            )
+        self._schedule_lock = threading.Lock()
+        self._channel_health = self._build_channel_health()
+
+    def _build_channel_health(self) -> dict[str, ChannelHealth]:
+        # 分流权重取通道限速；不限速（0）的通道按已知最大权重处理，全部不限速则等权
+        rates = {
+            channel_name: float(self._rate_limiter.rate_per_min(channel_name))
+            if channel_name in self._rate_limited_channels
+            else 0.0
+            for channel_name, _ in self._clients
+        }
+        max_rate = max(rates.values(), default=0.0)
+        return {
+            channel_name: ChannelHealth(
+                name=channel_name,
+                weight=(rate if rate > 0 else (max_rate if max_rate > 0 else 1.0)),
+            )
+            for channel_name, rate in rates.items()
+        }
+
+    @property
+    def rate_limiter(self) -> ChannelRateLimiter:
+        return self._rate_limiter
 
     def _respect_rate_limit(self, channel_name: str) -> None:
-        # 按通道独立限流：计算上次调用距今多久，不足最小间隔则 sleep
-        min_interval_seconds = self._channel_min_interval_seconds.get(channel_name, 0.0)
-        if min_interval_seconds <= 0:
+        # 按通道从令牌桶取令牌；共享限流器时由所有 fetcher 合计占用配额
+        if channel_name not in self._rate_limited_channels:
             return
-        now = self._now_fn()
-        last_call_at = self._channel_last_call_at.get(channel_name)
-        if last_call_at is not None:
-            elapsed = now - last_call_at
-            remaining = min_interval_seconds - elapsed
-            if remaining > 0:
-                self._sleep_fn(remaining)
-                now = self._now_fn()
-        self._channel_last_call_at[channel_name] = now
+        self._rate_limiter.acquire(channel_name)
 
     def fetch_with_retry(self, api_name: str, params: dict[str, Any]) -> Any:
+        return self._fetch_with_retry(api_name, params, columnar=False)
+
+    def fetch_table(self, api_name: str, params: dict[str, Any]) -> pa.Table:
+        """与 fetch_with_retry 相同的重试 / 限流 / 通道调度，结果为 Arrow Table。
+
+        通道客户端提供 call_table() 时直接取列式结果，否则将 call() 的 list[dict] 转换。
+        """
+        return as_arrow_table(self._fetch_with_retry(api_name, params, columnar=True))
+
+    def _fetch_with_retry(self, api_name: str, params: dict[str, Any], *, columnar: bool) -> Any:
         attempts: list[FetchAttempt] = []
         for attempt in range(1, self.max_retries + 1):
             try:
-                payload = self._call_with_failover(api_name=api_name, params=params)
+                payload = self._call_with_failover(
+                    api_name=api_name,
+                    params=params,
+                    columnar=columnar,
+                )
                 item = FetchAttempt(
                     api_name=api_name,
                     attempt=attempt,
@@ -500,15 +555,133 @@ class TuShareFetcher:
 
         raise FetchError(api_name=api_name, attempts=attempts)
 
-    def _call_with_failover(self, *, api_name: str, params: dict[str, Any]) -> Any:
-        # 主通道失败时自动切换兜底通道，所有通道都失败则抛出异常
+    def _ordered_channels(self) -> list[tuple[str, FetchClient]]:
+        # failover: 固定主备顺序；balanced: 加权轮询选首选通道，其余健康通道兜底
+        if self.channel_schedule != "balanced" or len(self._clients) <= 1:
+            return list(self._clients)
+        with self._schedule_lock:
+            now = self._now_fn()
+            healthy = [
+                (channel_name, channel_client)
+                for channel_name, channel_client in self._clients
+                if not self._is_ejected(self._channel_health[channel_name], now)
+            ]
+            if not healthy:
+                # 全部熔断：按最早恢复顺序全部尝试，避免整体不可用
+                return sorted(
+                    self._clients,
+                    key=lambda item: float(self._channel_health[item[0]].ejected_until or 0.0),
+                )
+            total_weight = 0.0
+            for channel_name, _ in healthy:
+                health = self._channel_health[channel_name]
+                health.current_weight += health.weight
+                total_weight += health.weight
+            selected = max(
+                healthy,
+                key=lambda item: self._channel_health[item[0]].current_weight,
+            )
+            self._channel_health[selected[0]].current_weight -= total_weight
+            others = sorted(
+                (item for item in healthy if item[0] != selected[0]),
+                key=lambda item: (
+                    self._channel_health[item[0]].error_rate_ewma,
+                    -self._channel_health[item[0]].weight,
+                ),
+            )
+            return [selected, *others]
+
+    @staticmethod
+    def _is_ejected(health: ChannelHealth, now: float) -> bool:
+        return health.ejected_until is not None and now < health.ejected_until
+
+    def _record_channel_result(
+        self,
+        channel_name: str,
+        *,
+        success: bool,
+        latency_seconds: float,
+    ) -> None:
+        alpha = float(self.channel_ewma_alpha)
+        with self._schedule_lock:
+            health = self._channel_health[channel_name]
+            health.calls += 1
+            latency = max(0.0, float(latency_seconds))
+            if health.latency_ewma_seconds is None:
+                health.latency_ewma_seconds = latency
+            else:
+                health.latency_ewma_seconds = (
+                    alpha * latency + (1.0 - alpha) * health.latency_ewma_seconds
+                )
+            health.error_rate_ewma = (
+                alpha * (0.0 if success else 1.0) + (1.0 - alpha) * health.error_rate_ewma
+            )
+            if success:
+                health.consecutive_failures = 0
+                health.ejected_until = None
+                return
+            health.errors += 1
+            health.consecutive_failures += 1
+            if (
+                self.channel_schedule == "balanced"
+                and health.consecutive_failures >= self.breaker_failure_threshold
+            ):
+                health.ejected_until = self._now_fn() + self.breaker_cooldown_seconds
+                health.ejections += 1
+
+    def channel_health_snapshot(self) -> dict[str, dict[str, Any]]:
+        """各通道调度统计（调用/错误次数、延迟与错误率 EWMA、熔断状态）。"""
+        with self._schedule_lock:
+            now = self._now_fn()
+            return {
+                channel_name: {
+                    "weight": health.weight,
+                    "calls": health.calls,
+                    "errors": health.errors,
+                    "latency_ewma_seconds": health.latency_ewma_seconds,
+                    "error_rate_ewma": health.error_rate_ewma,
+                    "ejected": self._is_ejected(health, now),
+                    "ejections": health.ejections,
+                }
+                for channel_name, health in self._channel_health.items()
+            }
+
+    def _call_with_failover(
+        self,
+        *,
+        api_name: str,
+        params: dict[str, Any],
+        columnar: bool = False,
+    ) -> Any:
+        # 按调度顺序逐个通道尝试，失败自动切换下一个通道，所有通道都失败则抛出异常
         errors: list[str] = []
-        for channel_name, channel_client in self._clients:
+        for channel_name, channel_client in self._ordered_channels():
             try:
                 self._respect_rate_limit(channel_name)
-                return channel_client.call(api_name, params)
+            except Exception as exc:  # pragma: no cover - defensive
+                errors.append(f"{channel_name}:{exc}")
+                continue
+            started = self._now_fn()
+            call_table = getattr(channel_client, "call_table", None) if columnar else None
+            try:
+                if callable(call_table):
+                    payload = call_table(api_name, params)
+                else:
+                    payload = channel_client.call(api_name, params)
             except Exception as exc:  # pragma: no cover - exercised via contract tests
+                self._record_channel_result(
+                    channel_name,
+                    success=False,
+                    latency_seconds=self._now_fn() - started,
+                )
                 errors.append(f"{channel_name}:{exc}")
+                continue
+            self._record_channel_result(
+                channel_name,
+                success=True,
+                latency_seconds=self._now_fn() - started,
+            )
+            return payload
         if errors:
             raise RuntimeError("; ".join(errors))
         raise RuntimeError("no_available_tushare_client")
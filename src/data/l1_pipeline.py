@@ -2,8 +2,8 @@
 
 流程：
 1. 确定哪些数据集需要拉取（日频 / 月频 / 半年频）
-2. 通过 Repository.fetch() + TuShareFetcher 拉取数据
-3. save_to_database() + save_to_parquet() 落盘
+2. 通过 Repository.fetch() + TuShareFetcher 并发拉取数据（共享通道令牌桶）
+3. 全部拉取完成后在一个写会话、一个事务内 save_to_database()，提交后 save_to_parquet()
 4. 评估数据质量门禁（Quality Gate）
 5. 输出产物文件（raw_counts / retry_report / quality_gate_report）
 """
@@ -11,22 +11,38 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 from dataclasses import dataclass
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 import duckdb
+import pyarrow as pa
 
 from src.config.config import Config
-from src.db.helpers import column_exists as _table_has_column, table_exists as _table_exists
+from src.db.helpers import (
+    WriteSession,
+    column_exists as _table_has_column,
+    table_exists as _table_exists,
+)
+from src.db.writer_client import RemoteWriteSession
 from src.data.fetcher import FetchAttempt, TuShareFetcher
+from src.data.record_batch import as_arrow_table, count_by_trade_date
+from src.db.storage_backend import open_read_connection, storage_backend
+from src.data.rate_limiter import shared_channel_rate_limiter
 from src.data.repositories.daily_basic import DailyBasicRepository
 from src.data.repositories.daily import DailyRepository
 from src.data.repositories.index_classify import IndexClassifyRepository
 from src.data.repositories.index_daily import IndexDailyRepository
 from src.data.repositories.index_member import IndexMemberRepository
 from src.data.repositories.limit_list import LimitListRepository
-from src.data.repositories.base import DuckDBLockRecoveryError
+from src.data.repositories.base import (
+    DEFAULT_RANGE_ROW_CAP,
+    BaseRepository,
+    DuckDBLockRecoveryError,
+)
 from src.data.repositories.stock_basic import StockBasicRepository
 from src.data.repositories.trade_calendars import TradeCalendarsRepository
 from src.data.quality_gate import STATUS_BLOCKED, evaluate_data_quality_gate
@@ -45,6 +61,10 @@ DESIGN_TRACE = {
 }
 
 
+# 支持 start_date/end_date 区间拉取的日频数据集（窗口采集模式下整窗拉取）
+RANGE_FETCH_DATASETS = ("raw_daily", "raw_daily_basic", "raw_index_daily", "raw_limit_list")
+
+
 @dataclass(frozen=True)
 class L1RunResult:
     trade_date: str
@@ -56,6 +76,23 @@ class L1RunResult:
     error_manifest_path: Path
 
 
+@dataclass(frozen=True)
+class L1WindowRunResult:
+    start_date: str
+    end_date: str
+    source: str
+    artifacts_dir: Path
+    trade_dates: tuple[str, ...]
+    raw_counts: dict[str, int]
+    api_calls: int
+    day_results: tuple[L1RunResult, ...]
+    has_error: bool
+
+    @property
+    def first_failed(self) -> L1RunResult | None:
+        return next((item for item in self.day_results if item.has_error), None)
+
+
 def _write_json(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(
@@ -64,11 +101,18 @@ def _write_json(path: Path, payload: dict[str, Any]) -> None:
     )
 
 
-def _write_fetch_retry_report(path: Path, attempts: list[FetchAttempt]) -> None:
+def _write_fetch_retry_report(
+    path: Path,
+    attempts: list[FetchAttempt],
+    *,
+    channel_schedule: str = "failover",
+    channel_health: dict[str, dict[str, Any]] | None = None,
+) -> None:
     lines = [
         "# Fetch Retry Report",
         "",
         f"- total_attempts: {len(attempts)}",
+        f"- channel_schedule: {channel_schedule}",
     ]
     if not attempts:
         lines.append("- details: none")
@@ -79,6 +123,19 @@ def _write_fetch_retry_report(path: Path, attempts: list[FetchAttempt]) -> None:
             if item.error:
                 detail = f"{detail} error={item.error}"
             lines.append(detail)
+    if channel_health:
+        lines.append("- channels:")
+        for channel_name, health in channel_health.items():
+            latency = health.get("latency_ewma_seconds")
+            latency_text = "na" if latency is None else f"{float(latency):.4f}"
+            lines.append(
+                f"  - channel={channel_name} calls={int(health.get('calls', 0))} "
+                f"errors={int(health.get('errors', 0))} "
+                f"latency_ewma_seconds={latency_text} "
+                f"error_rate_ewma={float(health.get('error_rate_ewma', 0.0)):.4f} "
+                f"ejected={str(bool(health.get('ejected', False))).lower()} "
+                f"ejections={int(health.get('ejections', 0))}"
+            )
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
@@ -188,6 +245,115 @@ def _should_fetch_dataset(
     )
 
 
+def _build_l1_repositories(config: Config) -> dict[str, BaseRepository]:
+    return {
+        "raw_daily": DailyRepository(config),
+        "raw_daily_basic": DailyBasicRepository(config),
+        "raw_index_daily": IndexDailyRepository(config),
+        "raw_index_member": IndexMemberRepository(config),
+        "raw_index_classify": IndexClassifyRepository(config),
+        "raw_stock_basic": StockBasicRepository(config),
+        "raw_trade_cal": TradeCalendarsRepository(config),
+        "raw_limit_list": LimitListRepository(config),
+    }
+
+
+def _dataset_error(dataset: str, exc: Exception) -> dict[str, str]:
+    if isinstance(exc, DuckDBLockRecoveryError):
+        return {
+            "dataset": dataset,
+            "error_type": "duckdb_lock_recovery_exhausted",
+            "message": exc.last_error_message,
+            "lock_holder_pid": exc.lock_holder_pid or "unknown",
+            "retry_attempts": str(exc.retry_attempts),
+            "wait_seconds_total": f"{exc.wait_seconds_total:.3f}",
+            "lock_wait_seconds": f"{exc.lock_wait_seconds:.3f}",
+            "lock_holder_command": exc.lock_holder_command or "unknown",
+            "lock_holder_since": exc.lock_holder_since or "unknown",
+        }
+    return {
+        "dataset": dataset,
+        "error_type": "fetch_or_persist_error",
+        "message": str(exc),
+    }
+
+
+def _trade_cal_flags(rows: list[dict[str, Any]], trade_date: str) -> tuple[bool, bool | None]:
+    # 返回 (交易日历是否包含 trade_date, trade_date 是否开市；未知为 None)
+    for row in rows:
+        if str(row.get("trade_date", "")) != trade_date:
+            continue
+        marker = row.get("is_open", row.get("is_trading"))
+        marker_text = str(marker).strip().lower()
+        return True, marker_text in {"1", "true", "y", "yes"}
+    return False, None
+
+
+def _build_fetch_plan(
+    database_path: Path,
+    *,
+    datasets: tuple[str, ...],
+    trade_date: str,
+    config: Config | None = None,
+) -> dict[str, dict[str, str | bool]]:
+    """在同一个只读连接内一次性确定当日各数据集是否需要拉取。"""
+    fetch_plan: dict[str, dict[str, str | bool]] = {}
+    connection: duckdb.DuckDBPyConnection | None = None
+    if database_path.exists() or storage_backend(config, "l1") != "duckdb":
+        try:
+            connection = open_read_connection(database_path, config=config)
+        except Exception:
+            connection = None
+    try:
+        for dataset in datasets:
+            should_fetch = True
+            if connection is not None:
+                try:
+                    should_fetch = _should_fetch_dataset(
+                        connection,
+                        dataset=dataset,
+                        trade_date=trade_date,
+                    )
+                except Exception:
+                    should_fetch = True
+            fetch_plan[dataset] = {
+                "schedule": _dataset_schedule(dataset),
+                "snapshot_trade_date": _resolve_snapshot_trade_date(dataset, trade_date),
+                "fetched": should_fetch,
+            }
+    finally:
+        if connection is not None:
+            connection.close()
+    return fetch_plan
+
+
+def _save_tables(
+    repositories: dict[str, BaseRepository],
+    tables: list[tuple[str, pa.Table]],
+) -> list[int]:
+    """在一个写会话、一个事务内落盘多个数据集，返回各表写入行数。
+
+    任一写入失败整体回滚并抛出；全部为 parquet 后端时不打开 DuckDB 写会话。
+    """
+    if not tables:
+        return []
+    with ExitStack() as stack:
+        session: WriteSession | RemoteWriteSession | None = None
+        if any(repositories[dataset].storage_backend != "parquet" for dataset, _ in tables):
+            session = stack.enter_context(repositories[tables[0][0]].open_write_session())
+            stack.enter_context(session.batch())
+        return [
+            repositories[dataset].save_to_database(table, session=session)
+            for dataset, table in tables
+        ]
+
+
+def _save_parquet_mirror(repository: BaseRepository, table: pa.Table) -> None:
+    if repository.storage_backend != "parquet":
+        # parquet 后端的 save_to_database 已写入 Parquet 湖
+        repository.save_to_parquet(table)
+
+
 def run_l1_collection(
     *,
     trade_date: str,
@@ -197,99 +363,127 @@ def run_l1_collection(
 ) -> L1RunResult:
     """执行单个交易日的 L1 数据采集。
 
-    依次拉取 8 个数据集（daily / daily_basic / index_daily / limit_list /
-    trade_cal / stock_basic / index_member / index_classify），
-    落盘后评估 Quality Gate，输出产物文件。
+    拉取 8 个数据集（daily / daily_basic / index_daily / limit_list /
+    trade_cal / stock_basic / index_member / index_classify）：先在一个只读连接内
+    生成拉取计划，再以 tushare_fetch_concurrency 个线程并发调用接口，
+    全部拉取完成后在一个写会话、一个事务内落盘，最后评估 Quality Gate，输出产物文件。
     """
     if source.lower() != "tushare":
         raise ValueError(f"unsupported source for S0b: {source}")
 
-    effective_fetcher = fetcher or TuShareFetcher(config=config)
-    artifacts_dir = Path("artifacts") / "spiral-s0b" / trade_date
-
-    repositories = {
-        "raw_daily": DailyRepository(config),
-        "raw_daily_basic": DailyBasicRepository(config),
-        "raw_index_daily": IndexDailyRepository(config),
-        "raw_index_member": IndexMemberRepository(config),
-        "raw_index_classify": IndexClassifyRepository(config),
-        "raw_stock_basic": StockBasicRepository(config),
-        "raw_trade_cal": TradeCalendarsRepository(config),
-        "raw_limit_list": LimitListRepository(config),
-    }
+    effective_fetcher = fetcher or TuShareFetcher(
+        config=config,
+        rate_limiter=shared_channel_rate_limiter(config),
+    )
+    repositories = _build_l1_repositories(config)
     raw_counts: dict[str, int] = {}
-    fetch_plan: dict[str, dict[str, str | bool]] = {}
     errors: list[dict[str, str]] = []
     trade_cal_contains_trade_date = False
     trade_cal_is_open: bool | None = None
 
     database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
     thresholds = init_quality_context(database_path, config=config)
-    min_coverage_ratio = float(thresholds["min_coverage_ratio"])
-    stale_hard_limit_days = int(thresholds["stale_hard_limit_days"])
 
-    for dataset, repository in repositories.items():
-        snapshot_trade_date = _resolve_snapshot_trade_date(dataset, trade_date)
-        should_fetch = True
-        if database_path.exists():
-            try:
-                with duckdb.connect(str(database_path), read_only=True) as snapshot_connection:
-                    should_fetch = _should_fetch_dataset(
-                        snapshot_connection,
-                        dataset=dataset,
-                        trade_date=trade_date,
-                    )
-            except Exception:
-                should_fetch = True
-        fetch_plan[dataset] = {
-            "schedule": _dataset_schedule(dataset),
-            "snapshot_trade_date": snapshot_trade_date,
-            "fetched": should_fetch,
-        }
-        if not should_fetch:
-            raw_counts[dataset] = 0
-            continue
-        try:
-            rows = repository.fetch(
+    fetch_plan = _build_fetch_plan(
+        database_path,
+        datasets=tuple(repositories),
+        trade_date=trade_date,
+        config=config,
+    )
+    pending_datasets = [
+        dataset for dataset in repositories if bool(fetch_plan[dataset]["fetched"])
+    ]
+    dataset_counts: dict[str, int] = {}
+    dataset_errors: dict[str, dict[str, str]] = {}
+    max_workers = max(
+        1,
+        min(len(pending_datasets), int(getattr(config, "tushare_fetch_concurrency", 1))),
+    )
+
+    # 网络拉取并发执行（合计速率由通道令牌桶约束），拉取期间不持有进程锁与读写连接；
+    # 全部拉取完成后打开一个写会话，当日各数据集在一个事务内落盘
+    tables: dict[str, pa.Table] = {}
+    trade_cal_rows: Any = None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="l1-fetch") as executor:
+        futures = {
+            executor.submit(
+                repositories[dataset].fetch,
                 trade_date=trade_date,
                 fetcher=effective_fetcher,
-                snapshot_trade_date=snapshot_trade_date,
-            )
-            saved_count = repository.save_to_database(rows)
-            repository.save_to_parquet(rows)
-            raw_counts[dataset] = saved_count
+                snapshot_trade_date=str(fetch_plan[dataset]["snapshot_trade_date"]),
+            ): dataset
+            for dataset in pending_datasets
+        }
+        for future in as_completed(futures):
+            dataset = futures[future]
+            try:
+                rows = future.result()
+                # DuckDB 与 Parquet 落盘共用同一个 Arrow Table，只转换一次
+                tables[dataset] = as_arrow_table(rows)
+                if dataset == "raw_trade_cal":
+                    trade_cal_rows = rows
+            except Exception as exc:  # pragma: no cover - covered via contract test
+                dataset_errors[dataset] = _dataset_error(dataset, exc)
+
+    pending_tables = [(dataset, tables[dataset]) for dataset in repositories if dataset in tables]
+    try:
+        saved_counts = _save_tables(repositories, pending_tables)
+    except Exception as exc:
+        for dataset, _ in pending_tables:
+            dataset_errors[dataset] = _dataset_error(dataset, exc)
+    else:
+        for (dataset, table), saved_count in zip(pending_tables, saved_counts, strict=True):
+            try:
+                _save_parquet_mirror(repositories[dataset], table)
+            except Exception as exc:
+                dataset_errors[dataset] = _dataset_error(dataset, exc)
+                continue
+            dataset_counts[dataset] = saved_count
             if dataset == "raw_trade_cal":
-                trade_cal_contains_trade_date = any(
-                    str(row.get("trade_date", "")) == trade_date for row in rows
+                trade_cal_contains_trade_date, trade_cal_is_open = _trade_cal_flags(
+                    trade_cal_rows, trade_date
                 )
-                for row in rows:
-                    if str(row.get("trade_date", "")) != trade_date:
-                        continue
-                    marker = row.get("is_open", row.get("is_trading"))
-                    marker_text = str(marker).strip().lower()
-                    trade_cal_is_open = marker_text in {"1", "true", "y", "yes"}
-                    break
-        except DuckDBLockRecoveryError as exc:
-            raw_counts[dataset] = 0
-            errors.append(
-                {
-                    "dataset": dataset,
-                    "error_type": "duckdb_lock_recovery_exhausted",
-                    "message": exc.last_error_message,
-                    "lock_holder_pid": exc.lock_holder_pid or "unknown",
-                    "retry_attempts": str(exc.retry_attempts),
-                    "wait_seconds_total": f"{exc.wait_seconds_total:.3f}",
-                }
-            )
-        except Exception as exc:  # pragma: no cover - covered via contract test
-            raw_counts[dataset] = 0
-            errors.append(
-                {
-                    "dataset": dataset,
-                    "error_type": "fetch_or_persist_error",
-                    "message": str(exc),
-                }
-            )
+
+    # 计数与错误按数据集固定顺序输出，保证产物与完成顺序无关
+    for dataset in repositories:
+        raw_counts[dataset] = dataset_counts.get(dataset, 0)
+        if dataset in dataset_errors:
+            errors.append(dataset_errors[dataset])
+
+    return _finalize_l1_trade_date(
+        trade_date=trade_date,
+        source=source,
+        config=config,
+        database_path=database_path,
+        thresholds=thresholds,
+        raw_counts=raw_counts,
+        fetch_plan=fetch_plan,
+        errors=errors,
+        trade_cal_contains_trade_date=trade_cal_contains_trade_date,
+        trade_cal_is_open=trade_cal_is_open,
+        retry_fetcher=effective_fetcher,
+    )
+
+
+def _finalize_l1_trade_date(
+    *,
+    trade_date: str,
+    source: str,
+    config: Config,
+    database_path: Path,
+    thresholds: dict[str, float | int],
+    raw_counts: dict[str, int],
+    fetch_plan: dict[str, dict[str, str | bool]],
+    errors: list[dict[str, str]],
+    trade_cal_contains_trade_date: bool,
+    trade_cal_is_open: bool | None,
+    retry_fetcher: TuShareFetcher | None,
+) -> L1RunResult:
+    """单交易日收尾：门禁检查、Quality Gate 评估与落库、输出产物文件。"""
+    artifacts_dir = Path("artifacts") / "spiral-s0b" / trade_date
+    min_coverage_ratio = float(thresholds["min_coverage_ratio"])
+    stale_hard_limit_days = int(thresholds["stale_hard_limit_days"])
+    errors = list(errors)
 
     gate_issues: list[str] = []
     if trade_cal_is_open is not False and raw_counts.get("raw_daily", 0) <= 0:
@@ -415,10 +609,13 @@ def run_l1_collection(
         },
     }
     _write_json(artifacts_dir / "raw_counts.json", raw_counts_payload)
-    _write_fetch_retry_report(
-        artifacts_dir / "fetch_retry_report.md",
-        list(effective_fetcher.retry_report),
-    )
+    if retry_fetcher is not None:
+        _write_fetch_retry_report(
+            artifacts_dir / "fetch_retry_report.md",
+            list(retry_fetcher.retry_report),
+            channel_schedule=retry_fetcher.channel_schedule,
+            channel_health=retry_fetcher.channel_health_snapshot(),
+        )
 
     error_manifest_payload = {
         "trade_date": trade_date,
@@ -444,3 +641,242 @@ def run_l1_collection(
         has_error=bool(errors),
         error_manifest_path=manifest_path,
     )
+
+
+def _open_trade_dates(
+    rows: list[dict[str, Any]],
+    *,
+    start_date: str,
+    end_date: str,
+) -> list[str]:
+    open_days: set[str] = set()
+    for row in rows:
+        trade_date = str(row.get("trade_date", row.get("cal_date", ""))).strip()
+        if not trade_date or trade_date < start_date or trade_date > end_date:
+            continue
+        marker = row.get("is_open", row.get("is_trading"))
+        if marker is None or str(marker).strip().lower() in {"1", "true", "y", "yes"}:
+            open_days.add(trade_date)
+    return sorted(open_days)
+
+
+def run_l1_window_collection(
+    *,
+    start_date: str,
+    end_date: str,
+    source: str,
+    config: Config,
+    fetcher: TuShareFetcher | None = None,
+    row_cap: int | None = None,
+    trade_date_callback: Callable[[str, int, int], None] | None = None,
+) -> L1WindowRunResult:
+    """按窗口执行 L1 采集：区间接口整窗拉取，再按 trade_date 拆分落盘与逐日门禁。
+
+    - trade_cal 整窗一次拉取，确定窗口内开市日
+    - RANGE_FETCH_DATASETS 以 start_date/end_date 区间并发拉取（按 row_cap 分块），
+    - 低频数据集（月频 / 半年频）按快照周期补拉，同一周期只拉一次
+    - 全部拉取完成后打开一个写会话，整窗各数据集的全部交易日分区在一个事务内写入
+    - 每个开市日按 run_l1_collection 相同口径评估 Quality Gate 并输出日级产物
+    """
+    if source.lower() != "tushare":
+        raise ValueError(f"unsupported source for S0b: {source}")
+
+    effective_fetcher = fetcher or TuShareFetcher(
+        config=config,
+        rate_limiter=shared_channel_rate_limiter(config),
+    )
+    effective_row_cap = max(
+        1,
+        int(row_cap or getattr(config, "tushare_range_row_cap", DEFAULT_RANGE_ROW_CAP)),
+    )
+    artifacts_dir = Path("artifacts") / "spiral-s0b" / f"window_{start_date}_{end_date}"
+    repositories = _build_l1_repositories(config)
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    thresholds = init_quality_context(database_path, config=config)
+    attempts_before = len(effective_fetcher.retry_report)
+
+    dataset_trade_date_counts: dict[str, dict[str, int]] = {}
+    dataset_totals: dict[str, int] = {}
+    window_errors: dict[str, dict[str, str]] = {}
+
+    # 交易日历、区间分块与低频补拉先全部拉取并排队（等待网络期间不持有进程锁与读写连接），
+    # 再打开一个写会话，整窗各数据集在一个事务内落盘；低频条目记录其补拉交易日
+    pending_tables: list[tuple[str, pa.Table, str | None]] = []
+
+    trade_cal_rows: list[dict[str, Any]] = []
+    try:
+        trade_cal_rows = repositories["raw_trade_cal"].fetch_range(
+            trade_dates=[start_date, end_date],
+            fetcher=effective_fetcher,
+        )
+        pending_tables.append(("raw_trade_cal", as_arrow_table(trade_cal_rows), None))
+    except Exception as exc:
+        window_errors["raw_trade_cal"] = _dataset_error("raw_trade_cal", exc)
+    trade_dates = _open_trade_dates(trade_cal_rows, start_date=start_date, end_date=end_date)
+
+    max_workers = max(
+        1,
+        min(len(RANGE_FETCH_DATASETS), int(getattr(config, "tushare_fetch_concurrency", 1))),
+    )
+    if trade_dates:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="l1-range"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    repositories[dataset].fetch_range,
+                    trade_dates=trade_dates,
+                    fetcher=effective_fetcher,
+                    row_cap=effective_row_cap,
+                ): dataset
+                for dataset in RANGE_FETCH_DATASETS
+            }
+            range_tables: dict[str, pa.Table] = {}
+            for future in as_completed(futures):
+                dataset = futures[future]
+                try:
+                    range_tables[dataset] = as_arrow_table(future.result())
+                except Exception as exc:
+                    window_errors[dataset] = _dataset_error(dataset, exc)
+        pending_tables.extend(
+            (dataset, range_tables[dataset], None)
+            for dataset in RANGE_FETCH_DATASETS
+            if dataset in range_tables
+        )
+
+    # 低频数据集：每个快照周期在窗口内首个开市日补拉一次
+    day_fetch_plans: dict[str, dict[str, dict[str, str | bool]]] = {}
+    low_frequency_counts: dict[tuple[str, str], int] = {}
+    day_errors: dict[tuple[str, str], dict[str, str]] = {}
+    seen_periods: set[tuple[str, str]] = set()
+    low_frequency = tuple(
+        dataset
+        for dataset in repositories
+        if dataset not in RANGE_FETCH_DATASETS and dataset != "raw_trade_cal"
+    )
+    for trade_date in trade_dates:
+        plan = _build_fetch_plan(
+            database_path,
+            datasets=tuple(repositories),
+            trade_date=trade_date,
+            config=config,
+        )
+        for dataset in low_frequency:
+            period = (dataset, str(plan[dataset]["snapshot_trade_date"]))
+            if not plan[dataset]["fetched"] or period in seen_periods:
+                plan[dataset]["fetched"] = False
+                continue
+            seen_periods.add(period)
+            try:
+                rows = repositories[dataset].fetch(
+                    trade_date=trade_date,
+                    fetcher=effective_fetcher,
+                    snapshot_trade_date=period[1],
+                )
+                pending_tables.append((dataset, as_arrow_table(rows), trade_date))
+            except Exception as exc:
+                day_errors[(dataset, trade_date)] = _dataset_error(dataset, exc)
+        day_fetch_plans[trade_date] = plan
+
+    def _record_error(dataset: str, trade_date: str | None, exc: Exception) -> None:
+        if trade_date is None:
+            window_errors[dataset] = _dataset_error(dataset, exc)
+        else:
+            day_errors[(dataset, trade_date)] = _dataset_error(dataset, exc)
+
+    try:
+        saved_counts = _save_tables(
+            repositories, [(dataset, table) for dataset, table, _ in pending_tables]
+        )
+    except Exception as exc:
+        for dataset, _, trade_date in pending_tables:
+            _record_error(dataset, trade_date, exc)
+    else:
+        for (dataset, table, trade_date), saved_count in zip(
+            pending_tables, saved_counts, strict=True
+        ):
+            try:
+                _save_parquet_mirror(repositories[dataset], table)
+            except Exception as exc:
+                _record_error(dataset, trade_date, exc)
+                continue
+            dataset_totals[dataset] = dataset_totals.get(dataset, 0) + saved_count
+            if trade_date is not None:
+                low_frequency_counts[(dataset, trade_date)] = saved_count
+            merged = dataset_trade_date_counts.setdefault(dataset, {})
+            for key, count in count_by_trade_date(table).items():
+                merged[key] = merged.get(key, 0) + count
+
+    counts_by_dataset = {
+        dataset: dataset_trade_date_counts.get(dataset, {})
+        for dataset in RANGE_FETCH_DATASETS
+    }
+    day_results: list[L1RunResult] = []
+    for index, trade_date in enumerate(trade_dates, start=1):
+        if trade_date_callback is not None:
+            trade_date_callback(trade_date, index, len(trade_dates))
+        raw_counts: dict[str, int] = {}
+        errors: list[dict[str, str]] = []
+        for dataset in repositories:
+            if dataset in RANGE_FETCH_DATASETS:
+                raw_counts[dataset] = counts_by_dataset[dataset].get(trade_date, 0)
+            elif dataset == "raw_trade_cal":
+                raw_counts[dataset] = 1 if _trade_cal_flags(trade_cal_rows, trade_date)[0] else 0
+            else:
+                raw_counts[dataset] = low_frequency_counts.get((dataset, trade_date), 0)
+            if dataset in window_errors:
+                errors.append(window_errors[dataset])
+            elif (dataset, trade_date) in day_errors:
+                errors.append(day_errors[(dataset, trade_date)])
+        trade_cal_contains_trade_date, trade_cal_is_open = _trade_cal_flags(
+            trade_cal_rows, trade_date
+        )
+        day_results.append(
+            _finalize_l1_trade_date(
+                trade_date=trade_date,
+                source=source,
+                config=config,
+                database_path=database_path,
+                thresholds=thresholds,
+                raw_counts=raw_counts,
+                fetch_plan=day_fetch_plans[trade_date],
+                errors=errors,
+                trade_cal_contains_trade_date=trade_cal_contains_trade_date,
+                trade_cal_is_open=trade_cal_is_open,
+                retry_fetcher=None,
+            )
+        )
+
+    attempts = list(effective_fetcher.retry_report)[attempts_before:]
+    window_raw_counts = {dataset: int(dataset_totals.get(dataset, 0)) for dataset in repositories}
+    api_calls = sum(1 for item in attempts if item.status == "success")
+    _write_json(
+        artifacts_dir / "raw_counts.json",
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "source": source,
+            "trade_dates": trade_dates,
+            "row_cap": effective_row_cap,
+            "api_calls": api_calls,
+            "raw_counts": window_raw_counts,
+            "errors": list(window_errors.values()) + list(day_errors.values()),
+        },
+    )
+    _write_fetch_retry_report(
+        artifacts_dir / "fetch_retry_report.md",
+        attempts,
+        channel_schedule=effective_fetcher.channel_schedule,
+        channel_health=effective_fetcher.channel_health_snapshot(),
+    )
+    return L1WindowRunResult(
+        start_date=start_date,
+        end_date=end_date,
+        source=source,
+        artifacts_dir=artifacts_dir,
+        trade_dates=tuple(trade_dates),
+        raw_counts=window_raw_counts,
+        api_calls=api_calls,
+        day_results=tuple(day_results),
+        has_error=bool(window_errors or day_errors) or any(item.has_error for item in day_results),
+    )
@@ -3,7 +3,8 @@
 流程：
 1. 从 DuckDB 读取 L1 原始表（raw_daily / raw_limit_list / raw_daily_basic）
 2. 加载申万行业分类 + 成分股映射
-3. 生成 MarketSnapshot + IndustrySnapshot（SW31 维度或全市场兜底）
+3. 生成 MarketSnapshot + IndustrySnapshot（SW31 维度或全市场兜底）；
+   100 日新高 / 连续涨停等字段由个股滚动状态（src/data/rolling_state.py）增量提供
 4. 写入 DuckDB + Parquet + 产物文件
 5. 评估 L2 质量门禁
 """
@@ -11,21 +12,35 @@
 from __future__ import annotations
 
 import json
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, replace
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
 import duckdb
+import numpy as np
 import pandas as pd
 
 from src.config.config import Config
-from src.db.helpers import table_exists as _table_exists
+from src.db.helpers import WriteSession, open_write_session, table_exists as _table_exists
+from src.db.parquet_lake import write_trade_date_partitions
+from src.db.storage_backend import open_read_connection
+from src.data.market_daily_agg import MARKET_DAILY_AGG_TABLE, market_daily_agg_available
 from src.data.models.snapshots import IndustrySnapshot, MarketSnapshot
-from src.data.quality_gate import STATUS_BLOCKED, evaluate_data_quality_gate
+from src.data.quality_gate import STATUS_BLOCKED, DataGateDecision, evaluate_data_quality_gate
 from src.data.quality_store import (
     decision_to_json,
     init_quality_context,
     persist_quality_outputs,
+    persist_quality_outputs_batch,
+)
+from src.data.rolling_state import (
+    StockRollingState,
+    load_rolling_daily,
+    load_rolling_state,
+    persist_rolling_state,
+    rolling_state_as_of,
 )
 
 # DESIGN_TRACE:
@@ -39,6 +54,8 @@ DESIGN_TRACE = {
 SW31_EXPECTED_COUNT = 31
 SW31_SOURCE = "SW2021"
 SW31_LEVEL = "L1"
+# 区间批处理每次读取的交易日数（控制 L1 窗口驻留内存）
+L2_RANGE_CHUNK_TRADE_DAYS = 60
 
 
 @dataclass(frozen=True)
@@ -53,6 +70,30 @@ class L2RunResult:
     canary_report_path: Path
 
 
+@dataclass(frozen=True)
+class L2RangeRunResult:
+    start_date: str
+    end_date: str
+    source: str
+    artifacts_dir: Path
+    trade_dates: list[str]
+    market_snapshot_count: int
+    industry_snapshot_count: int
+    failed_trade_dates: list[str]
+    has_error: bool
+    range_report_path: Path
+
+
+@dataclass(frozen=True)
+class RollingStateUpdateResult:
+    as_of_trade_date: str
+    replayed_trade_dates: int
+    daily_rows: int
+    stock_count: int
+    rebuilt: bool
+    state_persisted: bool
+
+
 def _write_json(path: Path, payload: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(
@@ -73,17 +114,6 @@ def _normalize_stock_code(row: pd.Series) -> str:
     return ts_code or "UNKNOWN"
 
 
-def _clean_text(value: object) -> str:
-    if value is None:
-        return ""
-    try:
-        if pd.isna(value):
-            return ""
-    except Exception:
-        pass
-    return str(value).strip()
-
-
 def _resolve_pct_chg_percent(frame: pd.DataFrame) -> tuple[pd.Series, str]:
     if frame.empty:
         return (pd.Series(dtype=float), "pct_chg")
@@ -122,9 +152,10 @@ def _winsorized_median(series: pd.Series) -> float:
     numeric = pd.to_numeric(series, errors="coerce").dropna()
     if numeric.empty:
         return 0.0
-    lower = float(numeric.quantile(0.01))
-    upper = float(numeric.quantile(0.99))
-    return float(numeric.clip(lower=lower, upper=upper).median())
+    # 1%/99% 分位截尾后取中位数（numpy 线性插值与 Series.quantile / median 口径一致）
+    values = numeric.to_numpy(dtype=float)
+    lower, upper = np.quantile(values, [0.01, 0.99])
+    return float(np.median(np.clip(values, lower, upper)))
 
 
 def _compute_amount_volatility(*, today_total_amount: float, recent_market_amounts: list[float]) -> tuple[float, str]:
@@ -138,20 +169,32 @@ def _compute_amount_volatility(*, today_total_amount: float, recent_market_amoun
     return (float(volatility), "normal")
 
 
+def _market_amount_source(connection: duckdb.DuckDBPyConnection) -> str | None:
+    # 逐日全市场成交额：优先读物化聚合表，聚合表不存在时回退到 raw_daily 现算
+    if market_daily_agg_available(connection):
+        return f"SELECT trade_date, total_amount FROM {MARKET_DAILY_AGG_TABLE}"
+    if not _table_exists(connection, "raw_daily"):
+        return None
+    return (
+        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
+        "SUM(COALESCE(amount, 0.0)) AS total_amount "
+        "FROM raw_daily GROUP BY CAST(trade_date AS VARCHAR)"
+    )
+
+
 def _load_recent_market_amounts(
     connection: duckdb.DuckDBPyConnection,
     *,
     trade_date: str,
     lookback_days: int = 20,
 ) -> list[float]:
-    if not _table_exists(connection, "raw_daily"):
+    source = _market_amount_source(connection)
+    if source is None:
         return []
     frame = connection.execute(
-        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
-        "SUM(COALESCE(amount, 0.0)) AS total_amount "
-        "FROM raw_daily "
+        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, total_amount "
+        f"FROM ({source}) "
         "WHERE CAST(trade_date AS VARCHAR) < ? "
-        "GROUP BY CAST(trade_date AS VARCHAR) "
         "ORDER BY trade_date DESC "
         "LIMIT ?",
         [trade_date, int(max(lookback_days, 1))],
@@ -182,6 +225,11 @@ def _load_previous_industry_valuation_map(
         "FROM industry_snapshot WHERE CAST(trade_date AS VARCHAR) = ?",
         [previous_trade_date],
     ).df()
+    return _valuation_map_from_frame(frame)
+
+
+def _valuation_map_from_frame(frame: pd.DataFrame) -> dict[str, tuple[float, float]]:
+    # 行业 → (industry_pe_ttm, industry_pb)，缺失 / 非数值按 0.0
     if frame.empty:
         return {}
     mapping: dict[str, tuple[float, float]] = {}
@@ -197,6 +245,49 @@ def _load_previous_industry_valuation_map(
     return mapping
 
 
+_ROLLING_FLAG_COLUMNS = {
+    "is_new_100d_high": False,
+    "is_new_100d_low": False,
+    "limit_up_streak": 0,
+    "new_high_streak": 0,
+    "prev_limit_up": False,
+}
+
+
+def _rolling_flag_frame(codes: pd.Series, rolling_daily: pd.DataFrame | None) -> pd.DataFrame:
+    # 按 stock_code 对齐当日滚动判定（与 codes 同索引），无判定的股票按未命中
+    if rolling_daily is None or rolling_daily.empty:
+        return pd.DataFrame(
+            {column: [default] * len(codes) for column, default in _ROLLING_FLAG_COLUMNS.items()},
+            index=codes.index,
+        )
+    flags = rolling_daily.drop_duplicates(subset=["stock_code"], keep="last")
+    aligned = flags.set_index("stock_code").reindex(codes.astype(str).to_numpy())
+    return pd.DataFrame(
+        {
+            column: aligned[column].fillna(default).to_numpy(dtype=type(default))
+            for column, default in _ROLLING_FLAG_COLUMNS.items()
+        },
+        index=codes.index,
+    )
+
+
+def _rolling_snapshot_fields(flags: pd.DataFrame, pct: pd.Series) -> dict[str, Any]:
+    """由滚动判定聚合 100 日新高 / 新低、连续涨停、连续新高与昨日涨停今日均涨幅。"""
+    limit_up_streak = flags["limit_up_streak"].to_numpy()
+    yesterday_limit_up_pct = pct.to_numpy(dtype=float)[flags["prev_limit_up"].to_numpy(dtype=bool)]
+    return {
+        "new_100d_high_count": int(flags["is_new_100d_high"].sum()),
+        "new_100d_low_count": int(flags["is_new_100d_low"].sum()),
+        "continuous_limit_up_2d": int((limit_up_streak == 2).sum()),
+        "continuous_limit_up_3d_plus": int((limit_up_streak >= 3).sum()),
+        "continuous_new_high_2d_plus": int((flags["new_high_streak"].to_numpy() >= 2).sum()),
+        "yesterday_limit_up_today_avg_pct": (
+            float(yesterday_limit_up_pct.mean()) if yesterday_limit_up_pct.size else 0.0
+        ),
+    }
+
+
 def _build_market_snapshot(
     *,
     trade_date: str,
@@ -204,6 +295,7 @@ def _build_market_snapshot(
     limit_list: pd.DataFrame,
     flat_threshold_ratio: float,
     recent_market_amounts: list[float],
+    rolling_daily: pd.DataFrame | None = None,
 ) -> MarketSnapshot:
     working = daily.copy()
     for column in ("open", "close", "amount"):
@@ -228,6 +320,9 @@ def _build_market_snapshot(
         limit_up_count = 0
         limit_down_count = 0
         touched_limit_up = 0
+    rolling_fields = _rolling_snapshot_fields(
+        _rolling_flag_frame(_normalize_stock_code_series(working), rolling_daily), pct
+    )
 
     return MarketSnapshot(
         trade_date=trade_date,
@@ -240,6 +335,7 @@ def _build_market_snapshot(
         limit_up_count=limit_up_count,
         limit_down_count=limit_down_count,
         touched_limit_up=touched_limit_up,
+        **rolling_fields,
         pct_chg_std=float(pct.std(ddof=0)),
         amount_volatility=float(amount_volatility),
         data_quality="normal" if pct_source == "pct_chg" and amount_quality == "normal" else "cold_start",
@@ -254,6 +350,7 @@ def _build_industry_snapshot_all(
     daily: pd.DataFrame,
     limit_list: pd.DataFrame,
     flat_threshold_ratio: float,
+    rolling_daily: pd.DataFrame | None = None,
 ) -> IndustrySnapshot:
     working = daily.copy()
     for column in ("open", "close", "amount", "vol"):
@@ -274,6 +371,9 @@ def _build_industry_snapshot_all(
     else:
         limit_up_count = 0
         limit_down_count = 0
+    rolling_fields = _rolling_snapshot_fields(
+        _rolling_flag_frame(_normalize_stock_code_series(working), rolling_daily), pct
+    )
 
     return IndustrySnapshot(
         trade_date=trade_date,
@@ -291,38 +391,73 @@ def _build_industry_snapshot_all(
         style_bucket="balanced",
         limit_up_count=limit_up_count,
         limit_down_count=limit_down_count,
+        new_100d_high_count=rolling_fields["new_100d_high_count"],
+        new_100d_low_count=rolling_fields["new_100d_low_count"],
         top5_codes=top5_codes,
         top5_pct_chg=top5_pct_chg,
         top5_limit_up=min(limit_up_count, len(top5_codes)),
+        yesterday_limit_up_today_avg_pct=rolling_fields["yesterday_limit_up_today_avg_pct"],
         data_quality="normal",
         stale_days=0,
         source_trade_date=trade_date,
     )
 
 
-def _normalize_member_stock_code(row: pd.Series) -> str:
-    stock_code = _clean_text(row.get("stock_code", ""))
-    if stock_code:
-        return stock_code
-    ts_code = _clean_text(row.get("ts_code", ""))
-    if "." in ts_code:
-        return ts_code.split(".", maxsplit=1)[0]
-    con_code = _clean_text(row.get("con_code", ""))
-    if "." in con_code:
-        return con_code.split(".", maxsplit=1)[0]
-    return ts_code or con_code
+def _text_series(frame: pd.DataFrame, column: str, *, missing: str | None = None) -> pd.Series:
+    # 列转为去空白字符串；列不存在时为空串，缺失值取 missing（None 时与 str(value) 一致）
+    if column not in frame.columns:
+        return pd.Series([""] * len(frame), index=frame.index, dtype="object")
+    values = frame[column]
+    text = values.astype(str)
+    is_missing = values.isna()
+    if is_missing.any():
+        fill = values[is_missing].map(str) if missing is None else missing
+        text = text.where(~is_missing, fill)
+    return text.astype("object").str.strip()
+
+
+def _code_prefix(codes: pd.Series) -> pd.Series:
+    # "000001.SZ" → "000001"；不含 "." 时原样返回
+    return codes.str.split(".", n=1).str[0]
 
 
-def _normalize_industry_code(row: pd.Series) -> str:
-    return _clean_text(row.get("industry_code", ""))
+def _normalize_stock_code_series(frame: pd.DataFrame) -> pd.Series:
+    """_normalize_stock_code 的列式实现（逐行 apply 在单日 5,000+ 行上开销显著）。"""
+    stock_code = _text_series(frame, "stock_code")
+    ts_code = _text_series(frame, "ts_code")
+    from_ts_code = _code_prefix(ts_code).where(ts_code != "", "UNKNOWN")
+    return stock_code.where(stock_code != "", from_ts_code)
 
 
-def _is_member_active(row: pd.Series, trade_date: str) -> bool:
-    in_date = _clean_text(row.get("in_date", ""))
-    out_date = _clean_text(row.get("out_date", ""))
-    start = in_date if len(in_date) == 8 and in_date.isdigit() else "00000000"
-    end = out_date if len(out_date) == 8 and out_date.isdigit() else "99991231"
-    return start <= trade_date <= end
+def _normalize_member_stock_code_series(frame: pd.DataFrame) -> pd.Series:
+    """成分股代码：stock_code → ts_code 前缀 → con_code 前缀 → 原始 ts_code / con_code。"""
+    stock_code = _text_series(frame, "stock_code", missing="")
+    ts_code = _text_series(frame, "ts_code", missing="")
+    con_code = _text_series(frame, "con_code", missing="")
+    fallback = ts_code.where(ts_code != "", con_code)
+    fallback = _code_prefix(con_code).where(con_code.str.contains(".", regex=False), fallback)
+    fallback = _code_prefix(ts_code).where(ts_code.str.contains(".", regex=False), fallback)
+    return stock_code.where(stock_code != "", fallback)
+
+
+def _member_active_mask(frame: pd.DataFrame, trade_date: str) -> pd.Series:
+    """in_date <= trade_date <= out_date（非 8 位数字日期视为不设限）。"""
+    in_date = _text_series(frame, "in_date", missing="")
+    out_date = _text_series(frame, "out_date", missing="")
+    start = in_date.where((in_date.str.len() == 8) & in_date.str.isdigit(), "00000000")
+    end = out_date.where((out_date.str.len() == 8) & out_date.str.isdigit(), "99991231")
+    return (start <= trade_date) & (end >= trade_date)
+
+
+def _industry_positions(frame: pd.DataFrame) -> dict[str, np.ndarray]:
+    # 单次 groupby 按 industry_code 划分行位置（未映射行不参与），分区内保持原行序
+    if frame.empty or "industry_code" not in frame.columns:
+        return {}
+    keys = frame["industry_code"].astype(str)
+    return {
+        str(industry_code): positions
+        for industry_code, positions in frame.groupby(keys, sort=False).indices.items()
+    }
 
 
 def _load_sw31_classify(
@@ -343,7 +478,13 @@ def _load_sw31_classify(
     snapshot_trade_date = str(row[0] or "").strip() if row else ""
     if not snapshot_trade_date:
         return (pd.DataFrame.from_records([]), "")
+    return (_read_sw31_classify_snapshot(connection, snapshot_trade_date), snapshot_trade_date)
 
+
+def _read_sw31_classify_snapshot(
+    connection: duckdb.DuckDBPyConnection,
+    snapshot_trade_date: str,
+) -> pd.DataFrame:
     frame = connection.execute(
         "SELECT * FROM raw_index_classify "
         "WHERE CAST(trade_date AS VARCHAR) = ? "
@@ -352,11 +493,11 @@ def _load_sw31_classify(
         [snapshot_trade_date, SW31_SOURCE.upper(), SW31_LEVEL],
     ).df()
     if frame.empty:
-        return (frame, snapshot_trade_date)
+        return frame
 
     normalized = frame.copy()
     normalized["index_code"] = normalized["index_code"].astype(str).str.strip()
-    normalized["industry_code"] = normalized.apply(_normalize_industry_code, axis=1)
+    normalized["industry_code"] = _text_series(normalized, "industry_code", missing="")
     normalized["industry_name"] = (
         normalized.get("industry_name", pd.Series([""] * len(normalized)))
         .astype(str)
@@ -366,7 +507,7 @@ def _load_sw31_classify(
         (normalized["index_code"] != "")
         & normalized["industry_code"].astype(str).str.match(r"^\d{6}$")
     ].drop_duplicates(subset=["industry_code"], keep="first")
-    return (normalized, snapshot_trade_date)
+    return normalized
 
 
 def _load_index_member(
@@ -396,23 +537,29 @@ def _load_index_member(
         snapshot_trade_date = str(fallback[0] or "").strip() if fallback else ""
     if not snapshot_trade_date:
         return (pd.DataFrame.from_records([]), "")
+    return (_read_index_member_snapshot(connection, snapshot_trade_date), snapshot_trade_date)
 
+
+def _read_index_member_snapshot(
+    connection: duckdb.DuckDBPyConnection,
+    snapshot_trade_date: str,
+) -> pd.DataFrame:
     frame = connection.execute(
         "SELECT * FROM raw_index_member WHERE CAST(trade_date AS VARCHAR) = ?",
         [snapshot_trade_date],
     ).df()
     if frame.empty:
-        return (frame, snapshot_trade_date)
+        return frame
 
     normalized = frame.copy()
     normalized["index_code"] = normalized.get("index_code", pd.Series([""] * len(normalized))).astype(
         str
     ).str.strip()
-    normalized["stock_code"] = normalized.apply(_normalize_member_stock_code, axis=1)
+    normalized["stock_code"] = _normalize_member_stock_code_series(normalized)
     normalized = normalized[
         (normalized["index_code"] != "") & (normalized["stock_code"] != "")
     ].drop_duplicates(subset=["index_code", "stock_code"], keep="last")
-    return (normalized, snapshot_trade_date)
+    return normalized
 
 
 def _assign_style_bucket(frame: pd.DataFrame) -> pd.Series:
@@ -445,6 +592,7 @@ def _build_industry_snapshot_sw31(
     member_snapshot_trade_date: str,
     flat_threshold_ratio: float,
     previous_valuation_by_industry: dict[str, tuple[float, float]],
+    rolling_daily: pd.DataFrame | None = None,
 ) -> tuple[list[IndustrySnapshot], dict[str, object]]:
     daily_working = daily.copy()
     for column in ("open", "close", "amount", "vol"):
@@ -452,7 +600,7 @@ def _build_industry_snapshot_sw31(
             daily_working[column] = 0.0
         daily_working[column] = pd.to_numeric(daily_working[column], errors="coerce").fillna(0.0)
 
-    daily_working["stock_code"] = daily_working.apply(_normalize_stock_code, axis=1)
+    daily_working["stock_code"] = _normalize_stock_code_series(daily_working)
     daily_working["pct"], _ = _resolve_pct_chg_percent(daily_working)
     market_amount_total = float(pd.to_numeric(daily_working["amount"], errors="coerce").fillna(0.0).sum())
 
@@ -462,6 +610,7 @@ def _build_industry_snapshot_sw31(
             daily=daily_working,
             limit_list=limit_list,
             flat_threshold_ratio=flat_threshold_ratio,
+            rolling_daily=rolling_daily,
         )
         return (
             [fallback],
@@ -488,11 +637,7 @@ def _build_industry_snapshot_sw31(
 
     members = sw31_member.copy()
     members = members[members["index_code"].astype(str).isin(set(classify["index_code"].tolist()))]
-    if "in_date" not in members.columns:
-        members["in_date"] = ""
-    if "out_date" not in members.columns:
-        members["out_date"] = ""
-    members = members[members.apply(lambda row: _is_member_active(row, trade_date), axis=1)]
+    members = members[_member_active_mask(members, trade_date)]
     members = members.drop_duplicates(subset=["stock_code"], keep="first")
     members = members.merge(
         classify[["index_code", "industry_code", "industry_name"]],
@@ -509,10 +654,11 @@ def _build_industry_snapshot_sw31(
     mapped_stock_count = int(mapped["industry_code"].notna().sum())
     unmapped_stock_count = int(len(mapped) - mapped_stock_count)
     mapping_coverage = float(mapped_stock_count) / max(float(len(mapped)), 1.0)
+    mapped_flags = _rolling_flag_frame(mapped["stock_code"], rolling_daily)
 
     limit_working = limit_list.copy() if not limit_list.empty else pd.DataFrame()
     if not limit_working.empty:
-        limit_working["stock_code"] = limit_working.apply(_normalize_stock_code, axis=1)
+        limit_working["stock_code"] = _normalize_stock_code_series(limit_working)
         limit_working["limit_type"] = _resolve_limit_type_series(limit_working)
         limit_working = limit_working.merge(
             members[["stock_code", "industry_code"]],
@@ -522,7 +668,7 @@ def _build_industry_snapshot_sw31(
 
     basic_working = daily_basic.copy() if not daily_basic.empty else pd.DataFrame()
     if not basic_working.empty:
-        basic_working["stock_code"] = basic_working.apply(_normalize_stock_code, axis=1)
+        basic_working["stock_code"] = _normalize_stock_code_series(basic_working)
         for column in ("pe_ttm", "pb"):
             if column not in basic_working.columns:
                 basic_working[column] = 0.0
@@ -534,38 +680,49 @@ def _build_industry_snapshot_sw31(
         )
 
     # 逐行业聚合是 SW31 语义口径的关键步骤，输出必须保持行业级可审计字段。
+    # 三张表各做一次 groupby 划分行业分区，替代逐行业的全列 astype(str) 比较扫描；
+    # 行业内统计仍在分区上按原表达式计算：pandas 分组求和 / nlargest 的累加顺序与
+    # 并列排序口径不同，逐行业结果需与历史快照逐位一致。
+    daily_positions = _industry_positions(mapped)
+    limit_positions = _industry_positions(limit_working)
+    basic_positions = _industry_positions(basic_working)
+    no_rows = np.empty(0, dtype=np.intp)
     row_dicts: list[dict[str, object]] = []
     for industry_row in classify.sort_values(["industry_code"]).itertuples(index=False):
         industry_code = str(industry_row.industry_code).strip()
         industry_name = str(industry_row.industry_name).strip() or industry_code
-        subset = mapped[mapped["industry_code"].astype(str) == industry_code].copy()
+        subset = mapped.take(daily_positions.get(industry_code, no_rows))
+        rolling_fields = _rolling_snapshot_fields(
+            mapped_flags.take(daily_positions.get(industry_code, no_rows)), subset["pct"]
+        )
         ranking = subset.sort_values("pct", ascending=False).head(5)
-        # top5 采用当日涨幅排序，作为行业领涨强度与连板统计输入。
-        top5_codes = [_normalize_stock_code(record) for record in ranking.to_dict("records")]
+        # top5 采用当日涨幅排序，作为行业领涨强度与连板统计输入（stock_code 已规范化）。
+        top5_codes = [str(value) for value in ranking["stock_code"]]
         top5_pct_chg = [float(round(float(value), 4)) for value in ranking["pct"]]
 
         if not limit_working.empty:
-            limit_subset = limit_working[limit_working["industry_code"].astype(str) == industry_code]
+            limit_subset = limit_working.take(limit_positions.get(industry_code, no_rows))
             limit_up_count = int((limit_subset["limit_type"] == "U").sum())
             limit_down_count = int((limit_subset["limit_type"] == "D").sum())
         else:
+            limit_subset = limit_working
             limit_up_count = 0
             limit_down_count = 0
 
         top5_set = set(top5_codes)
-        if not limit_working.empty and top5_set:
-            top5_limit_subset = limit_working[
-                (limit_working["industry_code"].astype(str) == industry_code)
-                & (limit_working["stock_code"].astype(str).isin(top5_set))
-                & (limit_working["limit_type"] == "U")
-            ]
-            top5_limit_up = int(len(top5_limit_subset))
+        if not limit_subset.empty and top5_set:
+            top5_limit_up = int(
+                (
+                    limit_subset["stock_code"].astype(str).isin(top5_set)
+                    & (limit_subset["limit_type"] == "U")
+                ).sum()
+            )
         else:
             top5_limit_up = 0
 
         previous_pe, previous_pb = previous_valuation_by_industry.get(industry_code, (0.0, 0.0))
         if not basic_working.empty:
-            basic_subset = basic_working[basic_working["industry_code"].astype(str) == industry_code]
+            basic_subset = basic_working.take(basic_positions.get(industry_code, no_rows))
             valid_pe = pd.to_numeric(basic_subset["pe_ttm"], errors="coerce")
             valid_pe = valid_pe[(valid_pe > 0.0) & (valid_pe <= 1000.0)].dropna()
             if len(valid_pe) >= 8:
@@ -602,12 +759,14 @@ def _build_industry_snapshot_sw31(
                 "industry_pb": industry_pb,
                 "limit_up_count": limit_up_count,
                 "limit_down_count": limit_down_count,
-                "new_100d_high_count": 0,
-                "new_100d_low_count": 0,
+                "new_100d_high_count": rolling_fields["new_100d_high_count"],
+                "new_100d_low_count": rolling_fields["new_100d_low_count"],
                 "top5_codes": top5_codes,
                 "top5_pct_chg": top5_pct_chg,
                 "top5_limit_up": top5_limit_up,
-                "yesterday_limit_up_today_avg_pct": 0.0,
+                "yesterday_limit_up_today_avg_pct": rolling_fields[
+                    "yesterday_limit_up_today_avg_pct"
+                ],
                 "data_quality": "normal",
                 "stale_days": 0,
                 "source_trade_date": trade_date,
@@ -621,6 +780,7 @@ def _build_industry_snapshot_sw31(
             daily=daily_working,
             limit_list=limit_list,
             flat_threshold_ratio=flat_threshold_ratio,
+            rolling_daily=rolling_daily,
         )
         return (
             [fallback],
@@ -661,56 +821,13 @@ def _persist_snapshot_table(
     database_path: Path,
     table_name: str,
     frame: pd.DataFrame,
+    session: WriteSession | None = None,
 ) -> int:
-    database_path.parent.mkdir(parents=True, exist_ok=True)
-    with duckdb.connect(str(database_path)) as connection:
-        incoming = frame.copy()
-        connection.register("incoming_df", incoming)
-        connection.execute(
-            f"CREATE TABLE IF NOT EXISTS {table_name} "
-            "AS SELECT * FROM incoming_df WHERE 1=0"
-        )
-        existing_columns = {
-            str(row[1]): str(row[2])
-            for row in connection.execute(f"PRAGMA table_info('{table_name}')").fetchall()
-        }
-        for column in incoming.columns:
-            if column in existing_columns:
-                continue
-            series = incoming[column]
-            if pd.api.types.is_bool_dtype(series):
-                column_type = "BOOLEAN"
-            elif pd.api.types.is_integer_dtype(series):
-                column_type = "BIGINT"
-            elif pd.api.types.is_float_dtype(series):
-                column_type = "DOUBLE"
-            elif pd.api.types.is_datetime64_any_dtype(series):
-                column_type = "TIMESTAMP"
-            else:
-                column_type = "VARCHAR"
-            connection.execute(
-                f"ALTER TABLE {table_name} ADD COLUMN {column} {column_type}"
-            )
-
-        table_columns = [
-            str(row[1]) for row in connection.execute(f"PRAGMA table_info('{table_name}')").fetchall()
-        ]
-        aligned = incoming.copy()
-        for column in table_columns:
-            if column not in aligned.columns:
-                aligned[column] = pd.NA
-        aligned = aligned[table_columns]
-        connection.unregister("incoming_df")
-        connection.register("incoming_df", aligned)
-
-        if "trade_date" in aligned.columns:
-            connection.execute(
-                f"DELETE FROM {table_name} WHERE CAST(trade_date AS VARCHAR) IN ("
-                "SELECT DISTINCT CAST(trade_date AS VARCHAR) FROM incoming_df WHERE trade_date IS NOT NULL)"
-            )
-        connection.execute(f"INSERT INTO {table_name} SELECT * FROM incoming_df")
-        connection.unregister("incoming_df")
-    return int(len(aligned))
+    # 按 frame 中出现的 trade_date 分区幂等写入；传入 session 时复用其连接与事务
+    if session is not None:
+        return session.write_frame(table_name, frame)
+    with open_write_session(database_path) as own_session:
+        return own_session.write_frame(table_name, frame)
 
 
 def _write_sw_mapping_audit(path: Path, *, trade_date: str, strict_sw31: bool, payload: dict[str, object]) -> None:
@@ -817,6 +934,145 @@ def _write_canary_report(
     path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+def _evaluate_l2_gate(
+    *,
+    trade_date: str,
+    market_snapshot_count: int,
+    industry_snapshot_count: int,
+    min_coverage_ratio: float,
+    stale_hard_limit_days: int,
+    strict_sw31: bool,
+    sw_audit_payload: dict[str, object],
+    errors: list[dict[str, str]],
+) -> tuple[DataGateDecision, list[dict[str, Any]]]:
+    # L2 就绪门禁：P0 错误并入 issues 并阻断；门禁阻断时追加 data_readiness_gate_blocked
+    source_trade_dates = {
+        "market_snapshot": trade_date,
+        "industry_snapshot": trade_date,
+    }
+    coverage_ratio = (
+        float(1 if market_snapshot_count > 0 else 0)
+        + float(1 if industry_snapshot_count > 0 else 0)
+    ) / 2.0
+    quality_by_dataset = {
+        "market_snapshot": "normal" if market_snapshot_count > 0 else "stale",
+        "industry_snapshot": "normal" if industry_snapshot_count > 0 else "stale",
+    }
+    stale_days_by_dataset = {
+        "market_snapshot": 0 if market_snapshot_count > 0 else 1,
+        "industry_snapshot": 0 if industry_snapshot_count > 0 else 1,
+    }
+    decision = evaluate_data_quality_gate(
+        trade_date=trade_date,
+        coverage_ratio=coverage_ratio,
+        source_trade_dates=source_trade_dates,
+        quality_by_dataset=quality_by_dataset,
+        stale_days_by_dataset=stale_days_by_dataset,
+        min_coverage=min_coverage_ratio,
+        stale_hard_limit=stale_hard_limit_days,
+    )
+    p0_messages = [
+        f"{item.get('step', 'unknown')}:{item.get('message', '')}"
+        for item in errors
+        if str(item.get("error_level", "")) == "P0"
+    ]
+    if p0_messages:
+        merged_issues = [*decision.issues, *p0_messages]
+        decision = replace(
+            decision,
+            status=STATUS_BLOCKED,
+            is_ready=False,
+            issues=merged_issues,
+        )
+    if decision.status == STATUS_BLOCKED and not any(
+        item.get("message") == "data_readiness_gate_blocked"
+        for item in errors
+    ):
+        errors.append(
+            {
+                "error_level": "P0",
+                "step": "gate",
+                "trade_date": trade_date,
+                "message": "data_readiness_gate_blocked",
+            }
+        )
+
+    report_rows: list[dict[str, Any]] = [
+        {
+            "check_item": "l2_market_snapshot_count",
+            "expected_value": ">0",
+            "actual_value": str(market_snapshot_count),
+            "deviation": 0.0 if market_snapshot_count > 0 else 1.0,
+            "status": "PASS" if market_snapshot_count > 0 else "FAIL",
+            "gate_status": decision.status,
+            "affected_layers": "L2",
+            "action": "continue" if market_snapshot_count > 0 else "block",
+        },
+        {
+            "check_item": "l2_industry_snapshot_count",
+            "expected_value": ">0",
+            "actual_value": str(industry_snapshot_count),
+            "deviation": 0.0 if industry_snapshot_count > 0 else 1.0,
+            "status": "PASS" if industry_snapshot_count > 0 else "FAIL",
+            "gate_status": decision.status,
+            "affected_layers": "L2",
+            "action": "continue" if industry_snapshot_count > 0 else "block",
+        },
+    ]
+    if strict_sw31:
+        strict_ok = (
+            bool(sw_audit_payload.get("uses_sw31", False))
+            and int(sw_audit_payload.get("industry_count", 0) or 0) == SW31_EXPECTED_COUNT
+            and ("ALL" not in set(sw_audit_payload.get("industry_codes", [])))
+        )
+        report_rows.append(
+            {
+                "check_item": "l2_sw31_strict_gate",
+                "expected_value": "industry_count=31 & no_ALL",
+                "actual_value": (
+                    f"industry_count={int(sw_audit_payload.get('industry_count', 0) or 0)}, "
+                    f"uses_sw31={str(bool(sw_audit_payload.get('uses_sw31', False))).lower()}"
+                ),
+                "deviation": 0.0 if strict_ok else 1.0,
+                "status": "PASS" if strict_ok else "FAIL",
+                "gate_status": decision.status,
+                "affected_layers": "L2",
+                "action": "continue" if strict_ok else "block",
+            }
+        )
+    report_rows.append(
+        {
+            "check_item": "l2_readiness_gate",
+            "expected_value": "ready/degraded",
+            "actual_value": decision.status,
+            "deviation": max(0.0, min_coverage_ratio - coverage_ratio),
+            "status": (
+                "PASS"
+                if decision.status == "ready"
+                else ("WARN" if decision.status == "degraded" else "FAIL")
+            ),
+            "gate_status": decision.status,
+            "affected_layers": "L2",
+            "action": "continue" if decision.is_ready else "block",
+        }
+    )
+    return (decision, report_rows)
+
+
+def _strict_sw31_gate_messages(
+    industry_codes: set[str],
+    sw_audit_payload: dict[str, object],
+) -> list[str]:
+    messages: list[str] = []
+    if "ALL" in industry_codes:
+        messages.append("sw31_contains_all_aggregate")
+    if len(industry_codes) != SW31_EXPECTED_COUNT:
+        messages.append(f"sw31_industry_count_invalid:{len(industry_codes)}")
+    if not bool(sw_audit_payload.get("uses_sw31", False)):
+        messages.append("sw31_mapping_source_missing")
+    return messages
+
+
 def run_l2_snapshot(
     *,
     trade_date: str,
@@ -869,13 +1125,19 @@ def run_l2_snapshot(
 
     if quality_context_error:
         add_error("P1", "init_quality_context", f"quality_context_init_fallback:{quality_context_error}")
+    if database_path.exists():
+        try:
+            update_stock_rolling_state(config=config, start_date=trade_date, end_date=trade_date)
+        except Exception as exc:  # pragma: no cover - IO contention is environment-dependent
+            add_error("P1", "rolling_state", f"rolling_state_update_failed:{exc}")
+    rolling_daily: pd.DataFrame | None = None
 
     try:
         if not database_path.exists():
             add_error("P0", "load_l1", "duckdb_not_found")
             raise RuntimeError("L1 database not found")
 
-        with duckdb.connect(str(database_path), read_only=True) as connection:
+        with open_read_connection(database_path, config=config) as connection:
             if not _table_exists(connection, "raw_daily"):
                 add_error("P0", "load_l1", "raw_daily_table_missing")
                 raise RuntimeError("raw_daily table missing")
@@ -915,6 +1177,11 @@ def run_l2_snapshot(
                 connection,
                 trade_date=trade_date,
             )
+            rolling_daily = load_rolling_daily(
+                connection,
+                start_date=trade_date,
+                end_date=trade_date,
+            )
 
         if daily.empty:
             add_error("P0", "build_market_snapshot", "raw_daily_empty")
@@ -926,6 +1193,7 @@ def run_l2_snapshot(
             limit_list=limit_list,
             flat_threshold_ratio=flat_threshold_ratio,
             recent_market_amounts=recent_market_amounts,
+            rolling_daily=rolling_daily,
         )
         industry_snapshots, sw_audit_payload = _build_industry_snapshot_sw31(
             trade_date=trade_date,
@@ -938,6 +1206,7 @@ def run_l2_snapshot(
             member_snapshot_trade_date=member_snapshot_trade_date,
             flat_threshold_ratio=flat_threshold_ratio,
             previous_valuation_by_industry=previous_valuation_by_industry,
+            rolling_daily=rolling_daily,
         )
 
         market_frame = pd.DataFrame.from_records([market_snapshot.to_storage_record()])
@@ -945,24 +1214,26 @@ def run_l2_snapshot(
             [item.to_storage_record() for item in industry_snapshots]
         )
 
-        market_snapshot_count = _persist_snapshot_table(
-            database_path=database_path,
-            table_name="market_snapshot",
-            frame=market_frame,
-        )
-        industry_snapshot_count = _persist_snapshot_table(
-            database_path=database_path,
-            table_name="industry_snapshot",
-            frame=industry_frame,
-        )
+        # 市场 / 行业快照在同一连接、同一事务内写入
+        with open_write_session(database_path) as session, session.batch():
+            market_snapshot_count = _persist_snapshot_table(
+                database_path=database_path,
+                table_name="market_snapshot",
+                frame=market_frame,
+                session=session,
+            )
+            industry_snapshot_count = _persist_snapshot_table(
+                database_path=database_path,
+                table_name="industry_snapshot",
+                frame=industry_frame,
+                session=session,
+            )
 
-        (parquet_root / "market_snapshot").mkdir(parents=True, exist_ok=True)
-        market_frame.to_parquet(
-            parquet_root / "market_snapshot" / f"{trade_date}.parquet", index=False,
+        write_trade_date_partitions(
+            parquet_root / "market_snapshot", market_frame, trade_date=trade_date
         )
-        (parquet_root / "industry_snapshot").mkdir(parents=True, exist_ok=True)
-        industry_frame.to_parquet(
-            parquet_root / "industry_snapshot" / f"{trade_date}.parquet", index=False,
+        write_trade_date_partitions(
+            parquet_root / "industry_snapshot", industry_frame, trade_date=trade_date
         )
 
         artifacts_dir.mkdir(parents=True, exist_ok=True)
@@ -984,116 +1255,20 @@ def run_l2_snapshot(
 
         if strict_sw31:
             industry_codes = set(industry_frame["industry_code"].astype(str).tolist())
-            if "ALL" in industry_codes:
-                add_error("P0", "gate", "sw31_contains_all_aggregate")
-            if len(industry_codes) != SW31_EXPECTED_COUNT:
-                add_error(
-                    "P0",
-                    "gate",
-                    f"sw31_industry_count_invalid:{len(industry_codes)}",
-                )
-            if not bool(sw_audit_payload.get("uses_sw31", False)):
-                add_error("P0", "gate", "sw31_mapping_source_missing")
+            for message in _strict_sw31_gate_messages(industry_codes, sw_audit_payload):
+                add_error("P0", "gate", message)
     except Exception as exc:  # pragma: no cover - validated through contract tests
         add_error("P0", "run_l2_snapshot", str(exc))
 
-    source_trade_dates = {
-        "market_snapshot": trade_date,
-        "industry_snapshot": trade_date,
-    }
-    coverage_ratio = (
-        float(1 if market_snapshot_count > 0 else 0) + float(1 if industry_snapshot_count > 0 else 0)
-    ) / 2.0
-    quality_by_dataset = {
-        "market_snapshot": "normal" if market_snapshot_count > 0 else "stale",
-        "industry_snapshot": "normal" if industry_snapshot_count > 0 else "stale",
-    }
-    stale_days_by_dataset = {
-        "market_snapshot": 0 if market_snapshot_count > 0 else 1,
-        "industry_snapshot": 0 if industry_snapshot_count > 0 else 1,
-    }
-    decision = evaluate_data_quality_gate(
+    decision, report_rows = _evaluate_l2_gate(
         trade_date=trade_date,
-        coverage_ratio=coverage_ratio,
-        source_trade_dates=source_trade_dates,
-        quality_by_dataset=quality_by_dataset,
-        stale_days_by_dataset=stale_days_by_dataset,
-        min_coverage=min_coverage_ratio,
-        stale_hard_limit=stale_hard_limit_days,
-    )
-    p0_messages = [
-        f"{item.get('step', 'unknown')}:{item.get('message', '')}"
-        for item in errors
-        if str(item.get("error_level", "")) == "P0"
-    ]
-    if p0_messages:
-        merged_issues = [*decision.issues, *p0_messages]
-        decision = replace(
-            decision,
-            status=STATUS_BLOCKED,
-            is_ready=False,
-            issues=merged_issues,
-        )
-    if decision.status == STATUS_BLOCKED and not any(
-        item.get("message") == "data_readiness_gate_blocked"
-        for item in errors
-    ):
-        add_error("P0", "gate", "data_readiness_gate_blocked")
-
-    report_rows: list[dict[str, Any]] = [
-        {
-            "check_item": "l2_market_snapshot_count",
-            "expected_value": ">0",
-            "actual_value": str(market_snapshot_count),
-            "deviation": 0.0 if market_snapshot_count > 0 else 1.0,
-            "status": "PASS" if market_snapshot_count > 0 else "FAIL",
-            "gate_status": decision.status,
-            "affected_layers": "L2",
-            "action": "continue" if market_snapshot_count > 0 else "block",
-        },
-        {
-            "check_item": "l2_industry_snapshot_count",
-            "expected_value": ">0",
-            "actual_value": str(industry_snapshot_count),
-            "deviation": 0.0 if industry_snapshot_count > 0 else 1.0,
-            "status": "PASS" if industry_snapshot_count > 0 else "FAIL",
-            "gate_status": decision.status,
-            "affected_layers": "L2",
-            "action": "continue" if industry_snapshot_count > 0 else "block",
-        },
-    ]
-    if strict_sw31:
-        strict_ok = (
-            bool(sw_audit_payload.get("uses_sw31", False))
-            and int(sw_audit_payload.get("industry_count", 0) or 0) == SW31_EXPECTED_COUNT
-            and ("ALL" not in set(sw_audit_payload.get("industry_codes", [])))
-        )
-        report_rows.append(
-            {
-                "check_item": "l2_sw31_strict_gate",
-                "expected_value": "industry_count=31 & no_ALL",
-                "actual_value": (
-                    f"industry_count={int(sw_audit_payload.get('industry_count', 0) or 0)}, "
-                    f"uses_sw31={str(bool(sw_audit_payload.get('uses_sw31', False))).lower()}"
-                ),
-                "deviation": 0.0 if strict_ok else 1.0,
-                "status": "PASS" if strict_ok else "FAIL",
-                "gate_status": decision.status,
-                "affected_layers": "L2",
-                "action": "continue" if strict_ok else "block",
-            }
-        )
-    report_rows.append(
-        {
-            "check_item": "l2_readiness_gate",
-            "expected_value": "ready/degraded",
-            "actual_value": decision.status,
-            "deviation": max(0.0, min_coverage_ratio - coverage_ratio),
-            "status": "PASS" if decision.status == "ready" else ("WARN" if decision.status == "degraded" else "FAIL"),
-            "gate_status": decision.status,
-            "affected_layers": "L2",
-            "action": "continue" if decision.is_ready else "block",
-        }
+        market_snapshot_count=market_snapshot_count,
+        industry_snapshot_count=industry_snapshot_count,
+        min_coverage_ratio=min_coverage_ratio,
+        stale_hard_limit_days=stale_hard_limit_days,
+        strict_sw31=strict_sw31,
+        sw_audit_payload=sw_audit_payload,
+        errors=errors,
     )
     persist_quality_outputs(
         database_path,
@@ -1135,7 +1310,7 @@ def run_l2_snapshot(
         s3c_artifacts_dir = Path("artifacts") / "spiral-s3c" / trade_date
         s3c_artifacts_dir.mkdir(parents=True, exist_ok=True)
         if industry_snapshot_count > 0 and database_path.exists():
-            with duckdb.connect(str(database_path), read_only=True) as connection:
+            with open_read_connection(database_path, config=config) as connection:
                 if _table_exists(connection, "industry_snapshot"):
                     snapshot_frame = connection.execute(
                         "SELECT * FROM industry_snapshot WHERE trade_date = ? ORDER BY industry_code",
@@ -1163,3 +1338,544 @@ def run_l2_snapshot(
         error_manifest_path=manifest_path,
         canary_report_path=canary_report_path,
     )
+
+
+def _load_range_trade_dates(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    start_date: str,
+    end_date: str,
+) -> list[str]:
+    # 优先交易日历开市日；无日历时取 raw_daily 中出现的交易日
+    if _table_exists(connection, "raw_trade_cal"):
+        rows = connection.execute(
+            "SELECT DISTINCT CAST(trade_date AS VARCHAR) AS trade_date FROM raw_trade_cal "
+            "WHERE CAST(trade_date AS VARCHAR) >= ? AND CAST(trade_date AS VARCHAR) <= ? "
+            "AND CAST(is_open AS INTEGER) = 1 ORDER BY trade_date",
+            [start_date, end_date],
+        ).fetchall()
+        trade_dates = [str(row[0]) for row in rows if row[0] is not None]
+        if trade_dates:
+            return trade_dates
+    if not _table_exists(connection, "raw_daily"):
+        return []
+    rows = connection.execute(
+        "SELECT DISTINCT CAST(trade_date AS VARCHAR) AS trade_date FROM raw_daily "
+        "WHERE CAST(trade_date AS VARCHAR) >= ? AND CAST(trade_date AS VARCHAR) <= ? "
+        "ORDER BY trade_date",
+        [start_date, end_date],
+    ).fetchall()
+    return [str(row[0]) for row in rows if row[0] is not None]
+
+
+def _load_market_amount_history(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    end_date: str,
+) -> tuple[list[str], list[float]]:
+    # 一次 GROUP BY 得到截至 end_date 的逐日全市场成交额（升序），供滚动 20 日窗口切片
+    source = _market_amount_source(connection)
+    if source is None:
+        return ([], [])
+    frame = connection.execute(
+        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, total_amount "
+        f"FROM ({source}) "
+        "WHERE CAST(trade_date AS VARCHAR) <= ? "
+        "ORDER BY trade_date",
+        [end_date],
+    ).df()
+    if frame.empty:
+        return ([], [])
+    amounts = pd.to_numeric(frame["total_amount"], errors="coerce").fillna(0.0).tolist()
+    return (
+        [str(item) for item in frame["trade_date"].tolist()],
+        [float(item) for item in amounts],
+    )
+
+
+def _recent_market_amounts(
+    history_dates: list[str],
+    history_amounts: list[float],
+    *,
+    trade_date: str,
+    lookback_days: int = 20,
+) -> list[float]:
+    # 与 _load_recent_market_amounts 一致：trade_date 之前最近 lookback_days 日，按日期倒序
+    end = bisect_left(history_dates, trade_date)
+    start = max(0, end - int(max(lookback_days, 1)))
+    return history_amounts[start:end][::-1]
+
+
+def _load_member_snapshot_counts(connection: duckdb.DuckDBPyConnection) -> dict[str, int]:
+    if not _table_exists(connection, "raw_index_member"):
+        return {}
+    rows = connection.execute(
+        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, COUNT(*) AS row_count "
+        "FROM raw_index_member WHERE trade_date IS NOT NULL "
+        "GROUP BY CAST(trade_date AS VARCHAR)"
+    ).fetchall()
+    return {str(row[0]): int(row[1]) for row in rows}
+
+
+def _pick_member_snapshot_date(counts: dict[str, int], trade_date: str) -> str:
+    # 与 _load_index_member 一致：当月行数最多（并列取较晚）的快照，否则取不晚于交易日的最新快照
+    same_month = [value for value in counts if value.startswith(trade_date[:6])]
+    if same_month:
+        return max(same_month, key=lambda value: (counts[value], value)).strip()
+    earlier = [value for value in counts if value <= trade_date]
+    return max(earlier).strip() if earlier else ""
+
+
+def _load_classify_snapshot_dates(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    end_date: str,
+) -> list[str]:
+    if not _table_exists(connection, "raw_index_classify"):
+        return []
+    rows = connection.execute(
+        "SELECT DISTINCT CAST(trade_date AS VARCHAR) AS trade_date FROM raw_index_classify "
+        "WHERE CAST(trade_date AS VARCHAR) <= ? "
+        "AND UPPER(COALESCE(src, '')) = ? "
+        "AND UPPER(COALESCE(level, '')) = ? "
+        "ORDER BY trade_date",
+        [end_date, SW31_SOURCE.upper(), SW31_LEVEL],
+    ).fetchall()
+    return [str(row[0]) for row in rows if row[0] is not None]
+
+
+def _read_trade_date_partitions(
+    connection: duckdb.DuckDBPyConnection,
+    table_name: str,
+    *,
+    start_date: str,
+    end_date: str,
+    columns: Sequence[str] | None = None,
+) -> dict[str, pd.DataFrame]:
+    # 一次读取窗口内全部行，按 trade_date 划分（分区内保持原行序，与逐日查询一致）
+    selected = ", ".join(columns) if columns else "*"
+    frame = connection.execute(
+        f"SELECT {selected} FROM {table_name} WHERE trade_date >= ? AND trade_date <= ?",
+        [start_date, end_date],
+    ).df()
+    if frame.empty:
+        return {}
+    keys = frame["trade_date"].astype(str)
+    return {
+        str(trade_date): frame.take(positions).reset_index(drop=True)
+        for trade_date, positions in frame.groupby(keys, sort=False).indices.items()
+    }
+
+
+def run_l2_snapshot_range(
+    *,
+    start_date: str,
+    end_date: str,
+    source: str,
+    config: Config,
+    strict_sw31: bool = True,
+) -> L2RangeRunResult:
+    """区间批量生成 L2 快照（与逐日 run_l2_snapshot 口径一致）。
+
+    L1 窗口按 L2_RANGE_CHUNK_TRADE_DAYS 个交易日分块一次读取并按交易日划分；
+    20 日成交额历史一次聚合后滚动切片；SW31 分类 / 成分快照按快照日缓存；
+    行业 PE/PB 兜底值在区间内按交易日顺序结转。全部市场 / 行业快照在一个事务内写入，
+    门禁决策批量落库，产物只输出区间汇总报告（不逐日输出样例文件）。
+    """
+    if source.lower() != "tushare":
+        raise ValueError(f"unsupported source for S0c: {source}")
+
+    artifacts_dir = Path("artifacts") / "spiral-s0c" / f"{start_date}_{end_date}"
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    parquet_root = Path(config.parquet_path) / "l2"
+    thresholds = {
+        "flat_threshold": float(config.flat_threshold),
+        "min_coverage_ratio": float(config.min_coverage_ratio),
+        "stale_hard_limit_days": int(config.stale_hard_limit_days),
+    }
+    common_errors: list[dict[str, str]] = []
+    if database_path.exists():
+        try:
+            thresholds = init_quality_context(database_path, config=config)
+        except Exception as exc:  # pragma: no cover - IO contention is environment-dependent
+            common_errors.append(
+                {
+                    "error_level": "P1",
+                    "step": "init_quality_context",
+                    "message": f"quality_context_init_fallback:{exc}",
+                }
+            )
+    flat_threshold_ratio = float(thresholds["flat_threshold"]) / 100.0
+    min_coverage_ratio = float(thresholds["min_coverage_ratio"])
+    stale_hard_limit_days = int(thresholds["stale_hard_limit_days"])
+
+    trade_dates: list[str] = []
+    errors_by_date: dict[str, list[dict[str, str]]] = {}
+    audit_by_date: dict[str, dict[str, object]] = {}
+    market_frames: dict[str, pd.DataFrame] = {}
+    industry_frames: dict[str, pd.DataFrame] = {}
+
+    def add_error(trade_date: str, level: str, step: str, message: str) -> None:
+        errors_by_date.setdefault(trade_date, []).append(
+            {"error_level": level, "step": step, "trade_date": trade_date, "message": message}
+        )
+
+    if not database_path.exists():
+        range_errors = [{"error_level": "P0", "step": "load_l1", "message": "duckdb_not_found"}]
+    else:
+        range_errors = []
+        try:
+            update_stock_rolling_state(config=config, start_date=start_date, end_date=end_date)
+        except Exception as exc:  # pragma: no cover - IO contention is environment-dependent
+            common_errors.append(
+                {
+                    "error_level": "P1",
+                    "step": "rolling_state",
+                    "message": f"rolling_state_update_failed:{exc}",
+                }
+            )
+        with open_read_connection(database_path, config=config) as connection:
+            trade_dates = _load_range_trade_dates(
+                connection, start_date=start_date, end_date=end_date
+            )
+            if not _table_exists(connection, "raw_daily"):
+                range_errors.append(
+                    {"error_level": "P0", "step": "load_l1", "message": "raw_daily_table_missing"}
+                )
+                trade_dates = []
+            has_limit_list = _table_exists(connection, "raw_limit_list")
+            has_daily_basic = _table_exists(connection, "raw_daily_basic")
+            history_dates, history_amounts = _load_market_amount_history(
+                connection, end_date=end_date
+            )
+            classify_dates = _load_classify_snapshot_dates(connection, end_date=end_date)
+            member_counts = _load_member_snapshot_counts(connection)
+            classify_cache: dict[str, pd.DataFrame] = {}
+            member_cache: dict[str, pd.DataFrame] = {}
+            rolling_range = load_rolling_daily(
+                connection, start_date=start_date, end_date=end_date
+            )
+            rolling_by_date = {
+                str(trade_date): rolling_range.take(positions)
+                for trade_date, positions in rolling_range.groupby(
+                    rolling_range["trade_date"].astype(str), sort=False
+                ).indices.items()
+            }
+            previous_valuation_by_industry = (
+                _load_previous_industry_valuation_map(connection, trade_date=trade_dates[0])
+                if trade_dates
+                else {}
+            )
+
+            for offset in range(0, len(trade_dates), L2_RANGE_CHUNK_TRADE_DAYS):
+                chunk = trade_dates[offset : offset + L2_RANGE_CHUNK_TRADE_DAYS]
+                window = {"start_date": chunk[0], "end_date": chunk[-1]}
+                daily_parts = _read_trade_date_partitions(connection, "raw_daily", **window)
+                limit_parts = (
+                    _read_trade_date_partitions(connection, "raw_limit_list", **window)
+                    if has_limit_list
+                    else {}
+                )
+                basic_parts = (
+                    _read_trade_date_partitions(connection, "raw_daily_basic", **window)
+                    if has_daily_basic
+                    else {}
+                )
+                for trade_date in chunk:
+                    if not has_limit_list:
+                        add_error(trade_date, "P1", "load_l1", "raw_limit_list_table_missing")
+                    daily = daily_parts.get(trade_date)
+                    if daily is None or daily.empty:
+                        add_error(trade_date, "P0", "build_market_snapshot", "raw_daily_empty")
+                        continue
+                    limit_list = limit_parts.get(trade_date, pd.DataFrame())
+                    daily_basic = basic_parts.get(trade_date, pd.DataFrame())
+
+                    position = bisect_right(classify_dates, trade_date)
+                    classify_snapshot_trade_date = (
+                        classify_dates[position - 1].strip() if position else ""
+                    )
+                    if classify_snapshot_trade_date not in classify_cache:
+                        classify_cache[classify_snapshot_trade_date] = (
+                            _read_sw31_classify_snapshot(connection, classify_snapshot_trade_date)
+                            if classify_snapshot_trade_date
+                            else pd.DataFrame.from_records([])
+                        )
+                    member_snapshot_trade_date = _pick_member_snapshot_date(
+                        member_counts, trade_date
+                    )
+                    if member_snapshot_trade_date not in member_cache:
+                        member_cache[member_snapshot_trade_date] = (
+                            _read_index_member_snapshot(connection, member_snapshot_trade_date)
+                            if member_snapshot_trade_date
+                            else pd.DataFrame.from_records([])
+                        )
+
+                    try:
+                        market_snapshot = _build_market_snapshot(
+                            trade_date=trade_date,
+                            daily=daily,
+                            limit_list=limit_list,
+                            flat_threshold_ratio=flat_threshold_ratio,
+                            recent_market_amounts=_recent_market_amounts(
+                                history_dates, history_amounts, trade_date=trade_date
+                            ),
+                            rolling_daily=rolling_by_date.get(trade_date),
+                        )
+                        industry_snapshots, sw_audit_payload = _build_industry_snapshot_sw31(
+                            trade_date=trade_date,
+                            daily=daily,
+                            limit_list=limit_list,
+                            daily_basic=daily_basic,
+                            sw31_classify=classify_cache[classify_snapshot_trade_date],
+                            sw31_member=member_cache[member_snapshot_trade_date],
+                            classify_snapshot_trade_date=classify_snapshot_trade_date,
+                            member_snapshot_trade_date=member_snapshot_trade_date,
+                            flat_threshold_ratio=flat_threshold_ratio,
+                            previous_valuation_by_industry=previous_valuation_by_industry,
+                            rolling_daily=rolling_by_date.get(trade_date),
+                        )
+                    except Exception as exc:  # pragma: no cover - validated through contract tests
+                        add_error(trade_date, "P0", "run_l2_snapshot_range", str(exc))
+                        continue
+                    market_frames[trade_date] = pd.DataFrame.from_records(
+                        [market_snapshot.to_storage_record()]
+                    )
+                    industry_frame = pd.DataFrame.from_records(
+                        [item.to_storage_record() for item in industry_snapshots]
+                    )
+                    industry_frames[trade_date] = industry_frame
+                    audit_by_date[trade_date] = sw_audit_payload
+                    previous_valuation_by_industry = _valuation_map_from_frame(industry_frame)
+                    if strict_sw31:
+                        industry_codes = set(industry_frame["industry_code"].astype(str).tolist())
+                        for message in _strict_sw31_gate_messages(industry_codes, sw_audit_payload):
+                            add_error(trade_date, "P0", "gate", message)
+
+    written_dates = sorted(market_frames)
+    if written_dates:
+        market_frame = pd.concat([market_frames[item] for item in written_dates], ignore_index=True)
+        industry_frame = pd.concat(
+            [industry_frames[item] for item in written_dates], ignore_index=True
+        )
+        try:
+            # 区间内全部交易日的市场 / 行业快照在同一事务内写入
+            with open_write_session(database_path) as session, session.batch():
+                session.write_frame("market_snapshot", market_frame)
+                session.write_frame("industry_snapshot", industry_frame)
+            write_trade_date_partitions(parquet_root / "market_snapshot", market_frame)
+            write_trade_date_partitions(parquet_root / "industry_snapshot", industry_frame)
+        except Exception as exc:  # pragma: no cover - IO contention is environment-dependent
+            for trade_date in written_dates:
+                add_error(trade_date, "P0", "persist", str(exc))
+            written_dates = []
+
+    quality_outputs: list[tuple[DataGateDecision, list[dict[str, Any]]]] = []
+    date_reports: list[dict[str, object]] = []
+    market_snapshot_count = 0
+    industry_snapshot_count = 0
+    written = set(written_dates)
+    for trade_date in trade_dates:
+        errors = [
+            {**item, "trade_date": trade_date} for item in [*common_errors, *range_errors]
+        ] + errors_by_date.get(trade_date, [])
+        market_count = len(market_frames[trade_date]) if trade_date in written else 0
+        industry_count = len(industry_frames[trade_date]) if trade_date in written else 0
+        market_snapshot_count += market_count
+        industry_snapshot_count += industry_count
+        decision, report_rows = _evaluate_l2_gate(
+            trade_date=trade_date,
+            market_snapshot_count=market_count,
+            industry_snapshot_count=industry_count,
+            min_coverage_ratio=min_coverage_ratio,
+            stale_hard_limit_days=stale_hard_limit_days,
+            strict_sw31=strict_sw31,
+            sw_audit_payload=audit_by_date.get(trade_date, {}),
+            errors=errors,
+        )
+        quality_outputs.append((decision, report_rows))
+        audit = audit_by_date.get(trade_date, {})
+        date_reports.append(
+            {
+                "trade_date": trade_date,
+                "market_snapshot_count": market_count,
+                "industry_snapshot_count": industry_count,
+                "gate_status": decision.status,
+                "uses_sw31": bool(audit.get("uses_sw31", False)),
+                "industry_count": int(audit.get("industry_count", 0) or 0),
+                "errors": errors,
+            }
+        )
+    if quality_outputs and database_path.exists():
+        persist_quality_outputs_batch(database_path, outputs=quality_outputs, config=config)
+
+    failed_trade_dates = [str(item["trade_date"]) for item in date_reports if item["errors"]]
+    range_report_path = artifacts_dir / "l2_range_report.json"
+    _write_json(
+        range_report_path,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "source": source,
+            "strict_sw31": strict_sw31,
+            "trade_date_count": len(trade_dates),
+            "market_snapshot_count": market_snapshot_count,
+            "industry_snapshot_count": industry_snapshot_count,
+            "failed_trade_dates": failed_trade_dates,
+            "range_errors": range_errors,
+            "trade_dates": date_reports,
+        },
+    )
+    return L2RangeRunResult(
+        start_date=start_date,
+        end_date=end_date,
+        source=source,
+        artifacts_dir=artifacts_dir,
+        trade_dates=trade_dates,
+        market_snapshot_count=market_snapshot_count,
+        industry_snapshot_count=industry_snapshot_count,
+        failed_trade_dates=failed_trade_dates,
+        has_error=bool(failed_trade_dates or range_errors),
+        range_report_path=range_report_path,
+    )
+
+
+def _existing_columns(
+    connection: duckdb.DuckDBPyConnection,
+    table_name: str,
+    candidates: Sequence[str],
+) -> list[str]:
+    present = {str(row[0]) for row in connection.execute(f"DESCRIBE {table_name}").fetchall()}
+    return [column for column in candidates if column in present]
+
+
+def _load_raw_daily_dates(connection: duckdb.DuckDBPyConnection, *, end_date: str) -> list[str]:
+    rows = connection.execute(
+        "SELECT DISTINCT CAST(trade_date AS VARCHAR) AS trade_date FROM raw_daily "
+        "WHERE CAST(trade_date AS VARCHAR) <= ? ORDER BY trade_date",
+        [end_date],
+    ).fetchall()
+    return [str(row[0]) for row in rows if row[0] is not None]
+
+
+def update_stock_rolling_state(
+    *,
+    config: Config,
+    start_date: str,
+    end_date: str,
+    rebuild: bool = False,
+) -> RollingStateUpdateResult:
+    """推进个股滚动状态，保证 [start_date, end_date] 内每个有行情的交易日都有判定结果。
+
+    - 区间内判定结果齐全：不写入
+    - 状态日早于区间内首个缺失日：从状态日之后增量推进到 end_date
+    - 无状态 / 状态已超前（回补了更早的行情）/ rebuild=True：从 raw_daily 首日起重放
+    每 L2_RANGE_CHUNK_TRADE_DAYS 个交易日读取一次 L1 窗口并写入一次判定结果，
+    最新状态随最后一块写入（中途失败时状态不前移，下次从原状态日重放）；
+    end_date 早于已落库状态日时只写判定结果，不以旧状态覆盖。
+    """
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    with open_read_connection(database_path, config=config) as connection:
+        if not _table_exists(connection, "raw_daily"):
+            return RollingStateUpdateResult(
+                as_of_trade_date="",
+                replayed_trade_dates=0,
+                daily_rows=0,
+                stock_count=0,
+                rebuilt=False,
+                state_persisted=False,
+            )
+        persist_state = end_date >= rolling_state_as_of(connection)
+        state = StockRollingState() if rebuild else load_rolling_state(connection)
+        raw_dates = _load_raw_daily_dates(connection, end_date=end_date)
+        rebuilt = bool(rebuild)
+        if not rebuild:
+            covered = set(
+                load_rolling_daily(connection, start_date=start_date, end_date=end_date)[
+                    "trade_date"
+                ].astype(str)
+            )
+            missing = [item for item in raw_dates if item >= start_date and item not in covered]
+            if not missing:
+                return RollingStateUpdateResult(
+                    as_of_trade_date=state.as_of_trade_date,
+                    replayed_trade_dates=0,
+                    daily_rows=0,
+                    stock_count=len(state),
+                    rebuilt=False,
+                    state_persisted=False,
+                )
+            if not state.as_of_trade_date or state.as_of_trade_date >= missing[0]:
+                state = StockRollingState()
+                rebuilt = True
+        daily_columns = _existing_columns(
+            connection, "raw_daily", ("trade_date", "stock_code", "ts_code", "close")
+        )
+        limit_columns = (
+            _existing_columns(
+                connection,
+                "raw_limit_list",
+                ("trade_date", "stock_code", "ts_code", "limit_type", "limit"),
+            )
+            if _table_exists(connection, "raw_limit_list")
+            else []
+        )
+    replay_dates = [item for item in raw_dates if item > state.as_of_trade_date]
+
+    daily_rows = 0
+    for offset in range(0, len(replay_dates), L2_RANGE_CHUNK_TRADE_DAYS):
+        chunk = replay_dates[offset : offset + L2_RANGE_CHUNK_TRADE_DAYS]
+        window = {"start_date": chunk[0], "end_date": chunk[-1]}
+        with open_read_connection(database_path, config=config, **window) as connection:
+            daily_parts = _read_trade_date_partitions(
+                connection, "raw_daily", **window, columns=daily_columns
+            )
+            limit_parts = (
+                _read_trade_date_partitions(
+                    connection, "raw_limit_list", **window, columns=limit_columns
+                )
+                if limit_columns
+                else {}
+            )
+        frames: list[pd.DataFrame] = []
+        for trade_date in chunk:
+            daily = daily_parts.get(trade_date)
+            if daily is None or daily.empty:
+                continue
+            codes = _normalize_stock_code_series(daily)
+            closes = pd.to_numeric(
+                daily.get("close", pd.Series(np.nan, index=daily.index)), errors="coerce"
+            )
+            limit_rows = limit_parts.get(trade_date, pd.DataFrame())
+            limit_up_codes: set[str] = set()
+            if not limit_rows.empty:
+                limit_codes = _normalize_stock_code_series(limit_rows)
+                limit_up_codes = set(limit_codes[_resolve_limit_type_series(limit_rows) == "U"])
+            frames.append(
+                state.advance(
+                    trade_date,
+                    stock_codes=codes.tolist(),
+                    closes=closes.to_numpy(dtype=float),
+                    limit_up=codes.isin(limit_up_codes).to_numpy(),
+                )
+            )
+        daily_frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        is_last_chunk = offset + L2_RANGE_CHUNK_TRADE_DAYS >= len(replay_dates)
+        if daily_frame.empty and not is_last_chunk:
+            continue
+        with open_write_session(database_path) as session:
+            persist_rolling_state(
+                session,
+                state=state if is_last_chunk and persist_state else None,
+                daily=daily_frame,
+            )
+        daily_rows += int(len(daily_frame))
+
+    return RollingStateUpdateResult(
+        as_of_trade_date=state.as_of_trade_date,
+        replayed_trade_dates=len(replay_dates),
+        daily_rows=daily_rows,
+        stock_count=len(state),
+        rebuilt=rebuilt,
+        state_persisted=persist_state and bool(replay_dates),
+    )
@@ -0,0 +1,244 @@
+"""全市场逐日聚合表（market_daily_agg）：raw_daily 的每日汇总物化。
+
+L2 成交额波动、验证层未来收益、IC 校准都需要"每个交易日的全市场汇总"，此前各自对
+raw_daily 全表 GROUP BY trade_date，历史越长越慢。本模块把汇总物化为一张小表：
+
+- 随 L1 落盘增量维护：DailyRepository.save_to_database 在写 raw_daily 的同一事务内
+  按本次写入的 trade_date 整体替换对应聚合行（raw_daily 本身也按 trade_date 整体替换，
+  因此增量结果与全量重算一致）
+- 可重建：rebuild_market_daily_agg() / eq rebuild-market-agg 从 raw_daily 全量或按区间重算
+- 首次建表（升级后的库首次写 raw_daily）时在同一事务内从 raw_daily 全量补齐
+
+口径与原查询一致：total_amount = SUM(COALESCE(amount, 0))，mean_close = AVG(close)，
+mean_pct_chg = AVG(pct_chg)（raw_daily 无 pct_chg 列时为 NULL），rise / fall 按 pct_chg 正负计数。
+读取方经 market_daily_agg_available() 判断：聚合表不存在或交易日范围窄于 raw_daily 时
+回退到 raw_daily 现算。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.data.record_batch import as_arrow_table
+from src.db.helpers import WriteSession, open_write_session, table_exists
+from src.db.storage_backend import open_read_connection
+from src.db.writer_client import RemoteWriteSession
+
+MARKET_DAILY_AGG_TABLE = "market_daily_agg"
+MARKET_DAILY_AGG_COLUMNS = (
+    "trade_date",
+    "stock_count",
+    "total_amount",
+    "mean_close",
+    "mean_pct_chg",
+    "pct_chg_count",
+    "rise_count",
+    "fall_count",
+)
+
+
+@dataclass(frozen=True)
+class MarketDailyAggRebuildResult:
+    trade_date_count: int
+    start_date: str
+    end_date: str
+
+
+def _column_names(connection: duckdb.DuckDBPyConnection, relation: str) -> set[str]:
+    return {str(row[0]) for row in connection.execute(f"DESCRIBE {relation}").fetchall()}
+
+
+def _aggregate_sql(relation: str, columns: set[str], *, where_clause: str = "") -> str:
+    # 与 raw_daily 现算的各读取方口径逐项对应；缺列时对应统计为 NULL / 0
+    amount = "SUM(COALESCE(CAST(amount AS DOUBLE), 0.0))" if "amount" in columns else "0.0"
+    close = "AVG(CAST(close AS DOUBLE))" if "close" in columns else "CAST(NULL AS DOUBLE)"
+    if "pct_chg" in columns:
+        pct_chg = "CAST(pct_chg AS DOUBLE)"
+        pct_fields = (
+            f"AVG({pct_chg}) AS mean_pct_chg, "
+            f"COUNT({pct_chg}) AS pct_chg_count, "
+            f"COUNT(*) FILTER (WHERE {pct_chg} > 0) AS rise_count, "
+            f"COUNT(*) FILTER (WHERE {pct_chg} < 0) AS fall_count"
+        )
+    else:
+        pct_fields = (
+            "CAST(NULL AS DOUBLE) AS mean_pct_chg, "
+            "CAST(0 AS BIGINT) AS pct_chg_count, "
+            "CAST(0 AS BIGINT) AS rise_count, "
+            "CAST(0 AS BIGINT) AS fall_count"
+        )
+    return (
+        "SELECT CAST(trade_date AS VARCHAR) AS trade_date, "
+        "COUNT(*) AS stock_count, "
+        f"{amount} AS total_amount, "
+        f"{close} AS mean_close, "
+        f"{pct_fields} "
+        f"FROM {relation} {where_clause} "
+        "GROUP BY CAST(trade_date AS VARCHAR) "
+        "ORDER BY trade_date"
+    )
+
+
+def _float_column(table: pa.Table, name: str) -> pa.Array:
+    if name not in table.column_names:
+        return pa.nulls(table.num_rows, type=pa.float64())
+    return pc.cast(table[name], pa.float64())
+
+
+def compute_market_daily_agg(data: pa.Table | pd.DataFrame) -> pd.DataFrame:
+    """对一批 raw_daily 行（Arrow / DataFrame）按 trade_date 汇总。
+
+    在 Arrow 上直接分组聚合，不为增量维护另开 DuckDB 连接；口径与 _aggregate_sql 一致。
+    """
+    table = as_arrow_table(data)
+    if "trade_date" not in table.column_names or table.num_rows == 0:
+        return pd.DataFrame(columns=list(MARKET_DAILY_AGG_COLUMNS))
+    pct_chg = _float_column(table, "pct_chg")
+    work = pa.table(
+        {
+            "trade_date": pc.cast(table["trade_date"], pa.string()),
+            "amount": pc.fill_null(_float_column(table, "amount"), 0.0),
+            "close": _float_column(table, "close"),
+            "pct_chg": pct_chg,
+            "rise": pc.cast(pc.fill_null(pc.greater(pct_chg, 0.0), False), pa.int64()),
+            "fall": pc.cast(pc.fill_null(pc.less(pct_chg, 0.0), False), pa.int64()),
+        }
+    )
+    grouped = work.group_by("trade_date").aggregate(
+        [
+            ([], "count_all"),
+            ("amount", "sum"),
+            ("close", "mean"),
+            ("pct_chg", "mean"),
+            ("pct_chg", "count"),
+            ("rise", "sum"),
+            ("fall", "sum"),
+        ]
+    )
+    frame = pd.DataFrame(
+        {
+            "trade_date": grouped["trade_date"].to_pylist(),
+            "stock_count": grouped["count_all"].to_numpy(),
+            "total_amount": grouped["amount_sum"].to_numpy(),
+            "mean_close": grouped["close_mean"].to_pandas(),
+            "mean_pct_chg": grouped["pct_chg_mean"].to_pandas(),
+            "pct_chg_count": grouped["pct_chg_count"].to_numpy(),
+            "rise_count": grouped["rise_sum"].to_numpy(),
+            "fall_count": grouped["fall_sum"].to_numpy(),
+        },
+        columns=list(MARKET_DAILY_AGG_COLUMNS),
+    )
+    return frame.sort_values("trade_date").reset_index(drop=True)
+
+
+def write_market_daily_agg(
+    session: WriteSession | RemoteWriteSession,
+    data: pa.Table | pd.DataFrame,
+) -> int:
+    """按本批 raw_daily 涉及的 trade_date 整体替换聚合行，返回写入行数。
+
+    本地会话下聚合表尚不存在时，改为从 raw_daily 全量汇总（须在本批 raw_daily 写入之后、
+    同一事务内调用，汇总结果已包含本批），避免升级后的库只有本批交易日的聚合行。
+    """
+    if (
+        isinstance(session, WriteSession)
+        and not table_exists(session.connection, MARKET_DAILY_AGG_TABLE)
+        and table_exists(session.connection, "raw_daily")
+    ):
+        with session.batch():
+            frame = session.connection.execute(
+                _aggregate_sql("raw_daily", _column_names(session.connection, "raw_daily"))
+            ).df()
+            if frame.empty:
+                return 0
+            return session.write_frame(MARKET_DAILY_AGG_TABLE, frame)
+    frame = compute_market_daily_agg(data)
+    if frame.empty:
+        return 0
+    return session.write_frame(MARKET_DAILY_AGG_TABLE, frame)
+
+
+def _trade_date_coverage(
+    connection: duckdb.DuckDBPyConnection, table_name: str
+) -> tuple[str, str, int]:
+    row = connection.execute(
+        "SELECT MIN(CAST(trade_date AS VARCHAR)), MAX(CAST(trade_date AS VARCHAR)), "
+        f"COUNT(DISTINCT trade_date) FROM {table_name}"
+    ).fetchone()
+    if not row or row[0] is None:
+        return "", "", 0
+    return str(row[0]), str(row[1]), int(row[2])
+
+
+def market_daily_agg_available(connection: duckdb.DuckDBPyConnection) -> bool:
+    """聚合表存在且交易日范围与交易日数均覆盖 raw_daily 时可代替 raw_daily 现算。
+
+    聚合表晚于 raw_daily 建立、且未经 rebuild 补齐（如经单写入服务写入的升级库）时，
+    其范围窄于 raw_daily 或范围内缺交易日，读取方回退现算，避免历史序列被截断或出现空洞。
+    """
+    if not table_exists(connection, MARKET_DAILY_AGG_TABLE):
+        return False
+    if not table_exists(connection, "raw_daily"):
+        return True
+    raw_start, raw_end, raw_days = _trade_date_coverage(connection, "raw_daily")
+    if not raw_start:
+        return True
+    agg_start, agg_end, agg_days = _trade_date_coverage(connection, MARKET_DAILY_AGG_TABLE)
+    return (
+        bool(agg_start)
+        and agg_start <= raw_start
+        and agg_end >= raw_end
+        and agg_days >= raw_days
+    )
+
+
+def rebuild_market_daily_agg(
+    *,
+    config: Any,
+    start_date: str = "",
+    end_date: str = "",
+) -> MarketDailyAggRebuildResult:
+    """从 raw_daily 重算聚合表（start_date / end_date 为空表示不设下 / 上界）。"""
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    conditions: list[str] = []
+    params: list[str] = []
+    if start_date:
+        conditions.append("CAST(trade_date AS VARCHAR) >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("CAST(trade_date AS VARCHAR) <= ?")
+        params.append(end_date)
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with open_read_connection(
+        database_path,
+        config=config,
+        start_date=start_date or None,
+        end_date=end_date or None,
+    ) as connection:
+        if not table_exists(connection, "raw_daily"):
+            frame = pd.DataFrame(columns=list(MARKET_DAILY_AGG_COLUMNS))
+        else:
+            frame = connection.execute(
+                _aggregate_sql(
+                    "raw_daily",
+                    _column_names(connection, "raw_daily"),
+                    where_clause=where_clause,
+                ),
+                params,
+            ).df()
+    if not frame.empty:
+        with open_write_session(database_path) as session:
+            session.write_frame(MARKET_DAILY_AGG_TABLE, frame)
+    trade_dates = [str(item) for item in frame["trade_date"].tolist()]
+    return MarketDailyAggRebuildResult(
+        trade_date_count=len(trade_dates),
+        start_date=trade_dates[0] if trade_dates else "",
+        end_date=trade_dates[-1] if trade_dates else "",
+    )
@@ -54,6 +54,7 @@ def _with_duckdb_write_connection(
     wait_seconds_total = 0.0
     last_error_message = ""
     lock_holder_pid = ""
+    lock_wait_seconds = 0.0
     lock_wait_started = time.monotonic()
     try:
         with acquire_duckdb_interprocess_lock(
@@ -61,7 +62,8 @@ def _with_duckdb_write_connection(
             timeout_seconds=float(QUALITY_DUCKDB_PROCESS_LOCK_TIMEOUT_SECONDS),
             poll_seconds=float(QUALITY_DUCKDB_PROCESS_LOCK_POLL_SECONDS),
         ):
-            wait_seconds_total += max(0.0, time.monotonic() - lock_wait_started)
+            lock_wait_seconds = max(0.0, time.monotonic() - lock_wait_started)
+            wait_seconds_total += lock_wait_seconds
             for attempt in range(1, max_attempts + 1):
                 try:
                     with duckdb.connect(str(database_path)) as connection:
@@ -74,29 +76,32 @@ def _with_duckdb_write_connection(
                     if extracted_pid:
                         lock_holder_pid = extracted_pid
                     if attempt >= max_attempts:
-                        raise DuckDBLockRecoveryError(
+                        raise DuckDBLockRecoveryError.from_lock_state(
                             database_path=database_path,
                             retry_attempts=max_attempts,
                             wait_seconds_total=wait_seconds_total,
                             last_error_message=last_error_message,
                             lock_holder_pid=lock_holder_pid,
+                            lock_wait_seconds=lock_wait_seconds,
                         ) from exc
                     wait_seconds = wait_base_seconds * float(attempt)
                     if wait_seconds > 0:
                         time.sleep(wait_seconds)
                         wait_seconds_total += wait_seconds
     except TimeoutError as exc:
-        wait_seconds_total += max(0.0, time.monotonic() - lock_wait_started)
+        lock_wait_seconds = max(0.0, time.monotonic() - lock_wait_started)
+        wait_seconds_total += lock_wait_seconds
         last_error_message = str(exc)
         extracted_pid = extract_lock_holder_pid(last_error_message)
         if extracted_pid:
             lock_holder_pid = extracted_pid
-        raise DuckDBLockRecoveryError(
+        raise DuckDBLockRecoveryError.from_lock_state(
             database_path=database_path,
             retry_attempts=max_attempts,
             wait_seconds_total=wait_seconds_total,
             last_error_message=last_error_message,
             lock_holder_pid=lock_holder_pid,
+            lock_wait_seconds=lock_wait_seconds,
         ) from exc
 
 
@@ -326,6 +331,35 @@ def persist_quality_outputs(
     _with_duckdb_write_connection(database_path, operation=_operation)
 
 
+def persist_quality_outputs_batch(
+    database_path: Path,
+    *,
+    outputs: list[tuple[DataGateDecision, list[dict[str, Any]]]],
+    config: Config,
+) -> None:
+    """多个交易日的门禁决策与检查报告在同一连接、同一事务内写入（区间批处理）。"""
+    if not outputs:
+        return
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    def _operation(connection: duckdb.DuckDBPyConnection) -> None:
+        ensure_quality_tables(connection)
+        upsert_system_config_defaults(connection, config=config)
+        connection.begin()
+        try:
+            for decision, report_rows in outputs:
+                persist_data_quality_report(
+                    connection,
+                    trade_date=decision.trade_date,
+                    rows=report_rows,
+                )
+                persist_data_readiness_gate(connection, decision=decision)
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+    _with_duckdb_write_connection(database_path, operation=_operation)
+
+
 def decision_to_json(decision: DataGateDecision) -> dict[str, Any]:
     payload = asdict(decision)
     payload["issues"] = list(decision.issues)
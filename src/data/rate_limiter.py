@@ -0,0 +1,262 @@
+"""TuShare 通道限流器：按通道的令牌桶，支持进程内共享与可选的跨进程共享。
+
+核心组件：
+- TokenBucket: GCRA（理论到达时间）形式的令牌桶，支持突发容量，按预约顺序排队
+- ChannelRateLimiter: 按通道名（primary / fallback）管理一组 TokenBucket
+- shared_channel_rate_limiter(): 进程级注册表，同一配置下所有 fetcher 共用同一组令牌桶
+
+并行 fetch-batch 时，各 worker 的 TuShareFetcher 从同一组令牌桶取令牌，
+合计调用速率恰好等于配置的 *_rate_limit_per_min，而不是每个 worker 各自限速。
+scope=host 时令牌桶状态写入 cache 目录下的状态文件，同机多个 eq 进程共享配额。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.config.config import Config
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # pragma: no cover - non-Windows fallback
+    msvcrt = None
+
+
+RATE_LIMIT_SCOPES = ("process", "host")
+_CHANNEL_NAMES = ("primary", "fallback")
+
+
+def _normalize_scope(scope: str | None) -> str:
+    value = str(scope or "process").strip().lower() or "process"
+    if value not in RATE_LIMIT_SCOPES:
+        supported = ", ".join(RATE_LIMIT_SCOPES)
+        raise ValueError(f"invalid tushare_rate_limit_scope: {scope!r}; supported: {supported}")
+    return value
+
+
+@contextmanager
+def _exclusive_file_lock(path: Path) -> Iterator[int]:
+    # 跨进程互斥：Linux/macOS 用 fcntl.flock，Windows 用 msvcrt 字节锁（阻塞等待）
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:  # pragma: no cover - Windows only
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield fd
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:  # pragma: no cover - Windows only
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+
+class TokenBucket:
+    """GCRA 令牌桶：rate_per_min 为稳态速率，burst 为可瞬时消耗的令牌数。
+
+    acquire() 在锁内预约下一个可用时刻（theoretical arrival time），锁外 sleep，
+    因此等待者按预约顺序依次放行（先到先得），不会出现饥饿。
+    burst=1 时等价于“两次调用间隔不小于 60/rate 秒”的固定间隔限流。
+    配置 state_path 时预约状态保存在文件中，持文件锁读写，可跨进程共享。
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_min: int,
+        burst: int = 1,
+        now_fn: Callable[[], float] | None = None,
+        sleep_fn: Callable[[float], None] | None = None,
+        state_path: Path | None = None,
+    ) -> None:
+        self.rate_per_min = max(0, int(rate_per_min))
+        self.burst = max(1, int(burst))
+        self.state_path = state_path
+        # 跨进程共享必须使用墙上时钟；进程内使用单调时钟
+        self._now_fn = now_fn or (time.time if state_path is not None else time.monotonic)
+        self._sleep_fn = sleep_fn or time.sleep
+        self._lock = threading.Lock()
+        self._tat: float | None = None
+        self.acquired_count = 0
+        self.waited_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def interval_seconds(self) -> float:
+        return 60.0 / self.rate_per_min if self.rate_per_min > 0 else 0.0
+
+    def _reserve(self, now: float, tat: float | None) -> tuple[float, float]:
+        # 返回 (需要等待的秒数, 新的理论到达时间)
+        interval = self.interval_seconds
+        tolerance = interval * float(self.burst - 1)
+        effective_tat = now if tat is None else max(tat, now)
+        wait_seconds = max(0.0, effective_tat - tolerance - now)
+        return wait_seconds, effective_tat + interval
+
+    def _read_state(self, fd: int) -> float | None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = os.read(fd, 64).decode("ascii", errors="ignore").strip()
+        try:
+            return float(raw) if raw else None
+        except ValueError:
+            return None
+
+    def _write_state(self, fd: int, tat: float) -> None:
+        payload = f"{tat:.6f}".encode("ascii")
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, payload)
+
+    def acquire(self) -> float:
+        """取一个令牌，必要时阻塞等待；返回实际等待秒数。"""
+        if self.rate_per_min <= 0:
+            return 0.0
+        with self._lock:
+            now = self._now_fn()
+            if self.state_path is None:
+                wait_seconds, self._tat = self._reserve(now, self._tat)
+            else:
+                with _exclusive_file_lock(self.state_path) as fd:
+                    wait_seconds, tat = self._reserve(now, self._read_state(fd))
+                    self._write_state(fd, tat)
+            self.acquired_count += 1
+            if wait_seconds > 0:
+                self.waited_count += 1
+                self.wait_seconds_total += wait_seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        if wait_seconds > 0:
+            self._sleep_fn(wait_seconds)
+        return wait_seconds
+
+
+class ChannelRateLimiter:
+    """按通道名管理令牌桶；未配置速率（或速率为 0）的通道不限流。"""
+
+    def __init__(
+        self,
+        rates_per_min: dict[str, int],
+        *,
+        burst: int = 1,
+        state_dir: Path | None = None,
+        state_key: str = "",
+        now_fn: Callable[[], float] | None = None,
+        sleep_fn: Callable[[float], None] | None = None,
+    ) -> None:
+        self._buckets: dict[str, TokenBucket] = {}
+        for channel_name, rate in rates_per_min.items():
+            state_path = None
+            if state_dir is not None:
+                suffix = f"_{state_key}" if state_key else ""
+                state_path = state_dir / f"tushare_{channel_name}{suffix}.bucket"
+            self._buckets[channel_name] = TokenBucket(
+                rate_per_min=rate,
+                burst=burst,
+                now_fn=now_fn,
+                sleep_fn=sleep_fn,
+                state_path=state_path,
+            )
+
+    def rate_per_min(self, channel_name: str) -> int:
+        bucket = self._buckets.get(channel_name)
+        return 0 if bucket is None else bucket.rate_per_min
+
+    def acquire(self, channel_name: str) -> float:
+        bucket = self._buckets.get(channel_name)
+        if bucket is None:
+            return 0.0
+        return bucket.acquire()
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """各通道限流统计（调用次数、等待次数、累计/最大等待秒数）。"""
+        return {
+            channel_name: {
+                "rate_per_min": float(bucket.rate_per_min),
+                "burst": float(bucket.burst),
+                "acquired": float(bucket.acquired_count),
+                "waited": float(bucket.waited_count),
+                "wait_seconds_total": float(bucket.wait_seconds_total),
+                "wait_seconds_max": float(bucket.wait_seconds_max),
+            }
+            for channel_name, bucket in self._buckets.items()
+        }
+
+
+def resolve_channel_rate_limits(config: Config) -> dict[str, int]:
+    """解析 primary / fallback 通道限速（通道独立值为 0 时继承全局值）。"""
+    global_rate_limit = max(0, int(config.tushare_rate_limit_per_min))
+    primary_rate_limit = max(0, int(config.tushare_primary_rate_limit_per_min))
+    fallback_rate_limit = max(0, int(config.tushare_fallback_rate_limit_per_min))
+    return {
+        "primary": primary_rate_limit if primary_rate_limit > 0 else global_rate_limit,
+        "fallback": fallback_rate_limit if fallback_rate_limit > 0 else global_rate_limit,
+    }
+
+
+def _token_digest(config: Config) -> str:
+    # 状态文件按 token 区分，避免不同账号共用同一配额桶；不落盘明文 token
+    material = "|".join(
+        (
+            str(config.tushare_primary_token or config.tushare_token).strip(),
+            str(config.tushare_fallback_token).strip(),
+        )
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:12]
+
+
+def build_channel_rate_limiter(
+    config: Config,
+    *,
+    now_fn: Callable[[], float] | None = None,
+    sleep_fn: Callable[[float], None] | None = None,
+) -> ChannelRateLimiter:
+    """按配置构建一组新的通道令牌桶（不进入进程级注册表）。"""
+    scope = _normalize_scope(getattr(config, "tushare_rate_limit_scope", "process"))
+    state_dir = Path(config.cache_path) / "rate_limit" if scope == "host" else None
+    return ChannelRateLimiter(
+        resolve_channel_rate_limits(config),
+        burst=max(1, int(getattr(config, "tushare_rate_limit_burst", 1))),
+        state_dir=state_dir,
+        state_key=_token_digest(config) if state_dir is not None else "",
+        now_fn=now_fn,
+        sleep_fn=sleep_fn,
+    )
+
+
+_SHARED_LIMITERS: dict[tuple[object, ...], ChannelRateLimiter] = {}
+_SHARED_LIMITERS_LOCK = threading.Lock()
+
+
+def shared_channel_rate_limiter(config: Config) -> ChannelRateLimiter:
+    """返回进程级共享的通道令牌桶：相同 token + 限速配置复用同一实例。"""
+    rates = resolve_channel_rate_limits(config)
+    key = (
+        _token_digest(config),
+        tuple(rates[name] for name in _CHANNEL_NAMES),
+        max(1, int(getattr(config, "tushare_rate_limit_burst", 1))),
+        _normalize_scope(getattr(config, "tushare_rate_limit_scope", "process")),
+        str(config.cache_path),
+    )
+    with _SHARED_LIMITERS_LOCK:
+        limiter = _SHARED_LIMITERS.get(key)
+        if limiter is None:
+            limiter = build_channel_rate_limiter(config)
+            _SHARED_LIMITERS[key] = limiter
+        return limiter
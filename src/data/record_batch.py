@@ -0,0 +1,197 @@
+"""L1 列式记录批次：拉取 → 字段规范化 → DuckDB / Parquet 落盘共用同一个 Arrow Table。
+
+高频数据集（daily / daily_basic / limit_list / index_daily）单日约 5,400 行，
+逐行 dict 往返（DataFrame → list[dict] → DataFrame）只产生分配开销。本模块提供：
+
+- as_arrow_table(): None / list[dict] / DataFrame / Arrow 统一转为 pa.Table（Arrow 输入零拷贝）
+- normalize_tushare_fields(): RealTuShareClient 字段补全的列式实现
+  （trade_date / stock_code / ts_code）
+- fill_blank_column(): 列中空值 / 空串按常量补齐（快照 trade_date 回填）
+- fetch_table(): 经 fetcher 拉取并返回 pa.Table（fetcher 不支持列式时按 list[dict] 转换）
+- concat_tables() / count_by_trade_date(): 分块结果合并与按交易日计数
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# 需按请求参数回填 trade_date 的接口
+_TRADE_DATE_APIS = frozenset({"daily", "daily_basic", "index_daily", "limit_list", "index_member"})
+# 需由 ts_code 前 6 位补 stock_code 的接口
+_STOCK_CODE_APIS = frozenset({"daily", "daily_basic", "limit_list", "stock_basic"})
+
+
+def _column_array(values: list[Any]) -> pa.Array:
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 同一列类型混杂时按字符串保存（与 DataFrame object 列落库为 VARCHAR 一致）
+        array = pa.array([None if value is None else str(value) for value in values], pa.string())
+    if pa.types.is_null(array.type):
+        array = array.cast(pa.string())
+    return array
+
+
+def _from_records(rows: list[dict[str, Any]]) -> pa.Table:
+    # 列为所有行键的并集（按首次出现顺序），缺失键为 null，与 DataFrame.from_records 一致
+    columns: dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            columns.setdefault(str(key), None)
+    return pa.table(
+        {name: _column_array([row.get(name) for row in rows]) for name in columns}
+    )
+
+
+def _from_pandas(frame: pd.DataFrame) -> pa.Table:
+    try:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return _from_records(frame.to_dict(orient="records"))
+    for index, field in enumerate(table.schema):
+        if pa.types.is_null(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    return table
+
+
+def as_arrow_table(data: Any) -> pa.Table:
+    """将拉取结果统一转为 pa.Table；list 中非 dict 元素忽略（与既有 list[dict] 契约一致）。"""
+    if data is None:
+        return pa.table({})
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    if isinstance(data, pd.DataFrame):
+        return _from_pandas(data)
+    if isinstance(data, list):
+        return _from_records([row for row in data if isinstance(row, dict)])
+    if hasattr(data, "to_dict"):
+        return _from_records(
+            [row for row in data.to_dict(orient="records") if isinstance(row, dict)]
+        )
+    raise TypeError(f"unsupported payload type: {type(data)!r}")
+
+
+def _blank_mask(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    text = pc.utf8_trim_whitespace(pc.cast(column, pa.string()))
+    return pc.fill_null(pc.equal(text, ""), True)
+
+
+def _set_column(table: pa.Table, name: str, values: pa.ChunkedArray | pa.Array) -> pa.Table:
+    index = table.schema.get_field_index(name)
+    if index < 0:
+        return table.append_column(name, values)
+    return table.set_column(index, name, values)
+
+
+def _fill_where(
+    table: pa.Table,
+    name: str,
+    mask: pa.ChunkedArray,
+    values: pa.ChunkedArray | pa.Scalar,
+) -> pa.Table:
+    # mask 为 True 的行取 values，其余保留原值；列不存在时新增（其余行为 null）
+    if not pc.any(mask).as_py():
+        return table
+    if name in table.column_names:
+        current = pc.cast(table.column(name), pa.string())
+    else:
+        current = pa.nulls(table.num_rows, pa.string())
+    return _set_column(table, name, pc.if_else(mask, values, current))
+
+
+def fill_blank_column(table: pa.Table, name: str, value: str) -> pa.Table:
+    """name 列为空（null / 空白串 / 不存在）的行填入 value。"""
+    if not value or table.num_rows == 0:
+        return table
+    if name not in table.column_names:
+        return table.append_column(name, pa.array([value] * table.num_rows, pa.string()))
+    mask = _blank_mask(table.column(name))
+    return _fill_where(table, name, mask, pa.scalar(value, pa.string()))
+
+
+def _derive_stock_code(table: pa.Table) -> pa.Table:
+    if "ts_code" not in table.column_names:
+        return table
+    ts_code = pc.cast(table.column("ts_code"), pa.string())
+    derivable = pc.fill_null(pc.greater_equal(pc.utf8_length(ts_code), 6), False)
+    if "stock_code" in table.column_names:
+        derivable = pc.and_(derivable, _blank_mask(table.column("stock_code")))
+    return _fill_where(table, "stock_code", derivable, pc.utf8_slice_codeunits(ts_code, 0, 6))
+
+
+def normalize_tushare_fields(
+    table: pa.Table,
+    *,
+    api_name: str,
+    request_params: dict[str, Any],
+) -> pa.Table:
+    """TuShare 返回字段补全（列式）。
+
+    trade_cal 以 cal_date 补 trade_date；行情类接口以请求日期补 trade_date；
+    ts_code 前 6 位补 stock_code；index_member 以 con_code 补 ts_code。
+    """
+    if table.num_rows == 0:
+        return table
+    requested_trade_date = str(
+        request_params.get("trade_date", "")
+        or request_params.get("start_date", "")
+        or request_params.get("end_date", "")
+    ).strip()
+    if api_name == "trade_cal" and "cal_date" in table.column_names:
+        cal_date = table.column("cal_date")
+        mask = pc.invert(_blank_mask(cal_date))
+        if "trade_date" in table.column_names:
+            mask = pc.and_(mask, _blank_mask(table.column("trade_date")))
+        table = _fill_where(table, "trade_date", mask, pc.cast(cal_date, pa.string()))
+    if api_name in _TRADE_DATE_APIS and requested_trade_date:
+        table = fill_blank_column(table, "trade_date", requested_trade_date)
+    if api_name in _STOCK_CODE_APIS:
+        table = _derive_stock_code(table)
+    if api_name == "index_member":
+        if "con_code" in table.column_names:
+            con_code = table.column("con_code")
+            mask = pc.invert(_blank_mask(con_code))
+            if "ts_code" in table.column_names:
+                mask = pc.and_(mask, _blank_mask(table.column("ts_code")))
+            table = _fill_where(table, "ts_code", mask, pc.cast(con_code, pa.string()))
+        table = _derive_stock_code(table)
+    return table
+
+
+def fetch_table(fetcher: Any, api_name: str, params: dict[str, Any]) -> pa.Table:
+    """经 fetcher 拉取一次并返回 pa.Table（优先走 fetcher.fetch_table 列式路径）。"""
+    fetch = getattr(fetcher, "fetch_table", None)
+    if callable(fetch):
+        return fetch(api_name, params)
+    return as_arrow_table(fetcher.fetch_with_retry(api_name, params))
+
+
+def concat_tables(tables: list[pa.Table]) -> pa.Table:
+    """合并多个分块结果（列集合 / 类型不一致时按 Arrow 规则提升）。"""
+    non_empty = [table for table in tables if table.num_columns > 0]
+    if not non_empty:
+        return pa.table({})
+    if len(non_empty) == 1:
+        return non_empty[0]
+    return pa.concat_tables(non_empty, promote_options="permissive")
+
+
+def count_by_trade_date(table: pa.Table) -> dict[str, int]:
+    """按 trade_date 计数（列不存在时全部计入空串）。"""
+    if table.num_rows == 0:
+        return {}
+    if "trade_date" not in table.column_names:
+        return {"": int(table.num_rows)}
+    text = pc.cast(table.column("trade_date"), pa.string())
+    keys = pc.fill_null(pc.utf8_trim_whitespace(text), "")
+    counts = pc.value_counts(keys)
+    return {
+        str(item["values"]): int(item["counts"])
+        for item in counts.to_pylist()
+    }
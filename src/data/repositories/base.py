@@ -1,15 +1,18 @@
 """仓储基类（BaseRepository）和 DuckDB 锁恢复机制。
 
 提供：
-- save_to_database(): 带锁重试的 DuckDB 写入（线程锁 + 进程锁 + DuckDB 内部锁重试）
+- fetch_range(): 按 start_date/end_date 区间拉取（按行数上限分块），供窗口采集使用
+- save_to_database(): 带锁重试的 DuckDB 写入（线程锁 + 进程锁 + DuckDB 内部锁重试，单事务）
+- open_repository_write_session(): 跨多次写入复用同一连接的写会话（WriteSession）
 - save_to_parquet(): Parquet 文件写入
-- acquire_duckdb_interprocess_lock(): Windows 上基于文件字节锁的进程间协调
+- 写会话持有进程间写入锁（src/db/process_lock.py 的 acquire_duckdb_interprocess_lock，
+  与 src/db/helpers.py 的通用写会话共用）
 """
 
 from __future__ import annotations
 
-from contextlib import contextmanager
-import os
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager
 import re
 import threading
 import time
@@ -17,14 +20,18 @@ from pathlib import Path
 from typing import Any
 
 import duckdb
-import pandas as pd
+import pyarrow as pa
 
 from src.config.config import Config
-
-try:
-    import msvcrt
-except ImportError:  # pragma: no cover - non-Windows fallback
-    msvcrt = None
+from src.data.record_batch import as_arrow_table, concat_tables, fetch_table
+from src.db.helpers import WriteSession, table_exists
+from src.db.parquet_lake import write_trade_date_partitions
+from src.db.process_lock import (
+    acquire_duckdb_interprocess_lock,
+    read_duckdb_lock_holder,
+)
+from src.db.storage_backend import open_read_connection, storage_backend
+from src.db.writer_client import RemoteWriteSession, connect_writer
 
 
 def is_duckdb_lock_error(exc: Exception) -> bool:
@@ -50,52 +57,8 @@ def extract_lock_holder_pid(message: str) -> str:
     return str(match.group(1))
 
 
-@contextmanager
-def acquire_duckdb_interprocess_lock(
-    database_path: Path,
-    *,
-    timeout_seconds: float,
-    poll_seconds: float,
-):
-    """跨进程写入协调：在 Windows 上通过 lock 文件字节锁实现互斥。
-
-    非 Windows 平台直接 yield（不需要进程锁）。
-    超时未获取锁时抛出 TimeoutError。
-    """
-    if os.name != "nt" or msvcrt is None:
-        yield
-        return
-    lock_path = database_path.with_suffix(f"{database_path.suffix}.lock")
-    lock_path.parent.mkdir(parents=True, exist_ok=True)
-    timeout = max(0.0, float(timeout_seconds))
-    poll = max(0.01, float(poll_seconds))
-    deadline = time.monotonic() + timeout
-    while True:
-        handle = lock_path.open("a+b")
-        try:
-            handle.seek(0)
-            handle.write(b"\0")
-            handle.flush()
-            handle.seek(0)
-            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
-            break
-        except OSError:
-            handle.close()
-            if time.monotonic() >= deadline:
-                raise TimeoutError(f"duckdb_interprocess_lock_timeout: {lock_path}")
-            time.sleep(poll)
-    try:
-        yield
-    finally:
-        try:
-            handle.seek(0)
-            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
-        finally:
-            handle.close()
-
-
 class DuckDBLockRecoveryError(RuntimeError):
-    """所有锁重试耗尽后抛出，携带详细诊断信息（重试次数、等待时间、持锁进程 PID）。"""
+    """所有锁重试耗尽后抛出，携带详细诊断信息（重试次数、等待时间、持锁进程元数据）。"""
     def __init__(
         self,
         *,
@@ -104,32 +67,71 @@ class DuckDBLockRecoveryError(RuntimeError):
         wait_seconds_total: float,
         last_error_message: str,
         lock_holder_pid: str = "",
+        lock_wait_seconds: float = 0.0,
+        lock_holder_command: str = "",
+        lock_holder_since: str = "",
     ) -> None:
         self.database_path = database_path
         self.retry_attempts = int(retry_attempts)
         self.wait_seconds_total = float(wait_seconds_total)
         self.last_error_message = str(last_error_message)
         self.lock_holder_pid = str(lock_holder_pid).strip()
+        self.lock_wait_seconds = float(lock_wait_seconds)
+        self.lock_holder_command = str(lock_holder_command).strip()
+        self.lock_holder_since = str(lock_holder_since).strip()
         holder = self.lock_holder_pid or "unknown"
         super().__init__(
             "duckdb_lock_recovery_exhausted: "
             f"db={self.database_path} "
             f"retry_attempts={self.retry_attempts} "
             f"wait_seconds_total={self.wait_seconds_total:.3f} "
+            f"lock_wait_seconds={self.lock_wait_seconds:.3f} "
             f"lock_holder_pid={holder} "
+            f"lock_holder_command={self.lock_holder_command or 'unknown'} "
+            f"lock_holder_since={self.lock_holder_since or 'unknown'} "
             f"last_error={self.last_error_message}"
         )
 
+    @classmethod
+    def from_lock_state(
+        cls,
+        *,
+        database_path: Path,
+        retry_attempts: int,
+        wait_seconds_total: float,
+        last_error_message: str,
+        lock_holder_pid: str = "",
+        lock_wait_seconds: float = 0.0,
+    ) -> DuckDBLockRecoveryError:
+        """结合持锁元数据文件构造异常（错误信息中未带 pid 时以元数据补齐）。"""
+        holder = read_duckdb_lock_holder(database_path)
+        return cls(
+            database_path=database_path,
+            retry_attempts=retry_attempts,
+            wait_seconds_total=wait_seconds_total,
+            last_error_message=last_error_message,
+            lock_holder_pid=lock_holder_pid or holder.get("pid", ""),
+            lock_wait_seconds=lock_wait_seconds,
+            lock_holder_command=holder.get("command", ""),
+            lock_holder_since=holder.get("since", ""),
+        )
+
+
+DEFAULT_RANGE_ROW_CAP = 6000
+
 
 class BaseRepository:
     """所有 L1 原始数据仓储的基类。
 
     子类只需设置 table_name 并实现 fetch() 方法。
+    支持区间拉取的接口再设置 range_api_name（及每日行数估计 range_rows_per_day_hint）。
     save_to_database() / save_to_parquet() 由基类统一提供，
     内置线程锁 + 进程锁 + DuckDB 内部锁重试机制。
     """
 
     table_name = ""
+    range_api_name = ""
+    range_rows_per_day_hint = 1
     duckdb_lock_max_attempts = 12
     duckdb_lock_retry_base_seconds = 0.5
     duckdb_process_lock_timeout_seconds = 120.0
@@ -141,18 +143,66 @@ class BaseRepository:
         self.database_path = Path(self.config.duckdb_dir) / "emotionquant.duckdb"
         self.parquet_root = Path(self.config.parquet_path) / "l1"
 
+    @property
+    def storage_backend(self) -> str:
+        """L1 存储后端（STORAGE_BACKEND_L1）：duckdb / parquet / hybrid。"""
+        return storage_backend(self.config, "l1")
+
     def fetch(self, *args: Any, **kwargs: Any) -> Any:
         raise NotImplementedError("fetch is not implemented")
 
-    def _normalize_records(self, data: Any) -> list[dict[str, Any]]:
-        if data is None:
-            return []
-        if isinstance(data, list):
-            return [row for row in data if isinstance(row, dict)]
-        if hasattr(data, "to_dict"):
-            records = data.to_dict(orient="records")
-            return [row for row in records if isinstance(row, dict)]
-        raise TypeError(f"unsupported payload type: {type(data)!r}")
+    def fetch_range(
+        self,
+        *,
+        trade_dates: list[str],
+        fetcher: Any,
+        row_cap: int = DEFAULT_RANGE_ROW_CAP,
+    ) -> pa.Table:
+        """按 start_date/end_date 区间拉取 trade_dates 覆盖的全部数据（Arrow Table）。"""
+        if not self.range_api_name:
+            raise NotImplementedError(f"{self.__class__.__name__} does not support range fetch")
+        return self._fetch_range_chunks(
+            fetcher,
+            self.range_api_name,
+            trade_dates=trade_dates,
+            row_cap=row_cap,
+        )
+
+    def _fetch_range_chunks(
+        self,
+        fetcher: Any,
+        api_name: str,
+        *,
+        trade_dates: list[str],
+        row_cap: int,
+        params: dict[str, Any] | None = None,
+        rows_per_day_hint: int | None = None,
+    ) -> pa.Table:
+        # 接口单次返回行数有上限（超过即截断），按每日行数估计切分区间：
+        # 返回行数触顶说明可能被截断，区间减半重取；否则按实测每日行数调整下一块跨度。
+        dates = sorted({str(item) for item in trade_dates if str(item).strip()})
+        if not dates:
+            return pa.table({})
+        cap = max(1, int(row_cap))
+        hint = max(1, int(rows_per_day_hint or self.range_rows_per_day_hint))
+        span = max(1, (cap - 1) // hint)
+        chunks: list[pa.Table] = []
+        index = 0
+        while index < len(dates):
+            chunk = dates[index : index + span]
+            chunk_table = fetch_table(
+                fetcher,
+                api_name,
+                {**(params or {}), "start_date": chunk[0], "end_date": chunk[-1]},
+            )
+            if chunk_table.num_rows >= cap and len(chunk) > 1:
+                span = max(1, len(chunk) // 2)
+                continue
+            chunks.append(chunk_table)
+            index += len(chunk)
+            if chunk_table.num_rows:
+                span = max(1, int((cap - 1) / (chunk_table.num_rows / len(chunk))))
+        return concat_tables(chunks)
 
     def _assert_table_name(self) -> None:
         if not self.table_name:
@@ -166,159 +216,151 @@ class BaseRepository:
     def _extract_lock_holder_pid(message: str) -> str:
         return extract_lock_holder_pid(message)
 
-    def _table_has_column(
-        self, connection: duckdb.DuckDBPyConnection, *, table_name: str, column_name: str
-    ) -> bool:
-        row = connection.execute(
-            "SELECT COUNT(*) FROM information_schema.columns WHERE table_name = ? AND column_name = ?",
-            [table_name, column_name],
-        ).fetchone()
-        return bool(row and int(row[0]) > 0)
-
-    def _replace_trade_date_partition(self, connection: duckdb.DuckDBPyConnection) -> None:
-        if not self._table_has_column(connection, table_name=self.table_name, column_name="trade_date"):
-            return
-        incoming_columns = {str(item[0]) for item in connection.execute("DESCRIBE incoming_df").fetchall()}
-        if "trade_date" not in incoming_columns:
-            return
-        connection.execute(
-            f"DELETE FROM {self.table_name} "
-            "WHERE CAST(trade_date AS VARCHAR) IN ("
-            "SELECT DISTINCT CAST(trade_date AS VARCHAR) FROM incoming_df WHERE trade_date IS NOT NULL)"
+    def open_write_session(self) -> AbstractContextManager[WriteSession | RemoteWriteSession]:
+        """按本仓储的锁重试参数打开写会话（可供多个仓储共用）。"""
+        return open_repository_write_session(
+            self.database_path,
+            max_attempts=int(self.duckdb_lock_max_attempts),
+            retry_base_seconds=float(self.duckdb_lock_retry_base_seconds),
+            process_lock_timeout_seconds=float(self.duckdb_process_lock_timeout_seconds),
+            process_lock_poll_seconds=float(self.duckdb_process_lock_poll_seconds),
         )
 
-    def save_to_database(self, data: Any) -> int:
+    def save_to_database(
+        self,
+        data: Any,
+        *,
+        session: WriteSession | RemoteWriteSession | None = None,
+    ) -> int:
         """将数据写入 DuckDB，按 trade_date 分区去重。
 
-        写入流程：获取线程锁 → 获取进程锁 → DuckDB connect → 建表/同步 schema → 删旧分区 → 插入新数据。
-        遇到 DuckDB 锁错误时自动重试（指数退避），重试耗尽后抛出 DuckDBLockRecoveryError。
+        写入流程：建表/同步 schema → 删旧分区 → 插入新数据，删旧分区与插入在同一事务内完成，
+        多交易日数据（窗口采集）整体生效或整体回滚。
+        data 可为 Arrow Table / DataFrame / list[dict]，统一转为 Arrow Table 后零拷贝注册到 DuckDB。
+        传入 session 时复用会话连接与表结构缓存；否则临时打开一个会话
+        （线程锁 + 进程锁 + DuckDB 连接锁重试，重试耗尽抛出 DuckDBLockRecoveryError）。
         """
         self._assert_table_name()
-        records = self._normalize_records(data)
-        if not records:
+        table = as_arrow_table(data)
+        if table.num_rows == 0:
             return 0
+        if self.storage_backend == "parquet":
+            # parquet 后端：L1 只落 Parquet 湖，数据库文件不保存 raw_* 表
+            self.save_to_parquet(table)
+            return int(table.num_rows)
 
-        frame = pd.DataFrame.from_records(records)
-        self.database_path.parent.mkdir(parents=True, exist_ok=True)
-
-        max_attempts = max(1, int(self.duckdb_lock_max_attempts))
-        wait_base_seconds = max(0.0, float(self.duckdb_lock_retry_base_seconds))
-        wait_seconds_total = 0.0
-        last_error_message = ""
-        lock_holder_pid = ""
-
-        with self._write_io_lock:  # 线程锁：同进程内串行化写入
-            lock_wait_started = time.monotonic()
-            try:
-                with acquire_duckdb_interprocess_lock(
-                    self.database_path,
-                    timeout_seconds=float(self.duckdb_process_lock_timeout_seconds),
-                    poll_seconds=float(self.duckdb_process_lock_poll_seconds),
-                ):
-                    wait_seconds_total += max(0.0, time.monotonic() - lock_wait_started)
-                    for attempt in range(1, max_attempts + 1):
-                        try:
-                            with duckdb.connect(str(self.database_path)) as connection:
-                                connection.register("incoming_df", frame)
-                                connection.execute(
-                                    f"CREATE TABLE IF NOT EXISTS {self.table_name} "
-                                    "AS SELECT * FROM incoming_df WHERE 1=0"
-                                )
-                                self._sync_table_schema(connection)
-                                self._replace_trade_date_partition(connection)
-                                connection.execute(f"INSERT INTO {self.table_name} BY NAME SELECT * FROM incoming_df")
-                                connection.unregister("incoming_df")
-                            return int(len(frame))
-                        except Exception as exc:
-                            if not self._is_duckdb_lock_error(exc):
-                                raise
-                            last_error_message = str(exc)
-                            extracted_pid = self._extract_lock_holder_pid(last_error_message)
-                            if extracted_pid:
-                                lock_holder_pid = extracted_pid
-                            if attempt >= max_attempts:
-                                raise DuckDBLockRecoveryError(
-                                    database_path=self.database_path,
-                                    retry_attempts=max_attempts,
-                                    wait_seconds_total=wait_seconds_total,
-                                    last_error_message=last_error_message,
-                                    lock_holder_pid=lock_holder_pid,
-                                ) from exc
-                            wait_seconds = wait_base_seconds * float(attempt)
-                            if wait_seconds > 0:
-                                time.sleep(wait_seconds)
-                                wait_seconds_total += wait_seconds
-            except TimeoutError as exc:
-                wait_seconds_total += max(0.0, time.monotonic() - lock_wait_started)
-                last_error_message = str(exc)
-                extracted_pid = self._extract_lock_holder_pid(last_error_message)
-                if extracted_pid:
-                    lock_holder_pid = extracted_pid
-                raise DuckDBLockRecoveryError(
-                    database_path=self.database_path,
-                    retry_attempts=max_attempts,
-                    wait_seconds_total=wait_seconds_total,
-                    last_error_message=last_error_message,
-                    lock_holder_pid=lock_holder_pid,
-                ) from exc
-
-        return int(len(frame))
-
-    def _sync_table_schema(self, connection: duckdb.DuckDBPyConnection) -> None:
-        # 自动补齐表缺少的列（incoming 有但 table 没有的列自动 ALTER TABLE ADD）
-        existing = connection.execute(
-            f"SELECT column_name FROM information_schema.columns "
-            f"WHERE table_name = '{self.table_name}'"
-        ).fetchall()
-        existing_columns = {str(item[0]) for item in existing}
-        incoming = connection.execute("DESCRIBE incoming_df").fetchall()
-        for column_name, column_type, *_ in incoming:
-            name = str(column_name)
-            if name in existing_columns:
-                continue
-            escaped_name = name.replace('"', '""')
-            connection.execute(
-                f'ALTER TABLE {self.table_name} ADD COLUMN "{escaped_name}" {column_type}'
-            )
-            existing_columns.add(name)
+        if session is not None:
+            return session.write_frame(self.table_name, table)
+        with self.open_write_session() as own_session:
+            return own_session.write_frame(self.table_name, table)
 
     def save_to_parquet(self, data: Any) -> Path:
-        """将数据写入 Parquet，按 trade_date 分区存储。
+        """将数据写入 Parquet 湖，按 year/month 分区、trade_date 追加存储。
 
-        存储结构（对齐 data-layer-algorithm.md §2.3）：
-          {parquet_root}/{table_name}/{trade_date}.parquet
+        存储结构（见 src/db/parquet_lake.py）：
+          {parquet_root}/{table_name}/year=YYYY/month=MM/{trade_date}.parquet
+          （eq compact-parquet 合并为 year=YYYY/month=MM/part-YYYYMM.parquet）
 
-        若数据不含 trade_date 列，则写入 {table_name}/latest.parquet。
+        同一 trade_date 重写为整体替换；若数据不含 trade_date 列，则写入
+        {table_name}/latest.parquet。传入 Arrow Table 时与 save_to_database 共用同一份列式数据。
         """
         self._assert_table_name()
-        records = self._normalize_records(data)
+        table = as_arrow_table(data)
         table_dir = self.parquet_root / self.table_name
-        if not records:
+        if table.num_rows == 0:
             return table_dir
-
-        frame = pd.DataFrame.from_records(records)
-        table_dir.mkdir(parents=True, exist_ok=True)
-
-        with self._write_io_lock:
-            if "trade_date" in frame.columns:
-                for trade_date_value, group in frame.groupby("trade_date"):
-                    file_name = str(trade_date_value).strip()
-                    if not file_name:
-                        file_name = "unknown"
-                    output_path = table_dir / f"{file_name}.parquet"
-                    group.to_parquet(output_path, index=False)
-            else:
-                output_path = table_dir / "latest.parquet"
-                frame.to_parquet(output_path, index=False)
+        write_trade_date_partitions(table_dir, table)
         return table_dir
 
     def count_by_trade_date(self, trade_date: str) -> int:
         self._assert_table_name()
-        if not self.database_path.exists():
+        if self.storage_backend == "duckdb" and not self.database_path.exists():
             return 0
-        with duckdb.connect(str(self.database_path), read_only=True) as connection:
+        with open_read_connection(self.database_path, config=self.config) as connection:
+            if not table_exists(connection, self.table_name):
+                return 0
             result = connection.execute(
                 f"SELECT COUNT(*) FROM {self.table_name} WHERE trade_date = ?",
                 [trade_date],
             ).fetchone()
         return int(result[0]) if result else 0
+
+
+@contextmanager
+def open_repository_write_session(
+    database_path: Path,
+    *,
+    max_attempts: int = 12,
+    retry_base_seconds: float = 0.5,
+    process_lock_timeout_seconds: float = 120.0,
+    process_lock_poll_seconds: float = 0.1,
+) -> Iterator[WriteSession | RemoteWriteSession]:
+    """打开仓储写会话：进程锁 + 带锁重试的 DuckDB 连接，会话期间复用同一连接。
+
+    会话内每个事务持有 BaseRepository._write_io_lock，与同进程其它写入方串行。
+    连接遇到 DuckDB 锁错误时线性退避重试，重试耗尽抛出 DuckDBLockRecoveryError。
+    """
+    client = connect_writer(database_path)
+    if client is not None:
+        # 单写入服务运行中：写入提交给服务，由服务独占写连接
+        yield RemoteWriteSession(client)
+        return
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    attempts = max(1, int(max_attempts))
+    wait_base_seconds = max(0.0, float(retry_base_seconds))
+    wait_seconds_total = 0.0
+    last_error_message = ""
+    lock_holder_pid = ""
+
+    with ExitStack() as stack:
+        lock_wait_started = time.monotonic()
+        try:
+            stack.enter_context(
+                acquire_duckdb_interprocess_lock(
+                    database_path,
+                    timeout_seconds=float(process_lock_timeout_seconds),
+                    poll_seconds=float(process_lock_poll_seconds),
+                )
+            )
+        except TimeoutError as exc:
+            last_error_message = str(exc)
+            lock_wait_seconds = max(0.0, time.monotonic() - lock_wait_started)
+            raise DuckDBLockRecoveryError.from_lock_state(
+                database_path=database_path,
+                retry_attempts=attempts,
+                wait_seconds_total=lock_wait_seconds,
+                last_error_message=last_error_message,
+                lock_holder_pid=extract_lock_holder_pid(last_error_message),
+                lock_wait_seconds=lock_wait_seconds,
+            ) from exc
+        lock_wait_seconds = max(0.0, time.monotonic() - lock_wait_started)
+        wait_seconds_total += lock_wait_seconds
+
+        connection: duckdb.DuckDBPyConnection | None = None
+        attempt = 0
+        while connection is None:
+            attempt += 1
+            try:
+                connection = duckdb.connect(str(database_path))
+            except Exception as exc:
+                if not is_duckdb_lock_error(exc):
+                    raise
+                last_error_message = str(exc)
+                extracted_pid = extract_lock_holder_pid(last_error_message)
+                if extracted_pid:
+                    lock_holder_pid = extracted_pid
+                if attempt >= attempts:
+                    raise DuckDBLockRecoveryError.from_lock_state(
+                        database_path=database_path,
+                        retry_attempts=attempts,
+                        wait_seconds_total=wait_seconds_total,
+                        last_error_message=last_error_message,
+                        lock_holder_pid=lock_holder_pid,
+                        lock_wait_seconds=lock_wait_seconds,
+                    ) from exc
+                wait_seconds = wait_base_seconds * float(attempt)
+                if wait_seconds > 0:
+                    time.sleep(wait_seconds)
+                    wait_seconds_total += wait_seconds
+        stack.callback(connection.close)
+        yield WriteSession(connection, lock=BaseRepository._write_io_lock)
@@ -4,7 +4,13 @@ from __future__ import annotations
 
 from typing import Any
 
+import pyarrow as pa
+
 from src.data.fetcher import TuShareFetcher
+from src.data.market_daily_agg import write_market_daily_agg
+from src.data.record_batch import as_arrow_table, fetch_table
+from src.db.helpers import WriteSession
+from src.db.writer_client import RemoteWriteSession
 
 from .base import BaseRepository
 
@@ -13,6 +19,8 @@ class DailyRepository(BaseRepository):
     """股票日线行情仓储（raw_daily），按 trade_date 拉取。"""
 
     table_name = "raw_daily"
+    range_api_name = "daily"
+    range_rows_per_day_hint = 6000
 
     def fetch(
         self,
@@ -20,5 +28,26 @@ class DailyRepository(BaseRepository):
         trade_date: str,
         fetcher: TuShareFetcher,
         **_: Any,
-    ) -> list[dict[str, Any]]:
-        return fetcher.fetch_with_retry("daily", {"trade_date": trade_date})
+    ) -> pa.Table:
+        return fetch_table(fetcher, "daily", {"trade_date": trade_date})
+
+    def save_to_database(
+        self,
+        data: Any,
+        *,
+        session: WriteSession | RemoteWriteSession | None = None,
+    ) -> int:
+        """写入 raw_daily，并在同一事务内刷新涉及交易日的 market_daily_agg 聚合行。
+
+        parquet 后端 raw_daily 只落 Parquet 湖，聚合表仍写入 DuckDB。
+        """
+        table = as_arrow_table(data)
+        if table.num_rows == 0:
+            return 0
+        if session is None:
+            with self.open_write_session() as own_session:
+                return self.save_to_database(table, session=own_session)
+        with session.batch():
+            saved_count = super().save_to_database(table, session=session)
+            write_market_daily_agg(session, table)
+        return saved_count
@@ -4,31 +4,20 @@ from __future__ import annotations
 
 from typing import Any
 
+import pyarrow as pa
+
 from src.data.fetcher import TuShareFetcher
+from src.data.record_batch import fetch_table, fill_blank_column
 
 from .base import BaseRepository
 
 
-def _attach_snapshot_trade_date(
-    rows: list[dict[str, Any]],
-    *,
-    snapshot_trade_date: str,
-) -> list[dict[str, Any]]:
-    if not snapshot_trade_date:
-        return rows
-    normalized: list[dict[str, Any]] = []
-    for row in rows:
-        item = dict(row)
-        if not str(item.get("trade_date", "")).strip():
-            item["trade_date"] = snapshot_trade_date
-        normalized.append(item)
-    return normalized
-
-
 class DailyBasicRepository(BaseRepository):
     """股票每日指标仓储（raw_daily_basic），按 trade_date 拉取。"""
 
     table_name = "raw_daily_basic"
+    range_api_name = "daily_basic"
+    range_rows_per_day_hint = 6000
 
     def fetch(
         self,
@@ -37,10 +26,7 @@ class DailyBasicRepository(BaseRepository):
         fetcher: TuShareFetcher,
         snapshot_trade_date: str | None = None,
         **_: Any,
-    ) -> list[dict[str, Any]]:
-        rows = fetcher.fetch_with_retry("daily_basic", {"trade_date": trade_date})
-        return _attach_snapshot_trade_date(
-            rows,
-            snapshot_trade_date=snapshot_trade_date or trade_date,
-        )
+    ) -> pa.Table:
+        table = fetch_table(fetcher, "daily_basic", {"trade_date": trade_date})
+        return fill_blank_column(table, "trade_date", snapshot_trade_date or trade_date)
 
@@ -4,25 +4,22 @@ from __future__ import annotations
 
 from typing import Any
 
-from src.data.fetcher import TuShareFetcher
+import pyarrow as pa
 
-from .base import BaseRepository
+from src.data.fetcher import TuShareFetcher
+from src.data.record_batch import concat_tables, fetch_table, fill_blank_column
 
+from .base import DEFAULT_RANGE_ROW_CAP, BaseRepository
 
-def _attach_snapshot_trade_date(
-    rows: list[dict[str, Any]],
-    *,
-    snapshot_trade_date: str,
-) -> list[dict[str, Any]]:
-    if not snapshot_trade_date:
-        return rows
-    normalized: list[dict[str, Any]] = []
-    for row in rows:
-        item = dict(row)
-        if not str(item.get("trade_date", "")).strip():
-            item["trade_date"] = snapshot_trade_date
-        normalized.append(item)
-    return normalized
+# TuShare index_daily 要求 ts_code 时回退拉取的核心指数集合
+_CORE_INDEX_CODES = (
+    "000001.SH",
+    "399001.SZ",
+    "399006.SZ",
+    "000300.SH",
+    "000905.SH",
+    "000852.SH",
+)
 
 
 class IndexDailyRepository(BaseRepository):
@@ -32,6 +29,8 @@ class IndexDailyRepository(BaseRepository):
     """
 
     table_name = "raw_index_daily"
+    range_api_name = "index_daily"
+    range_rows_per_day_hint = 500
 
     def fetch(
         self,
@@ -40,30 +39,49 @@ class IndexDailyRepository(BaseRepository):
         fetcher: TuShareFetcher,
         snapshot_trade_date: str | None = None,
         **_: Any,
-    ) -> list[dict[str, Any]]:
+    ) -> pa.Table:
         try:
-            rows = fetcher.fetch_with_retry("index_daily", {"trade_date": trade_date})
+            table = fetch_table(fetcher, "index_daily", {"trade_date": trade_date})
         except Exception as exc:
             message = str(exc).lower()
             if "ts_code" not in message:
                 raise
-            rows = []
             # TuShare index_daily may require ts_code; fallback to core benchmark set.
-            for ts_code in (
-                "000001.SH",
-                "399001.SZ",
-                "399006.SZ",
-                "000300.SH",
-                "000905.SH",
-                "000852.SH",
-            ):
-                rows.extend(
-                    fetcher.fetch_with_retry(
+            table = concat_tables(
+                [
+                    fetch_table(
+                        fetcher,
                         "index_daily",
                         {"ts_code": ts_code, "trade_date": trade_date},
                     )
+                    for ts_code in _CORE_INDEX_CODES
+                ]
+            )
+        return fill_blank_column(table, "trade_date", snapshot_trade_date or trade_date)
+
+    def fetch_range(
+        self,
+        *,
+        trade_dates: list[str],
+        fetcher: TuShareFetcher,
+        row_cap: int = DEFAULT_RANGE_ROW_CAP,
+    ) -> pa.Table:
+        try:
+            return super().fetch_range(trade_dates=trade_dates, fetcher=fetcher, row_cap=row_cap)
+        except Exception as exc:
+            if "ts_code" not in str(exc).lower():
+                raise
+        # 区间模式下按指数逐个拉取：每个指数每日仅 1 行，一次调用即可覆盖整个窗口
+        return concat_tables(
+            [
+                self._fetch_range_chunks(
+                    fetcher,
+                    "index_daily",
+                    trade_dates=trade_dates,
+                    row_cap=row_cap,
+                    params={"ts_code": ts_code},
+                    rows_per_day_hint=1,
                 )
-        return _attach_snapshot_trade_date(
-            rows,
-            snapshot_trade_date=snapshot_trade_date or trade_date,
+                for ts_code in _CORE_INDEX_CODES
+            ]
         )
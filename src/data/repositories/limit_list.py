@@ -4,7 +4,10 @@ from __future__ import annotations
 
 from typing import Any
 
+import pyarrow as pa
+
 from src.data.fetcher import TuShareFetcher
+from src.data.record_batch import fetch_table
 
 from .base import BaseRepository
 
@@ -13,6 +16,8 @@ class LimitListRepository(BaseRepository):
     """涨跌停列表仓储（raw_limit_list），按 trade_date 拉取。"""
 
     table_name = "raw_limit_list"
+    range_api_name = "limit_list"
+    range_rows_per_day_hint = 200
 
     def fetch(
         self,
@@ -20,5 +25,5 @@ class LimitListRepository(BaseRepository):
         trade_date: str,
         fetcher: TuShareFetcher,
         **_: Any,
-    ) -> list[dict[str, Any]]:
-        return fetcher.fetch_with_retry("limit_list", {"trade_date": trade_date})
+    ) -> pa.Table:
+        return fetch_table(fetcher, "limit_list", {"trade_date": trade_date})
@@ -6,11 +6,11 @@ from typing import Any
 
 from src.data.fetcher import TuShareFetcher
 
-from .base import BaseRepository
+from .base import DEFAULT_RANGE_ROW_CAP, BaseRepository
 
 
 class TradeCalendarsRepository(BaseRepository):
-    """交易日历仓储（raw_trade_cal），按单日拉取。"""
+    """交易日历仓储（raw_trade_cal），按单日或按区间拉取。"""
 
     table_name = "raw_trade_cal"
 
@@ -25,3 +25,20 @@ class TradeCalendarsRepository(BaseRepository):
             "trade_cal",
             {"start_date": trade_date, "end_date": trade_date},
         )
+
+    def fetch_range(
+        self,
+        *,
+        trade_dates: list[str],
+        fetcher: TuShareFetcher,
+        row_cap: int = DEFAULT_RANGE_ROW_CAP,
+    ) -> list[dict[str, Any]]:
+        # 交易日历含休市日，直接按 trade_dates 首尾一次拉取整个区间
+        del row_cap
+        dates = sorted(str(item) for item in trade_dates if str(item).strip())
+        if not dates:
+            return []
+        return fetcher.fetch_with_retry(
+            "trade_cal",
+            {"start_date": dates[0], "end_date": dates[-1]},
+        )
@@ -0,0 +1,259 @@
+"""个股滚动状态（L2 辅助）：100 日新高 / 新低与连续涨停 / 连续新高的增量状态。
+
+L2 快照的 new_100d_high_count / continuous_limit_up_2d 等字段需要每只股票近 100 日
+历史；逐日回读 100 日行情会让区间重建变成二次复杂度。本模块为每只股票维护：
+
+- 最近 ROLLING_WINDOW_DAYS 个有效收盘价的环形缓冲区（定长数组 + 写入位置）
+- 连续涨停天数、连续新高天数、最近一次有行情的交易日
+
+按交易日逐日推进，单日只触及当日有行情的股票，开销 O(股票数 × 窗口)（numpy 向量化）。
+口径：
+- 新高 / 新低：此前窗口已满 ROLLING_WINDOW_DAYS 个收盘价，且当日收盘价严格高于 / 低于窗口极值
+- 连续涨停 / 连续新高：当日成立则在该股上一次有行情时的计数上 +1，否则归零；停牌日不中断
+- 昨日涨停：该股在上一推进交易日有行情且涨停
+
+持久化两张表：
+- stock_rolling_state：最新状态（每只股票一行，按 state_scope 整体替换）
+- stock_rolling_daily：每个交易日每只股票的判定结果，供 L2 聚合与重跑复用
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from src.db.helpers import WriteSession, table_exists
+from src.db.writer_client import RemoteWriteSession
+
+ROLLING_WINDOW_DAYS = 100
+ROLLING_STATE_TABLE = "stock_rolling_state"
+ROLLING_DAILY_TABLE = "stock_rolling_daily"
+ROLLING_STATE_SCOPE = "latest"
+ROLLING_DAILY_COLUMNS = (
+    "trade_date",
+    "stock_code",
+    "is_new_100d_high",
+    "is_new_100d_low",
+    "limit_up_streak",
+    "new_high_streak",
+    "prev_limit_up",
+)
+
+
+class StockRollingState:
+    """全市场个股滚动状态（可变，advance() 原地推进一个交易日）。"""
+
+    def __init__(self, *, window: int = ROLLING_WINDOW_DAYS) -> None:
+        self.window = int(window)
+        self.as_of_trade_date = ""
+        self.stock_codes = np.empty(0, dtype=object)
+        self.close_ring = np.empty((0, self.window), dtype=np.float64)
+        self.ring_pos = np.empty(0, dtype=np.int64)
+        self.ring_count = np.empty(0, dtype=np.int64)
+        self.limit_up_streak = np.empty(0, dtype=np.int64)
+        self.new_high_streak = np.empty(0, dtype=np.int64)
+        self.last_trade_date = np.empty(0, dtype=object)
+        self._rows: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return int(len(self.stock_codes))
+
+    def _ensure_rows(self, codes: np.ndarray) -> np.ndarray:
+        # 代码 → 行号；新代码追加到数组末尾（环形缓冲区以 NaN 占位）
+        new_codes = [code for code in dict.fromkeys(codes.tolist()) if code not in self._rows]
+        if new_codes:
+            start = len(self)
+            added = len(new_codes)
+            self.stock_codes = np.concatenate([self.stock_codes, np.array(new_codes, dtype=object)])
+            self.close_ring = np.vstack(
+                [self.close_ring, np.full((added, self.window), np.nan, dtype=np.float64)]
+            )
+            self.ring_pos = np.concatenate([self.ring_pos, np.zeros(added, dtype=np.int64)])
+            self.ring_count = np.concatenate([self.ring_count, np.zeros(added, dtype=np.int64)])
+            self.limit_up_streak = np.concatenate(
+                [self.limit_up_streak, np.zeros(added, dtype=np.int64)]
+            )
+            self.new_high_streak = np.concatenate(
+                [self.new_high_streak, np.zeros(added, dtype=np.int64)]
+            )
+            self.last_trade_date = np.concatenate(
+                [self.last_trade_date, np.full(added, "", dtype=object)]
+            )
+            for offset, code in enumerate(new_codes):
+                self._rows[code] = start + offset
+        return np.fromiter(
+            (self._rows[code] for code in codes.tolist()), dtype=np.int64, count=len(codes)
+        )
+
+    def advance(
+        self,
+        trade_date: str,
+        *,
+        stock_codes: Sequence[str],
+        closes: Sequence[float],
+        limit_up: Sequence[bool],
+    ) -> pd.DataFrame:
+        """推进一个交易日，返回当日判定结果（列见 ROLLING_DAILY_COLUMNS）。
+
+        收盘价缺失或非正的股票视为当日无行情；同一代码出现多行时取最后一行。
+        """
+        if self.as_of_trade_date and trade_date <= self.as_of_trade_date:
+            raise ValueError(
+                f"rolling state already advanced to {self.as_of_trade_date}: {trade_date}"
+            )
+        codes = np.asarray(list(stock_codes), dtype=object)
+        close_values = np.asarray(closes, dtype=np.float64)
+        limit_values = np.asarray(limit_up, dtype=bool)
+        keep = np.isfinite(close_values) & (close_values > 0.0)
+        keep &= ~pd.Index(codes).duplicated(keep="last")
+        codes = codes[keep]
+        close_values = close_values[keep]
+        limit_values = limit_values[keep]
+
+        rows = self._ensure_rows(codes)
+        window = self.close_ring[rows]
+        full = self.ring_count[rows] >= self.window
+        prior_high = np.fmax.reduce(window, axis=1)
+        prior_low = np.fmin.reduce(window, axis=1)
+        is_new_high = full & (close_values > prior_high)
+        is_new_low = full & (close_values < prior_low)
+        prev_limit_up = (self.limit_up_streak[rows] > 0) & (
+            self.last_trade_date[rows] == self.as_of_trade_date
+        )
+        limit_up_streak = np.where(limit_values, self.limit_up_streak[rows] + 1, 0)
+        new_high_streak = np.where(is_new_high, self.new_high_streak[rows] + 1, 0)
+
+        positions = self.ring_pos[rows]
+        self.close_ring[rows, positions] = close_values
+        self.ring_pos[rows] = (positions + 1) % self.window
+        self.ring_count[rows] = np.minimum(self.ring_count[rows] + 1, self.window)
+        self.limit_up_streak[rows] = limit_up_streak
+        self.new_high_streak[rows] = new_high_streak
+        self.last_trade_date[rows] = trade_date
+        self.as_of_trade_date = trade_date
+
+        return pd.DataFrame(
+            {
+                "trade_date": trade_date,
+                "stock_code": codes,
+                "is_new_100d_high": is_new_high,
+                "is_new_100d_low": is_new_low,
+                "limit_up_streak": limit_up_streak.astype(np.int64),
+                "new_high_streak": new_high_streak.astype(np.int64),
+                "prev_limit_up": prev_limit_up,
+            },
+            columns=list(ROLLING_DAILY_COLUMNS),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """状态表行：收盘价窗口按时间正序（旧 → 新）存为 DOUBLE[]。"""
+        count = self.ring_count
+        start = np.where(count >= self.window, self.ring_pos, 0)
+        order = (start[:, None] + np.arange(self.window)[None, :]) % self.window
+        chronological = np.take_along_axis(self.close_ring, order, axis=1)
+        return pd.DataFrame(
+            {
+                "state_scope": ROLLING_STATE_SCOPE,
+                "stock_code": self.stock_codes,
+                "as_of_trade_date": self.as_of_trade_date,
+                "last_trade_date": self.last_trade_date,
+                "close_window": [
+                    row[:size].tolist()
+                    for row, size in zip(chronological, count.tolist(), strict=True)
+                ],
+                "limit_up_streak": self.limit_up_streak,
+                "new_high_streak": self.new_high_streak,
+            }
+        )
+
+    @classmethod
+    def from_frame(
+        cls, frame: pd.DataFrame, *, window: int = ROLLING_WINDOW_DAYS
+    ) -> StockRollingState:
+        state = cls(window=window)
+        if frame.empty:
+            return state
+        state.as_of_trade_date = str(frame["as_of_trade_date"].iloc[0])
+        state.stock_codes = frame["stock_code"].astype(str).to_numpy(dtype=object, copy=True)
+        size = len(frame)
+        state.close_ring = np.full((size, state.window), np.nan, dtype=np.float64)
+        state.ring_count = np.zeros(size, dtype=np.int64)
+        for row, values in enumerate(frame["close_window"].tolist()):
+            closes = np.asarray(values if values is not None else [], dtype=np.float64)
+            closes = closes[-state.window :]
+            state.close_ring[row, : len(closes)] = closes
+            state.ring_count[row] = len(closes)
+        state.ring_pos = state.ring_count % state.window
+        # DuckDB 结果列可能是只读视图，状态数组需可写副本
+        state.limit_up_streak = frame["limit_up_streak"].fillna(0).to_numpy(
+            dtype=np.int64, copy=True
+        )
+        state.new_high_streak = frame["new_high_streak"].fillna(0).to_numpy(
+            dtype=np.int64, copy=True
+        )
+        state.last_trade_date = (
+            frame["last_trade_date"].fillna("").astype(str).to_numpy(dtype=object, copy=True)
+        )
+        state._rows = {code: row for row, code in enumerate(state.stock_codes.tolist())}
+        return state
+
+
+def load_rolling_state(connection: duckdb.DuckDBPyConnection) -> StockRollingState:
+    """读取最新滚动状态（表不存在时返回空状态）。"""
+    if not table_exists(connection, ROLLING_STATE_TABLE):
+        return StockRollingState()
+    frame = connection.execute(
+        f"SELECT * FROM {ROLLING_STATE_TABLE} WHERE state_scope = ? ORDER BY stock_code",
+        [ROLLING_STATE_SCOPE],
+    ).df()
+    return StockRollingState.from_frame(frame)
+
+
+def rolling_state_as_of(connection: duckdb.DuckDBPyConnection) -> str:
+    """已落库最新状态的状态日（表不存在或无状态时为空串）。"""
+    if not table_exists(connection, ROLLING_STATE_TABLE):
+        return ""
+    row = connection.execute(
+        f"SELECT MAX(as_of_trade_date) FROM {ROLLING_STATE_TABLE} WHERE state_scope = ?",
+        [ROLLING_STATE_SCOPE],
+    ).fetchone()
+    return str(row[0]) if row and row[0] is not None else ""
+
+
+def load_rolling_daily(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    start_date: str,
+    end_date: str,
+) -> pd.DataFrame:
+    """读取区间内的逐日判定结果（表不存在时返回空表）。"""
+    if not table_exists(connection, ROLLING_DAILY_TABLE):
+        return pd.DataFrame(columns=list(ROLLING_DAILY_COLUMNS))
+    columns = ", ".join(ROLLING_DAILY_COLUMNS)
+    return connection.execute(
+        f"SELECT {columns} FROM {ROLLING_DAILY_TABLE} "
+        "WHERE CAST(trade_date AS VARCHAR) >= ? AND CAST(trade_date AS VARCHAR) <= ?",
+        [start_date, end_date],
+    ).df()
+
+
+def persist_rolling_state(
+    session: WriteSession | RemoteWriteSession,
+    *,
+    state: StockRollingState | None,
+    daily: pd.DataFrame,
+) -> None:
+    """写入逐日判定结果（按 trade_date 幂等）及最新状态（整体替换）。"""
+    with session.batch():
+        if not daily.empty:
+            session.write_frame(ROLLING_DAILY_TABLE, daily)
+        if state is not None and len(state) > 0:
+            session.write_frame(
+                ROLLING_STATE_TABLE,
+                state.to_frame(),
+                trade_date=ROLLING_STATE_SCOPE,
+                partition_key="state_scope",
+            )
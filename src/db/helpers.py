@@ -3,14 +3,31 @@
 提取自 IRS/PAS/Validation/MSS/Integration/Analysis/Backtest/Trading/GUI 等模块中
 完全相同的 _table_exists / _column_exists / _duckdb_type / _ensure_columns / _persist
 实现，统一维护于此。
+
+WriteSession：单连接写入会话，跨多次写入复用同一读写连接并缓存表结构，
+避免每次写入都重新 connect / 查询 information_schema。
+open_write_connection() / open_write_session() 持进程间写入锁（见 src/db/process_lock.py）。
+单写入服务（eq writer）运行时，open_write_session() 返回 RemoteWriteSession，
+写入改由服务统一提交（见 src/db/writer_client.py）。
 """
 
 from __future__ import annotations
 
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 
 import duckdb
 import pandas as pd
+import pyarrow as pa
+
+from src.db.process_lock import (
+    DEFAULT_PROCESS_LOCK_POLL_SECONDS,
+    DEFAULT_PROCESS_LOCK_TIMEOUT_SECONDS,
+    acquire_duckdb_interprocess_lock,
+)
+from src.db.writer_client import RemoteWriteSession, connect_writer
 
 
 def table_exists(connection: duckdb.DuckDBPyConnection, table_name: str) -> bool:
@@ -48,14 +65,41 @@ def duckdb_type(series: pd.Series) -> str:
     return "VARCHAR"
 
 
+def arrow_duckdb_type(data_type: pa.DataType) -> str:
+    """根据 Arrow 字段类型推断对应的 DuckDB 列类型（与 duckdb_type 口径一致）。"""
+    if pa.types.is_boolean(data_type):
+        return "BOOLEAN"
+    if pa.types.is_integer(data_type):
+        return "BIGINT"
+    if pa.types.is_floating(data_type) or pa.types.is_decimal(data_type):
+        return "DOUBLE"
+    if pa.types.is_timestamp(data_type) or pa.types.is_date(data_type):
+        return "TIMESTAMP"
+    return "VARCHAR"
+
+
+def frame_columns(frame: pd.DataFrame | pa.Table) -> list[str]:
+    """DataFrame / Arrow Table 的列名列表。"""
+    if isinstance(frame, pa.Table):
+        return list(frame.column_names)
+    return [str(column) for column in frame.columns]
+
+
+def _column_duckdb_type(frame: pd.DataFrame | pa.Table, column: str) -> str:
+    if isinstance(frame, pa.Table):
+        return arrow_duckdb_type(frame.schema.field(column).type)
+    return duckdb_type(frame[column])
+
+
 def ensure_columns(
     connection: duckdb.DuckDBPyConnection,
     table_name: str,
-    frame: pd.DataFrame,
+    frame: pd.DataFrame | pa.Table,
 ) -> list[str]:
     """确保表存在且包含 frame 中的所有列，返回最终列列表。
 
     若表不存在则根据 frame schema 创建空表；若表已存在但缺少列则 ALTER ADD。
+    frame 可为 DataFrame 或 Arrow Table（Arrow 注册到 DuckDB 为零拷贝）。
     """
     if not table_exists(connection, table_name):
         connection.register("schema_df", frame)
@@ -68,11 +112,13 @@ def ensure_columns(
             str(row[1])
             for row in connection.execute(f"PRAGMA table_info('{table_name}')").fetchall()
         }
-        for column in frame.columns:
+        for column in frame_columns(frame):
             if column in existing:
                 continue
+            escaped = str(column).replace('"', '""')
             connection.execute(
-                f"ALTER TABLE {table_name} ADD COLUMN {column} {duckdb_type(frame[column])}"
+                f'ALTER TABLE {table_name} ADD COLUMN "{escaped}" '
+                f"{_column_duckdb_type(frame, column)}"
             )
 
     return [
@@ -80,26 +126,148 @@ def ensure_columns(
     ]
 
 
+class WriteSession:
+    """单连接写入会话：同一读写连接承载多次写入，表结构按表名缓存。
+
+    - write_frame(): 建表 / 补列 → 删旧分区 → INSERT BY NAME
+    - batch(): 将多次 write_frame() 合并为一个事务（可嵌套，内层并入外层）
+    未处于 batch() 中时，每次 write_frame() 自成一个事务。
+    传入 lock 时，每个事务期间持有该锁（与同进程其它写入方串行）。
+    """
+
+    def __init__(
+        self,
+        connection: duckdb.DuckDBPyConnection,
+        *,
+        lock: threading.RLock | None = None,
+    ) -> None:
+        self.connection = connection
+        self._lock = lock
+        self._columns: dict[str, list[str]] = {}
+        self._transaction_depth = 0
+        self.transactions = 0
+        self.rows_written = 0
+
+    def table_columns(self, table_name: str, frame: pd.DataFrame | pa.Table) -> list[str]:
+        """返回表列（必要时建表 / 补列）；frame 的列已全部存在时直接命中缓存。"""
+        cached = self._columns.get(table_name)
+        if cached is not None and set(frame_columns(frame)).issubset(cached):
+            return cached
+        columns = ensure_columns(self.connection, table_name, frame)
+        self._columns[table_name] = columns
+        return columns
+
+    @contextmanager
+    def batch(self) -> Iterator[WriteSession]:
+        """一个事务内完成多次写入：全部成功才提交，任一失败整体回滚。"""
+        if self._transaction_depth > 0:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        with self._lock if self._lock is not None else nullcontext():
+            self.connection.begin()
+            self._transaction_depth = 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth = 0
+                self.connection.rollback()
+                # 回滚会撤销事务内的建表 / 补列，缓存随之失效
+                self._columns.clear()
+                raise
+            self._transaction_depth = 0
+            self.connection.commit()
+            self.transactions += 1
+
+    def write_frame(
+        self,
+        table_name: str,
+        frame: pd.DataFrame | pa.Table,
+        *,
+        trade_date: str | None = None,
+        partition_key: str = "trade_date",
+    ) -> int:
+        """按 trade_date 幂等写入一张表。
+
+        trade_date 给定时删除该日分区（分区列默认 trade_date，可由 partition_key 指定，
+        表中无该列时跳过删除）；否则删除 frame 中出现的全部 trade_date 分区；
+        frame 不含 trade_date 列时直接追加。
+        """
+        with self.batch():
+            columns = self.table_columns(table_name, frame)
+            self.connection.register("incoming_df", frame)
+            try:
+                if trade_date is not None:
+                    if partition_key in columns:
+                        escaped = partition_key.replace('"', '""')
+                        self.connection.execute(
+                            f'DELETE FROM {table_name} WHERE "{escaped}" = ?',
+                            [trade_date],
+                        )
+                elif "trade_date" in frame_columns(frame):
+                    self.connection.execute(
+                        f"DELETE FROM {table_name} "
+                        "WHERE CAST(trade_date AS VARCHAR) IN ("
+                        "SELECT DISTINCT CAST(trade_date AS VARCHAR) FROM incoming_df "
+                        "WHERE trade_date IS NOT NULL)"
+                    )
+                if len(frame) > 0:
+                    self.connection.execute(
+                        f"INSERT INTO {table_name} BY NAME SELECT * FROM incoming_df"
+                    )
+            finally:
+                self.connection.unregister("incoming_df")
+        self.rows_written += int(len(frame))
+        return int(len(frame))
+
+
+@contextmanager
+def open_write_connection(database_path: Path) -> Iterator[duckdb.DuckDBPyConnection]:
+    """持进程间写入锁打开读写连接，退出时先关连接再释放锁。
+
+    与仓储写会话共用 acquire_duckdb_interprocess_lock，跨进程写入方按到达顺序排队。
+    """
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    with acquire_duckdb_interprocess_lock(
+        database_path,
+        timeout_seconds=DEFAULT_PROCESS_LOCK_TIMEOUT_SECONDS,
+        poll_seconds=DEFAULT_PROCESS_LOCK_POLL_SECONDS,
+    ):
+        connection = duckdb.connect(str(database_path))
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+
+@contextmanager
+def open_write_session(database_path: Path) -> Iterator[WriteSession | RemoteWriteSession]:
+    """打开一个写入会话，退出时关闭连接；单写入服务运行时改为提交给服务。"""
+    client = connect_writer(database_path)
+    if client is not None:
+        yield RemoteWriteSession(client)
+        return
+    with open_write_connection(database_path) as connection:
+        yield WriteSession(connection)
+
+
 def persist_by_trade_date(
     *,
     database_path: Path,
     table_name: str,
     frame: pd.DataFrame,
     trade_date: str,
+    session: WriteSession | RemoteWriteSession | None = None,
 ) -> int:
-    """按 trade_date 幂等写入：ensure_columns → 对齐列 → 删旧 → 插新。
+    """按 trade_date 幂等写入：ensure_columns → 删旧 → 按列名插新。
 
     适用于 IRS / PAS / Validation 等标准流水线的 _persist 模式。
+    传入 session 时复用其连接（可与其它写入合并为一个事务）。
     """
-    with duckdb.connect(str(database_path)) as connection:
-        table_columns = ensure_columns(connection, table_name, frame)
-        aligned = frame.copy()
-        for column in table_columns:
-            if column not in aligned.columns:
-                aligned[column] = pd.NA
-        aligned = aligned[table_columns]
-        connection.register("incoming_df", aligned)
-        connection.execute(f"DELETE FROM {table_name} WHERE trade_date = ?", [trade_date])
-        connection.execute(f"INSERT INTO {table_name} SELECT * FROM incoming_df")
-        connection.unregister("incoming_df")
-    return int(len(aligned))
+    if session is not None:
+        return session.write_frame(table_name, frame, trade_date=trade_date)
+    with open_write_session(database_path) as own_session:
+        return own_session.write_frame(table_name, frame, trade_date=trade_date)
@@ -0,0 +1,478 @@
+"""Parquet 湖分区布局：按 year=YYYY/month=MM 分区的追加写入、清单与月度合并。
+
+每表每日一个小文件（{table}/{trade_date}.parquet）运行数年后文件数上千，
+扫描与元数据开销随之线性增长；L3 单文件每日整体覆盖也无法保留历史。本模块统一
+L1 / L2 / L3 的 Parquet 布局：
+
+    {table_dir}/year=YYYY/month=MM/{trade_date}.parquet   日增量文件（按交易日替换）
+    {table_dir}/year=YYYY/month=MM/part-YYYYMM.parquet    月度合并文件（按 trade_date 排序，
+                                                           每个交易日一个 row group）
+    {table_dir}/_manifest.json                             文件清单（行数 / 交易日范围）
+
+- write_trade_date_partitions(): 按 trade_date 拆分写入日增量文件，同一交易日重写为整体替换
+  （月度合并文件 / 旧版平铺文件中的同日数据一并移除），其余交易日保持不变（追加语义）
+- read_lake_table() / lake_files(): 依据清单按交易日范围裁剪文件后读取
+- compact_lake_table() / compact_parquet_lake(): 把日增量文件（含旧版平铺文件）
+  合并为月度文件，由 eq compact-parquet 触发，可与写入并行运行
+- 清单缺失或损坏时扫描目录重建；写入与合并按表加锁（线程锁 + fcntl 文件锁）
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+# {parquet_path} 下使用本布局的数据层目录
+PARQUET_LAKE_LAYERS = ("l1", "l2", "l3")
+PARQUET_MANIFEST_NAME = "_manifest.json"
+_MANIFEST_LOCK_NAME = "_manifest.lock"
+_MANIFEST_VERSION = 1
+_LATEST_FILE_NAME = "latest.parquet"
+_UNKNOWN_PARTITION = "unknown"
+_TRADE_DATE_PATTERN = re.compile(r"^\d{8}$")
+# 合并文件内 trade_date 之后的次级排序键（取第一个存在的列）
+_SECONDARY_SORT_KEYS = ("stock_code", "ts_code", "industry_code", "index_code", "con_code")
+
+_TABLE_LOCKS: dict[str, threading.RLock] = {}
+_TABLE_LOCKS_GUARD = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CompactionResult:
+    """单表合并结果。"""
+
+    table_dir: Path
+    months_compacted: int
+    files_merged: int
+    rows_written: int
+    files_after: int
+
+
+def partition_dir(table_dir: Path, trade_date: str) -> Path:
+    """trade_date 对应的分区目录（非 YYYYMMDD 的键落到 year=unknown/month=unknown）。"""
+    text = str(trade_date).strip()
+    if _TRADE_DATE_PATTERN.match(text):
+        return Path(table_dir) / f"year={text[:4]}" / f"month={text[4:6]}"
+    return Path(table_dir) / f"year={_UNKNOWN_PARTITION}" / f"month={_UNKNOWN_PARTITION}"
+
+
+def _relpath(table_dir: Path, path: Path) -> str:
+    return path.relative_to(table_dir).as_posix()
+
+
+def _to_arrow(data: pa.Table | pd.DataFrame) -> pa.Table:
+    if isinstance(data, pa.Table):
+        return data
+    try:
+        return pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # object 列类型混杂时按字符串保存
+        normalized = data.copy()
+        for column in normalized.columns:
+            if normalized[column].dtype == object:
+                normalized[column] = normalized[column].map(
+                    lambda value: None if value is None else str(value)
+                )
+        return pa.Table.from_pandas(normalized, preserve_index=False)
+
+
+def _trade_date_keys(table: pa.Table) -> pa.ChunkedArray:
+    return pc.utf8_trim_whitespace(pc.cast(table.column("trade_date"), pa.string()))
+
+
+def _concat(tables: list[pa.Table]) -> pa.Table:
+    non_empty = [table for table in tables if table.num_columns > 0]
+    if not non_empty:
+        return pa.table({})
+    if len(non_empty) == 1:
+        return non_empty[0]
+    try:
+        return pa.concat_tables(non_empty, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # 同名列跨日类型不一致（如整列为空的日子推断为字符串）时统一按字符串合并
+        conflicting = {
+            field.name
+            for table in non_empty
+            for field in table.schema
+            for other in non_empty
+            if field.name in other.column_names
+            and other.schema.field(field.name).type != field.type
+        }
+        casted = [
+            table.cast(
+                pa.schema(
+                    [
+                        pa.field(field.name, pa.string()) if field.name in conflicting else field
+                        for field in table.schema
+                    ]
+                )
+            )
+            for table in non_empty
+        ]
+        return pa.concat_tables(casted, promote_options="permissive")
+
+
+def _atomic_write(path: Path, table: pa.Table) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _manifest_entry(table: pa.Table, *, kind: str) -> dict[str, Any]:
+    if "trade_date" in table.column_names and table.num_rows:
+        trade_dates = sorted(
+            value for value in pc.unique(_trade_date_keys(table)).to_pylist() if value
+        )
+    else:
+        trade_dates = []
+    return {
+        "kind": kind,
+        "rows": int(table.num_rows),
+        "min_trade_date": trade_dates[0] if trade_dates else "",
+        "max_trade_date": trade_dates[-1] if trade_dates else "",
+        "trade_dates": trade_dates,
+    }
+
+
+def _is_lake_file(table_dir: Path, path: Path) -> bool:
+    if path.name.startswith(".") or path.name.endswith(".tmp"):
+        return False
+    return not (path.parent == table_dir and path.name == _LATEST_FILE_NAME)
+
+
+def _scan_manifest(table_dir: Path) -> dict[str, Any]:
+    files: dict[str, dict[str, Any]] = {}
+    for path in sorted(table_dir.rglob("*.parquet")):
+        if not _is_lake_file(table_dir, path):
+            continue
+        schema = pq.read_schema(path)
+        columns = ["trade_date"] if "trade_date" in schema.names else []
+        table = pq.read_table(path, columns=columns)
+        kind = "compacted" if path.name.startswith("part-") else "daily"
+        entry = _manifest_entry(table, kind=kind)
+        entry["rows"] = int(pq.read_metadata(path).num_rows)
+        files[_relpath(table_dir, path)] = entry
+    return {"version": _MANIFEST_VERSION, "files": files}
+
+
+def _read_manifest_file(table_dir: Path) -> dict[str, Any] | None:
+    path = table_dir / PARQUET_MANIFEST_NAME
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != _MANIFEST_VERSION:
+        return None
+    if not isinstance(payload.get("files"), dict):
+        return None
+    return payload
+
+
+def _save_manifest(table_dir: Path, manifest: dict[str, Any]) -> None:
+    manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+    path = table_dir / PARQUET_MANIFEST_NAME
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(
+        json.dumps(manifest, ensure_ascii=True, indent=2, sort_keys=True),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _table_lock(table_dir: Path) -> Iterator[None]:
+    # 同一表的写入 / 合并串行：进程内线程锁 + 跨进程 fcntl 文件锁
+    key = str(Path(table_dir).resolve())
+    with _TABLE_LOCKS_GUARD:
+        lock = _TABLE_LOCKS.setdefault(key, threading.RLock())
+    with lock:
+        table_dir.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with (table_dir / _MANIFEST_LOCK_NAME).open("a+") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _load_manifest_locked(table_dir: Path) -> dict[str, Any]:
+    manifest = _read_manifest_file(table_dir)
+    if manifest is None:
+        manifest = _scan_manifest(table_dir)
+    return manifest
+
+
+def load_manifest(table_dir: Path) -> dict[str, Any]:
+    """读取表清单；缺失或损坏时扫描目录重建并落盘。目录不存在时返回空清单。"""
+    table_dir = Path(table_dir)
+    if not table_dir.exists():
+        return {"version": _MANIFEST_VERSION, "files": {}}
+    manifest = _read_manifest_file(table_dir)
+    if manifest is not None:
+        return manifest
+    return rebuild_manifest(table_dir)
+
+
+def rebuild_manifest(table_dir: Path) -> dict[str, Any]:
+    """扫描目录下全部 Parquet 文件重建清单（只读文件元数据与 trade_date 列）。"""
+    table_dir = Path(table_dir)
+    with _table_lock(table_dir):
+        manifest = _scan_manifest(table_dir)
+        _save_manifest(table_dir, manifest)
+    return manifest
+
+
+def _drop_trade_dates(
+    table_dir: Path,
+    manifest: dict[str, Any],
+    trade_dates: set[str],
+    *,
+    keep: set[str],
+) -> None:
+    # 从 keep 以外的文件中移除 trade_dates：日增量文件直接删除，合并文件过滤后重写
+    files: dict[str, dict[str, Any]] = manifest["files"]
+    for relpath, entry in list(files.items()):
+        if relpath in keep:
+            continue
+        overlap = trade_dates.intersection(entry.get("trade_dates", []))
+        if not overlap:
+            continue
+        path = table_dir / relpath
+        remaining = [value for value in entry.get("trade_dates", []) if value not in overlap]
+        if entry.get("kind") != "compacted" or not remaining or not path.exists():
+            path.unlink(missing_ok=True)
+            del files[relpath]
+            continue
+        table = pq.read_table(path)
+        keys = _trade_date_keys(table)
+        mask = pc.invert(pc.is_in(keys, value_set=pa.array(sorted(overlap), pa.string())))
+        filtered = table.filter(pc.fill_null(mask, True))
+        _write_compacted(path, filtered)
+        files[relpath] = _manifest_entry(filtered, kind="compacted")
+
+
+def write_trade_date_partitions(
+    table_dir: Path,
+    data: pa.Table | pd.DataFrame,
+    *,
+    trade_date: str | None = None,
+) -> list[Path]:
+    """按 trade_date 写入日增量文件并更新清单，返回写出的文件。
+
+    - 同一交易日重写为整体替换，其它交易日不受影响（L3 按日追加历史）
+    - 数据不含 trade_date 列时：给定 trade_date 则补列后写入；否则写 {table_dir}/latest.parquet
+    - 给定 trade_date 且数据为空时，移除该交易日已有数据
+    """
+    table_dir = Path(table_dir)
+    table = _to_arrow(data)
+    if "trade_date" not in table.column_names:
+        if trade_date is None:
+            if table.num_rows == 0:
+                return []
+            table_dir.mkdir(parents=True, exist_ok=True)
+            _atomic_write(table_dir / _LATEST_FILE_NAME, table)
+            return [table_dir / _LATEST_FILE_NAME]
+        table = table.append_column(
+            "trade_date", pa.array([str(trade_date)] * table.num_rows, pa.string())
+        )
+
+    if table.num_rows:
+        keys = _trade_date_keys(table)
+        values = sorted(value for value in pc.unique(keys).to_pylist() if value is not None)
+    else:
+        keys = None
+        values = []
+    if not values and not trade_date:
+        return []
+
+    written: list[Path] = []
+    with _table_lock(table_dir):
+        manifest = _load_manifest_locked(table_dir)
+        targets: dict[str, pa.Table] = {}
+        for value in values:
+            # trade_date 为空白串的行写入 unknown 分区
+            name = value or _UNKNOWN_PARTITION
+            target = partition_dir(table_dir, name) / f"{name}.parquet"
+            targets[_relpath(table_dir, target)] = table.filter(pc.equal(keys, value))
+        replaced = {value for value in values if value}
+        if trade_date and not values:
+            replaced.add(str(trade_date))
+        _drop_trade_dates(table_dir, manifest, replaced, keep=set(targets))
+        for relpath, part in targets.items():
+            path = table_dir / relpath
+            _atomic_write(path, part)
+            manifest["files"][relpath] = _manifest_entry(part, kind="daily")
+            written.append(path)
+        _save_manifest(table_dir, manifest)
+    return written
+
+
+def _overlaps(entry: dict[str, Any], start_date: str | None, end_date: str | None) -> bool:
+    if not entry.get("trade_dates"):
+        return start_date is None and end_date is None
+    if start_date and str(entry.get("max_trade_date", "")) < start_date:
+        return False
+    return not (end_date and str(entry.get("min_trade_date", "")) > end_date)
+
+
+def lake_files(
+    table_dir: Path,
+    *,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> list[Path]:
+    """依据清单返回与 [start_date, end_date] 有交集的数据文件（分区裁剪）。"""
+    table_dir = Path(table_dir)
+    manifest = load_manifest(table_dir)
+    return [
+        table_dir / relpath
+        for relpath, entry in sorted(manifest["files"].items())
+        if _overlaps(entry, start_date, end_date) and (table_dir / relpath).exists()
+    ]
+
+
+def has_lake_data(table_dir: Path) -> bool:
+    """表目录下是否已有分区数据。"""
+    return bool(lake_files(table_dir))
+
+
+def read_lake_table(
+    table_dir: Path,
+    *,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    columns: list[str] | None = None,
+) -> pa.Table:
+    """读取 [start_date, end_date] 内的数据；文件按清单裁剪，合并文件内按 row group 统计过滤。"""
+    filters: list[tuple[str, str, str]] = []
+    if start_date:
+        filters.append(("trade_date", ">=", str(start_date)))
+    if end_date:
+        filters.append(("trade_date", "<=", str(end_date)))
+    tables = []
+    for path in lake_files(table_dir, start_date=start_date, end_date=end_date):
+        schema = pq.read_schema(path)
+        selected = None if columns is None else [name for name in columns if name in schema.names]
+        use_filters = filters if filters and "trade_date" in schema.names else None
+        tables.append(pq.read_table(path, columns=selected, filters=use_filters))
+    return _concat(tables)
+
+
+def _sort_keys(table: pa.Table) -> list[tuple[str, str]]:
+    keys = [("trade_date", "ascending")]
+    for name in _SECONDARY_SORT_KEYS:
+        if name in table.column_names:
+            keys.append((name, "ascending"))
+            break
+    return keys
+
+
+def _write_compacted(path: Path, table: pa.Table) -> None:
+    # 按 trade_date 排序，每个交易日一个 row group，min/max 统计可直接裁剪到日
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    ordered = table.sort_by(_sort_keys(table)) if "trade_date" in table.column_names else table
+    with pq.ParquetWriter(tmp_path, ordered.schema) as writer:
+        if "trade_date" not in ordered.column_names or ordered.num_rows == 0:
+            writer.write_table(ordered)
+        else:
+            keys = _trade_date_keys(ordered)
+            for value in pc.unique(keys).to_pylist():
+                writer.write_table(ordered.filter(pc.equal(keys, value)))
+    os.replace(tmp_path, path)
+
+
+def _entry_month(relpath: str, entry: dict[str, Any]) -> str:
+    trade_date = str(entry.get("min_trade_date", ""))
+    if _TRADE_DATE_PATTERN.match(trade_date):
+        return trade_date[:6]
+    return ""
+
+
+def compact_lake_table(table_dir: Path) -> CompactionResult:
+    """把每个月的日增量文件（含旧版平铺文件）与已有月度文件合并为 part-YYYYMM.parquet。"""
+    table_dir = Path(table_dir)
+    months_compacted = 0
+    files_merged = 0
+    rows_written = 0
+    if not table_dir.exists():
+        return CompactionResult(table_dir, 0, 0, 0, 0)
+    with _table_lock(table_dir):
+        manifest = _load_manifest_locked(table_dir)
+        files: dict[str, dict[str, Any]] = manifest["files"]
+        by_month: dict[str, list[str]] = {}
+        for relpath, entry in files.items():
+            month = _entry_month(relpath, entry)
+            if month:
+                by_month.setdefault(month, []).append(relpath)
+        for month, relpaths in sorted(by_month.items()):
+            daily = sorted(path for path in relpaths if files[path].get("kind") != "compacted")
+            if not daily:
+                continue
+            target = (
+                partition_dir(table_dir, f"{month}01") / f"part-{month}.parquet"
+            )
+            target_relpath = _relpath(table_dir, target)
+            daily_dates = {value for path in daily for value in files[path]["trade_dates"]}
+            tables = []
+            for relpath in relpaths:
+                path = table_dir / relpath
+                if not path.exists():
+                    continue
+                table = pq.read_table(path)
+                if files[relpath].get("kind") == "compacted":
+                    # 日增量文件晚于合并文件写入，同日以日增量为准
+                    keys = _trade_date_keys(table)
+                    mask = pc.invert(
+                        pc.is_in(keys, value_set=pa.array(sorted(daily_dates), pa.string()))
+                    )
+                    table = table.filter(pc.fill_null(mask, True))
+                tables.append(table)
+            merged = _concat(tables)
+            _write_compacted(target, merged)
+            for relpath in relpaths:
+                if relpath != target_relpath:
+                    (table_dir / relpath).unlink(missing_ok=True)
+                    del files[relpath]
+            files[target_relpath] = _manifest_entry(merged, kind="compacted")
+            months_compacted += 1
+            files_merged += len(relpaths)
+            rows_written += int(merged.num_rows)
+        _save_manifest(table_dir, manifest)
+        files_after = len(files)
+    return CompactionResult(table_dir, months_compacted, files_merged, rows_written, files_after)
+
+
+def compact_parquet_lake(
+    root: Path,
+    *,
+    tables: list[str] | None = None,
+) -> list[CompactionResult]:
+    """合并 root 下各表目录（tables 为空时处理全部含 Parquet 数据的子目录）。"""
+    root = Path(root)
+    if not root.exists():
+        return []
+    names = tables or sorted(path.name for path in root.iterdir() if path.is_dir())
+    return [compact_lake_table(root / name) for name in names if (root / name).is_dir()]
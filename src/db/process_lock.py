@@ -0,0 +1,328 @@
+"""DuckDB 进程间写入锁。
+
+acquire_duckdb_interprocess_lock()：POSIX 用 fcntl 排队锁（先来先得），Windows 用 lock 文件字节锁；
+持锁者元数据写在数据库旁（{db}.lock.holder），等待统计见 duckdb_lock_wait_snapshot()。
+仓储写会话（src/data/repositories/base.py）与通用写会话（src/db/helpers.py）共用同一把锁。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows fallback
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # pragma: no cover - non-Windows fallback
+    msvcrt = None
+
+DEFAULT_PROCESS_LOCK_TIMEOUT_SECONDS = 120.0
+DEFAULT_PROCESS_LOCK_POLL_SECONDS = 0.1
+
+
+def _lock_path(database_path: Path) -> Path:
+    return database_path.with_suffix(f"{database_path.suffix}.lock")
+
+
+def _holder_path(database_path: Path) -> Path:
+    return database_path.with_suffix(f"{database_path.suffix}.lock.holder")
+
+
+def read_duckdb_lock_holder(database_path: Path) -> dict[str, str]:
+    """读取数据库旁的持锁元数据（pid / command / since）；不存在或持锁进程已退出时返回空字典。"""
+    try:
+        payload = json.loads(_holder_path(database_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict):
+        return {}
+    pid = str(payload.get("pid", "")).strip()
+    if os.name != "nt" and pid.isdigit() and not _pid_alive(int(pid)):
+        return {}
+    return {key: str(payload.get(key, "")) for key in ("pid", "command", "since")}
+
+
+def _write_lock_holder(database_path: Path) -> None:
+    command = " ".join(sys.argv)[:240] or "python"
+    payload = {
+        "pid": str(os.getpid()),
+        "command": command,
+        "since": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    try:
+        _holder_path(database_path).write_text(json.dumps(payload), encoding="utf-8")
+    except OSError:  # pragma: no cover - metadata is best effort
+        pass
+
+
+def _clear_lock_holder(database_path: Path) -> None:
+    try:
+        _holder_path(database_path).unlink()
+    except OSError:
+        pass
+
+
+def _format_lock_timeout(lock_path: Path, holder: dict[str, str]) -> str:
+    return (
+        f"duckdb_interprocess_lock_timeout: {lock_path} "
+        f"holder_pid={holder.get('pid') or 'unknown'} "
+        f"holder_command={holder.get('command') or 'unknown'} "
+        f"holder_since={holder.get('since') or 'unknown'}"
+    )
+
+
+class _LockWaitStats:
+    """进程级锁等待统计（累计值），供吞吐报告取增量。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, *, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquired += 1
+            if wait_seconds > 0.001:
+                self.waited += 1
+            self.wait_seconds_total += max(0.0, wait_seconds)
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "acquired": float(self.acquired),
+                "waited": float(self.waited),
+                "timeouts": float(self.timeouts),
+                "wait_seconds_total": float(self.wait_seconds_total),
+                "wait_seconds_max": float(self.wait_seconds_max),
+            }
+
+
+_LOCK_WAIT_STATS = _LockWaitStats()
+
+
+def duckdb_lock_wait_snapshot() -> dict[str, float]:
+    """本进程 DuckDB 进程锁的累计等待统计（获取次数 / 等待次数 / 超时次数 / 等待秒数）。"""
+    return _LOCK_WAIT_STATS.snapshot()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _update_lock_queue(
+    queue_path: Path,
+    update: Callable[[list[str]], list[str]],
+) -> list[str]:
+    # 排队文件每行一个等待者 token（"pid:uuid"）；读改写全程持 flock，清理已退出进程的条目
+    fd = os.open(str(queue_path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            chunks: list[bytes] = []
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            entries = [
+                line
+                for line in b"".join(chunks).decode("ascii", errors="ignore").splitlines()
+                if line.strip() and _pid_alive(int(line.split(":", 1)[0] or 0))
+            ]
+            updated = update(entries)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, "".join(f"{item}\n" for item in updated).encode("ascii"))
+            return updated
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _acquire_fcntl_queue_lock(
+    lock_path: Path,
+    *,
+    deadline: float,
+    poll_seconds: float,
+) -> int:
+    """按排队顺序获取 flock：只有队首等待者尝试加锁，释放后下一位接替（FIFO）。
+
+    flock 随进程退出由内核释放，排队条目按 pid 存活检查清理，崩溃不会造成死锁。
+    """
+    queue_path = lock_path.with_name(f"{lock_path.name}.queue")
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    _update_lock_queue(queue_path, lambda entries: [*entries, token])
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    acquired = False
+    try:
+        while True:
+            entries = _update_lock_queue(queue_path, lambda entries: entries)
+            if not entries or entries[0] == token:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                    return fd
+                except BlockingIOError:
+                    pass
+            if time.monotonic() >= deadline:
+                raise TimeoutError("duckdb_interprocess_lock_timeout")
+            time.sleep(poll_seconds)
+    finally:
+        _update_lock_queue(queue_path, lambda entries: [item for item in entries if item != token])
+        if not acquired:
+            os.close(fd)
+
+
+class _ProcessLockHold:
+    # 同一进程内共享一把进程锁：首个持有者加锁，其余线程引用计数（与 DuckDB 按进程持有文件锁一致）
+    def __init__(self) -> None:
+        self.mutex = threading.Lock()
+        self.count = 0
+        self.fd: int | None = None
+
+
+_PROCESS_LOCK_HOLDS: dict[str, _ProcessLockHold] = {}
+_PROCESS_LOCK_HOLDS_GUARD = threading.Lock()
+
+
+def _process_lock_hold(lock_path: Path) -> _ProcessLockHold:
+    key = str(lock_path.resolve())
+    with _PROCESS_LOCK_HOLDS_GUARD:
+        hold = _PROCESS_LOCK_HOLDS.get(key)
+        if hold is None:
+            hold = _ProcessLockHold()
+            _PROCESS_LOCK_HOLDS[key] = hold
+        return hold
+
+
+@contextmanager
+def _acquire_fcntl_interprocess_lock(
+    database_path: Path,
+    *,
+    timeout_seconds: float,
+    poll_seconds: float,
+):
+    lock_path = _lock_path(database_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    hold = _process_lock_hold(lock_path)
+    started = time.monotonic()
+    deadline = started + max(0.0, float(timeout_seconds))
+    if not hold.mutex.acquire(timeout=max(0.0, float(timeout_seconds))):
+        _LOCK_WAIT_STATS.record(time.monotonic() - started, timed_out=True)
+        raise TimeoutError(_format_lock_timeout(lock_path, read_duckdb_lock_holder(database_path)))
+    try:
+        if hold.count == 0:
+            try:
+                hold.fd = _acquire_fcntl_queue_lock(
+                    lock_path,
+                    deadline=deadline,
+                    poll_seconds=max(0.01, float(poll_seconds)),
+                )
+            except TimeoutError:
+                _LOCK_WAIT_STATS.record(time.monotonic() - started, timed_out=True)
+                holder = read_duckdb_lock_holder(database_path)
+                raise TimeoutError(_format_lock_timeout(lock_path, holder)) from None
+            _write_lock_holder(database_path)
+        hold.count += 1
+    finally:
+        hold.mutex.release()
+    _LOCK_WAIT_STATS.record(time.monotonic() - started)
+    try:
+        yield
+    finally:
+        with hold.mutex:
+            hold.count -= 1
+            if hold.count == 0 and hold.fd is not None:
+                _clear_lock_holder(database_path)
+                try:
+                    fcntl.flock(hold.fd, fcntl.LOCK_UN)
+                finally:
+                    os.close(hold.fd)
+                    hold.fd = None
+
+
+@contextmanager
+def acquire_duckdb_interprocess_lock(
+    database_path: Path,
+    *,
+    timeout_seconds: float,
+    poll_seconds: float,
+):
+    """跨进程写入协调：Linux/macOS 用 fcntl 排队锁，Windows 用 lock 文件字节锁。
+
+    - POSIX：等待者在 {db}.lock.queue 中排队，按先来后到依次获取 {db}.lock 的 flock；
+      同一进程内多线程共享同一把锁（引用计数），与 DuckDB 按进程持有文件锁的语义一致
+    - 持锁期间在 {db}.lock.holder 写入持锁者元数据（pid / command / since）
+    - 超时未获取锁时抛出 TimeoutError（消息含持锁者元数据），等待统计见 duckdb_lock_wait_snapshot()
+    """
+    if fcntl is not None:
+        with _acquire_fcntl_interprocess_lock(
+            database_path,
+            timeout_seconds=timeout_seconds,
+            poll_seconds=poll_seconds,
+        ):
+            yield
+        return
+    if os.name != "nt" or msvcrt is None:
+        yield
+        return
+    lock_path = _lock_path(database_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    timeout = max(0.0, float(timeout_seconds))
+    poll = max(0.01, float(poll_seconds))
+    started = time.monotonic()
+    deadline = started + timeout
+    while True:
+        handle = lock_path.open("a+b")
+        try:
+            handle.seek(0)
+            handle.write(b"\0")
+            handle.flush()
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            break
+        except OSError:
+            handle.close()
+            if time.monotonic() >= deadline:
+                _LOCK_WAIT_STATS.record(time.monotonic() - started, timed_out=True)
+                holder = read_duckdb_lock_holder(database_path)
+                raise TimeoutError(_format_lock_timeout(lock_path, holder)) from None
+            time.sleep(poll)
+    _LOCK_WAIT_STATS.record(time.monotonic() - started)
+    _write_lock_holder(database_path)
+    try:
+        yield
+    finally:
+        _clear_lock_holder(database_path)
+        try:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            handle.close()
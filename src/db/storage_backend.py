@@ -0,0 +1,178 @@
+"""分层存储后端：按层选择 DuckDB / Parquet 湖 / 混合读取（STORAGE_BACKEND_L1/L2/L3）。
+
+所有读取方原先都直连 emotionquant.duckdb，与写入方争用同一个文件锁。本模块提供
+open_read_connection()：对后端不是 duckdb 的层，把 {parquet_path}/{layer}/{table}
+下的 Parquet 湖（见 src/db/parquet_lake.py）注册为同名临时视图（read_parquet，
+trade_date 过滤下推到 row group 统计；给定日期窗口时再按清单裁剪文件）：
+
+- duckdb：读写都走 DuckDB 表（默认，行为与此前一致）
+- parquet：读取只走 Parquet 视图；L1 写入只落 Parquet 湖，数据库文件不再保存 raw_* 表
+- hybrid：读取时 Parquet 湖已覆盖的交易日取 Parquet，其余交易日取 DuckDB 表（迁移期 / 热数据）
+
+L2 / L3 写入始终进入 DuckDB（下游流水线在其上做热状态读写），parquet / hybrid
+只决定读取来源。数据库文件被其它进程写锁占用时，连接只暴露 Parquet 视图，
+只读 L1 的分析 / 回测不再因文件锁失败。
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+from src.db.parquet_lake import (
+    PARQUET_LAKE_LAYERS,
+    PARQUET_MANIFEST_NAME,
+    lake_files,
+    load_manifest,
+)
+
+STORAGE_BACKENDS = ("duckdb", "parquet", "hybrid")
+_ATTACHED_DATABASE = "eq"
+
+
+def storage_backend(config: Any | None, layer: str) -> str:
+    """读取某层的存储后端配置（未配置时为 duckdb，非法取值抛出 ValueError）。"""
+    if config is None:
+        return "duckdb"
+    value = str(getattr(config, f"storage_backend_{layer}", "") or "duckdb").strip().lower()
+    if value not in STORAGE_BACKENDS:
+        raise ValueError(f"unsupported storage backend for {layer}: {value}")
+    return value
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _quote_identifier(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def _lake_views(config: Any) -> dict[str, tuple[str, Path]]:
+    # {表名: (后端, 表目录)}，仅包含后端不是 duckdb 且 Parquet 湖已有清单 / 数据的表
+    views: dict[str, tuple[str, Path]] = {}
+    parquet_root = Path(str(getattr(config, "parquet_path", "") or ""))
+    if not str(parquet_root):
+        return views
+    for layer in PARQUET_LAKE_LAYERS:
+        backend = storage_backend(config, layer)
+        layer_root = parquet_root / layer
+        if backend == "duckdb" or not layer_root.is_dir():
+            continue
+        for table_dir in sorted(path for path in layer_root.iterdir() if path.is_dir()):
+            has_manifest = (table_dir / PARQUET_MANIFEST_NAME).exists()
+            if has_manifest or any(table_dir.rglob("*.parquet")):
+                views[table_dir.name] = (backend, table_dir)
+    return views
+
+
+def _open_database(database_path: Path) -> duckdb.DuckDBPyConnection:
+    # 优先内存连接 + 只读挂载数据库文件；本进程已有写会话打开该库时挂载会被拒，
+    # 改用默认连接共享实例；其它进程持有写锁时只返回内存连接（仅 Parquet 视图可用）
+    connection = duckdb.connect(":memory:")
+    if not database_path.exists():
+        return connection
+    try:
+        connection.execute(
+            f"ATTACH {_quote_literal(str(database_path))} AS {_ATTACHED_DATABASE} (READ_ONLY)"
+        )
+        connection.execute(f"USE {_ATTACHED_DATABASE}")
+        return connection
+    except duckdb.Error:
+        connection.close()
+    try:
+        return duckdb.connect(str(database_path))
+    except duckdb.Error:
+        return duckdb.connect(":memory:")
+
+
+def _database_table(connection: duckdb.DuckDBPyConnection, table_name: str) -> str | None:
+    # 数据库文件中的同名表（带 catalog.schema 限定，避免与同名临时视图相互引用）
+    row = connection.execute(
+        "SELECT table_catalog, table_schema FROM information_schema.tables "
+        "WHERE table_name = ? AND table_catalog <> 'temp' AND table_type = 'BASE TABLE' "
+        "LIMIT 1",
+        [table_name],
+    ).fetchone()
+    if not row:
+        return None
+    return ".".join(_quote_identifier(str(part)) for part in (row[0], row[1], table_name))
+
+
+def _create_lake_view(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    table_name: str,
+    backend: str,
+    table_dir: Path,
+    start_date: str | None,
+    end_date: str | None,
+) -> None:
+    files = lake_files(table_dir, start_date=start_date, end_date=end_date)
+    name = _quote_identifier(table_name)
+    database_table = _database_table(connection, table_name)
+    if not files:
+        if backend == "parquet" and database_table is not None:
+            # parquet 后端窗口内无数据：以空视图遮蔽数据库中的旧表
+            connection.execute(
+                f"CREATE TEMP VIEW {name} AS SELECT * FROM {database_table} WHERE FALSE"
+            )
+        return
+    file_list = ", ".join(_quote_literal(str(path)) for path in files)
+    lake_select = (
+        f"SELECT * FROM read_parquet([{file_list}], union_by_name = true, "
+        "hive_partitioning = false)"
+    )
+    if backend == "hybrid" and database_table is not None:
+        lake_dates = sorted(
+            {
+                trade_date
+                for relpath, entry in load_manifest(table_dir)["files"].items()
+                if table_dir / relpath in files
+                for trade_date in entry.get("trade_dates", [])
+            }
+        )
+        date_list = ", ".join(_quote_literal(value) for value in lake_dates) or "''"
+        select = (
+            f"{lake_select} UNION ALL BY NAME SELECT * FROM {database_table} "
+            f"WHERE CAST(trade_date AS VARCHAR) NOT IN ({date_list})"
+        )
+    else:
+        select = lake_select
+    connection.execute(f"CREATE TEMP VIEW {name} AS {select}")
+
+
+def open_read_connection(
+    database_path: Path,
+    *,
+    config: Any | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> duckdb.DuckDBPyConnection:
+    """打开只读查询连接（可直接用作上下文管理器）。
+
+    所有层为 duckdb 后端时等价于 duckdb.connect(database_path, read_only=True)；
+    否则返回挂载数据库文件（可用时）并注册 Parquet 视图的连接。
+    start_date / end_date 给定时 Parquet 视图只包含清单中与窗口有交集的文件。
+    """
+    database_path = Path(database_path)
+    views = _lake_views(config) if config is not None else {}
+    if not views:
+        return duckdb.connect(str(database_path), read_only=True)
+    connection = _open_database(database_path)
+    try:
+        for table_name, (backend, table_dir) in views.items():
+            _create_lake_view(
+                connection,
+                table_name=table_name,
+                backend=backend,
+                table_dir=table_dir,
+                start_date=start_date,
+                end_date=end_date,
+            )
+    except BaseException:
+        connection.close()
+        raise
+    return connection
@@ -0,0 +1,265 @@
+"""单写入服务（eq writer）客户端与线路协议。
+
+单写入服务运行时独占 emotionquant.duckdb 的写连接，其它进程的写入经本地 Unix 套接字
+提交给它（见 src/db/writer_service.py）。本模块只依赖标准库 + pyarrow，
+供 open_write_session() / open_repository_write_session() 在服务运行时自动改走服务：
+
+- writer_socket_path(): 数据库对应的套接字路径（数据库旁 {db}.writer.sock，过长时落到临时目录）
+- connect_writer(): 探测服务是否在运行（ping），未运行 / 套接字失效时返回 None（回退直连写入）
+- submit_to_writer(): 供各流水线自带的 _persist 使用，服务运行时提交一次分区替换写入
+- RemoteWriteSession: 与 WriteSession 同接口（write_frame / batch），batch() 内的写入在退出时
+  作为一个请求提交，服务端在同一事务内写入，收到确认时已提交
+
+线路格式：4 字节大端头长度 + JSON 头 + 各 part 的 Arrow IPC stream 字节
+（各段长度见头部 payload_sizes）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import struct
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+# AF_UNIX 路径上限约 108 字节，超过时改用临时目录下按数据库路径哈希命名的套接字
+_MAX_SOCKET_PATH_LENGTH = 100
+_HEADER_LENGTH = struct.Struct(">I")
+
+
+class WriterServiceError(RuntimeError):
+    """单写入服务返回失败确认（写入未生效）。"""
+
+
+@dataclass(frozen=True)
+class WritePart:
+    """一次写入：目标表 + 数据 + 分区（partition_value 为空时按 frame 中的 trade_date 替换）。"""
+
+    table_name: str
+    frame: pd.DataFrame | pa.Table
+    partition_value: str | None = None
+    partition_key: str = "trade_date"
+
+
+def writer_socket_path(database_path: Path) -> Path:
+    """数据库对应的单写入服务套接字路径。"""
+    resolved = Path(database_path).resolve()
+    candidate = resolved.with_suffix(f"{resolved.suffix}.writer.sock")
+    if len(str(candidate)) <= _MAX_SOCKET_PATH_LENGTH:
+        return candidate
+    digest = hashlib.sha256(str(resolved).encode("utf-8")).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"eq-writer-{digest}.sock"
+
+
+def frame_to_arrow_bytes(frame: pd.DataFrame | pa.Table) -> bytes:
+    """DataFrame / Arrow Table → Arrow IPC stream 字节；object 列类型混杂无法转换时按字符串提交。"""
+    try:
+        table = frame if isinstance(frame, pa.Table) else pa.Table.from_pandas(
+            frame, preserve_index=False
+        )
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        normalized = frame.copy()
+        for column in normalized.columns:
+            if normalized[column].dtype == object:
+                normalized[column] = normalized[column].map(
+                    lambda value: None if value is None else str(value)
+                )
+        table = pa.Table.from_pandas(normalized, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_bytes_to_table(payload: bytes) -> pa.Table:
+    """Arrow IPC stream 字节 → Arrow Table（服务端直接注册到 DuckDB，不经 pandas）。"""
+    with pa.ipc.open_stream(pa.py_buffer(payload)) as reader:
+        return reader.read_all()
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks: list[bytes] = []
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("writer_connection_closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(
+    sock: socket.socket,
+    header: dict[str, Any],
+    payloads: list[bytes] | None = None,
+) -> None:
+    """发送一条消息：头部 JSON（含 payload_sizes）+ 依次拼接的 payload。"""
+    items = list(payloads or [])
+    body = json.dumps({**header, "payload_sizes": [len(item) for item in items]}).encode("utf-8")
+    sock.sendall(_HEADER_LENGTH.pack(len(body)) + body)
+    for item in items:
+        sock.sendall(item)
+
+
+def recv_message(sock: socket.socket) -> tuple[dict[str, Any], list[bytes]]:
+    """接收一条消息，返回 (头部, payload 列表)。"""
+    (length,) = _HEADER_LENGTH.unpack(_recv_exact(sock, _HEADER_LENGTH.size))
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    payloads = [_recv_exact(sock, int(size)) for size in header.get("payload_sizes", [])]
+    return header, payloads
+
+
+class WriterClient:
+    """单写入服务客户端：每个请求一条短连接，收到确认即表示已提交。"""
+
+    def __init__(self, socket_path: Path, *, timeout_seconds: float = 600.0) -> None:
+        self.socket_path = socket_path
+        self.timeout_seconds = float(timeout_seconds)
+
+    def _request(
+        self,
+        header: dict[str, Any],
+        payloads: list[bytes] | None = None,
+    ) -> dict[str, Any]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout_seconds)
+            sock.connect(str(self.socket_path))
+            send_message(sock, header, payloads)
+            response, _ = recv_message(sock)
+        if not response.get("ok", False):
+            raise WriterServiceError(str(response.get("error", "writer_request_failed")))
+        return response
+
+    def ping(self) -> dict[str, Any]:
+        return self._request({"op": "ping"})
+
+    def stats(self) -> dict[str, Any]:
+        return self._request({"op": "stats"})
+
+    def submit(self, parts: list[WritePart]) -> dict[str, Any]:
+        """提交一组写入（服务端同一事务内完成），返回确认（rows / commit_id / group_size）。"""
+        header = {
+            "op": "write",
+            "parts": [
+                {
+                    "table_name": part.table_name,
+                    "partition_key": part.partition_key,
+                    "partition_value": part.partition_value,
+                }
+                for part in parts
+            ],
+        }
+        return self._request(header, [frame_to_arrow_bytes(part.frame) for part in parts])
+
+
+def connect_writer(database_path: Path) -> WriterClient | None:
+    """服务在运行时返回客户端；平台不支持 / 套接字不存在 / 服务无响应时返回 None。"""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    socket_path = writer_socket_path(database_path)
+    if not socket_path.exists():
+        return None
+    client = WriterClient(socket_path)
+    try:
+        response = client.ping()
+    except (OSError, ConnectionError, WriterServiceError):
+        return None
+    # 服务进程自身的写入不能再提交给自己
+    if int(response.get("pid", -1)) == os.getpid():
+        return None
+    return client
+
+
+def submit_to_writer(
+    database_path: Path,
+    *,
+    table_name: str,
+    frame: pd.DataFrame | pa.Table,
+    partition_value: str | None,
+    partition_key: str = "trade_date",
+) -> bool:
+    """服务在运行时提交一次分区替换写入并返回 True；未运行返回 False（调用方直连写入）。"""
+    client = connect_writer(database_path)
+    if client is None:
+        return False
+    client.submit(
+        [
+            WritePart(
+                table_name=table_name,
+                frame=frame,
+                partition_value=partition_value,
+                partition_key=partition_key,
+            )
+        ]
+    )
+    return True
+
+
+class RemoteWriteSession:
+    """与 WriteSession 同接口的远程写会话：写入提交给单写入服务。
+
+    batch() 外每次 write_frame() 立即提交；batch() 内的写入缓存到最外层 batch 退出时
+    合并为一个请求提交（服务端同一事务，整体生效或整体失败），异常退出时丢弃。
+    """
+
+    def __init__(self, client: WriterClient) -> None:
+        self.client = client
+        self._pending: list[WritePart] = []
+        self._transaction_depth = 0
+        self.transactions = 0
+        self.rows_written = 0
+
+    @contextmanager
+    def batch(self) -> Iterator[RemoteWriteSession]:
+        if self._transaction_depth > 0:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        self._pending = []
+        self._transaction_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth = 0
+            self._pending = []
+            raise
+        self._transaction_depth = 0
+        parts, self._pending = self._pending, []
+        if parts:
+            self.client.submit(parts)
+            self.transactions += 1
+
+    def write_frame(
+        self,
+        table_name: str,
+        frame: pd.DataFrame | pa.Table,
+        *,
+        trade_date: str | None = None,
+        partition_key: str = "trade_date",
+    ) -> int:
+        part = WritePart(
+            table_name=table_name,
+            frame=frame,
+            partition_value=trade_date,
+            partition_key=partition_key,
+        )
+        if self._transaction_depth > 0:
+            self._pending.append(part)
+        else:
+            self.client.submit([part])
+            self.transactions += 1
+        self.rows_written += int(len(frame))
+        return int(len(frame))
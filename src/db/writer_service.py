@@ -0,0 +1,318 @@
+"""单写入服务（eq writer）：独占 emotionquant.duckdb 的写连接，组提交各进程的写入请求。
+
+并行回补时，各流水线进程各自打开读写连接会在 DuckDB 文件锁上反复冲突重试。
+服务运行时，open_write_session() / open_repository_write_session() 及各流水线的 _persist
+自动把写入经本地 Unix 套接字提交给服务（见 src/db/writer_client.py）：
+
+- 连接线程：每个客户端连接一个线程，解析请求（表 + 分区 + Arrow 数据）后入队，等待确认
+- 写线程：取队首请求后在 group_commit_ms 窗口内继续收集（至多 max_batch 个），
+  在同一事务内写入后一次提交，提交返回后才向各请求发送确认
+- 组内任一请求失败时整组回滚，逐个请求单独重试，失败只影响出错的请求
+- 队列空闲 idle_close_ms 后关闭写连接并释放进程锁，便于其它进程只读访问
+  （DuckDB 同一时刻只允许一个进程读写打开数据库文件）
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import socket
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from src.config.config import Config
+from src.data.repositories.base import open_repository_write_session
+from src.db.helpers import WriteSession
+from src.db.writer_client import (
+    WritePart,
+    WriterClient,
+    WriterServiceError,
+    arrow_bytes_to_table,
+    recv_message,
+    send_message,
+    writer_socket_path,
+)
+
+
+@dataclass
+class _PendingWrite:
+    parts: list[WritePart]
+    done: threading.Event = field(default_factory=threading.Event)
+    response: dict[str, Any] = field(default_factory=dict)
+
+    def finish(self, response: dict[str, Any]) -> None:
+        self.response = response
+        self.done.set()
+
+
+class IngestionWriterService:
+    """单写入服务：监听 writer_socket_path(database_path)，串行组提交所有写入。"""
+
+    def __init__(
+        self,
+        database_path: Path,
+        *,
+        group_commit_ms: int = 20,
+        max_batch: int = 64,
+        idle_close_ms: int = 200,
+        socket_path: Path | None = None,
+    ) -> None:
+        self.database_path = Path(database_path)
+        self.socket_path = socket_path or writer_socket_path(self.database_path)
+        self.group_commit_seconds = max(0, int(group_commit_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.idle_close_seconds = max(0, int(idle_close_ms)) / 1000.0
+        self._queue: queue.Queue[_PendingWrite] = queue.Queue()
+        self._stop = threading.Event()
+        self._writer_stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._server: socket.socket | None = None
+        self._session_stack: ExitStack | None = None
+        self._session: WriteSession | None = None
+        self._last_activity = time.monotonic()
+        self._stats_lock = threading.Lock()
+        self.commits = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.rows_written = 0
+        self.max_group_size = 0
+        self.connection_opens = 0
+
+    @classmethod
+    def from_config(cls, config: Config) -> IngestionWriterService:
+        return cls(
+            Path(config.duckdb_dir) / "emotionquant.duckdb",
+            group_commit_ms=int(config.duckdb_writer_group_commit_ms),
+            max_batch=int(config.duckdb_writer_max_batch),
+            idle_close_ms=int(config.duckdb_writer_idle_close_ms),
+        )
+
+    # ---- 生命周期 ----
+
+    def start(self) -> None:
+        """绑定套接字并启动接收线程与写线程（已有存活服务时抛出 RuntimeError）。"""
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("duckdb_writer_unsupported_platform: AF_UNIX socket is required")
+        if self.socket_path.exists():
+            try:
+                WriterClient(self.socket_path, timeout_seconds=2.0).ping()
+            except (OSError, ConnectionError, WriterServiceError):
+                self.socket_path.unlink()
+            else:
+                raise RuntimeError(f"duckdb_writer_already_running: {self.socket_path}")
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        server.listen(128)
+        server.settimeout(0.2)
+        self._server = server
+        self._stop.clear()
+        self._writer_stopped.clear()
+        loops = ((self._accept_loop, "eq-writer-accept"), (self._writer_loop, "eq-writer"))
+        for target, name in loops:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        """停止接收新请求，处理完队列中已有请求后关闭写连接并删除套接字。"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+
+    def __enter__(self) -> IngestionWriterService:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "commits": self.commits,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests,
+                "rows_written": self.rows_written,
+                "max_group_size": self.max_group_size,
+                "connection_opens": self.connection_opens,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    # ---- 连接处理 ----
+
+    def _accept_loop(self) -> None:
+        assert self._server is not None
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            threading.Thread(
+                target=self._handle_connection,
+                args=(conn,),
+                name="eq-writer-conn",
+                daemon=True,
+            ).start()
+
+    def _handle_connection(self, conn: socket.socket) -> None:
+        with conn:
+            conn.settimeout(None)
+            try:
+                header, payloads = recv_message(conn)
+            except (OSError, ConnectionError, ValueError):
+                return
+            op = str(header.get("op", ""))
+            if op == "ping":
+                response: dict[str, Any] = {"ok": True, "pid": os.getpid()}
+            elif op == "stats":
+                response = {"ok": True, **self.stats()}
+            elif op == "write":
+                response = self._submit(header, payloads)
+            else:
+                response = {"ok": False, "error": f"unsupported_op: {op}"}
+            try:
+                send_message(conn, response)
+            except OSError:
+                return
+
+    def _submit(self, header: dict[str, Any], payloads: list[bytes]) -> dict[str, Any]:
+        specs = list(header.get("parts", []))
+        if len(specs) != len(payloads):
+            return {"ok": False, "error": "malformed_write_request: parts/payloads mismatch"}
+        try:
+            parts = [
+                WritePart(
+                    table_name=str(spec["table_name"]),
+                    frame=arrow_bytes_to_table(payload),
+                    partition_value=(
+                        None
+                        if spec.get("partition_value") is None
+                        else str(spec["partition_value"])
+                    ),
+                    partition_key=str(spec.get("partition_key") or "trade_date"),
+                )
+                for spec, payload in zip(specs, payloads, strict=True)
+            ]
+        except Exception as exc:  # pragma: no cover - malformed client payload
+            return {"ok": False, "error": f"malformed_write_request: {exc}"}
+        if self._stop.is_set():
+            return {"ok": False, "error": "duckdb_writer_stopping"}
+        pending = _PendingWrite(parts=parts)
+        self._queue.put(pending)
+        while not pending.done.wait(0.5):
+            if self._writer_stopped.is_set():
+                return {"ok": False, "error": "duckdb_writer_stopping"}
+        return pending.response
+
+    # ---- 组提交 ----
+
+    def _writer_loop(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                if time.monotonic() - self._last_activity >= self.idle_close_seconds:
+                    self._close_session()
+                continue
+            group = [first]
+            deadline = time.monotonic() + self.group_commit_seconds
+            while len(group) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                group.append(item)
+            self._commit_group(group)
+            self._last_activity = time.monotonic()
+        self._close_session()
+        self._writer_stopped.set()
+
+    def _ensure_session(self) -> WriteSession:
+        if self._session is None:
+            stack = ExitStack()
+            try:
+                self._session = stack.enter_context(
+                    open_repository_write_session(self.database_path)
+                )
+            except BaseException:
+                stack.close()
+                raise
+            self._session_stack = stack
+            with self._stats_lock:
+                self.connection_opens += 1
+        return self._session
+
+    def _close_session(self) -> None:
+        if self._session_stack is not None:
+            self._session_stack.close()
+        self._session_stack = None
+        self._session = None
+
+    def _commit_group(self, group: list[_PendingWrite]) -> None:
+        try:
+            session = self._ensure_session()
+        except Exception as exc:
+            for item in group:
+                self._fail(item, exc)
+            return
+        try:
+            rows_by_item = []
+            with session.batch():
+                for item in group:
+                    rows_by_item.append(self._apply(session, item))
+        except Exception as exc:
+            if len(group) == 1:
+                self._fail(group[0], exc)
+                return
+            # 整组回滚后逐个重试，把失败隔离到出错的请求
+            for item in group:
+                self._commit_group([item])
+            return
+        with self._stats_lock:
+            self.commits += 1
+            self.requests += len(group)
+            self.rows_written += sum(rows_by_item)
+            self.max_group_size = max(self.max_group_size, len(group))
+            commit_id = self.commits
+        for item, rows in zip(group, rows_by_item, strict=True):
+            item.finish(
+                {"ok": True, "rows": rows, "commit_id": commit_id, "group_size": len(group)}
+            )
+
+    @staticmethod
+    def _apply(session: WriteSession, item: _PendingWrite) -> int:
+        return sum(
+            session.write_frame(
+                part.table_name,
+                part.frame,
+                trade_date=part.partition_value,
+                partition_key=part.partition_key,
+            )
+            for part in item.parts
+        )
+
+    def _fail(self, item: _PendingWrite, exc: Exception) -> None:
+        with self._stats_lock:
+            self.failed_requests += 1
+        item.finish({"ok": False, "error": f"{type(exc).__name__}: {exc}"})
@@ -159,11 +159,19 @@ def _launch_streamlit_dashboard(
     trade_date: str,
     database_path: Path,
     streamlit_port: int,
+    config: Config | None = None,
 ) -> subprocess.CompletedProcess[str]:
     command = _build_streamlit_command(trade_date=trade_date, streamlit_port=streamlit_port)
     env = os.environ.copy()
     env["EQ_GUI_TRADE_DATE"] = trade_date
     env["EQ_GUI_DUCKDB_PATH"] = str(database_path)
+    if config is not None:
+        # 仪表盘子进程按同一存储后端读取（Parquet 湖视图）
+        env["PARQUET_PATH"] = str(config.parquet_path)
+        for layer in ("l1", "l2", "l3"):
+            env[f"STORAGE_BACKEND_{layer.upper()}"] = str(
+                getattr(config, f"storage_backend_{layer}")
+            )
     return subprocess.run(command, check=False, env=env, text=True)
 
 
@@ -192,6 +200,7 @@ def run_gui(
                 trade_date=normalized_date,
                 database_path=database_path,
                 streamlit_port=effective_streamlit_port,
+                config=config,
             )
             has_error = completed.returncode not in {0, 130}
             quality_status = "FAIL" if has_error else "PASS"
@@ -16,6 +16,7 @@ from typing import Any
 import plotly.graph_objects as go
 import streamlit as st
 
+from src.config.config import Config
 from src.gui import formatter as fmt
 from src.gui.data_service import DataService
 
@@ -266,7 +267,7 @@ def main() -> None:
         st.error("缺少 DuckDB 路径。")
         return
 
-    svc = DataService(database_path)
+    svc = DataService(database_path, config=Config.from_env())
 
     tabs = st.tabs(PAGE_NAMES)
 
@@ -1,7 +1,7 @@
 """GUI 数据服务层（只读消费 DuckDB）。
 
 与 docs/design/core-infrastructure/gui/gui-api.md v3.2.0 §2 DataService 对齐。
-所有查询以 read_only=True 打开连接，不执行任何写操作或算法计算。
+所有查询以只读连接执行（可按存储后端配置读取 Parquet 湖视图），不执行任何写操作或算法计算。
 """
 
 from __future__ import annotations
@@ -12,7 +12,9 @@ from typing import Any
 
 import duckdb
 
+from src.config.config import Config
 from src.db.helpers import table_exists as _table_exists
+from src.db.storage_backend import open_read_connection
 from src.gui import formatter as fmt
 from src.gui.models import (
     AnalysisPageData,
@@ -120,11 +122,13 @@ def _safe_str(val: Any, default: str = "") -> str:
 class DataService:
     """GUI 数据服务（只读）。"""
 
-    def __init__(self, database_path: Path) -> None:
+    def __init__(self, database_path: Path, *, config: Config | None = None) -> None:
         self._db_path = database_path
+        self._config = config
 
     def _connect(self) -> duckdb.DuckDBPyConnection:
-        return duckdb.connect(str(self._db_path), read_only=True)
+        # 按 STORAGE_BACKEND_* 配置把 Parquet 湖注册为同名视图（默认等价于 read_only 直连）
+        return open_read_connection(self._db_path, config=self._config)
 
     def _has_table(self, conn: duckdb.DuckDBPyConnection, name: str) -> bool:
         return _table_exists(conn, name)
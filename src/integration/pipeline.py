@@ -19,10 +19,16 @@ from dataclasses import dataclass
 from pathlib import Path
 
 import duckdb
+import numpy as np
 import pandas as pd
 
 from src.config.config import Config
-from src.db.helpers import column_exists as _column_exists, table_exists as _table_exists
+from src.db.helpers import (
+    column_exists as _column_exists,
+    open_write_connection,
+    table_exists as _table_exists,
+)
+from src.db.writer_client import submit_to_writer
 from src.models.enums import (
     GateDecision,
     MssCycle,
@@ -173,7 +179,11 @@ def _persist(
     frame: pd.DataFrame,
     trade_date: str,
 ) -> None:
-    with duckdb.connect(str(database_path)) as connection:
+    if submit_to_writer(
+        database_path, table_name=table_name, frame=frame, partition_value=trade_date
+    ):
+        return
+    with open_write_connection(database_path) as connection:
         if table_name == "integrated_recommendation" and _table_exists(connection, table_name):
             column_info = connection.execute(f"PRAGMA table_info('{table_name}')").fetchall()
             for row in column_info:
@@ -217,14 +227,52 @@ def _persist(
         connection.unregister("incoming_df")
 
 
-def _to_stock_code(stock_code: str, ts_code: str) -> str:
-    candidate = str(stock_code or "").strip()
-    if candidate:
-        return candidate
-    ts = str(ts_code or "").strip()
-    if "." in ts:
-        return ts.split(".", maxsplit=1)[0]
-    return ts
+_GRADE_PRIORITY = {"S": 0, "A": 1, "B": 2, "C": 3, "D": 4}
+_RECOMMENDATION_PRIORITY = {"STRONG_BUY": 0, "BUY": 1, "HOLD": 2, "SELL": 3, "AVOID": 4}
+_DIRECTION_SCORE = {
+    PasDirection.BULLISH.value: 1.0,
+    PasDirection.NEUTRAL.value: 0.0,
+    PasDirection.BEARISH.value: -1.0,
+}
+_VALID_GRADES = ("S", "A", "B", "C", "D")
+_BULLISH_RECOMMENDATIONS = (RecommendationGrade.STRONG_BUY.value, RecommendationGrade.BUY.value)
+_BEARISH_RECOMMENDATIONS = (RecommendationGrade.SELL.value, RecommendationGrade.AVOID.value)
+
+
+def _text(series: pd.Series, default: str = "") -> pd.Series:
+    """缺失值按 default 处理后去除首尾空白的文本列。"""
+    return series.fillna(default).astype(str).str.strip()
+
+
+def _stock_code_from_ts(ts_code: pd.Series) -> pd.Series:
+    return ts_code.str.replace(r"\..*", "", regex=True)
+
+
+def _to_stock_code(stock_code: pd.Series, ts_code: pd.Series) -> pd.Series:
+    """stock_code 为空时取 ts_code 点号前的代码。"""
+    candidate = _text(stock_code)
+    return candidate.where(candidate != "", _stock_code_from_ts(_text(ts_code)))
+
+
+def _round4(values: np.ndarray) -> np.ndarray:
+    """逐元素 round(x, 4)，与内置 round 的十进制舍入口径一致。
+
+    np.round 先乘 10^4 再取整：放大后恰落在 .5 附近（如两个 4 位小数分数的均值）时
+    末位可能与内置 round 不同，这些元素（及超出 2^52 的量级）逐个回落到内置 round。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 1e4
+    rounded = np.rint(scaled) / 1e4
+    fallback = (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6) | (np.abs(scaled) >= 2.0**52)
+    if fallback.any():
+        rounded[fallback] = [round(value, 4) for value in values[fallback].tolist()]
+    return rounded
+
+
+def _clamp(values: np.ndarray, lower: float, upper: float) -> np.ndarray:
+    """逐元素 max(lower, min(upper, x))；NaN 与内置 min / max 一致地落到 upper。"""
+    capped = np.where(values < upper, values, upper)
+    return np.where(capped > lower, capped, lower)
 
 
 def _direction_from_trend(mss_trend: str) -> str:
@@ -236,80 +284,97 @@ def _direction_from_trend(mss_trend: str) -> str:
     return mapping.get(str(mss_trend), PasDirection.NEUTRAL)
 
 
-def _direction_from_recommendation(recommendation: str) -> str:
-    value = str(recommendation)
-    if value in {RecommendationGrade.STRONG_BUY, RecommendationGrade.BUY}:
-        return PasDirection.BULLISH
-    if value in {RecommendationGrade.SELL, RecommendationGrade.AVOID}:
-        return PasDirection.BEARISH
-    return PasDirection.NEUTRAL
+def _direction_from_recommendation(recommendation: np.ndarray) -> np.ndarray:
+    return np.select(
+        [
+            np.isin(recommendation, _BULLISH_RECOMMENDATIONS),
+            np.isin(recommendation, _BEARISH_RECOMMENDATIONS),
+        ],
+        [PasDirection.BULLISH.value, PasDirection.BEARISH.value],
+        default=PasDirection.NEUTRAL.value,
+    )
 
 
-def _to_direction(mss_direction: str, irs_direction: str, pas_direction: str) -> str:
-    direction_score = {
-        PasDirection.BULLISH: 1.0,
-        PasDirection.NEUTRAL: 0.0,
-        PasDirection.BEARISH: -1.0,
-    }
+def _direction_score(direction: np.ndarray) -> np.ndarray:
+    bullish = direction == PasDirection.BULLISH.value
+    bearish = direction == PasDirection.BEARISH.value
+    return bullish.astype(np.float64) - bearish.astype(np.float64)
+
+
+def _to_direction(
+    mss_direction: str, irs_direction: np.ndarray, pas_direction: np.ndarray
+) -> np.ndarray:
     avg = (
-        direction_score.get(mss_direction, 0.0)
-        + direction_score.get(irs_direction, 0.0)
-        + direction_score.get(pas_direction, 0.0)
+        _DIRECTION_SCORE.get(mss_direction, 0.0)
+        + _direction_score(irs_direction)
+        + _direction_score(pas_direction)
     ) / 3.0
-    if avg > 0.3:
-        return PasDirection.BULLISH
-    if avg < -0.3:
-        return PasDirection.BEARISH
-    return PasDirection.NEUTRAL
-
-
-def _to_consistency(mss_direction: str, irs_direction: str, pas_direction: str) -> str:
-    items = [mss_direction, irs_direction, pas_direction]
-    unique_count = len(set(items))
-    if unique_count == 1:
-        return "consistent"
-    if unique_count == 3:
-        return "divergent"
-    return "partial"
-
-
-def _to_opportunity_grade(pas_score: float) -> str:
-    if pas_score >= 85.0:
-        return "S"
-    if pas_score >= 70.0:
-        return "A"
-    if pas_score >= 55.0:
-        return "B"
-    if pas_score >= 40.0:
-        return "C"
-    return "D"
-
-
-def _to_recommendation(final_score: float, mss_cycle: str) -> str:
-    if final_score >= 75.0 and mss_cycle in {MssCycle.EMERGENCE, MssCycle.FERMENTATION}:
-        candidate = RecommendationGrade.STRONG_BUY
-    elif final_score >= 70.0:
-        candidate = RecommendationGrade.BUY
-    elif final_score >= 50.0:
-        candidate = RecommendationGrade.HOLD
-    elif final_score >= 30.0:
-        candidate = RecommendationGrade.SELL
-    else:
-        candidate = RecommendationGrade.AVOID
-
-    if mss_cycle == MssCycle.UNKNOWN and candidate in {RecommendationGrade.STRONG_BUY, RecommendationGrade.BUY}:
-        return RecommendationGrade.HOLD
-    return candidate
+    return np.select(
+        [avg > 0.3, avg < -0.3],
+        [PasDirection.BULLISH.value, PasDirection.BEARISH.value],
+        default=PasDirection.NEUTRAL.value,
+    )
 
 
-def _to_limit_guard_result(close_price: float, high_price: float, low_price: float) -> str:
-    if close_price <= 0.0:
-        return "BLOCKED_INVALID_PRICE"
-    if high_price > 0.0 and close_price >= high_price * 0.999:
-        return "WARN_NEAR_LIMIT_UP"
-    if low_price > 0.0 and close_price <= low_price * 1.001:
-        return "WARN_NEAR_LIMIT_DOWN"
-    return "PASS"
+def _to_consistency(
+    mss_direction: str, irs_direction: np.ndarray, pas_direction: np.ndarray
+) -> np.ndarray:
+    mss_irs = irs_direction == mss_direction
+    mss_pas = pas_direction == mss_direction
+    irs_pas = irs_direction == pas_direction
+    return np.select(
+        [mss_irs & mss_pas, ~(mss_irs | mss_pas | irs_pas)],
+        ["consistent", "divergent"],
+        default="partial",
+    )
+
+
+def _to_opportunity_grade(pas_score: np.ndarray) -> np.ndarray:
+    return np.select(
+        [pas_score >= 85.0, pas_score >= 70.0, pas_score >= 55.0, pas_score >= 40.0],
+        ["S", "A", "B", "C"],
+        default="D",
+    )
+
+
+def _to_recommendation(final_score: np.ndarray, mss_cycle: str) -> np.ndarray:
+    strong_cycle = mss_cycle in {MssCycle.EMERGENCE, MssCycle.FERMENTATION}
+    recommendation = np.select(
+        [
+            (final_score >= 75.0) & strong_cycle,
+            final_score >= 70.0,
+            final_score >= 50.0,
+            final_score >= 30.0,
+        ],
+        [
+            RecommendationGrade.STRONG_BUY.value,
+            RecommendationGrade.BUY.value,
+            RecommendationGrade.HOLD.value,
+            RecommendationGrade.SELL.value,
+        ],
+        default=RecommendationGrade.AVOID.value,
+    )
+    if mss_cycle == MssCycle.UNKNOWN:
+        recommendation = np.where(
+            np.isin(recommendation, _BULLISH_RECOMMENDATIONS),
+            RecommendationGrade.HOLD.value,
+            recommendation,
+        )
+    return recommendation
+
+
+def _to_limit_guard_result(
+    close_price: np.ndarray, high_price: np.ndarray, low_price: np.ndarray
+) -> np.ndarray:
+    return np.select(
+        [
+            close_price <= 0.0,
+            (high_price > 0.0) & (close_price >= high_price * 0.999),
+            (low_price > 0.0) & (close_price <= low_price * 1.001),
+        ],
+        ["BLOCKED_INVALID_PRICE", "WARN_NEAR_LIMIT_UP", "WARN_NEAR_LIMIT_DOWN"],
+        default="PASS",
+    )
 
 
 def _normalize_gate(gate: str) -> str:
@@ -375,46 +440,67 @@ def _normalize_integration_mode(mode: str) -> str:
     return candidate
 
 
-def _grade_priority(grade: str) -> int:
-    mapping = {"S": 0, "A": 1, "B": 2, "C": 3, "D": 4}
-    return mapping.get(str(grade or "").strip().upper(), 5)
-
-
-def _recommendation_priority(recommendation: str) -> int:
-    mapping = {"STRONG_BUY": 0, "BUY": 1, "HOLD": 2, "SELL": 3, "AVOID": 4}
-    return mapping.get(str(recommendation or "").strip().upper(), 5)
 
 
 def _apply_recommendation_limits(frame: pd.DataFrame) -> pd.DataFrame:
     if frame.empty:
         return frame
     ranked = frame.copy()
-    ranked["__grade_priority"] = ranked["opportunity_grade"].map(_grade_priority)
-    ranked["__recommendation_priority"] = ranked["recommendation"].map(_recommendation_priority)
+    ranked["__grade_priority"] = (
+        _text(ranked["opportunity_grade"]).str.upper().map(_GRADE_PRIORITY).fillna(5)
+    )
+    ranked["__recommendation_priority"] = (
+        _text(ranked["recommendation"]).str.upper().map(_RECOMMENDATION_PRIORITY).fillna(5)
+    )
     ranked = ranked.sort_values(
         by=["__grade_priority", "__recommendation_priority", "final_score", "position_size"],
         ascending=[True, True, False, False],
         kind="stable",
     )
 
-    # 限额策略采用“全市场排序后顺序挑选”，确保每日20/行业5的硬约束可解释。
-    picked_indices: list[int] = []
-    industry_counts: dict[str, int] = {}
-    for tup in ranked.itertuples():
-        if len(picked_indices) >= MAX_RECOMMENDATIONS_PER_DAY:
-            break
-        industry_code = _safe_text(getattr(tup, "industry_code", ""), "UNKNOWN")
-        current_count = int(industry_counts.get(industry_code, 0))
-        if current_count >= MAX_RECOMMENDATIONS_PER_INDUSTRY:
-            continue
-        picked_indices.append(tup.Index)
-        industry_counts[industry_code] = current_count + 1
-
-    limited = ranked.loc[picked_indices].copy()
+    # 限额策略采用“全市场排序后顺序挑选”，确保每日20/行业5的硬约束可解释：
+    # 顺序挑选时行业内排名第 6 起的股票必被跳过，等价于先按行业内名次截断再取前 20。
+    industry_key = _text(ranked["industry_code"])
+    industry_key = industry_key.where(
+        ~industry_key.str.lower().isin({"", "<na>", "nan", "none"}), "UNKNOWN"
+    )
+    industry_rank = ranked.groupby(industry_key, sort=False).cumcount()
+    limited = ranked[industry_rank < MAX_RECOMMENDATIONS_PER_INDUSTRY].head(
+        MAX_RECOMMENDATIONS_PER_DAY
+    )
     limited = limited.drop(columns=["__grade_priority", "__recommendation_priority"], errors="ignore")
     return limited.reset_index(drop=True)
 
 
+def _take(column: pd.Series, rows: np.ndarray) -> np.ndarray:
+    """按行号取值；行号 -1（未命中）落到末尾哨兵 NaN。"""
+    return np.append(column.to_numpy(dtype=object), np.nan)[rows]
+
+
+def _join_by_code(
+    keys: pd.DataFrame,
+    *,
+    by_stock: pd.DataFrame,
+    by_ts: pd.DataFrame,
+    columns: list[str],
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """按 stock_code_key 优先、ts_code_key 兜底左连接查找表（键唯一）。
+
+    返回 (逐行对齐的列, 是否命中)。
+    """
+    stock_rows = pd.Index(by_stock["stock_code_key"]).get_indexer(keys["stock_code_key"])
+    ts_rows = pd.Index(by_ts["ts_code_key"]).get_indexer(keys["ts_code_key"])
+    joined = pd.DataFrame(
+        {
+            column: np.where(
+                stock_rows >= 0, _take(by_stock[column], stock_rows), _take(by_ts[column], ts_rows)
+            )
+            for column in columns
+        }
+    )
+    return joined, (stock_rows >= 0) | (ts_rows >= 0)
+
+
 def _latest_snapshot_trade_date(
     connection: duckdb.DuckDBPyConnection,
     *,
@@ -437,11 +523,19 @@ def _load_stock_industry_lookup(
     connection: duckdb.DuckDBPyConnection,
     *,
     trade_date: str,
-) -> tuple[dict[str, tuple[str, str]], dict[str, tuple[str, str]]]:
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """股票→行业查找表：(按 stock_code_key, 按 ts_code_key)。
+
+    两张表的列均为对应键 + industry_code / industry_name。
+    """
+    empty = (
+        pd.DataFrame(columns=["stock_code_key", "industry_code", "industry_name"]),
+        pd.DataFrame(columns=["ts_code_key", "industry_code", "industry_name"]),
+    )
     if not _table_exists(connection, "raw_index_member"):
-        return ({}, {})
+        return empty
     if not _table_exists(connection, "raw_index_classify"):
-        return ({}, {})
+        return empty
 
     member_snapshot = _latest_snapshot_trade_date(
         connection,
@@ -454,7 +548,7 @@ def _load_stock_industry_lookup(
         trade_date=trade_date,
     )
     if not member_snapshot or not classify_snapshot:
-        return ({}, {})
+        return empty
 
     # raw_index_member/raw_index_classify 采用最近快照，避免跨日混用导致行业映射漂移。
     frame = connection.execute(
@@ -467,7 +561,7 @@ def _load_stock_industry_lookup(
         [member_snapshot, classify_snapshot],
     ).df()
     if frame.empty:
-        return ({}, {})
+        return empty
 
     # 向量化构建 stock→industry 查找表（消除 iterrows）
     f = frame.copy()
@@ -482,18 +576,27 @@ def _load_stock_industry_lookup(
     f["_in_name"] = f["industry_name"].fillna("未知行业").astype(str).str.strip()
     f["_ic"] = f["_ic"].where(f["_ic"] != "", "UNKNOWN")
     f["_in_name"] = f["_in_name"].where(f["_in_name"] != "", "未知行业")
-    f["_sc"] = f["_ts"].apply(lambda x: _to_stock_code("", x))
+    f["_sc"] = _stock_code_from_ts(f["_ts"])
 
     # 取每个 stock_code / ts_code 的第一条记录
-    lookup_by_stock: dict[str, tuple[str, str]] = {}
-    lookup_by_ts: dict[str, tuple[str, str]] = {}
-    f_dedup_sc = f[f["_sc"] != ""].drop_duplicates(subset="_sc", keep="first")
-    for sc, ic, iname in zip(f_dedup_sc["_sc"], f_dedup_sc["_ic"], f_dedup_sc["_in_name"]):
-        lookup_by_stock[sc] = (ic, iname)
-    f_dedup_ts = f.drop_duplicates(subset="_ts", keep="first")
-    for ts, ic, iname in zip(f_dedup_ts["_ts"], f_dedup_ts["_ic"], f_dedup_ts["_in_name"]):
-        lookup_by_ts[ts] = (ic, iname)
-    return (lookup_by_stock, lookup_by_ts)
+    by_stock = f[f["_sc"] != ""].drop_duplicates(subset="_sc", keep="first")
+    by_ts = f.drop_duplicates(subset="_ts", keep="first")
+    return (
+        pd.DataFrame(
+            {
+                "stock_code_key": by_stock["_sc"],
+                "industry_code": by_stock["_ic"],
+                "industry_name": by_stock["_in_name"],
+            }
+        ).reset_index(drop=True),
+        pd.DataFrame(
+            {
+                "ts_code_key": by_ts["_ts"],
+                "industry_code": by_ts["_ic"],
+                "industry_name": by_ts["_in_name"],
+            }
+        ).reset_index(drop=True),
+    )
 
 
 def _resolve_weight_plan(
@@ -696,12 +799,22 @@ def run_integrated_daily(
     mss_record = mss_frame.iloc[0].to_dict()
     gate_record = gate_frame.iloc[0].to_dict()
     default_irs_record = irs_frame.iloc[0].to_dict()
-    irs_by_industry: dict[str, dict[str, object]] = {}
-    _irs_dedup = irs_frame.copy()
-    _irs_dedup["ic_key"] = _irs_dedup["industry_code"].fillna("").astype(str).str.strip()
-    _irs_dedup = _irs_dedup[_irs_dedup["ic_key"] != ""].drop_duplicates(subset="ic_key", keep="first")
-    for tup in _irs_dedup.itertuples(index=False):
-        irs_by_industry[tup.ic_key] = {col: getattr(tup, col, None) for col in irs_frame.columns}
+    # 行业 IRS 字段：按 industry_code 去重保留最新一行，未命中的行业回落到最新一行
+    irs_fields = pd.DataFrame(
+        {
+            "industry_code": _text(irs_frame["industry_code"]),
+            "irs_score": pd.to_numeric(irs_frame["irs_score"], errors="coerce"),
+            "irs_direction": _direction_from_recommendation(
+                irs_frame["recommendation"].to_numpy(dtype=object)
+            ),
+            "irs_avoid": _text(irs_frame["allocation_advice"]) == "回避",
+            "quality_flag": _text(irs_frame["quality_flag"]),
+        }
+    )
+    default_irs = irs_fields.iloc[0].to_dict()
+    irs_lookup = irs_fields[irs_fields["industry_code"] != ""].drop_duplicates(
+        subset="industry_code", keep="first"
+    )
 
     validation_gate = _normalize_gate(str(gate_record.get("final_gate", "FAIL")))
     effective_gate = validation_gate
@@ -745,12 +858,8 @@ def run_integrated_daily(
                 w_pas = BASELINE_WEIGHT
 
     integration_state = "normal"
-    has_cold_start_industry = any(
-        str(item.get("quality_flag", "")).strip() == "cold_start" for item in irs_by_industry.values()
-    )
-    has_stale_industry = any(
-        str(item.get("quality_flag", "")).strip() == "stale" for item in irs_by_industry.values()
-    )
+    has_cold_start_industry = bool((irs_lookup["quality_flag"] == "cold_start").any())
+    has_stale_industry = bool((irs_lookup["quality_flag"] == "stale").any())
     if validation_gate == "FAIL":
         integration_state = "blocked_gate_fail"
     elif with_validation_bridge and bridge_error:
@@ -782,7 +891,7 @@ def run_integrated_daily(
     elif effective_gate == "WARN":
         integration_state = "warn_gate_fallback"
 
-    integrated_rows: list[dict[str, object]] = []
+    integrated_frame = pd.DataFrame(columns=INTEGRATED_COLUMNS)
     rr_filtered_count = 0
     created_at = pd.Timestamp.utcnow().isoformat()
 
@@ -795,176 +904,187 @@ def run_integrated_daily(
         mss_temperature = _to_float(mss_record.get("mss_temperature", mss_score), mss_score)
         mss_cycle = str(mss_record.get("mss_cycle", "unknown"))
         mss_trend = str(mss_record.get("mss_trend", "sideways"))
-        mss_direction = _direction_from_trend(mss_trend)
+        mss_direction = _direction_from_trend(mss_trend).value
         cycle_position_cap_top_down = _cycle_cap_ratio(mss_cycle)
         cycle_position_cap_bottom_up = min(
             cycle_position_cap_top_down,
             _cycle_cap_ratio_bottom_up(mss_cycle),
         )
 
-        raw_lookup_by_stock: dict[str, dict[str, object]] = {}
-        raw_lookup_by_ts: dict[str, dict[str, object]] = {}
-        if not raw_frame.empty:
-            _rf = raw_frame.copy()
-            _rf["_sk"] = _rf["stock_code"].astype(str).str.strip()
-            _rf["_tk"] = _rf["ts_code"].astype(str).str.strip().str.upper() if "ts_code" in _rf.columns else ""
-            _rf_sc = _rf[_rf["_sk"] != ""].drop_duplicates(subset="_sk", keep="first").set_index("_sk")
-            raw_lookup_by_stock = _rf_sc.drop(columns=["_tk"], errors="ignore").to_dict("index")
-            if "_tk" in _rf.columns:
-                _rf_ts = _rf[_rf["_tk"] != ""].drop_duplicates(subset="_tk", keep="first").set_index("_tk")
-                raw_lookup_by_ts = _rf_ts.drop(columns=["_sk"], errors="ignore").to_dict("index")
-
-        pas_metrics = pas_frame.copy()
-        if "opportunity_grade" not in pas_metrics.columns:
-            pas_metrics["opportunity_grade"] = pas_metrics["pas_score"].map(_to_opportunity_grade)
-        pas_metrics["opportunity_grade"] = (
-            pas_metrics["opportunity_grade"].astype(str).str.strip().str.upper()
+        default_industry_code = str(default_irs_record.get("industry_code", "UNKNOWN"))
+        default_industry_name = str(default_irs_record.get("industry_name", "未知行业"))
+
+        # 候选股按列计算：行业映射、IRS 字段与行情均以左连接对齐到 stock_pas_daily 行序
+        keys = pd.DataFrame(
+            {
+                "stock_code_key": _to_stock_code(pas_frame["stock_code"], pas_frame["ts_code"]),
+                "ts_code_key": _text(pas_frame["ts_code"]).str.upper(),
+            }
         )
-        pas_metrics["stock_code_key"] = pas_metrics.apply(
-            lambda row: _to_stock_code(
-                str(row.get("stock_code", "")),
-                str(row.get("ts_code", "")),
-            ),
-            axis=1,
+        industry, industry_hit = _join_by_code(
+            keys,
+            by_stock=stock_industry_by_stock,
+            by_ts=stock_industry_by_ts,
+            columns=["industry_code", "industry_name"],
         )
-        pas_metrics["ts_code_key"] = pas_metrics["ts_code"].astype(str).str.strip().str.upper()
-        # 向量化行业查找（消除 iterrows）
-        def _lookup_industry(sc: str, ts: str) -> tuple[str, str]:
-            t = stock_industry_by_stock.get(sc) or stock_industry_by_ts.get(ts)
-            return t if t else ("UNKNOWN", "未知行业")
-
-        _ind_pairs = [
-            _lookup_industry(sc, ts)
-            for sc, ts in zip(pas_metrics["stock_code_key"], pas_metrics["ts_code_key"])
-        ]
-        pas_metrics["industry_code"] = [p[0] for p in _ind_pairs]
-        pas_metrics["industry_name"] = [p[1] for p in _ind_pairs]
-        pas_metrics["is_sa"] = pas_metrics["opportunity_grade"].isin({"S", "A"})
-        pas_sa_ratio = float(pas_metrics["is_sa"].mean()) if len(pas_metrics) > 0 else 0.0
-        industry_sa_ratio_map = (
-            pas_metrics.groupby("industry_code")["is_sa"].mean().to_dict()
-            if len(pas_metrics) > 0
-            else {}
+        pas_score_all = pd.to_numeric(pas_frame["pas_score"], errors="coerce").to_numpy(np.float64)
+        computed_grade = _to_opportunity_grade(pas_score_all)
+        if "opportunity_grade" in pas_frame.columns:
+            stored_grade = _text(pas_frame["opportunity_grade"]).str.upper().to_numpy(dtype=object)
+            grade_all = np.where(np.isin(stored_grade, _VALID_GRADES), stored_grade, computed_grade)
+        else:
+            stored_grade = computed_grade
+            grade_all = computed_grade
+        # S/A 占比按库内等级原值统计，未映射行业的股票归入 UNKNOWN
+        is_sa = pd.Series(np.isin(stored_grade, ("S", "A")))
+        pas_sa_ratio = float(is_sa.mean()) if len(is_sa) > 0 else 0.0
+        industry_sa_ratio_map = is_sa.groupby(
+            np.where(industry_hit, industry["industry_code"].to_numpy(dtype=object), "UNKNOWN")
+        ).mean()
+
+        risk_reward_all = pd.to_numeric(pas_frame["risk_reward_ratio"], errors="coerce").to_numpy(
+            np.float64
+        )
+        rr_filtered = risk_reward_all < 1.0
+        rr_filtered_count = int(rr_filtered.sum())
+        keep = ~rr_filtered
+        candidates = keys[keep].reset_index(drop=True)
+        industry_code = np.where(
+            industry_hit, industry["industry_code"].to_numpy(dtype=object), default_industry_code
+        )[keep]
+        industry_name = np.where(
+            industry_hit, industry["industry_name"].to_numpy(dtype=object), default_industry_name
+        )[keep]
+        risk_reward_ratio = risk_reward_all[keep]
+        pas_score = pas_score_all[keep]
+        opportunity_grade = grade_all[keep]
+        pas_direction_text = pas_frame["pas_direction"].to_numpy(dtype=object)[keep]
+        pas_direction = np.where(
+            np.isin(pas_direction_text, tuple(_DIRECTION_SCORE)),
+            pas_direction_text,
+            PasDirection.NEUTRAL.value,
+        )
+
+        irs_rows = pd.Index(irs_lookup["industry_code"]).get_indexer(industry_code)
+        irs_hit = irs_rows >= 0
+        irs_score = np.where(
+            irs_hit,
+            _take(irs_lookup["irs_score"], irs_rows).astype(np.float64),
+            float(default_irs["irs_score"]),
+        )
+        irs_direction = np.where(
+            irs_hit, _take(irs_lookup["irs_direction"], irs_rows), default_irs["irs_direction"]
+        )
+        irs_avoid = np.where(
+            irs_hit, _take(irs_lookup["irs_avoid"], irs_rows).astype(bool), default_irs["irs_avoid"]
+        )
+        industry_sa_ratio = (
+            pd.Series(industry_code).map(industry_sa_ratio_map).fillna(0.0).to_numpy(np.float64)
         )
 
-        # 主循环：使用 itertuples 替代 iterrows（消除性能瓶颈）
-        _default_ic = str(default_irs_record.get("industry_code", "UNKNOWN"))
-        _default_in = str(default_irs_record.get("industry_name", "未知行业"))
-        _position_cap_warn = effective_gate == "WARN"
-        _temp_extreme = mss_temperature < 30.0 or mss_temperature > 80.0
-
-        # 主循环保留逐股决策语义，但读取侧已向量化（查找字典 + 预计算映射）。
-        for tup in pas_frame.itertuples(index=False):
-            risk_reward_ratio = float(getattr(tup, "risk_reward_ratio", 0.0) or 0.0)
-            if risk_reward_ratio < 1.0:
-                rr_filtered_count += 1
-                continue
-
-            stock_code = _to_stock_code(
-                str(getattr(tup, "stock_code", "") or ""),
-                str(getattr(tup, "ts_code", "") or ""),
+        price_columns = ["open", "high", "low", "close"]
+        if raw_frame.empty:
+            price_by_stock = pd.DataFrame(columns=["stock_code_key", *price_columns])
+            price_by_ts = pd.DataFrame(columns=["ts_code_key", *price_columns])
+        else:
+            raw_keyed = raw_frame.assign(
+                stock_code_key=_text(raw_frame["stock_code"]),
+                ts_code_key=_text(raw_frame["ts_code"]).str.upper(),
             )
-            ts_code = str(getattr(tup, "ts_code", "") or "").strip().upper()
-            industry_tuple = stock_industry_by_stock.get(stock_code) or stock_industry_by_ts.get(ts_code)
-            if industry_tuple:
-                industry_code, industry_name = industry_tuple
-            else:
-                industry_code = _default_ic
-                industry_name = _default_in
-            irs_record = irs_by_industry.get(industry_code, default_irs_record)
-            irs_score = float(irs_record.get("irs_score", 0.0))
-            irs_recommendation = str(irs_record.get("recommendation", "HOLD"))
-            allocation_advice = str(irs_record.get("allocation_advice", "")).strip()
-            irs_direction = _direction_from_recommendation(irs_recommendation)
-            industry_sa_ratio = float(industry_sa_ratio_map.get(industry_code, 0.0))
-
-            raw_item = raw_lookup_by_stock.get(stock_code) or raw_lookup_by_ts.get(ts_code) or {}
-
-            open_price = float(raw_item.get("open", 0.0) or 0.0)
-            high_price = float(raw_item.get("high", 0.0) or 0.0)
-            low_price = float(raw_item.get("low", 0.0) or 0.0)
-            close_price = float(raw_item.get("close", 0.0) or 0.0)
-
-            entry = close_price if close_price > 0.0 else (open_price if open_price > 0.0 else 1.0)
-            stop = low_price if low_price > 0.0 else entry * 0.98
-            if stop >= entry:
-                stop = entry * 0.98
-            target = entry + (entry - stop) * risk_reward_ratio
-
-            pas_score = float(getattr(tup, "pas_score", 0.0) or 0.0)
-            effective_pas_score = pas_score * (0.85 if allocation_advice == "回避" else 1.0)
-            pas_direction = str(getattr(tup, "pas_direction", "neutral") or "neutral")
-            if pas_direction not in {"bullish", "bearish", "neutral"}:
-                pas_direction = "neutral"
-            opportunity_grade = str(getattr(tup, "opportunity_grade", "") or "").strip().upper()
-            if opportunity_grade not in {"S", "A", "B", "C", "D"}:
-                opportunity_grade = _to_opportunity_grade(pas_score)
-
-            top_down_score = round(
-                mss_score * w_mss + irs_score * w_irs + effective_pas_score * w_pas,
-                4,
+            price_by_stock = raw_keyed[raw_keyed["stock_code_key"] != ""].drop_duplicates(
+                subset="stock_code_key", keep="first"
+            )[["stock_code_key", *price_columns]]
+            price_by_ts = raw_keyed[raw_keyed["ts_code_key"] != ""].drop_duplicates(
+                subset="ts_code_key", keep="first"
+            )[["ts_code_key", *price_columns]]
+        prices, price_hit = _join_by_code(
+            candidates, by_stock=price_by_stock, by_ts=price_by_ts, columns=price_columns
+        )
+        open_price, high_price, low_price, close_price = (
+            np.where(price_hit, prices[column].to_numpy(np.float64), 0.0)
+            for column in price_columns
+        )
+
+        entry = np.where(
+            close_price > 0.0, close_price, np.where(open_price > 0.0, open_price, 1.0)
+        )
+        stop = np.where(low_price > 0.0, low_price, entry * 0.98)
+        stop = np.where(stop >= entry, entry * 0.98, stop)
+        target = entry + (entry - stop) * risk_reward_ratio
+
+        effective_pas_score = pas_score * np.where(irs_avoid, 0.85, 1.0)
+        top_down_score = _round4(
+            mss_score * w_mss + irs_score * w_irs + effective_pas_score * w_pas
+        )
+        bottom_up_score = effective_pas_score * 0.70 + irs_score * 0.20 + mss_score * 0.10
+        if pas_sa_ratio >= 0.20:
+            bottom_up_score = bottom_up_score * 1.05
+        bottom_up_score = np.where(
+            industry_sa_ratio >= 0.20, bottom_up_score * 1.05, bottom_up_score
+        )
+        bottom_up_score = np.where(irs_avoid, bottom_up_score * 0.90, bottom_up_score)
+        bottom_up_score = _round4(_clamp(bottom_up_score, 0.0, 100.0))
+
+        td_direction = _direction_from_recommendation(
+            _to_recommendation(top_down_score, mss_cycle)
+        )
+        bu_direction = _direction_from_recommendation(
+            _to_recommendation(bottom_up_score, mss_cycle)
+        )
+        direction_conflict = (
+            (td_direction != bu_direction)
+            & (td_direction != PasDirection.NEUTRAL.value)
+            & (bu_direction != PasDirection.NEUTRAL.value)
+        )
+        if resolved_integration_mode == "top_down":
+            final_score = top_down_score
+            recommendation = _to_recommendation(final_score, mss_cycle)
+            mode_position_cap = cycle_position_cap_top_down
+        elif resolved_integration_mode == "bottom_up":
+            final_score = bottom_up_score
+            recommendation = _to_recommendation(final_score, mss_cycle)
+            mode_position_cap = cycle_position_cap_bottom_up
+        elif resolved_integration_mode == "dual_verify":
+            final_score = _round4((top_down_score + bottom_up_score) / 2.0)
+            recommendation = np.where(
+                direction_conflict,
+                RecommendationGrade.HOLD.value,
+                _to_recommendation(final_score, mss_cycle),
             )
-            bottom_up_score = (
-                effective_pas_score * 0.70 + irs_score * 0.20 + mss_score * 0.10
+            mode_position_cap = min(cycle_position_cap_top_down, cycle_position_cap_bottom_up)
+        else:  # complementary
+            final_score = _round4(top_down_score * 0.40 + bottom_up_score * 0.60)
+            recommendation = np.where(
+                direction_conflict,
+                RecommendationGrade.HOLD.value,
+                _to_recommendation(final_score, mss_cycle),
             )
-            if pas_sa_ratio >= 0.20:
-                bottom_up_score *= 1.05
-            if industry_sa_ratio >= 0.20:
-                bottom_up_score *= 1.05
-            if allocation_advice == "回避":
-                bottom_up_score *= 0.90
-            bottom_up_score = round(max(0.0, min(100.0, bottom_up_score)), 4)
-
-            td_recommendation = _to_recommendation(top_down_score, mss_cycle)
-            bu_recommendation = _to_recommendation(bottom_up_score, mss_cycle)
-            td_direction = _direction_from_recommendation(td_recommendation)
-            bu_direction = _direction_from_recommendation(bu_recommendation)
-
-            if resolved_integration_mode == "top_down":
-                final_score = top_down_score
-                recommendation = td_recommendation
-                mode_position_cap = cycle_position_cap_top_down
-            elif resolved_integration_mode == "bottom_up":
-                final_score = bottom_up_score
-                recommendation = bu_recommendation
-                mode_position_cap = cycle_position_cap_bottom_up
-            elif resolved_integration_mode == "dual_verify":
-                final_score = round((top_down_score + bottom_up_score) / 2.0, 4)
-                recommendation = _to_recommendation(final_score, mss_cycle)
-                if td_direction != bu_direction and td_direction != "neutral" and bu_direction != "neutral":
-                    recommendation = "HOLD"
-                mode_position_cap = min(cycle_position_cap_top_down, cycle_position_cap_bottom_up)
-            else:  # complementary
-                final_score = round(top_down_score * 0.40 + bottom_up_score * 0.60, 4)
-                recommendation = _to_recommendation(final_score, mss_cycle)
-                if td_direction != bu_direction and td_direction != "neutral" and bu_direction != "neutral":
-                    recommendation = "HOLD"
-                mode_position_cap = cycle_position_cap_top_down
-
-            direction = _to_direction(mss_direction, irs_direction, pas_direction)
-            consistency = _to_consistency(mss_direction, irs_direction, pas_direction)
-            neutrality = round(max(0.0, min(1.0, 1.0 - abs(final_score - 50.0) / 50.0)), 4)
-
-            base_position_size = max(0.0, min(1.0, final_score / 100.0))
-            if _temp_extreme:
-                base_position_size *= 0.85
-            position_cap = min(position_cap_ratio, mode_position_cap)
-            if _position_cap_warn:
-                position_cap = min(position_cap, 0.80)
-            position_size = round(min(base_position_size, position_cap), 4)
-
-            integrated_rows.append(
+            mode_position_cap = cycle_position_cap_top_down
+
+        neutrality = _round4(_clamp(1.0 - np.abs(final_score - 50.0) / 50.0, 0.0, 1.0))
+        base_position_size = _clamp(final_score / 100.0, 0.0, 1.0)
+        if mss_temperature < 30.0 or mss_temperature > 80.0:
+            base_position_size = base_position_size * 0.85
+        position_cap = min(position_cap_ratio, mode_position_cap)
+        if effective_gate == "WARN":
+            position_cap = min(position_cap, 0.80)
+        position_size = _round4(
+            np.where(position_cap < base_position_size, position_cap, base_position_size)
+        )
+
+        if len(candidates) > 0:
+            integrated_frame = pd.DataFrame(
                 {
                     "trade_date": trade_date,
-                    "stock_code": stock_code,
+                    "stock_code": candidates["stock_code_key"].to_numpy(dtype=object),
                     "industry_code": industry_code,
                     "industry_name": industry_name,
                     "mss_score": round(mss_score, 4),
-                    "irs_score": round(irs_score, 4),
-                    "pas_score": round(pas_score, 4),
+                    "irs_score": _round4(irs_score),
+                    "pas_score": _round4(pas_score),
                     "final_score": final_score,
-                    "direction": direction,
-                    "consistency": consistency,
+                    "direction": _to_direction(mss_direction, irs_direction, pas_direction),
+                    "consistency": _to_consistency(mss_direction, irs_direction, pas_direction),
                     "integration_mode": resolved_integration_mode,
                     "weight_plan_id": weight_plan_id,
                     "w_mss": round(w_mss, 4),
@@ -976,24 +1096,21 @@ def run_integrated_daily(
                     "position_size": position_size,
                     "mss_cycle": mss_cycle,
                     "opportunity_grade": opportunity_grade,
-                    "entry": round(entry, 4),
-                    "stop": round(stop, 4),
-                    "target": round(target, 4),
-                    "risk_reward_ratio": round(risk_reward_ratio, 4),
+                    "entry": _round4(entry),
+                    "stop": _round4(stop),
+                    "target": _round4(target),
+                    "risk_reward_ratio": _round4(risk_reward_ratio),
                     "neutrality": neutrality,
                     "t1_restriction_hit": False,
-                    "limit_guard_result": _to_limit_guard_result(close_price, high_price, low_price),
+                    "limit_guard_result": _to_limit_guard_result(
+                        close_price, high_price, low_price
+                    ),
                     "session_guard_result": "PASS",
                     "contract_version": SUPPORTED_CONTRACT_VERSION,
                     "created_at": created_at,
                 }
             )
 
-    integrated_frame = (
-        pd.DataFrame.from_records(integrated_rows)
-        if integrated_rows
-        else pd.DataFrame(columns=INTEGRATED_COLUMNS)
-    )
     integrated_frame = _apply_recommendation_limits(integrated_frame)
     integrated_frame = integrated_frame.reindex(columns=INTEGRATED_COLUMNS)
     integrated_count = int(len(integrated_frame))
@@ -16,6 +16,7 @@
   scheduler     : 每日调度（S7A）
   fetch-batch   : 批量数据抓取
   fetch-retry   : 重试失败抓取
+  writer        : 单写入服务（独占 DuckDB 写连接，组提交各进程写入）
 """
 
 from __future__ import annotations
@@ -24,6 +25,7 @@ import argparse
 from contextlib import contextmanager
 import json
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Sequence
@@ -36,10 +38,11 @@ from src import __version__
 from src.algorithms.irs.pipeline import run_irs_daily
 from src.algorithms.mss.pipeline import run_mss_scoring
 from src.algorithms.mss.probe import run_mss_probe
-from src.algorithms.pas.pipeline import run_pas_daily
+from src.algorithms.pas.pipeline import rebuild_pas_rolling_state, run_pas_daily
 from src.algorithms.validation.pipeline import run_validation_gate
 from src.config.config import Config
 from src.db.helpers import table_exists as _table_exists
+from src.db.parquet_lake import PARQUET_LAKE_LAYERS, compact_parquet_lake
 from src.data.fetch_batch_pipeline import (
     FetchBatchProgressEvent,
     read_fetch_status,
@@ -47,8 +50,10 @@ from src.data.fetch_batch_pipeline import (
     run_fetch_retry,
 )
 from src.data.l1_pipeline import run_l1_collection
-from src.data.l2_pipeline import run_l2_snapshot
-from src.data.repositories.base import acquire_duckdb_interprocess_lock
+from src.data.l2_pipeline import run_l2_snapshot, update_stock_rolling_state
+from src.data.market_daily_agg import rebuild_market_daily_agg
+from src.db.process_lock import acquire_duckdb_interprocess_lock
+from src.db.writer_service import IngestionWriterService
 from src.gui.app import run_gui
 from src.pipeline.consistency import (
     run_full_consistency_check,
@@ -61,6 +66,7 @@ from src.pipeline.scheduler import (
     run_once as scheduler_run_once,
 )
 from src.stress.pipeline import run_stress
+from src.trading.ledger import rebuild_portfolio_ledger, verify_portfolio_ledger
 from src.trading.pipeline import run_paper_trade
 
 # DESIGN_TRACE:
@@ -411,6 +417,91 @@ def build_parser() -> argparse.ArgumentParser:
     subparsers.add_parser("fetch-status", help="Show latest S3a fetch status.")
     subparsers.add_parser("fetch-retry", help="Retry failed S3a fetch batches.")
 
+    writer_parser = subparsers.add_parser(
+        "writer",
+        help="Run single-writer ingestion service for emotionquant.duckdb.",
+    )
+    writer_parser.add_argument(
+        "--group-commit-ms",
+        type=int,
+        default=None,
+        help="Group-commit window in ms (default: DUCKDB_WRITER_GROUP_COMMIT_MS).",
+    )
+    writer_parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=None,
+        help="Max requests per group commit (default: DUCKDB_WRITER_MAX_BATCH).",
+    )
+    writer_parser.add_argument(
+        "--idle-close-ms",
+        type=int,
+        default=None,
+        help="Close write connection after idle ms (default: DUCKDB_WRITER_IDLE_CLOSE_MS).",
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact-parquet",
+        help="Compact daily Parquet partitions into monthly files.",
+    )
+    compact_parser.add_argument(
+        "--layer",
+        action="append",
+        choices=list(PARQUET_LAKE_LAYERS),
+        default=None,
+        help="Parquet layer to compact (repeatable, default: all layers).",
+    )
+    compact_parser.add_argument(
+        "--table",
+        action="append",
+        default=None,
+        help="Table directory to compact (repeatable, default: all tables in layer).",
+    )
+
+    rolling_parser = subparsers.add_parser(
+        "rebuild-rolling-state",
+        help="Rebuild per-stock rolling state (100d high/low, limit-up streaks) from raw_daily.",
+    )
+    rolling_parser.add_argument(
+        "--end-date",
+        required=True,
+        help="Replay raw_daily through this trade date in YYYYMMDD.",
+    )
+
+    market_agg_parser = subparsers.add_parser(
+        "rebuild-market-agg",
+        help="Rebuild the market_daily_agg table (per-day market totals) from raw_daily.",
+    )
+    market_agg_parser.add_argument(
+        "--start-date",
+        default="",
+        help="First trade date to rebuild in YYYYMMDD (default: earliest in raw_daily).",
+    )
+    market_agg_parser.add_argument(
+        "--end-date",
+        default="",
+        help="Last trade date to rebuild in YYYYMMDD (default: latest in raw_daily).",
+    )
+
+    pas_state_parser = subparsers.add_parser(
+        "rebuild-pas-state",
+        help="Rebuild the PAS per-stock rolling state by replaying raw_daily from the first date.",
+    )
+    pas_state_parser.add_argument(
+        "--end-date",
+        required=True,
+        help="Replay raw_daily through this trade date in YYYYMMDD.",
+    )
+
+    subparsers.add_parser(
+        "verify-ledger",
+        help="Replay trade_records/positions and check every portfolio_ledger row.",
+    )
+    subparsers.add_parser(
+        "rebuild-ledger",
+        help="Rewrite portfolio_ledger by replaying trade_records/positions.",
+    )
+
     subparsers.add_parser("version", help="Print CLI version.")
 
     return parser
@@ -1120,6 +1211,182 @@ def _run_fetch_retry(ctx: PipelineContext) -> int:
     return 1 if result.has_error else 0
 
 
+def _run_writer(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    config = ctx.config
+    service = IngestionWriterService(
+        Path(config.duckdb_dir) / "emotionquant.duckdb",
+        group_commit_ms=(
+            config.duckdb_writer_group_commit_ms
+            if args.group_commit_ms is None
+            else args.group_commit_ms
+        ),
+        max_batch=config.duckdb_writer_max_batch if args.max_batch is None else args.max_batch,
+        idle_close_ms=(
+            config.duckdb_writer_idle_close_ms if args.idle_close_ms is None else args.idle_close_ms
+        ),
+    )
+    try:
+        service.start()
+    except RuntimeError as exc:
+        print(str(exc))
+        return 2
+    print(
+        json.dumps(
+            {
+                "event": "duckdb_writer_started",
+                "database_path": str(service.database_path),
+                "socket_path": str(service.socket_path),
+                "group_commit_ms": int(service.group_commit_seconds * 1000),
+                "max_batch": service.max_batch,
+                "idle_close_ms": int(service.idle_close_seconds * 1000),
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        ),
+        flush=True,
+    )
+    try:
+        while True:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+    print(
+        json.dumps(
+            {"event": "duckdb_writer_stopped", **service.stats()},
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
+def _run_compact_parquet(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    parquet_root = Path(ctx.config.parquet_path)
+    tables: list[dict[str, object]] = []
+    for layer in args.layer or list(PARQUET_LAKE_LAYERS):
+        for result in compact_parquet_lake(parquet_root / layer, tables=args.table):
+            tables.append(
+                {
+                    "layer": layer,
+                    "table": result.table_dir.name,
+                    "months_compacted": result.months_compacted,
+                    "files_merged": result.files_merged,
+                    "rows_written": result.rows_written,
+                    "files_after": result.files_after,
+                }
+            )
+    print(
+        json.dumps(
+            {
+                "event": "parquet_compaction",
+                "parquet_path": str(parquet_root),
+                "tables": tables,
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
+def _run_rebuild_rolling_state(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    result = update_stock_rolling_state(
+        config=ctx.config,
+        start_date=args.end_date,
+        end_date=args.end_date,
+        rebuild=True,
+    )
+    print(
+        json.dumps(
+            {
+                "event": "rolling_state_rebuilt",
+                "as_of_trade_date": result.as_of_trade_date,
+                "replayed_trade_dates": result.replayed_trade_dates,
+                "daily_rows": result.daily_rows,
+                "stock_count": result.stock_count,
+                "state_persisted": result.state_persisted,
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
+def _run_rebuild_pas_state(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    result = rebuild_pas_rolling_state(config=ctx.config, end_date=args.end_date)
+    print(
+        json.dumps(
+            {
+                "event": "pas_rolling_state_rebuilt",
+                "as_of_trade_date": result.as_of_trade_date,
+                "replayed_trade_dates": result.replayed_trade_dates,
+                "stock_count": result.stock_count,
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
+def _run_verify_ledger(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    result = verify_portfolio_ledger(config=ctx.config)
+    print(
+        json.dumps(
+            {
+                "event": "portfolio_ledger_verified",
+                "checked_trade_dates": result.checked_trade_dates,
+                "mismatch_count": len(result.mismatches),
+                "report_path": str(result.report_path),
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0 if result.ok else 1
+
+
+def _run_rebuild_ledger(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    result = rebuild_portfolio_ledger(config=ctx.config)
+    print(
+        json.dumps(
+            {
+                "event": "portfolio_ledger_rebuilt",
+                "trade_dates": result.trade_dates,
+                "first_trade_date": result.first_trade_date,
+                "last_trade_date": result.last_trade_date,
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
+def _run_rebuild_market_agg(ctx: PipelineContext, args: argparse.Namespace) -> int:
+    result = rebuild_market_daily_agg(
+        config=ctx.config,
+        start_date=str(args.start_date or ""),
+        end_date=str(args.end_date or ""),
+    )
+    print(
+        json.dumps(
+            {
+                "event": "market_daily_agg_rebuilt",
+                "trade_date_count": result.trade_date_count,
+                "start_date": result.start_date,
+                "end_date": result.end_date,
+            },
+            ensure_ascii=True,
+            sort_keys=True,
+        )
+    )
+    return 0
+
+
 def _run_backtest(ctx: PipelineContext, args: argparse.Namespace) -> int:
     try:
         result = run_backtest(
@@ -1201,6 +1468,9 @@ def _run_trade(ctx: PipelineContext, args: argparse.Namespace) -> int:
         "gate_report_path": str(result.gate_report_path),
         "error_manifest_path": str(result.error_manifest_path),
     }
+    opening_state_source = getattr(result, "opening_state_source", None)
+    if opening_state_source is not None:
+        payload["opening_state_source"] = str(opening_state_source)
     if result.s4r_patch_note_path is not None:
         payload["s4r_patch_note_path"] = str(result.s4r_patch_note_path)
     if result.s4r_delta_report_path is not None:
@@ -1600,6 +1870,20 @@ def main(argv: Sequence[str] | None = None) -> int:
         return _run_fetch_status(ctx)
     if command == "fetch-retry":
         return _run_fetch_retry(ctx)
+    if command == "writer":
+        return _run_writer(ctx, args)
+    if command == "compact-parquet":
+        return _run_compact_parquet(ctx, args)
+    if command == "rebuild-rolling-state":
+        return _run_rebuild_rolling_state(ctx, args)
+    if command == "rebuild-market-agg":
+        return _run_rebuild_market_agg(ctx, args)
+    if command == "rebuild-pas-state":
+        return _run_rebuild_pas_state(ctx, args)
+    if command == "verify-ledger":
+        return _run_verify_ledger(ctx, args)
+    if command == "rebuild-ledger":
+        return _run_rebuild_ledger(ctx, args)
     if command == "backtest":
         return _run_backtest(ctx, args)
     if command == "trade":
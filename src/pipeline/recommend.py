@@ -24,6 +24,7 @@ from src.algorithms.pas.pipeline import run_pas_daily
 from src.algorithms.validation.pipeline import run_validation_gate
 from src.config.config import Config
 from src.db.helpers import column_exists as _column_exists, table_exists as _table_exists
+from src.db.parquet_lake import has_lake_data, read_lake_table, write_trade_date_partitions
 from src.integration.pipeline import run_integrated_daily
 
 # DESIGN_TRACE:
@@ -115,6 +116,27 @@ def _load_trade_date_table(
     return (frame, True)
 
 
+def _load_l3_parquet_trade_date(
+    *,
+    parquet_root: Path,
+    table_name: str,
+    trade_date: str,
+) -> tuple[pd.DataFrame, bool]:
+    # 优先读 Parquet 湖分区（按清单裁剪到当日），兼容旧版单文件 {table_name}.parquet
+    table_dir = parquet_root / table_name
+    if has_lake_data(table_dir):
+        frame = read_lake_table(table_dir, start_date=trade_date, end_date=trade_date).to_pandas()
+        return (frame.reset_index(drop=True), True)
+    legacy_path = parquet_root / f"{table_name}.parquet"
+    if not legacy_path.exists():
+        return (pd.DataFrame.from_records([]), False)
+    frame = pd.read_parquet(legacy_path)
+    if "trade_date" not in frame.columns:
+        return (pd.DataFrame.from_records([]), True)
+    frame = frame[frame["trade_date"].astype(str) == trade_date].reset_index(drop=True)
+    return (frame, True)
+
+
 def _materialize_s2c_bridge_samples(
     *,
     database_path: Path,
@@ -132,22 +154,20 @@ def _materialize_s2c_bridge_samples(
         table_name="validation_gate_decision",
         trade_date=trade_date,
     )
+    mss_parquet_exists = False
     if mss_frame.empty:
-        mss_parquet_path = parquet_root / "mss_factor_intermediate.parquet"
-        if mss_parquet_path.exists():
-            mss_parquet_frame = pd.read_parquet(mss_parquet_path)
-            if "trade_date" in mss_parquet_frame.columns:
-                mss_frame = mss_parquet_frame[
-                    mss_parquet_frame["trade_date"].astype(str) == trade_date
-                ].reset_index(drop=True)
+        mss_frame, mss_parquet_exists = _load_l3_parquet_trade_date(
+            parquet_root=parquet_root,
+            table_name="mss_factor_intermediate",
+            trade_date=trade_date,
+        )
+    validation_parquet_exists = False
     if validation_frame.empty:
-        validation_parquet_path = parquet_root / "validation_gate_decision.parquet"
-        if validation_parquet_path.exists():
-            validation_parquet_frame = pd.read_parquet(validation_parquet_path)
-            if "trade_date" in validation_parquet_frame.columns:
-                validation_frame = validation_parquet_frame[
-                    validation_parquet_frame["trade_date"].astype(str) == trade_date
-                ].reset_index(drop=True)
+        validation_frame, validation_parquet_exists = _load_l3_parquet_trade_date(
+            parquet_root=parquet_root,
+            table_name="validation_gate_decision",
+            trade_date=trade_date,
+        )
 
     mss_sample_path = artifacts_dir / "mss_factor_intermediate_sample.parquet"
     validation_sample_path = artifacts_dir / "validation_gate_decision_sample.parquet"
@@ -155,13 +175,11 @@ def _materialize_s2c_bridge_samples(
     validation_frame.to_parquet(validation_sample_path, index=False)
 
     violations: list[str] = []
-    mss_parquet_exists = (parquet_root / "mss_factor_intermediate.parquet").exists()
     if not has_mss_table and not mss_parquet_exists and mss_frame.empty:
         violations.append("mss_factor_intermediate_source_missing")
     elif mss_frame.empty:
         violations.append("mss_factor_intermediate_empty_for_trade_date")
 
-    validation_parquet_exists = (parquet_root / "validation_gate_decision.parquet").exists()
     if not has_validation_table and not validation_parquet_exists and validation_frame.empty:
         violations.append("validation_gate_decision_source_missing")
     elif validation_frame.empty:
@@ -343,13 +361,13 @@ def _run_s2a(
         pas_result.frame.to_parquet(pas_sample_path, index=False)
         validation_result.frame.to_parquet(validation_sample_path, index=False)
 
-        parquet_root.mkdir(parents=True, exist_ok=True)
-        irs_result.frame.to_parquet(parquet_root / "irs_industry_daily.parquet", index=False)
-        pas_result.frame.to_parquet(parquet_root / "stock_pas_daily.parquet", index=False)
-        validation_result.frame.to_parquet(
-            parquet_root / "validation_gate_decision.parquet",
-            index=False,
-        )
+        # L3 按交易日追加到 Parquet 湖，同日重算整体替换
+        for table_name, frame in (
+            ("irs_industry_daily", irs_result.frame),
+            ("stock_pas_daily", pas_result.frame),
+            ("validation_gate_decision", validation_result.frame),
+        ):
+            write_trade_date_partitions(parquet_root / table_name, frame, trade_date=trade_date)
 
         if irs_count <= 0:
             add_error("P0", "gate", "irs_industry_daily_empty")
@@ -522,15 +540,11 @@ def _run_s2b(
             reason=integration_result.quality_message,
         )
 
-        parquet_root.mkdir(parents=True, exist_ok=True)
-        integration_result.frame.to_parquet(
-            parquet_root / "integrated_recommendation.parquet",
-            index=False,
-        )
-        integration_result.quality_frame.to_parquet(
-            parquet_root / "quality_gate_report.parquet",
-            index=False,
-        )
+        for table_name, frame in (
+            ("integrated_recommendation", integration_result.frame),
+            ("quality_gate_report", integration_result.quality_frame),
+        ):
+            write_trade_date_partitions(parquet_root / table_name, frame, trade_date=trade_date)
         if with_validation_bridge:
             validation_count, sample_violations = _materialize_s2c_bridge_samples(
                 database_path=database_path,
@@ -19,6 +19,7 @@ from typing import Any, Sequence
 import duckdb
 
 from src.config.config import Config
+from src.db.helpers import open_write_connection
 from src.db.helpers import table_exists as _table_exists
 
 # DESIGN_TRACE:
@@ -147,7 +148,7 @@ def log_task_start(
         start_time=datetime.now(),
     )
     db_path = _ensure_db_dir(config)
-    with duckdb.connect(str(db_path)) as conn:
+    with open_write_connection(db_path) as conn:
         _ensure_tables(conn)
         conn.execute(
             "INSERT INTO task_execution_log "
@@ -171,7 +172,7 @@ def log_task_end(
     entry.status = status
     entry.error_message = error_message
     db_path = _ensure_db_dir(config)
-    with duckdb.connect(str(db_path)) as conn:
+    with open_write_connection(db_path) as conn:
         _ensure_tables(conn)
         conn.execute(
             "UPDATE task_execution_log "
@@ -251,7 +252,7 @@ def install_scheduler(config: Config) -> SchedulerStatus:
     """注册每日任务到 scheduler_config 表。"""
     db_path = _ensure_db_dir(config)
     now = datetime.now()
-    with duckdb.connect(str(db_path)) as conn:
+    with open_write_connection(db_path) as conn:
         _ensure_tables(conn)
         for key, value in [
             ("installed", "true"),
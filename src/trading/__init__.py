@@ -1,7 +1,20 @@
 # Trading module
 """Trading engine module."""
 
+from src.trading.ledger import (
+    LedgerRebuildResult,
+    LedgerVerifyResult,
+    rebuild_portfolio_ledger,
+    verify_portfolio_ledger,
+)
 from src.trading.pipeline import TradeRunResult, run_paper_trade
 
-__all__ = ["TradeRunResult", "run_paper_trade"]
+__all__ = [
+    "LedgerRebuildResult",
+    "LedgerVerifyResult",
+    "TradeRunResult",
+    "rebuild_portfolio_ledger",
+    "run_paper_trade",
+    "verify_portfolio_ledger",
+]
 """Trading execution and risk management."""
@@ -0,0 +1,339 @@
+"""纸面交易组合账本：每个交易日收盘后的现金 / 持仓快照（portfolio_ledger 表）。
+
+run_paper_trade 此前每次启动都回读全部历史成交记录重算可用现金，再单独查询持仓表，
+耗时随运行天数增长。账本每个交易日一行（现金、持仓市值、持仓明细 JSON），启动只读
+早于当日的最近一行：
+
+- 写入：与成交记录 / 持仓 / 风险事件在同一事务内按 trade_date 整体替换当日一行；
+  输入未就绪、未载入期初状态的运行删除当日旧行；重跑较早交易日时一并删除其后各行
+  （其期初状态建立在旧成交之上），后续运行由落后判定回退为回放
+- 读取：成交记录或持仓表存在晚于账本最近一行的交易日（账本缺行 / 写入前中断）时
+  视为账本落后，回退为全量回放
+- 核对 / 重建：现金按已成交记录逐日累计，持仓取持仓表当日行，与账本逐行比对或整体重写
+"""
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+
+from src.config.config import Config
+from src.db.helpers import WriteSession, open_write_session, table_exists
+from src.db.writer_client import RemoteWriteSession
+
+PORTFOLIO_LEDGER_TABLE = "portfolio_ledger"
+# 账本现金逐日四舍五入到 4 位小数，与一次性回放累计的差异在该容差内视为一致
+LEDGER_CASH_TOLERANCE = 0.01
+_LEDGER_DTYPES: dict[str, str] = {
+    "trade_date": "str",
+    "opening_cash": "float64",
+    "cash": "float64",
+    "position_count": "int64",
+    "market_value": "float64",
+    "total_equity": "float64",
+    "filled_orders": "int64",
+    "positions": "str",
+    "source": "str",
+    "created_at": "str",
+}
+LEDGER_COLUMNS = list(_LEDGER_DTYPES)
+_POSITION_KEY_COLUMNS = ("stock_code", "shares", "cost_price")
+
+
+@dataclass(frozen=True)
+class LedgerSnapshot:
+    trade_date: str
+    cash: float
+    positions: list[dict[str, object]]
+
+
+@dataclass(frozen=True)
+class LedgerVerifyResult:
+    checked_trade_dates: int
+    mismatches: list[dict[str, object]]
+    report_path: Path
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+
+@dataclass(frozen=True)
+class LedgerRebuildResult:
+    trade_dates: int
+    first_trade_date: str
+    last_trade_date: str
+
+
+def net_cash_flow(trades: pd.DataFrame) -> float:
+    """已成交记录的现金净流量：买入扣成交额与费用，卖出回款扣费用。"""
+    if trades.empty:
+        return 0.0
+    frame = trades
+    if "status" in frame.columns:
+        frame = frame[frame["status"].astype(str) == "filled"]
+    direction = frame["direction"].astype(str).str.strip().str.lower()
+    amount = pd.to_numeric(frame["amount"], errors="coerce").fillna(0.0)
+    total_fee = pd.to_numeric(frame["total_fee"], errors="coerce").fillna(0.0)
+    buy = direction == "buy"
+    sell = direction == "sell"
+    return float((amount[sell] - total_fee[sell]).sum()) - float(
+        (amount[buy] + total_fee[buy]).sum()
+    )
+
+
+def _positions_json(positions: pd.DataFrame) -> str:
+    if positions.empty:
+        return "[]"
+    return positions.to_json(orient="records", force_ascii=True)
+
+
+def build_ledger_frame(
+    *,
+    trade_date: str,
+    opening_cash: float,
+    cash: float,
+    positions: pd.DataFrame,
+    filled_orders: int,
+    source: str,
+    created_at: str,
+) -> pd.DataFrame:
+    """单个交易日的账本行（positions 为当日收盘持仓表行）。"""
+    market_value = (
+        float(pd.to_numeric(positions["market_value"], errors="coerce").fillna(0.0).sum())
+        if not positions.empty
+        else 0.0
+    )
+    row = {
+        "trade_date": trade_date,
+        "opening_cash": round(float(opening_cash), 4),
+        "cash": round(float(cash), 4),
+        "position_count": int(len(positions)),
+        "market_value": round(market_value, 4),
+        "total_equity": round(float(cash) + market_value, 4),
+        "filled_orders": int(filled_orders),
+        "positions": _positions_json(positions),
+        "source": source,
+        "created_at": created_at,
+    }
+    return pd.DataFrame([row]).astype(_LEDGER_DTYPES)
+
+
+def empty_ledger_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {column: pd.Series(dtype=dtype) for column, dtype in _LEDGER_DTYPES.items()}
+    )
+
+
+def write_ledger(
+    session: WriteSession | RemoteWriteSession,
+    *,
+    trade_date: str,
+    frame: pd.DataFrame,
+    later_trade_dates: Sequence[str] = (),
+) -> None:
+    """整体替换当日账本行并删除 later_trade_dates 各行（并入 session 当前事务）。
+
+    frame 为空时只删除当日旧行。
+    """
+    session.write_frame(PORTFOLIO_LEDGER_TABLE, frame, trade_date=trade_date)
+    for later_trade_date in later_trade_dates:
+        session.write_frame(
+            PORTFOLIO_LEDGER_TABLE, empty_ledger_frame(), trade_date=later_trade_date
+        )
+
+
+def ledger_trade_dates_after(
+    connection: duckdb.DuckDBPyConnection, *, trade_date: str
+) -> list[str]:
+    """晚于 trade_date 的账本交易日（重跑 trade_date 后这些行随之失效）。"""
+    if not table_exists(connection, PORTFOLIO_LEDGER_TABLE):
+        return []
+    rows = connection.execute(
+        f"SELECT DISTINCT trade_date FROM {PORTFOLIO_LEDGER_TABLE} WHERE trade_date > ? "
+        "ORDER BY trade_date",
+        [trade_date],
+    ).fetchall()
+    return [str(row[0]) for row in rows]
+
+
+def _max_trade_date_before(
+    connection: duckdb.DuckDBPyConnection, table_name: str, trade_date: str
+) -> str:
+    if not table_exists(connection, table_name):
+        return ""
+    row = connection.execute(
+        f"SELECT MAX(trade_date) FROM {table_name} WHERE trade_date < ?", [trade_date]
+    ).fetchone()
+    return str(row[0]) if row and row[0] is not None else ""
+
+
+def read_ledger_snapshot(
+    connection: duckdb.DuckDBPyConnection, *, trade_date: str
+) -> LedgerSnapshot | None:
+    """早于 trade_date 的最近一行账本；无账本或账本落后于成交 / 持仓表时返回 None。"""
+    if not table_exists(connection, PORTFOLIO_LEDGER_TABLE):
+        return None
+    row = connection.execute(
+        f"SELECT trade_date, cash, positions FROM {PORTFOLIO_LEDGER_TABLE} "
+        "WHERE trade_date < ? ORDER BY trade_date DESC LIMIT 1",
+        [trade_date],
+    ).fetchone()
+    if not row:
+        return None
+    ledger_date = str(row[0])
+    for table_name in ("trade_records", "positions"):
+        if _max_trade_date_before(connection, table_name, trade_date) > ledger_date:
+            return None
+    positions = json.loads(str(row[2] or "[]"))
+    return LedgerSnapshot(trade_date=ledger_date, cash=float(row[1]), positions=positions)
+
+
+def _trade_dates(connection: duckdb.DuckDBPyConnection, table_name: str) -> set[str]:
+    if not table_exists(connection, table_name):
+        return set()
+    rows = connection.execute(f"SELECT DISTINCT trade_date FROM {table_name}").fetchall()
+    return {str(item[0]) for item in rows if item[0] is not None}
+
+
+def replay_ledger(connection: duckdb.DuckDBPyConnection, *, initial_cash: float) -> pd.DataFrame:
+    """由成交记录与持仓表回放各交易日的账本行（覆盖三张表出现过的全部交易日）。"""
+    trade_dates = sorted(
+        _trade_dates(connection, "trade_records")
+        | _trade_dates(connection, "positions")
+        | _trade_dates(connection, PORTFOLIO_LEDGER_TABLE)
+    )
+    if not trade_dates:
+        return empty_ledger_frame()
+    trades = (
+        connection.execute(
+            "SELECT trade_date, direction, amount, total_fee, status FROM trade_records"
+        ).df()
+        if table_exists(connection, "trade_records")
+        else pd.DataFrame(columns=["trade_date", "direction", "amount", "total_fee", "status"])
+    )
+    positions = (
+        connection.execute("SELECT * FROM positions ORDER BY trade_date, stock_code").df()
+        if table_exists(connection, "positions")
+        else pd.DataFrame(columns=["trade_date", "market_value"])
+    )
+    trades["trade_date"] = trades["trade_date"].astype(str)
+    positions["trade_date"] = positions["trade_date"].astype(str)
+    trades_by_date = dict(tuple(trades.groupby("trade_date", sort=False)))
+    positions_by_date = dict(tuple(positions.groupby("trade_date", sort=False)))
+    empty_positions = positions.iloc[0:0]
+
+    frames: list[pd.DataFrame] = []
+    cumulative_flow = 0.0
+    for trade_date in trade_dates:
+        day_trades = trades_by_date.get(trade_date, trades.iloc[0:0])
+        opening_cash = round(float(initial_cash) + cumulative_flow, 4)
+        cumulative_flow += net_cash_flow(day_trades)
+        filled_orders = int((day_trades["status"].astype(str) == "filled").sum())
+        frames.append(
+            build_ledger_frame(
+                trade_date=trade_date,
+                opening_cash=opening_cash,
+                cash=float(initial_cash) + cumulative_flow,
+                positions=positions_by_date.get(trade_date, empty_positions),
+                filled_orders=filled_orders,
+                source="rebuild",
+                created_at=pd.Timestamp.now(tz="UTC").isoformat(),
+            )
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def _position_keys(payload: str) -> list[tuple[Any, ...]]:
+    rows = json.loads(str(payload or "[]"))
+    return sorted(
+        (
+            str(row.get("stock_code", "")),
+            int(row.get("shares", 0) or 0),
+            round(float(row.get("cost_price", 0.0) or 0.0), 4),
+        )
+        for row in rows
+    )
+
+
+def verify_portfolio_ledger(
+    *, config: Config, artifacts_dir: Path | None = None
+) -> LedgerVerifyResult:
+    """回放成交记录 / 持仓表，与账本逐交易日比对现金与持仓（股票、股数、成本）。"""
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    report_dir = artifacts_dir or Path("artifacts") / "spiral-s4"
+    report_path = report_dir / "portfolio_ledger_verify.json"
+    mismatches: list[dict[str, object]] = []
+    checked = 0
+    if database_path.exists():
+        with duckdb.connect(str(database_path), read_only=True) as connection:
+            expected = replay_ledger(connection, initial_cash=float(config.backtest_initial_cash))
+            actual = (
+                connection.execute(
+                    f"SELECT trade_date, cash, positions FROM {PORTFOLIO_LEDGER_TABLE}"
+                ).df()
+                if table_exists(connection, PORTFOLIO_LEDGER_TABLE)
+                else pd.DataFrame(columns=["trade_date", "cash", "positions"])
+            )
+        actual_by_date = {
+            str(row.trade_date): row for row in actual.itertuples(index=False)
+        }
+        for row in expected.itertuples(index=False):
+            checked += 1
+            ledger_row = actual_by_date.get(str(row.trade_date))
+            if ledger_row is None:
+                mismatches.append({"trade_date": row.trade_date, "issue": "ledger_row_missing"})
+                continue
+            if abs(float(ledger_row.cash) - float(row.cash)) > LEDGER_CASH_TOLERANCE:
+                mismatches.append(
+                    {
+                        "trade_date": row.trade_date,
+                        "issue": "cash_mismatch",
+                        "ledger": float(ledger_row.cash),
+                        "replay": float(row.cash),
+                    }
+                )
+            if _position_keys(ledger_row.positions) != _position_keys(row.positions):
+                mismatches.append({"trade_date": row.trade_date, "issue": "positions_mismatch"})
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(
+        json.dumps(
+            {
+                "checked_trade_dates": checked,
+                "mismatch_count": len(mismatches),
+                "mismatches": mismatches,
+                "cash_tolerance": LEDGER_CASH_TOLERANCE,
+            },
+            ensure_ascii=True,
+            indent=2,
+            sort_keys=True,
+        ),
+        encoding="utf-8",
+    )
+    return LedgerVerifyResult(
+        checked_trade_dates=checked, mismatches=mismatches, report_path=report_path
+    )
+
+
+def rebuild_portfolio_ledger(*, config: Config) -> LedgerRebuildResult:
+    """由成交记录 / 持仓表回放并整体重写账本（单事务）。"""
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    if not database_path.exists():
+        return LedgerRebuildResult(trade_dates=0, first_trade_date="", last_trade_date="")
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        frame = replay_ledger(connection, initial_cash=float(config.backtest_initial_cash))
+    if frame.empty:
+        return LedgerRebuildResult(trade_dates=0, first_trade_date="", last_trade_date="")
+    with open_write_session(database_path) as session:
+        # 不带 trade_date 时按 frame 中出现的全部交易日整体替换
+        session.write_frame(PORTFOLIO_LEDGER_TABLE, frame)
+    dates = frame["trade_date"].tolist()
+    return LedgerRebuildResult(
+        trade_dates=len(dates), first_trade_date=str(dates[0]), last_trade_date=str(dates[-1])
+    )
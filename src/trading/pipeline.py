@@ -22,8 +22,26 @@ from typing import Any
 import duckdb
 import pandas as pd
 
+from src.algorithms.board_limits import resolve_limit_ratio as _resolve_limit_ratio
+from src.backtest.price_store import PriceStore, read_prev_close_lookup
 from src.config.config import Config
-from src.db.helpers import column_exists as _table_has_column, table_exists as _table_exists
+from src.db.helpers import (
+    WriteSession,
+    column_exists as _table_has_column,
+    open_write_connection,
+    open_write_session,
+    table_exists as _table_exists,
+)
+from src.db.writer_client import RemoteWriteSession, submit_to_writer
+from src.trading.ledger import (
+    LedgerSnapshot,
+    build_ledger_frame,
+    empty_ledger_frame,
+    ledger_trade_dates_after,
+    net_cash_flow,
+    read_ledger_snapshot,
+    write_ledger,
+)
 
 # DESIGN_TRACE:
 # - Governance/SpiralRoadmap/planA/SPIRAL-S3A-S4B-EXECUTABLE-ROADMAP.md (§5 S4)
@@ -38,10 +56,8 @@ DESIGN_TRACE = {
 SUPPORTED_MODE = {"paper"}
 SUPPORTED_REPAIR = {"", "s4r"}
 SUPPORTED_CONTRACT_VERSION = "nc-v1"
-LIMIT_RATIO_MAIN_BOARD = 0.10
-LIMIT_RATIO_GEM_STAR = 0.20
-LIMIT_RATIO_ST = 0.05
 LIMIT_PRICE_TOLERANCE_RATIO = 0.001
+_PRICE_FIELDS = ("open", "high", "low", "close")
 
 TRADE_RECORD_COLUMNS = [
     "trade_id",
@@ -114,6 +130,7 @@ class TradeRunResult:
     has_error: bool
     s4r_patch_note_path: Path | None
     s4r_delta_report_path: Path | None
+    opening_state_source: str = "replay"
 
 
 def _utc_now_text() -> str:
@@ -156,31 +173,61 @@ def _persist(
     table_name: str,
     frame: pd.DataFrame,
     delete_trade_date: str,
+    session: WriteSession | RemoteWriteSession | None = None,
 ) -> None:
-    with duckdb.connect(str(database_path)) as connection:
-        exists_row = connection.execute(
-            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
-            [table_name],
-        ).fetchone()
-        table_exists = bool(exists_row and int(exists_row[0]) > 0)
-        if frame.empty:
-            if table_exists and frame.columns.tolist() and "trade_date" in frame.columns:
-                connection.execute(f"DELETE FROM {table_name} WHERE trade_date = ?", [delete_trade_date])
-            return
-        connection.register("incoming_df", frame)
-        if not table_exists:
-            connection.execute(
-                f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM incoming_df WHERE 1=0"
-            )
+    """按 trade_date 整体替换当日行；传入 session 时并入其事务（与其它表一起提交）。"""
+    if session is not None:
+        if isinstance(session, WriteSession):
+            with session.batch():
+                _replace_trade_date_rows(
+                    session.connection,
+                    table_name=table_name,
+                    frame=frame,
+                    delete_trade_date=delete_trade_date,
+                )
         else:
-            _ensure_table_columns(connection=connection, table_name=table_name, frame=frame)
-        if frame.columns.tolist() and "trade_date" in frame.columns:
+            session.write_frame(table_name, frame, trade_date=delete_trade_date)
+        return
+    if submit_to_writer(
+        database_path, table_name=table_name, frame=frame, partition_value=delete_trade_date
+    ):
+        return
+    with open_write_connection(database_path) as connection:
+        _replace_trade_date_rows(
+            connection, table_name=table_name, frame=frame, delete_trade_date=delete_trade_date
+        )
+
+
+def _replace_trade_date_rows(
+    connection: duckdb.DuckDBPyConnection,
+    *,
+    table_name: str,
+    frame: pd.DataFrame,
+    delete_trade_date: str,
+) -> None:
+    exists_row = connection.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
+        [table_name],
+    ).fetchone()
+    table_exists = bool(exists_row and int(exists_row[0]) > 0)
+    if frame.empty:
+        if table_exists and frame.columns.tolist() and "trade_date" in frame.columns:
             connection.execute(f"DELETE FROM {table_name} WHERE trade_date = ?", [delete_trade_date])
-        quoted_columns = ", ".join(_quote_identifier(column) for column in frame.columns.tolist())
+        return
+    connection.register("incoming_df", frame)
+    if not table_exists:
         connection.execute(
-            f"INSERT INTO {table_name} ({quoted_columns}) SELECT {quoted_columns} FROM incoming_df"
+            f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM incoming_df WHERE 1=0"
         )
-        connection.unregister("incoming_df")
+    else:
+        _ensure_table_columns(connection=connection, table_name=table_name, frame=frame)
+    if frame.columns.tolist() and "trade_date" in frame.columns:
+        connection.execute(f"DELETE FROM {table_name} WHERE trade_date = ?", [delete_trade_date])
+    quoted_columns = ", ".join(_quote_identifier(column) for column in frame.columns.tolist())
+    connection.execute(
+        f"INSERT INTO {table_name} ({quoted_columns}) SELECT {quoted_columns} FROM incoming_df"
+    )
+    connection.unregister("incoming_df")
 
 
 def _quote_identifier(name: str) -> str:
@@ -302,13 +349,14 @@ def _read_signals(database_path: Path, trade_date: str) -> pd.DataFrame:
     return frame
 
 
-def _read_prices(database_path: Path, trade_date: str) -> dict[str, dict[str, float]]:
+def _read_prices(database_path: Path, trade_date: str) -> PriceStore:
+    empty = PriceStore.empty(fields=_PRICE_FIELDS)
     with duckdb.connect(str(database_path), read_only=True) as connection:
         row = connection.execute(
             "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'raw_daily'"
         ).fetchone()
         if not row or int(row[0]) <= 0:
-            return {}
+            return empty
         frame = connection.execute(
             "SELECT COALESCE(NULLIF(stock_code, ''), SPLIT_PART(ts_code, '.', 1)) AS stock_code, "
             "open, high, low, close "
@@ -316,57 +364,20 @@ def _read_prices(database_path: Path, trade_date: str) -> dict[str, dict[str, fl
             [trade_date],
         ).df()
     if frame.empty:
-        return {}
-    frame["stock_code"] = frame["stock_code"].astype(str)
-    for col in ("open", "high", "low", "close"):
-        frame[col] = pd.to_numeric(frame[col], errors="coerce").fillna(0.0)
-    frame = frame.drop_duplicates(subset=["stock_code"], keep="last")
-    # 行情查找表用于订单撮合阶段的 O(1) 读取，避免逐股过滤 DataFrame。
-    lookup: dict[str, dict[str, float]] = frame.set_index("stock_code")[["open", "high", "low", "close"]].to_dict("index")
-    return lookup
-
-
+        return empty
+    frame["trade_date"] = trade_date
+    # 行情以列式存储按下标读取，订单撮合阶段无需逐股过滤 DataFrame。
+    return PriceStore.from_frame(frame, fields=_PRICE_FIELDS)
 
 
-def _read_prev_close_lookup(database_path: Path, trade_date: str) -> dict[str, float]:
+def _read_prev_close_lookup(
+    database_path: Path, trade_date: str, stock_codes: list[str] | None = None
+) -> dict[str, float]:
+    # 昨收只读前一开市日分区（停牌复牌股有界回看），启动耗时与历史长度无关。
     with duckdb.connect(str(database_path), read_only=True) as connection:
-        row = connection.execute(
-            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'raw_daily'"
-        ).fetchone()
-        if not row or int(row[0]) <= 0:
-            return {}
-        has_stock_code = _table_has_column(connection, "raw_daily", "stock_code")
-        has_ts_code = _table_has_column(connection, "raw_daily", "ts_code")
-        if not has_stock_code and not has_ts_code:
-            return {}
-
-        if has_stock_code and has_ts_code:
-            stock_code_expr = "COALESCE(NULLIF(stock_code, ''), SPLIT_PART(ts_code, '.', 1))"
-        elif has_stock_code:
-            stock_code_expr = "stock_code"
-        else:
-            stock_code_expr = "SPLIT_PART(ts_code, '.', 1)"
-
-        frame = connection.execute(
-            "WITH raw AS ("
-            f"SELECT trade_date, {stock_code_expr} AS stock_code, close "
-            "FROM raw_daily WHERE trade_date <= ?"
-            "), shifted AS ("
-            "SELECT trade_date, stock_code, "
-            "LAG(close) OVER (PARTITION BY stock_code ORDER BY trade_date) AS prev_close "
-            "FROM raw"
-            ") "
-            "SELECT stock_code, prev_close FROM shifted WHERE trade_date = ?",
-            [trade_date, trade_date],
-        ).df()
-
-    frame["stock_code"] = frame["stock_code"].astype(str).str.strip()
-    frame["prev_close"] = pd.to_numeric(frame["prev_close"], errors="coerce").fillna(0.0)
-    # 昨收只保留有效值，供涨跌停保护逻辑直接消费。
-    valid = frame[(frame["stock_code"] != "") & (frame["prev_close"] > 0.0)]
-    valid = valid.drop_duplicates(subset=["stock_code"], keep="last")
-    lookup: dict[str, float] = valid.set_index("stock_code")["prev_close"].to_dict()
-    return lookup
+        return read_prev_close_lookup(
+            connection, trade_date=trade_date, stock_codes=stock_codes
+        )
 
 
 def _read_stock_profiles(database_path: Path) -> dict[str, dict[str, str]]:
@@ -435,32 +446,24 @@ def _read_available_cash(database_path: Path, trade_date: str, initial_cash: flo
         ).fetchone()
         if not row or int(row[0]) <= 0:
             return round(initial_cash, 4)
-        has_trade_id = _table_has_column(connection, "trade_records", "trade_id")
-        has_created_at = _table_has_column(connection, "trade_records", "created_at")
-        if has_trade_id:
-            order_by = " ORDER BY trade_date, trade_id"
-        elif has_created_at:
-            order_by = " ORDER BY trade_date, created_at"
-        else:
-            order_by = " ORDER BY trade_date"
         frame = connection.execute(
             "SELECT direction, amount, total_fee FROM trade_records "
-            f"WHERE trade_date < ? AND status = 'filled'{order_by}",
+            "WHERE trade_date < ? AND status = 'filled'",
             [trade_date],
         ).df()
 
-    if frame.empty:
-        return round(float(initial_cash), 4)
     # 历史现金回放采用“买入扣款、卖出回款”的资金守恒口径。
-    cash = float(initial_cash)
-    frame["direction"] = frame["direction"].astype(str).str.strip().str.lower()
-    frame["amount"] = pd.to_numeric(frame["amount"], errors="coerce").fillna(0.0)
-    frame["total_fee"] = pd.to_numeric(frame["total_fee"], errors="coerce").fillna(0.0)
-    buy_mask = frame["direction"] == "buy"
-    sell_mask = frame["direction"] == "sell"
-    cash -= float((frame.loc[buy_mask, "amount"] + frame.loc[buy_mask, "total_fee"]).sum())
-    cash += float((frame.loc[sell_mask, "amount"] - frame.loc[sell_mask, "total_fee"]).sum())
-    return round(cash, 4)
+    return round(float(initial_cash) + net_cash_flow(frame), 4)
+
+
+def _read_ledger_snapshot(database_path: Path, trade_date: str) -> LedgerSnapshot | None:
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        return read_ledger_snapshot(connection, trade_date=trade_date)
+
+
+def _read_later_ledger_dates(database_path: Path, trade_date: str) -> list[str]:
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        return ledger_trade_dates_after(connection, trade_date=trade_date)
 
 
 def _read_next_trade_day(database_path: Path, trade_date: str) -> str:
@@ -479,16 +482,6 @@ def _read_next_trade_day(database_path: Path, trade_date: str) -> str:
     return str(rec[0]) if rec else trade_date
 
 
-def _resolve_limit_ratio(*, stock_code: str, stock_name: str) -> float:
-    normalized_name = str(stock_name).upper()
-    if "ST" in normalized_name:
-        return LIMIT_RATIO_ST
-    normalized_code = str(stock_code).strip()
-    if normalized_code.startswith(("300", "301", "688", "689")):
-        return LIMIT_RATIO_GEM_STAR
-    return LIMIT_RATIO_MAIN_BOARD
-
-
 def _price_tolerance(limit_price: float) -> float:
     return max(0.01, abs(limit_price) * LIMIT_PRICE_TOLERANCE_RATIO)
 
@@ -583,17 +576,28 @@ def run_paper_trade(
             "contract_version",
         ]
     )
-    prices: dict[str, dict[str, float]] = {}
+    prices = PriceStore.empty(fields=_PRICE_FIELDS)
     prev_close_lookup: dict[str, float] = {}
     stock_profile_lookup: dict[str, dict[str, str]] = {}
     previous_positions: list[dict[str, object]] = []
+    ledger_snapshot: LedgerSnapshot | None = None
+    state_loaded = False
     next_trade_day = trade_date
     if not errors:
         signal_frame = _read_signals(database_path, trade_date)
         prices = _read_prices(database_path, trade_date)
-        prev_close_lookup = _read_prev_close_lookup(database_path, trade_date)
+        prev_close_lookup = _read_prev_close_lookup(
+            database_path, trade_date, prices.stock_codes
+        )
         stock_profile_lookup = _read_stock_profiles(database_path)
-        previous_positions = _read_previous_positions(database_path, trade_date)
+        # 期初现金 / 持仓优先取组合账本最近一行，账本缺失或落后时回放历史
+        ledger_snapshot = _read_ledger_snapshot(database_path, trade_date)
+        previous_positions = (
+            ledger_snapshot.positions
+            if ledger_snapshot is not None
+            else _read_previous_positions(database_path, trade_date)
+        )
+        state_loaded = True
         next_trade_day = _read_next_trade_day(database_path, trade_date)
 
         if signal_frame.empty:
@@ -616,15 +620,18 @@ def run_paper_trade(
     min_score = float(config.trading_min_quality_score)
     top_n = int(config.trading_top_n)
 
-    if database_path.exists():
+    if ledger_snapshot is not None:
+        available_cash = round(ledger_snapshot.cash, 4)
+    elif database_path.exists():
         available_cash = _read_available_cash(database_path, trade_date, initial_cash)
+    opening_cash = available_cash
 
     for row in previous_positions:
         stock_code = str(row.get("stock_code", "")).strip()
         shares = int(row.get("shares", 0) or 0)
         if not stock_code or shares <= 0:
             continue
-        day_price = prices.get(stock_code, {})
+        day_price = prices.bar(trade_date, stock_code) or {}
         close_price = float(day_price.get("close", 0.0) or 0.0)
         if close_price <= 0.0:
             close_price = float(row.get("market_price", row.get("cost_price", 0.0)) or 0.0)
@@ -679,7 +686,7 @@ def run_paper_trade(
 
         industry_code = str(pos.get("industry_code", ""))
         rr_ratio = float(pos.get("risk_reward_ratio", 1.0) or 1.0)
-        price = prices.get(stock_code)
+        price = prices.bar(trade_date, stock_code)
         if not price:
             risk_events.append(
                 {
@@ -831,7 +838,7 @@ def run_paper_trade(
             )
             return (False, False)
 
-        price = prices.get(stock_code)
+        price = prices.bar(trade_date, stock_code)
         if not price:
             risk_events.append(
                 {
@@ -976,7 +983,7 @@ def run_paper_trade(
         for stock_code, position in positions_by_code.items():
             can_sell_date = str(position.get("can_sell_date", trade_date) or trade_date)
             position["is_frozen"] = trade_date < can_sell_date
-            day_price = prices.get(stock_code)
+            day_price = prices.bar(trade_date, stock_code)
             if not day_price:
                 continue
             close_price = float(day_price.get("close", 0.0) or 0.0)
@@ -1182,24 +1189,41 @@ def run_paper_trade(
         )
 
     if database_path.exists():
-        _persist(
-            database_path=database_path,
-            table_name="trade_records",
-            frame=trade_frame,
-            delete_trade_date=trade_date,
-        )
-        _persist(
-            database_path=database_path,
-            table_name="positions",
-            frame=position_frame,
-            delete_trade_date=trade_date,
-        )
-        _persist(
-            database_path=database_path,
-            table_name="risk_events",
-            frame=risk_event_frame,
-            delete_trade_date=trade_date,
+        ledger_frame = (
+            build_ledger_frame(
+                trade_date=trade_date,
+                opening_cash=opening_cash,
+                cash=opening_cash + net_cash_flow(trade_frame),
+                positions=position_frame,
+                filled_orders=filled_orders,
+                source="run",
+                created_at=created_at,
+            )
+            if state_loaded
+            else empty_ledger_frame()
         )
+        # 成交 / 持仓 / 风险事件与账本同一事务写入：任一失败整体回滚，账本不会与三表错位；
+        # 重跑较早交易日时其后的账本行建立在旧成交之上，同一事务内删除
+        later_ledger_dates = _read_later_ledger_dates(database_path, trade_date)
+        with open_write_session(database_path) as session, session.batch():
+            for table_name, frame in (
+                ("trade_records", trade_frame),
+                ("positions", position_frame),
+                ("risk_events", risk_event_frame),
+            ):
+                _persist(
+                    database_path=database_path,
+                    table_name=table_name,
+                    frame=frame,
+                    delete_trade_date=trade_date,
+                    session=session,
+                )
+            write_ledger(
+                session,
+                trade_date=trade_date,
+                frame=ledger_frame,
+                later_trade_dates=later_ledger_dates,
+            )
 
     return TradeRunResult(
         trade_date=trade_date,
@@ -1221,4 +1245,5 @@ def run_paper_trade(
         has_error=bool(errors),
         s4r_patch_note_path=s4r_patch_note_path,
         s4r_delta_report_path=s4r_delta_report_path,
+        opening_state_source="ledger" if ledger_snapshot is not None else "replay",
     )
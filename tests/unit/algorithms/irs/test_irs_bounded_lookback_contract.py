@@ -0,0 +1,153 @@
+"""
+IRS 有界回看向量化引擎契约测试。
+
+覆盖：回看窗口之外的远期历史不影响当日评分（日常开销与库内历史长度无关）、
+行业存在缺失交易日时宽表因子与逐行业序列口径一致。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.irs import pipeline as irs_pipeline
+from src.algorithms.irs.pipeline import run_irs_daily
+from src.config.config import Config
+
+_INDUSTRY_COUNT = 6
+_GAP_INDUSTRY = "801003"
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.irs.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _snapshot_rows(trade_dates: list[str], *, seed: int, scale: float = 1.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows: list[dict[str, object]] = []
+    for day_index, trade_date in enumerate(trade_dates):
+        for idx in range(_INDUSTRY_COUNT):
+            code = f"801{idx:03d}"
+            # 缺口行业每 4 个交易日缺一天（当日除外）
+            if code == _GAP_INDUSTRY and day_index % 4 == 1 and trade_date != trade_dates[-1]:
+                continue
+            stock_count = int(rng.integers(20, 80))
+            rows.append(
+                {
+                    "trade_date": trade_date,
+                    "industry_code": code,
+                    "industry_name": f"行业{idx + 1}",
+                    "industry_pct_chg": float(rng.normal(0.0, 2.0)) * scale,
+                    "industry_amount": float(rng.uniform(1e8, 5e9)) * scale,
+                    "industry_pe_ttm": float(rng.uniform(8.0, 40.0)) * scale,
+                    "industry_pb": float(rng.uniform(0.8, 5.0)),
+                    "rise_count": int(rng.integers(0, stock_count)),
+                    "fall_count": int(rng.integers(0, stock_count)),
+                    "new_100d_high_count": int(rng.integers(0, 6)),
+                    "new_100d_low_count": int(rng.integers(0, 6)),
+                    "limit_up_count": int(rng.integers(0, 4)),
+                    "top5_limit_up": int(rng.integers(0, 5)),
+                    "top5_pct_chg": json.dumps([float(v) for v in rng.normal(3.0, 2.0, 5)]),
+                    "stock_count": stock_count,
+                    "stale_days": 0,
+                    "style_bucket": ("growth", "balanced", "value")[idx % 3],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _seed(config: Config, frame: pd.DataFrame) -> None:
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    dates = sorted(frame["trade_date"].unique().tolist())
+    benchmark = pd.DataFrame(
+        {"trade_date": dates, "pct_chg": [(int(date) % 7 - 3) * 0.3 for date in dates]}
+    )
+    with duckdb.connect(str(db_path)) as connection:
+        for table_name, table in (("industry_snapshot", frame), ("raw_index_daily", benchmark)):
+            connection.register("incoming", table)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+
+
+def _business_dates(start: str, periods: int) -> list[str]:
+    return pd.bdate_range(start, periods=periods).strftime("%Y%m%d").tolist()
+
+
+def test_history_beyond_lookback_does_not_change_scores(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """回看窗口之外的远期行情（含异常值）不被读取，当日评分与只有窗口数据时一致。"""
+    monkeypatch.chdir(tmp_path)
+    recent_dates = _business_dates("2026-01-05", irs_pipeline.IRS_LOOKBACK_TRADE_DAYS)
+    recent = _snapshot_rows(recent_dates, seed=7)
+    ancient = _snapshot_rows(_business_dates("2021-01-04", 40), seed=11, scale=1000.0)
+    trade_date = recent_dates[-1]
+
+    frames = {}
+    for name, seeded in (("window", recent), ("long", pd.concat([ancient, recent]))):
+        config = _build_config(tmp_path, name)
+        _seed(config, seeded)
+        result = run_irs_daily(trade_date=trade_date, config=config)
+        frames[name] = (
+            result.frame.drop(columns=["created_at"]),
+            result.factor_intermediate_frame.drop(columns=["created_at"]),
+        )
+
+    for expected, actual in zip(frames["window"], frames["long"], strict=True):
+        pd.testing.assert_frame_equal(actual, expected)
+    assert (frames["long"][0]["sample_days"] <= irs_pipeline.IRS_LOOKBACK_TRADE_DAYS).all()
+
+
+def test_gap_industry_factors_follow_its_own_series(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """缺失交易日的行业按自身有效交易日序列计算滚动 / EWM 因子。"""
+    monkeypatch.chdir(tmp_path)
+    trade_dates = _business_dates("2026-01-05", 80)
+    frame = _snapshot_rows(trade_dates, seed=3)
+    config = _build_config(tmp_path, "gap")
+    _seed(config, frame)
+
+    result = run_irs_daily(trade_date=trade_dates[-1], config=config)
+
+    series = frame[frame["industry_code"] == _GAP_INDUSTRY].sort_values("trade_date")
+    stock_count = series["stock_count"].clip(lower=1.0)
+    continuity = (
+        0.6 * ((series["rise_count"] - series["fall_count"]) / stock_count).rolling(5, 1).sum()
+        + 0.4
+        * ((series["new_100d_high_count"] - series["new_100d_low_count"]) / stock_count)
+        .rolling(5, 1)
+        .sum()
+    )
+    gene = (
+        0.6 * (series["limit_up_count"] / stock_count).ewm(alpha=0.1, adjust=False).mean()
+        + 0.4 * (series["new_100d_high_count"] / stock_count).ewm(alpha=0.1, adjust=False).mean()
+    )
+    net_inflow = series["industry_amount"].diff().fillna(0.0).rolling(10, 1).sum()
+
+    factors = result.factor_intermediate_frame.set_index("industry_code").loc[_GAP_INDUSTRY]
+    output = result.frame.set_index("industry_code").loc[_GAP_INDUSTRY]
+    assert output["sample_days"] == len(series)
+    assert factors["continuity_factor_raw"] == pytest.approx(round(continuity.iloc[-1], 6))
+    assert factors["continuity_factor_mean"] == pytest.approx(round(continuity.mean(), 6))
+    assert factors["gene_score_raw"] == pytest.approx(round(gene.iloc[-1], 6))
+    assert factors["gene_score_mean"] == pytest.approx(round(gene.mean(), 6))
+    market_amount = frame.groupby("trade_date")["industry_amount"].sum()
+    flow_share = series["industry_amount"] / series["trade_date"].map(market_amount)
+    relative_volume = series["industry_amount"] / series["industry_amount"].rolling(20, 1).mean()
+    expected_capital_flow = (
+        0.5 * net_inflow.iloc[-1] + 0.3 * flow_share.iloc[-1] + 0.2 * relative_volume.iloc[-1]
+    )
+    assert factors["capital_flow_raw"] == pytest.approx(round(expected_capital_flow, 6))
@@ -0,0 +1,153 @@
+"""
+IRS 区间批量评分契约测试（run_irs_range）。
+
+覆盖：区间一次计算的 irs_industry_daily / irs_factor_intermediate 与逐日 run_irs_daily
+顺序执行逐行一致（含轮动状态对前序评分的依赖与库中既有历史评分）、
+数据过期交易日记入失败清单且不落库。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.irs import run_irs_daily, run_irs_range
+from src.config.config import Config
+
+_INDUSTRY_COUNT = 6
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.irs_range.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _snapshot_rows(trade_dates: list[str], *, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows: list[dict[str, object]] = []
+    for day_index, trade_date in enumerate(trade_dates):
+        for idx in range(_INDUSTRY_COUNT):
+            code = f"801{idx:03d}"
+            # 末位行业每 5 个交易日缺一天，覆盖行业缺口下的轮动历史
+            if idx == _INDUSTRY_COUNT - 1 and day_index % 5 == 2:
+                continue
+            stock_count = int(rng.integers(20, 80))
+            rows.append(
+                {
+                    "trade_date": trade_date,
+                    "industry_code": code,
+                    "industry_name": f"行业{idx + 1}",
+                    "industry_pct_chg": float(rng.normal(0.0, 2.0)),
+                    "industry_amount": float(rng.uniform(1e8, 5e9)),
+                    "industry_pe_ttm": float(rng.uniform(8.0, 40.0)),
+                    "industry_pb": float(rng.uniform(0.8, 5.0)),
+                    "rise_count": int(rng.integers(0, stock_count)),
+                    "fall_count": int(rng.integers(0, stock_count)),
+                    "new_100d_high_count": int(rng.integers(0, 6)),
+                    "new_100d_low_count": int(rng.integers(0, 6)),
+                    "limit_up_count": int(rng.integers(0, 4)),
+                    "top5_limit_up": int(rng.integers(0, 5)),
+                    "top5_pct_chg": json.dumps([float(v) for v in rng.normal(3.0, 2.0, 5)]),
+                    "stock_count": stock_count,
+                    "stale_days": 0,
+                    "style_bucket": ("growth", "balanced", "value")[idx % 3],
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _seed(config: Config, frame: pd.DataFrame) -> Path:
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    dates = sorted(frame["trade_date"].unique().tolist())
+    benchmark = pd.DataFrame(
+        {"trade_date": dates, "pct_chg": [(int(date) % 7 - 3) * 0.3 for date in dates]}
+    )
+    with duckdb.connect(str(db_path)) as connection:
+        for table_name, table in (("industry_snapshot", frame), ("raw_index_daily", benchmark)):
+            connection.register("incoming", table)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+    return db_path
+
+
+def _read_outputs(db_path: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        frames = tuple(
+            connection.execute(f"SELECT * FROM {table_name}")
+            .df()
+            .drop(columns=["created_at"])
+            .sort_values(["trade_date", "industry_code"])
+            .reset_index(drop=True)
+            for table_name in ("irs_industry_daily", "irs_factor_intermediate")
+        )
+    return frames
+
+
+def test_range_matches_sequential_daily_runs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """区间批量结果与逐日顺序执行逐行一致，轮动状态沿用前序交易日评分。"""
+    monkeypatch.chdir(tmp_path)
+    trade_dates = pd.bdate_range("2026-01-05", periods=40).strftime("%Y%m%d").tolist()
+    snapshot = _snapshot_rows(trade_dates, seed=5)
+    warmup_dates, range_dates = trade_dates[:12], trade_dates[12:]
+
+    db_paths = {}
+    for name in ("daily", "range"):
+        config = _build_config(tmp_path, name)
+        db_paths[name] = _seed(config, snapshot)
+        # 两侧库中都先有逐日产出的前序评分，区间从中段开始
+        for trade_date in warmup_dates:
+            run_irs_daily(trade_date=trade_date, config=config)
+        if name == "daily":
+            for trade_date in range_dates:
+                run_irs_daily(trade_date=trade_date, config=config)
+        else:
+            result = run_irs_range(
+                start_date=range_dates[0], end_date=range_dates[-1], config=config
+            )
+
+    assert result.trade_dates == range_dates
+    assert result.failed_trade_dates == []
+    assert result.count == len(snapshot[snapshot["trade_date"].isin(range_dates)])
+    assert result.range_report_path.exists()
+
+    expected = _read_outputs(db_paths["daily"])
+    actual = _read_outputs(db_paths["range"])
+    for expected_frame, actual_frame in zip(expected, actual, strict=True):
+        pd.testing.assert_frame_equal(actual_frame, expected_frame)
+    # 轮动斜率依赖区间内前序交易日评分（内存状态向后传递）
+    assert actual[0]["rotation_slope"].ne(0).any()
+
+
+def test_stale_trade_date_is_recorded_and_skipped(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """数据过期的交易日记入失败清单，其余交易日照常评分落库。"""
+    monkeypatch.chdir(tmp_path)
+    trade_dates = pd.bdate_range("2026-03-02", periods=10).strftime("%Y%m%d").tolist()
+    snapshot = _snapshot_rows(trade_dates, seed=9)
+    stale_date = trade_dates[6]
+    snapshot.loc[snapshot["trade_date"] == stale_date, "stale_days"] = 99
+    config = _build_config(tmp_path, "stale")
+    db_path = _seed(config, snapshot)
+
+    result = run_irs_range(start_date=trade_dates[0], end_date=trade_dates[-1], config=config)
+
+    assert result.failed_trade_dates == [stale_date]
+    assert "stale_days=99" in result.errors[stale_date]
+    scores, _ = _read_outputs(db_path)
+    assert sorted(scores["trade_date"].unique()) == [d for d in trade_dates if d != stale_date]
+    report = json.loads(result.range_report_path.read_text(encoding="utf-8"))
+    assert report["failed_trade_dates"] == [stale_date]
@@ -0,0 +1,145 @@
+"""
+MSS 区间批量评分契约测试（run_mss_range）。
+
+覆盖：区间一次评分的 mss_panorama 与逐日 run_mss_scoring 顺序执行逐行一致
+（自适应阈值 / 名次依赖库中既有温度历史与区间内前序评分）、数据过期交易日记入
+失败清单且沿用库中旧温度作为后续交易日的历史。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.mss import run_mss_range, run_mss_scoring
+from src.config.config import Config
+
+_TRADE_DATES = pd.bdate_range("2025-06-02", periods=170).strftime("%Y%m%d").tolist()
+_HISTORY_DATES, _RANGE_DATES = _TRADE_DATES[:130], _TRADE_DATES[130:]
+_STALE_DATE = _RANGE_DATES[7]
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.mss_range.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _snapshot_rows() -> pd.DataFrame:
+    rng = np.random.default_rng(21)
+    rows: list[dict[str, object]] = []
+    for trade_date in _RANGE_DATES:
+        total = int(rng.integers(4000, 5200))
+        limit_up = int(rng.integers(10, 120))
+        new_high = int(rng.integers(20, 300))
+        rows.append(
+            {
+                "trade_date": trade_date,
+                "total_stocks": total,
+                "rise_count": int(rng.integers(0, total)),
+                "limit_up_count": limit_up,
+                "limit_down_count": int(rng.integers(0, 80)),
+                "touched_limit_up": limit_up + int(rng.integers(0, 40)),
+                "strong_up_count": int(rng.integers(0, 400)),
+                "strong_down_count": int(rng.integers(0, 400)),
+                "new_100d_high_count": new_high,
+                "new_100d_low_count": int(rng.integers(0, 300)),
+                "continuous_limit_up_2d": int(rng.integers(0, limit_up)),
+                "continuous_limit_up_3d_plus": int(rng.integers(0, 15)),
+                "continuous_new_high_2d_plus": int(rng.integers(0, new_high)),
+                "high_open_low_close_count": int(rng.integers(0, 200)),
+                "low_open_high_close_count": int(rng.integers(0, 200)),
+                "pct_chg_std": float(rng.uniform(0.01, 0.05)),
+                "amount_volatility": float(rng.uniform(1e5, 5e6)),
+                "data_quality": "normal",
+                "stale_days": 99 if trade_date == _STALE_DATE else 0,
+                "source_trade_date": trade_date,
+                "created_at": "2025-12-31T00:00:00",
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _history_rows() -> pd.DataFrame:
+    rng = np.random.default_rng(8)
+    samples = rng.uniform(15.0, 85.0, len(_HISTORY_DATES))
+    temperatures = [float(round(value, 4)) for value in samples]
+    temperatures[40] = None
+    frame = pd.DataFrame({"trade_date": _HISTORY_DATES, "mss_temperature": temperatures})
+    # 过期交易日在库中已有旧评分：逐日执行时该日失败不落库，后续交易日读到旧值
+    return pd.concat(
+        [frame, pd.DataFrame({"trade_date": [_STALE_DATE], "mss_temperature": [88.8]})],
+        ignore_index=True,
+    )
+
+
+def _seed(config: Config) -> Path:
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(db_path)) as connection:
+        for table_name, table in (
+            ("market_snapshot", _snapshot_rows()),
+            ("mss_panorama", _history_rows()),
+        ):
+            connection.register("incoming", table)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+    return db_path
+
+
+def _read_scores(db_path: Path) -> pd.DataFrame:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        frame = connection.execute(
+            "SELECT * FROM mss_panorama WHERE trade_date >= ? ORDER BY trade_date",
+            [_RANGE_DATES[0]],
+        ).df()
+    frame = frame.drop(columns=["created_at"])
+    return frame[sorted(frame.columns)].reset_index(drop=True)
+
+
+def test_range_matches_sequential_daily_runs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """区间批量结果与逐日顺序执行逐行一致，过期交易日失败且保留库中旧温度。"""
+    monkeypatch.chdir(tmp_path)
+
+    daily_config = _build_config(tmp_path, "daily")
+    daily_db = _seed(daily_config)
+    for trade_date in _RANGE_DATES:
+        daily = run_mss_scoring(
+            trade_date=trade_date,
+            config=daily_config,
+            artifacts_dir=tmp_path / "daily_artifacts" / trade_date,
+        )
+        assert daily.has_error is (trade_date == _STALE_DATE)
+
+    range_config = _build_config(tmp_path, "range")
+    range_db = _seed(range_config)
+    result = run_mss_range(
+        start_date=_RANGE_DATES[0], end_date=_RANGE_DATES[-1], config=range_config
+    )
+
+    assert result.trade_dates == _RANGE_DATES
+    assert result.failed_trade_dates == [_STALE_DATE]
+    assert "stale_days=99" in result.errors[_STALE_DATE]
+    assert result.count == len(_RANGE_DATES) - 1
+    report = json.loads(result.range_report_path.read_text(encoding="utf-8"))
+    assert report["failed_trade_dates"] == [_STALE_DATE]
+
+    expected = _read_scores(daily_db)
+    actual = _read_scores(range_db)
+    pd.testing.assert_frame_equal(actual, expected)
+    assert actual.loc[actual["trade_date"] == _STALE_DATE, "mss_temperature"].tolist() == [88.8]
+    # 历史样本充足，区间内使用自适应阈值且名次随历史变化
+    assert actual["mss_rank"].nunique() > 1
+    lake = Path(range_config.parquet_path) / "l3" / "mss_panorama"
+    assert lake.exists()
@@ -0,0 +1,140 @@
+"""
+PAS 区间批量评分契约测试（run_pas_range）。
+
+覆盖：区间一次推进的 stock_pas_daily / pas_factor_intermediate 与逐日 run_pas_daily
+顺序执行逐行一致（跨多个读取块）、区间后续日常运行可直接接续区间终点状态、
+历史区间回补不覆盖更新的状态槽。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.pas import run_pas_daily, run_pas_range
+from src.algorithms.pas.pipeline import PAS_REPLAY_CHUNK_TRADE_DAYS
+from src.algorithms.pas.rolling_state import PAS_STATE_TABLE
+from src.config.config import Config
+
+_TRADE_DATES = pd.bdate_range("2025-03-03", periods=100).strftime("%Y%m%d").tolist()
+_STOCK_CODES = ("000001", "300002", "600003", "688004", "000005")
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.pas_range.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _seed(config: Config) -> Path:
+    rng = np.random.default_rng(23)
+    rows: list[dict[str, object]] = []
+    for index, code in enumerate(_STOCK_CODES):
+        listed_from = 30 if index == len(_STOCK_CODES) - 1 else 0
+        price = float(rng.uniform(5.0, 40.0))
+        for day, trade_date in enumerate(_TRADE_DATES):
+            if day < listed_from or rng.random() < 0.08:
+                continue
+            price *= float(np.exp(rng.normal(0.0, 0.03)))
+            open_ = price * float(rng.uniform(0.97, 1.03))
+            vol = float(rng.integers(100_000, 5_000_000))
+            rows.append(
+                {
+                    "ts_code": f"{code}.SZ",
+                    "stock_code": code,
+                    "trade_date": trade_date,
+                    "open": open_,
+                    "high": max(open_, price) * float(rng.uniform(1.0, 1.04)),
+                    "low": min(open_, price) * float(rng.uniform(0.96, 1.0)),
+                    "close": price,
+                    "vol": vol,
+                    "amount": price * vol,
+                }
+            )
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(db_path)) as connection:
+        connection.register("incoming", pd.DataFrame(rows))
+        connection.execute("CREATE OR REPLACE TABLE raw_daily AS SELECT * FROM incoming")
+        connection.unregister("incoming")
+    return db_path
+
+
+def _read_table(db_path: Path, table_name: str) -> pd.DataFrame:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        frame = connection.execute(f"SELECT * FROM {table_name}").df()
+    return (
+        frame.drop(columns=["created_at"])
+        .sort_values(["trade_date", "stock_code"])
+        .reset_index(drop=True)
+    )
+
+
+def _state_dates(db_path: Path) -> list[str]:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        rows = connection.execute(
+            f"SELECT DISTINCT as_of_trade_date FROM {PAS_STATE_TABLE} ORDER BY 1"
+        ).fetchall()
+    return [str(row[0]) for row in rows]
+
+
+def test_range_matches_sequential_daily_runs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """区间批量结果与逐日顺序执行逐行一致，之后的日常运行接续区间终点状态。"""
+    monkeypatch.chdir(tmp_path)
+    range_dates = _TRADE_DATES[20:-1]
+    assert len(range_dates) > PAS_REPLAY_CHUNK_TRADE_DAYS
+
+    daily_config = _build_config(tmp_path, "daily")
+    daily_db = _seed(daily_config)
+    for trade_date in range_dates:
+        run_pas_daily(trade_date=trade_date, config=daily_config)
+
+    range_config = _build_config(tmp_path, "range")
+    range_db = _seed(range_config)
+    result = run_pas_range(
+        start_date=range_dates[0], end_date=range_dates[-1], config=range_config
+    )
+
+    assert result.trade_dates == range_dates
+    assert result.state_persisted
+    assert result.factor_intermediate_sample_path.exists()
+    for table_name in ("stock_pas_daily", "pas_factor_intermediate"):
+        pd.testing.assert_frame_equal(
+            _read_table(range_db, table_name), _read_table(daily_db, table_name)
+        )
+    assert result.count == len(_read_table(range_db, "stock_pas_daily"))
+
+    # 区间之后的交易日从区间终点状态推进，与逐日链路一致
+    expected = run_pas_daily(trade_date=_TRADE_DATES[-1], config=daily_config)
+    actual = run_pas_daily(trade_date=_TRADE_DATES[-1], config=range_config)
+    pd.testing.assert_frame_equal(
+        actual.frame.drop(columns=["created_at"]), expected.frame.drop(columns=["created_at"])
+    )
+
+
+def test_historical_backfill_keeps_newer_state(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """早于已有状态槽的区间回补只写评分，不覆盖日常推进的状态。"""
+    monkeypatch.chdir(tmp_path)
+    config = _build_config(tmp_path, "backfill")
+    db_path = _seed(config)
+    run_pas_daily(trade_date=_TRADE_DATES[-2], config=config)
+    run_pas_daily(trade_date=_TRADE_DATES[-1], config=config)
+
+    result = run_pas_range(start_date=_TRADE_DATES[10], end_date=_TRADE_DATES[40], config=config)
+
+    assert not result.state_persisted
+    assert _state_dates(db_path) == _TRADE_DATES[-2:]
+    scored = _read_table(db_path, "stock_pas_daily")["trade_date"].unique().tolist()
+    assert scored == _TRADE_DATES[10:41] + _TRADE_DATES[-2:]
@@ -0,0 +1,208 @@
+"""
+PAS 个股滚动状态契约测试（pas_rolling_state）。
+
+覆盖：逐日推进与无状态有界预热、全量重放（rebuild）结果一致；评分只依赖近 150 个
+交易日行情（与回读 150 日宽表口径一致）；状态就绪后日常运行只依赖当日行情；
+同日重跑基于前一交易日状态槽；eq rebuild-pas-state 命令。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.pas import rebuild_pas_rolling_state, run_pas_daily
+from src.algorithms.pas.rolling_state import (
+    PAS_SAMPLE_WINDOW_DAYS,
+    PAS_STATE_TABLE,
+    PAS_STATE_WARMUP_TRADE_DAYS,
+)
+from src.config.config import Config
+from src.pipeline.main import main
+
+_TRADE_DATES = pd.bdate_range("2025-01-02", periods=PAS_STATE_WARMUP_TRADE_DAYS + 30).strftime(
+    "%Y%m%d"
+).tolist()
+_STOCK_CODES = ("000001", "000002", "300003", "600004", "688005", "600006")
+
+
+def _build_config(tmp_path: Path, name: str) -> tuple[Config, Path]:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.pas_state.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file)), env_file
+
+
+def _raw_daily() -> pd.DataFrame:
+    rng = np.random.default_rng(17)
+    rows: list[dict[str, object]] = []
+    for index, code in enumerate(_STOCK_CODES):
+        # 末只股票区间中段才上市，其余股票随机停牌
+        listed_from = len(_TRADE_DATES) // 2 if index == len(_STOCK_CODES) - 1 else 0
+        price = float(rng.uniform(5.0, 40.0))
+        for day, trade_date in enumerate(_TRADE_DATES):
+            if day < listed_from or rng.random() < 0.08:
+                continue
+            price *= float(np.exp(rng.normal(0.0, 0.03)))
+            if rng.random() < 0.04:
+                price *= 1.10
+            open_ = price * float(rng.uniform(0.97, 1.03))
+            vol = float(rng.integers(100_000, 5_000_000))
+            rows.append(
+                {
+                    "ts_code": f"{code}.SZ",
+                    "stock_code": code,
+                    "trade_date": trade_date,
+                    "open": open_,
+                    "high": max(open_, price) * float(rng.uniform(1.0, 1.04)),
+                    "low": min(open_, price) * float(rng.uniform(0.96, 1.0)),
+                    "close": price,
+                    "vol": vol,
+                    "amount": price * vol,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def _seed(config: Config, frame: pd.DataFrame) -> Path:
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(db_path)) as connection:
+        connection.register("incoming", frame)
+        connection.execute("CREATE OR REPLACE TABLE raw_daily AS SELECT * FROM incoming")
+        connection.unregister("incoming")
+    return db_path
+
+
+def _scores(result: object) -> pd.DataFrame:
+    return result.frame.drop(columns=["created_at"]).reset_index(drop=True)
+
+
+def _state_slots(db_path: Path) -> dict[str, str]:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        rows = connection.execute(
+            f"SELECT state_scope, MAX(as_of_trade_date) FROM {PAS_STATE_TABLE} "
+            "GROUP BY state_scope"
+        ).fetchall()
+    return {str(scope): str(as_of) for scope, as_of in rows}
+
+
+def test_incremental_matches_warmup_and_rebuild(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """逐日推进、无状态有界预热、全量重放三种路径的评分逐行一致。"""
+    monkeypatch.chdir(tmp_path)
+    frame = _raw_daily()
+    target = _TRADE_DATES[-1]
+
+    chain_config, _ = _build_config(tmp_path, "chain")
+    _seed(chain_config, frame)
+    for trade_date in _TRADE_DATES[-6:]:
+        chained = run_pas_daily(trade_date=trade_date, config=chain_config)
+
+    warmup_config, _ = _build_config(tmp_path, "warmup")
+    _seed(warmup_config, frame)
+    warmed = run_pas_daily(trade_date=target, config=warmup_config)
+
+    rebuild_config, _ = _build_config(tmp_path, "rebuild")
+    _seed(rebuild_config, frame)
+    rebuilt = rebuild_pas_rolling_state(config=rebuild_config, end_date=_TRADE_DATES[-2])
+    assert rebuilt.as_of_trade_date == _TRADE_DATES[-2]
+    assert rebuilt.replayed_trade_dates == len(_TRADE_DATES) - 1
+    assert rebuilt.stock_count == len(_STOCK_CODES)
+    replayed = run_pas_daily(trade_date=target, config=rebuild_config)
+
+    pd.testing.assert_frame_equal(_scores(warmed), _scores(chained))
+    pd.testing.assert_frame_equal(_scores(replayed), _scores(chained))
+    assert set(chained.frame["sample_days"]) <= {20, 60, 120}
+
+
+def test_scores_only_depend_on_sample_window(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """历史超过 150 个交易日时，评分与只保留最近 150 个交易日行情的库一致。"""
+    monkeypatch.chdir(tmp_path)
+    frame = _raw_daily()
+    target = _TRADE_DATES[-1]
+    assert len(_TRADE_DATES) > PAS_SAMPLE_WINDOW_DAYS
+
+    full_config, _ = _build_config(tmp_path, "long")
+    _seed(full_config, frame)
+    for trade_date in _TRADE_DATES[-3:]:
+        chained = run_pas_daily(trade_date=trade_date, config=full_config)
+
+    window_config, _ = _build_config(tmp_path, "window")
+    window_start = _TRADE_DATES[-PAS_SAMPLE_WINDOW_DAYS]
+    _seed(window_config, frame[frame["trade_date"] >= window_start].reset_index(drop=True))
+    windowed = run_pas_daily(trade_date=target, config=window_config)
+
+    pd.testing.assert_frame_equal(_scores(chained), _scores(windowed))
+
+
+def test_daily_run_only_needs_today_once_state_exists(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """前一交易日状态就绪后，删去全部历史行情不影响当日评分。"""
+    monkeypatch.chdir(tmp_path)
+    frame = _raw_daily()
+    previous, target = _TRADE_DATES[-2], _TRADE_DATES[-1]
+
+    full_config, _ = _build_config(tmp_path, "full")
+    _seed(full_config, frame)
+    run_pas_daily(trade_date=previous, config=full_config)
+    expected = run_pas_daily(trade_date=target, config=full_config)
+
+    trimmed_config, _ = _build_config(tmp_path, "trimmed")
+    db_path = _seed(trimmed_config, frame)
+    run_pas_daily(trade_date=previous, config=trimmed_config)
+    with duckdb.connect(str(db_path)) as connection:
+        connection.execute("DELETE FROM raw_daily WHERE trade_date < ?", [target])
+    actual = run_pas_daily(trade_date=target, config=trimmed_config)
+
+    pd.testing.assert_frame_equal(_scores(actual), _scores(expected))
+
+
+def test_same_day_rerun_advances_from_previous_slot(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """同日重跑以前一交易日状态槽为基准，结果不变，两个状态槽分别为前一日与当日。"""
+    monkeypatch.chdir(tmp_path)
+    config, _ = _build_config(tmp_path, "rerun")
+    db_path = _seed(config, _raw_daily())
+    previous, target = _TRADE_DATES[-2], _TRADE_DATES[-1]
+
+    run_pas_daily(trade_date=previous, config=config)
+    first = run_pas_daily(trade_date=target, config=config)
+    second = run_pas_daily(trade_date=target, config=config)
+
+    pd.testing.assert_frame_equal(_scores(second), _scores(first))
+    assert sorted(_state_slots(db_path).values()) == [previous, target]
+
+
+def test_main_rebuild_pas_state_command(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """eq rebuild-pas-state 从 raw_daily 首日重放到指定交易日并输出统计。"""
+    config, env_file = _build_config(tmp_path, "cli")
+    db_path = _seed(config, _raw_daily())
+    end_date = _TRADE_DATES[40]
+
+    exit_code = main(["--env-file", str(env_file), "rebuild-pas-state", "--end-date", end_date])
+
+    assert exit_code == 0
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload == {
+        "as_of_trade_date": end_date,
+        "event": "pas_rolling_state_rebuilt",
+        "replayed_trade_dates": 41,
+        "stock_count": len(_STOCK_CODES) - 1,
+    }
+    assert list(_state_slots(db_path).values()) == [end_date]
@@ -0,0 +1,52 @@
+"""
+滑动窗口顺序统计契约测试（SortedWindow / quantile_sorted）。
+
+覆盖：逐步推进后的分位数 / 名次计数与"截取最近 N 条再排序"一致（含空值占位、
+重复值淘汰）；线性插值分位数与 numpy 默认口径一致。
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from src.algorithms.rolling_stats import SortedWindow, quantile_sorted
+
+
+def test_sorted_window_matches_resorting_recent_rows() -> None:
+    """每步的有序副本、分位数与名次计数均等于对最近 maxlen 条重新排序的结果。"""
+    rng = np.random.default_rng(5)
+    window = SortedWindow(30)
+    rows: list[float | None] = []
+    for step in range(400):
+        value: float | None = float(rng.integers(0, 12))
+        if step % 17 == 0:
+            value = None
+        elif step % 23 == 0:
+            value = math.nan
+        window.push(value)
+        rows.append(value)
+
+        recent = [
+            float(item) for item in rows[-30:] if item is not None and math.isfinite(item)
+        ]
+        expected = sorted(recent)
+        assert list(window.sorted_values) == expected
+        assert window.values() == recent
+        assert window.recent(5) == recent[-5:]
+        assert len(window) == len(recent)
+        for q in (0.0, 0.3, 0.45, 0.75, 1.0):
+            assert window.quantile(q) == quantile_sorted(expected, q)
+        assert window.count_above(6.0) == sum(item > 6.0 for item in recent)
+        assert window.count_at_most(6.0) == sum(item <= 6.0 for item in recent)
+
+
+def test_quantile_sorted_matches_linear_interpolation() -> None:
+    """线性插值分位数与 numpy 默认口径一致，空序列返回 0。"""
+    values = sorted(np.random.default_rng(2).normal(size=57).tolist())
+    for q in (0.05, 0.3, 0.5, 0.95):
+        assert quantile_sorted(values, q) == pytest.approx(float(np.quantile(values, q)))
+    assert quantile_sorted([], 0.5) == 0.0
+    assert quantile_sorted([3.0], 0.9) == 3.0
+
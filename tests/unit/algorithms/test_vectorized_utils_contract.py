@@ -0,0 +1,59 @@
+"""
+算法层共用向量化工具契约测试（板块涨跌停幅度 / 末尾连续计数）。
+
+覆盖：批量板块判定与逐只判定口径一致、末尾连续上涨 / 下跌计数与逐列扫描一致
+（含全列满足、空序列与 NaN 中断）。
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.array_ops import trailing_run_lengths, trailing_sign_runs
+from src.algorithms.board_limits import limit_ratios, resolve_limit_ratio
+
+
+def _scan_trailing(flags: np.ndarray) -> int:
+    count = 0
+    for value in flags[::-1]:
+        if not value:
+            break
+        count += 1
+    return count
+
+
+def test_limit_ratios_match_scalar_resolution() -> None:
+    """批量判定与逐只判定一致：ST 优先、代码去空白、缺失名称视为非 ST。"""
+    codes = pd.Series(["000001", " 300750", "688001", "300001", "600000", "689009", "30", "301001"])
+    names = pd.Series(["平安银行", "宁德时代", None, "*ST示例", "st浦发", "", "短码", np.nan])
+
+    ratios = limit_ratios(codes, names)
+
+    expected = [
+        resolve_limit_ratio(stock_code=code, stock_name="" if pd.isna(name) else name)
+        for code, name in zip(codes, names, strict=True)
+    ]
+    assert ratios.tolist() == expected
+    assert ratios.tolist() == [0.10, 0.20, 0.20, 0.05, 0.05, 0.20, 0.10, 0.20]
+    assert limit_ratios(codes).tolist() == [0.10, 0.20, 0.20, 0.20, 0.10, 0.20, 0.10, 0.20]
+    with pytest.raises(ValueError):
+        limit_ratios(codes, names.iloc[:3])
+
+
+def test_trailing_runs_match_column_scan() -> None:
+    """二维末尾连续计数与逐列扫描一致，NaN 与 0 均中断连续。"""
+    rng = np.random.default_rng(3)
+    pct = rng.normal(0.0, 1.0, size=(30, 200))
+    pct[rng.random(pct.shape) < 0.05] = np.nan
+    pct[rng.random(pct.shape) < 0.05] = 0.0
+    pct[:, 0] = 1.0
+    pct[:, 1] = -1.0
+
+    up, down = trailing_sign_runs(pct)
+
+    assert up.tolist() == [_scan_trailing(pct[:, col] > 0.0) for col in range(pct.shape[1])]
+    assert down.tolist() == [_scan_trailing(pct[:, col] < 0.0) for col in range(pct.shape[1])]
+    assert up[0] == 30 and down[1] == 30
+    assert trailing_run_lengths(np.array([True, False, True, True])).tolist() == [2]
+    assert trailing_run_lengths(np.zeros((0, 3), dtype=bool)).tolist() == [0, 0, 0]
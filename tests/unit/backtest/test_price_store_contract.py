@@ -0,0 +1,144 @@
+"""
+列式行情存储契约测试（PriceStore）。
+
+覆盖：单日行情 / 昨收查找与逐行字典查找表口径一致（停牌缺口、重复行、
+收盘价为 0 / 缺失）、无记录返回 None、内存占用低于逐行字典；窗口外昨收查询与
+全量 LAG(close) 口径一致（有 / 无交易日历、停牌复牌、新股），首日昨收可由其补齐。
+"""
+from __future__ import annotations
+
+import sys
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.price_store import PRICE_FIELDS, PriceStore, read_prev_close_lookup
+
+
+def _price_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    trade_dates = pd.bdate_range("2025-01-02", periods=40).strftime("%Y%m%d").tolist()
+    rows: list[dict[str, object]] = []
+    for code in (f"{index:06d}" for index in range(1, 60)):
+        for trade_date in trade_dates:
+            if rng.random() < 0.15:
+                continue
+            close = float(rng.uniform(3.0, 60.0)) if rng.random() > 0.03 else None
+            rows.append(
+                {
+                    "trade_date": trade_date,
+                    "stock_code": code,
+                    "open": float(rng.uniform(3.0, 60.0)),
+                    "high": float(rng.uniform(3.0, 60.0)),
+                    "low": float(rng.uniform(3.0, 60.0)),
+                    "close": close,
+                    "vol": float(rng.integers(0, 10_000_000)),
+                    "amount": float(rng.uniform(0.0, 1e9)),
+                }
+            )
+    frame = pd.DataFrame(rows)
+    # 重复键：后出现的一条生效
+    duplicate = frame.iloc[[5]].assign(open=99.0)
+    return pd.concat([frame, duplicate], ignore_index=True)
+
+
+def _dict_lookups(
+    frame: pd.DataFrame,
+) -> tuple[dict[tuple[str, str], dict[str, float]], dict[tuple[str, str], float]]:
+    working = frame.copy()
+    for column in PRICE_FIELDS:
+        working[column] = pd.to_numeric(working[column], errors="coerce").fillna(0.0)
+    working = working.drop_duplicates(subset=["trade_date", "stock_code"], keep="last")
+    bars = working.set_index(["trade_date", "stock_code"])[list(PRICE_FIELDS)].to_dict("index")
+    working = working.sort_values(["stock_code", "trade_date"])
+    working["prev_close"] = working.groupby("stock_code")["close"].shift(1)
+    valid = working[working["prev_close"] > 0.0]
+    keys = zip(valid["trade_date"], valid["stock_code"], strict=True)
+    prev_close = dict(zip(keys, valid["prev_close"].astype(float), strict=True))
+    return bars, prev_close
+
+
+def test_lookups_match_row_dictionaries() -> None:
+    """逐键查找结果与逐行字典查找表完全一致。"""
+    frame = _price_frame()
+    store = PriceStore.from_frame(frame)
+    bars, prev_close = _dict_lookups(frame)
+
+    assert len(store) == len(bars)
+    for trade_date in store.trade_dates:
+        for stock_code in store.stock_codes:
+            key = (trade_date, stock_code)
+            assert store.bar(trade_date, stock_code) == bars.get(key)
+            assert store.prev_close(trade_date, stock_code) == prev_close.get(key)
+    assert store.bar("20990101", "000001") is None
+    assert store.prev_close("20250102", "999999") is None
+    assert len(PriceStore.empty()) == 0
+
+
+def test_store_is_more_compact_than_row_dictionaries() -> None:
+    """二维数组布局的内存占用显著低于逐行字典。"""
+    frame = _price_frame()
+    store = PriceStore.from_frame(frame)
+    bars, _ = _dict_lookups(frame)
+
+    dict_bytes = sys.getsizeof(bars) + sum(
+        sys.getsizeof(key) + sys.getsizeof(value) for key, value in bars.items()
+    )
+    assert store.nbytes * 5 < dict_bytes
+
+
+def _lag_prev_close(connection: duckdb.DuckDBPyConnection, trade_date: str) -> dict[str, float]:
+    rows = connection.execute(
+        "WITH shifted AS ("
+        "SELECT trade_date, stock_code, "
+        "LAG(close) OVER (PARTITION BY stock_code ORDER BY trade_date) AS prev_close "
+        "FROM raw_daily WHERE trade_date <= ?"
+        ") SELECT stock_code, prev_close FROM shifted WHERE trade_date = ?",
+        [trade_date, trade_date],
+    ).fetchall()
+    return {
+        str(code): float(value) for code, value in rows if value is not None and value > 0.0
+    }
+
+
+@pytest.mark.parametrize("with_calendar", [True, False])
+def test_prev_close_lookup_matches_full_history_lag(with_calendar: bool) -> None:
+    """逐交易日的窗口外昨收与全量 LAG(close) 一致（停牌复牌、新股、收盘价缺失）。"""
+    # 同键重复行会使 LAG 自身取值不确定，此处按唯一键比较
+    frame = _price_frame()[["trade_date", "stock_code", "close"]].drop_duplicates(
+        subset=["trade_date", "stock_code"], keep="last"
+    )
+    trade_dates = sorted(frame["trade_date"].unique())
+    with duckdb.connect() as connection:
+        connection.register("incoming", frame)
+        connection.execute("CREATE TABLE raw_daily AS SELECT * FROM incoming")
+        if with_calendar:
+            calendar = pd.DataFrame({"trade_date": trade_dates, "is_open": 1})
+            connection.register("calendar", calendar)
+            connection.execute("CREATE TABLE raw_trade_cal AS SELECT * FROM calendar")
+        for trade_date in trade_dates:
+            expected = _lag_prev_close(connection, trade_date)
+            assert read_prev_close_lookup(connection, trade_date=trade_date) == expected
+
+
+def test_prev_close_seed_fills_first_window_rows() -> None:
+    """窗口内各股首条行情的昨收取窗口前最后收盘价，其余交易日不受影响。"""
+    frame = _price_frame()
+    start = sorted(frame["trade_date"].unique())[10]
+    window = frame[frame["trade_date"] >= start]
+    with duckdb.connect() as connection:
+        connection.register("incoming", frame)
+        connection.execute("CREATE TABLE raw_daily AS SELECT * FROM incoming")
+        seed = read_prev_close_lookup(
+            connection, trade_date=start, stock_codes=window["stock_code"].unique().tolist()
+        )
+    _, full_prev_close = _dict_lookups(frame)
+    store = PriceStore.from_frame(window, prev_close_seed=seed)
+    for trade_date in store.trade_dates:
+        for stock_code in store.stock_codes:
+            if store.bar(trade_date, stock_code) is None:
+                continue
+            expected = full_prev_close.get((trade_date, stock_code))
+            assert store.prev_close(trade_date, stock_code) == expected
@@ -22,6 +22,20 @@ _ISOLATED_ENV_KEYS = (
     "TUSHARE_RATE_LIMIT_PER_MIN",
     "TUSHARE_PRIMARY_RATE_LIMIT_PER_MIN",
     "TUSHARE_FALLBACK_RATE_LIMIT_PER_MIN",
+    "TUSHARE_RATE_LIMIT_BURST",
+    "TUSHARE_RATE_LIMIT_SCOPE",
+    "TUSHARE_CHANNEL_SCHEDULE",
+    "TUSHARE_CHANNEL_BREAKER_FAILURES",
+    "TUSHARE_CHANNEL_BREAKER_COOLDOWN_SECONDS",
+    "TUSHARE_FETCH_CONCURRENCY",
+    "TUSHARE_RANGE_ROW_CAP",
+    "TUSHARE_FETCH_BATCH_MODE",
+    "DUCKDB_WRITER_GROUP_COMMIT_MS",
+    "DUCKDB_WRITER_MAX_BATCH",
+    "DUCKDB_WRITER_IDLE_CLOSE_MS",
+    "STORAGE_BACKEND_L1",
+    "STORAGE_BACKEND_L2",
+    "STORAGE_BACKEND_L3",
     "FLAT_THRESHOLD",
     "MIN_COVERAGE_RATIO",
     "STALE_HARD_LIMIT_DAYS",
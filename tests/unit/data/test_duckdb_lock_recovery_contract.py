@@ -2,11 +2,17 @@
 DuckDB 文件锁恢复机制契约测试。
 
 覆盖：写入时遇到文件锁的自动重试、重试耗尽后的审计记录、
-同 trade_date 写入幂等性、以及 quality_store 的锁重试能力。
+同 trade_date 写入幂等性、quality_store 的锁重试能力，
+POSIX 进程锁的持锁元数据、超时诊断与等待统计，
+以及 L1 采集等待网络期间不持有写锁、拉取完成后只打开一个写会话。
 """
 from __future__ import annotations
 
 import json
+import os
+import subprocess
+import sys
+import time
 from pathlib import Path
 from typing import Any
 
@@ -14,11 +20,21 @@ import duckdb
 import pytest
 
 from src.config.config import Config
+from src.data.fetch_batch_pipeline import _lock_wait_stats_delta, _write_throughput_benchmark
 from src.data.fetcher import TuShareFetcher
-from src.data.l1_pipeline import run_l1_collection
+from src.data.l1_pipeline import run_l1_collection, run_l1_window_collection
 from src.data.quality_store import init_quality_context
-from src.data.repositories.base import BaseRepository, DuckDBLockRecoveryError
+from src.data.repositories.base import (
+    BaseRepository,
+    DuckDBLockRecoveryError,
+    open_repository_write_session,
+)
 from src.data.repositories.daily import DailyRepository
+from src.db.process_lock import (
+    acquire_duckdb_interprocess_lock,
+    duckdb_lock_wait_snapshot,
+    read_duckdb_lock_holder,
+)
 
 
 class _DummyRepository(BaseRepository):
@@ -71,8 +87,8 @@ def test_l1_collection_emits_lock_recovery_audit_fields(
     """锁重试耗尽时，错误清单应包含审计字段（PID/重试次数/等待时间）。"""
     config = _build_config(tmp_path, ".env.s3ar.lock.audit")
 
-    def _raise_lock_error(self: DailyRepository, data: Any) -> int:
-        del data
+    def _raise_lock_error(self: DailyRepository, data: Any, **kwargs: Any) -> int:
+        del data, kwargs
         raise DuckDBLockRecoveryError(
             database_path=Path(self.config.duckdb_dir) / "emotionquant.duckdb",
             retry_attempts=3,
@@ -159,3 +175,251 @@ def test_quality_store_retries_duckdb_lock_and_succeeds(
     thresholds = init_quality_context(database_path, config=config)
     assert attempts["count"] == 3
     assert float(thresholds["min_coverage_ratio"]) == pytest.approx(config.min_coverage_ratio, abs=1e-12)
+
+
+_HOLD_LOCK_SCRIPT = """
+import sys, time
+from pathlib import Path
+from src.db.process_lock import acquire_duckdb_interprocess_lock
+
+database_path = Path(sys.argv[1])
+with acquire_duckdb_interprocess_lock(database_path, timeout_seconds=10.0, poll_seconds=0.01):
+    Path(sys.argv[2]).write_text("held", encoding="utf-8")
+    time.sleep(float(sys.argv[3]))
+"""
+
+
+_WAIT_LOCK_SCRIPT = """
+import sys
+from pathlib import Path
+from src.db.process_lock import acquire_duckdb_interprocess_lock
+
+with acquire_duckdb_interprocess_lock(Path(sys.argv[1]), timeout_seconds=30.0, poll_seconds=0.01):
+    with Path(sys.argv[2]).open("a", encoding="utf-8") as handle:
+        handle.write(sys.argv[3] + "\\n")
+"""
+
+
+def _start_lock_holder(tmp_path: Path, database_path: Path, hold_seconds: float) -> Any:
+    """在子进程中持有进程锁，返回 Popen（等到子进程实际持锁后才返回）。"""
+    marker = tmp_path / f"held_{time.monotonic_ns()}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            _HOLD_LOCK_SCRIPT,
+            str(database_path),
+            str(marker),
+            str(hold_seconds),
+        ],
+        cwd=str(Path(__file__).resolve().parents[3]),
+    )
+    deadline = time.monotonic() + 30.0
+    while not marker.exists():
+        assert process.poll() is None, "lock holder exited early"
+        assert time.monotonic() < deadline, "lock holder did not start"
+        time.sleep(0.02)
+    return process
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX only")
+def test_interprocess_lock_timeout_reports_holder_metadata(tmp_path: Path) -> None:
+    """其它进程持锁时超时，错误携带持锁者 pid/command/since，等待统计记录一次超时。"""
+    database_path = tmp_path / "eq.duckdb"
+    holder = _start_lock_holder(tmp_path, database_path, hold_seconds=5.0)
+    try:
+        metadata = read_duckdb_lock_holder(database_path)
+        assert metadata["pid"] == str(holder.pid)
+        assert metadata["command"]
+        assert metadata["since"]
+        before = duckdb_lock_wait_snapshot()
+        with pytest.raises(DuckDBLockRecoveryError) as excinfo:
+            with open_repository_write_session(
+                database_path,
+                process_lock_timeout_seconds=0.3,
+                process_lock_poll_seconds=0.02,
+            ):
+                pass
+    finally:
+        holder.terminate()
+        holder.wait(timeout=10)
+
+    error = excinfo.value
+    assert error.lock_holder_pid == str(holder.pid)
+    assert error.lock_holder_since == metadata["since"]
+    assert error.lock_wait_seconds >= 0.3
+    after = duckdb_lock_wait_snapshot()
+    assert after["timeouts"] - before["timeouts"] == 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX only")
+def test_interprocess_lock_is_granted_after_holder_exits_and_reentrant_in_process(
+    tmp_path: Path,
+) -> None:
+    """持锁进程退出后等待者获得锁；同进程内嵌套/并发获取不互相阻塞，释放后清理元数据。"""
+    database_path = tmp_path / "eq.duckdb"
+    holder = _start_lock_holder(tmp_path, database_path, hold_seconds=0.5)
+    before = duckdb_lock_wait_snapshot()
+    try:
+        with acquire_duckdb_interprocess_lock(
+            database_path, timeout_seconds=10.0, poll_seconds=0.02
+        ):
+            assert read_duckdb_lock_holder(database_path)["pid"] == str(os.getpid())
+            with acquire_duckdb_interprocess_lock(
+                database_path, timeout_seconds=0.1, poll_seconds=0.02
+            ):
+                pass
+    finally:
+        holder.wait(timeout=10)
+
+    after = duckdb_lock_wait_snapshot()
+    assert after["acquired"] - before["acquired"] == 2
+    assert after["waited"] - before["waited"] >= 1
+    assert after["wait_seconds_total"] - before["wait_seconds_total"] > 0.0
+    assert read_duckdb_lock_holder(database_path) == {}
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX only")
+def test_interprocess_lock_waiters_are_served_in_arrival_order(tmp_path: Path) -> None:
+    """多个进程排队等待时按到达顺序获得锁（队列公平）。"""
+    database_path = tmp_path / "eq.duckdb"
+    queue_path = tmp_path / "eq.duckdb.lock.queue"
+    order_path = tmp_path / "order.txt"
+    repo_root = str(Path(__file__).resolve().parents[3])
+    holder = _start_lock_holder(tmp_path, database_path, hold_seconds=60.0)
+    waiters = []
+    try:
+        for name in ("first", "second", "third"):
+            waiters.append(
+                subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-c",
+                        _WAIT_LOCK_SCRIPT,
+                        str(database_path),
+                        str(order_path),
+                        name,
+                    ],
+                    cwd=repo_root,
+                )
+            )
+            deadline = time.monotonic() + 30.0
+            while queue_path.read_text(encoding="utf-8").count(f"{waiters[-1].pid}:") == 0:
+                assert time.monotonic() < deadline, "waiter did not enqueue"
+                time.sleep(0.02)
+        # 持锁进程被杀时内核释放 flock，排队者依次接替
+        holder.kill()
+        for waiter in waiters:
+            assert waiter.wait(timeout=60) == 0
+    finally:
+        if holder.poll() is None:
+            holder.kill()
+        holder.wait(timeout=10)
+        for waiter in waiters:
+            if waiter.poll() is None:
+                waiter.kill()
+
+    assert order_path.read_text(encoding="utf-8").split() == ["first", "second", "third"]
+
+
+def test_throughput_benchmark_reports_lock_wait(tmp_path: Path) -> None:
+    """吞吐报告输出 DuckDB 进程锁等待统计（本次运行增量）。"""
+    path = tmp_path / "throughput_benchmark.md"
+    _write_throughput_benchmark(
+        path,
+        total_batches=1,
+        workers=1,
+        execution_mode="sequential",
+        records=[],
+        wall_seconds=1.0,
+        lock_wait_stats=_lock_wait_stats_delta(
+            {"acquired": 2.0, "waited": 1.0, "timeouts": 0.0, "wait_seconds_total": 0.5},
+            {
+                "acquired": 5.0,
+                "waited": 2.0,
+                "timeouts": 1.0,
+                "wait_seconds_total": 1.75,
+                "wait_seconds_max": 0.9,
+            },
+        ),
+    )
+    text = path.read_text(encoding="utf-8")
+    assert (
+        "- duckdb_lock_wait: acquired=3 waited=1 timeouts=1 "
+        "wait_seconds_total=1.250000 wait_seconds_max=0.900000"
+    ) in text
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX only")
+def test_l1_collection_holds_no_write_lock_while_fetching(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """L1 单日 / 窗口采集等待网络期间不持有进程锁，写会话只在落盘时打开。"""
+    config = _build_config(tmp_path, ".env.s3ar.lock.fetch_scope")
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    holders: list[dict[str, str]] = []
+    original_fetch = DailyRepository.fetch
+    original_fetch_range = DailyRepository.fetch_range
+
+    def _fetch(self: DailyRepository, *args: Any, **kwargs: Any) -> Any:
+        holders.append(read_duckdb_lock_holder(database_path))
+        return original_fetch(self, *args, **kwargs)
+
+    def _fetch_range(self: DailyRepository, *args: Any, **kwargs: Any) -> Any:
+        holders.append(read_duckdb_lock_holder(database_path))
+        return original_fetch_range(self, *args, **kwargs)
+
+    monkeypatch.setattr(DailyRepository, "fetch", _fetch)
+    monkeypatch.setattr(DailyRepository, "fetch_range", _fetch_range)
+    before = duckdb_lock_wait_snapshot()
+    run_l1_collection(
+        trade_date="20260220",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(max_retries=1),
+    )
+    run_l1_window_collection(
+        start_date="20260223",
+        end_date="20260227",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(max_retries=1),
+    )
+
+    assert len(holders) == 2
+    assert holders == [{}, {}]
+    assert duckdb_lock_wait_snapshot()["acquired"] - before["acquired"] > 0
+
+
+def test_l1_collection_persists_all_datasets_in_one_write_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """L1 单日 / 窗口采集拉取完成后只打开一个写会话，全部数据集在一个事务内落盘。"""
+    config = _build_config(tmp_path, ".env.s3ar.lock.single_session")
+    sessions: list[Any] = []
+    original_open = BaseRepository.open_write_session
+
+    def _open_write_session(self: BaseRepository) -> Any:
+        sessions.append(self.table_name)
+        return original_open(self)
+
+    monkeypatch.setattr(BaseRepository, "open_write_session", _open_write_session)
+    result = run_l1_collection(
+        trade_date="20260220",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(max_retries=1),
+    )
+    assert len(sessions) == 1
+    assert result.raw_counts["raw_daily"] > 0
+
+    sessions.clear()
+    window = run_l1_window_collection(
+        start_date="20260223",
+        end_date="20260227",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(max_retries=1),
+    )
+    assert len(sessions) == 1
+    assert window.raw_counts["raw_daily"] > 0
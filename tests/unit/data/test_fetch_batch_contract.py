@@ -87,6 +87,7 @@ def test_fetch_batch_uses_trade_cal_window_once_and_runs_only_open_days(
 ) -> None:
     """应只查询一次交易日历，且仅对开市日执行 L1 采集。"""
     monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TUSHARE_FETCH_BATCH_MODE", "daily")
     config = Config.from_env(env_file=None)
     called_trade_dates: list[str] = []
 
@@ -220,6 +221,7 @@ def test_fetch_batch_writes_trade_date_heartbeat_within_batch(
 ) -> None:
     """批次内每个交易日处理时应更新心跳状态（当前交易日/索引/总数）。"""
     monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("TUSHARE_FETCH_BATCH_MODE", "daily")
     config = Config.from_env(env_file=None)
     called_trade_dates: list[str] = []
 
@@ -312,3 +314,111 @@ def test_fetch_batch_parallel_workers_process_month_batches(tmp_path: Path, monk
     assert result.completed_batches == 3
     benchmark = result.throughput_benchmark_path.read_text(encoding="utf-8")
     assert "execution_mode: real_tushare_parallel_batch_write_lock" in benchmark
+
+
+def test_fetch_batch_parallel_workers_share_channel_rate_limiter(
+    tmp_path: Path, monkeypatch
+) -> None:
+    """并行 worker 创建的 fetcher 应共用同一组通道令牌桶，并在吞吐报告中输出限流统计。"""
+    monkeypatch.chdir(tmp_path)
+    config = Config.from_env(env_file=None)
+    limiters: list[object] = []
+
+    class _FakeFetcher:
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            del args
+            limiters.append(kwargs.get("rate_limiter"))
+
+        def fetch_with_retry(self, api_name: str, params: dict[str, str]) -> list[dict[str, object]]:
+            del api_name, params
+            return [{"trade_date": "20260102", "is_open": 1}]
+
+    def _fake_run_l1_window_collection(**kwargs: object) -> SimpleNamespace:
+        del kwargs
+        return SimpleNamespace(
+            has_error=False,
+            trade_dates=("20260102",),
+            first_failed=None,
+        )
+
+    monkeypatch.setattr(fetch_batch_pipeline, "_has_live_tushare_token", lambda _cfg: True)
+    monkeypatch.setattr(fetch_batch_pipeline, "TuShareFetcher", _FakeFetcher)
+    monkeypatch.setattr(
+        fetch_batch_pipeline, "run_l1_window_collection", _fake_run_l1_window_collection
+    )
+
+    result = run_fetch_batch(
+        start_date="20260101",
+        end_date="20260331",
+        batch_size=1,
+        batch_unit="month",
+        workers=3,
+        config=config,
+    )
+
+    assert result.status == "completed"
+    assert len(limiters) == 3
+    assert limiters[0] is not None
+    assert all(item is limiters[0] for item in limiters)
+    benchmark = result.throughput_benchmark_path.read_text(encoding="utf-8")
+    assert "- rate_limit_channels:" in benchmark
+    assert "channel=primary" in benchmark
+
+
+def test_fetch_batch_window_uses_range_collection_by_default(
+    tmp_path: Path, monkeypatch
+) -> None:
+    """默认 range 模式下每个 batch 调用一次窗口采集；daily 模式逐交易日采集。"""
+    monkeypatch.chdir(tmp_path)
+    window_calls: list[tuple[str, str]] = []
+    day_calls: list[str] = []
+
+    class _FakeFetcher:
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            del args, kwargs
+
+        def fetch_with_retry(self, api_name: str, params: dict[str, str]) -> list[dict[str, object]]:
+            del api_name, params
+            return [
+                {"trade_date": "20260105", "is_open": 1},
+                {"trade_date": "20260106", "is_open": 1},
+            ]
+
+    def _fake_run_l1_window_collection(**kwargs: object) -> SimpleNamespace:
+        window_calls.append((str(kwargs["start_date"]), str(kwargs["end_date"])))
+        return SimpleNamespace(
+            has_error=False,
+            trade_dates=("20260105", "20260106"),
+            first_failed=None,
+        )
+
+    def _fake_run_l1_collection(**kwargs: object) -> SimpleNamespace:
+        day_calls.append(str(kwargs["trade_date"]))
+        return SimpleNamespace(
+            has_error=False,
+            error_manifest_path=Path("artifacts/error_manifest_sample.json"),
+        )
+
+    monkeypatch.setattr(fetch_batch_pipeline, "_has_live_tushare_token", lambda _cfg: True)
+    monkeypatch.setattr(fetch_batch_pipeline, "TuShareFetcher", _FakeFetcher)
+    monkeypatch.setattr(
+        fetch_batch_pipeline, "run_l1_window_collection", _fake_run_l1_window_collection
+    )
+    monkeypatch.setattr(fetch_batch_pipeline, "run_l1_collection", _fake_run_l1_collection)
+    window = fetch_batch_pipeline.BatchWindow(
+        batch_id=1, start_date="20260105", end_date="20260106"
+    )
+
+    range_record = fetch_batch_pipeline._execute_batch_window(
+        window, config=Config.from_env(env_file=None)
+    )
+    monkeypatch.setenv("TUSHARE_FETCH_BATCH_MODE", "daily")
+    daily_record = fetch_batch_pipeline._execute_batch_window(
+        window, config=Config.from_env(env_file=None)
+    )
+
+    assert range_record.status == "success"
+    assert range_record.open_trade_dates == 2
+    assert window_calls == [("20260105", "20260106")]
+    assert daily_record.status == "success"
+    assert day_calls == ["20260105", "20260106"]
@@ -403,3 +403,127 @@ def test_fetcher_applies_fallback_channel_rate_limit_when_primary_unlimited(
 
     assert len(clock.sleeps) == 1
     assert clock.sleeps[0] == pytest.approx(2.0, abs=1e-6)
+
+
+def _install_dual_channel_fakes(
+    monkeypatch: pytest.MonkeyPatch,
+    counters: dict[str, int],
+    *,
+    primary_fails: dict[str, bool],
+) -> None:
+    class FakePrimaryProApi:
+        def daily(self, **_: Any) -> list[dict[str, Any]]:
+            counters["primary"] += 1
+            if primary_fails["value"]:
+                raise RuntimeError("primary_temporarily_unavailable")
+            return [{"ts_code": "000001.SZ", "trade_date": "20260215", "channel": "primary"}]
+
+    class FakeFallbackProApi:
+        def daily(self, **_: Any) -> list[dict[str, Any]]:
+            counters["fallback"] += 1
+            return [{"ts_code": "000001.SZ", "trade_date": "20260215", "channel": "fallback"}]
+
+    fake_tinyshare = types.SimpleNamespace(pro_api=lambda _token: FakePrimaryProApi())
+    fake_tushare = types.SimpleNamespace(pro_api=lambda _token: FakeFallbackProApi())
+    monkeypatch.setitem(__import__("sys").modules, "tinyshare", fake_tinyshare)
+    monkeypatch.setitem(__import__("sys").modules, "tushare", fake_tushare)
+
+
+def _balanced_config(tmp_path, name: str) -> Config:
+    env_file = tmp_path / name
+    env_file.write_text(
+        "ENVIRONMENT=test\n"
+        "TUSHARE_PRIMARY_TOKEN=trial_token\n"
+        "TUSHARE_PRIMARY_SDK_PROVIDER=tinyshare\n"
+        "TUSHARE_FALLBACK_TOKEN=official_token\n"
+        "TUSHARE_FALLBACK_SDK_PROVIDER=tushare\n"
+        "TUSHARE_PRIMARY_RATE_LIMIT_PER_MIN=6000\n"
+        "TUSHARE_FALLBACK_RATE_LIMIT_PER_MIN=3000\n"
+        "TUSHARE_CHANNEL_SCHEDULE=balanced\n"
+        "TUSHARE_CHANNEL_BREAKER_FAILURES=2\n"
+        "TUSHARE_CHANNEL_BREAKER_COOLDOWN_SECONDS=60\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def test_fetcher_balanced_schedule_splits_calls_by_channel_rate_limit(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """balanced 模式下应按两路限速（2:1）加权分流，兜底 token 配额不再闲置。"""
+    counters = {"primary": 0, "fallback": 0}
+    _install_dual_channel_fakes(monkeypatch, counters, primary_fails={"value": False})
+    clock = FakeClock()
+    fetcher = TuShareFetcher(
+        config=_balanced_config(tmp_path, ".env.fetcher.balanced"),
+        max_retries=1,
+        now_fn=clock.now,
+        sleep_fn=clock.sleep,
+    )
+
+    for _ in range(9):
+        fetcher.fetch_with_retry("daily", {"trade_date": "20260215"})
+
+    assert fetcher.channel_schedule == "balanced"
+    assert counters == {"primary": 6, "fallback": 3}
+
+
+def test_fetcher_balanced_schedule_ejects_failing_channel_until_cooldown(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """连续失败的通道应被熔断剔除，冷却期内不再付出失败往返；冷却后半开试探恢复。"""
+    counters = {"primary": 0, "fallback": 0}
+    primary_fails = {"value": True}
+    _install_dual_channel_fakes(monkeypatch, counters, primary_fails=primary_fails)
+    clock = FakeClock()
+    fetcher = TuShareFetcher(
+        config=_balanced_config(tmp_path, ".env.fetcher.breaker"),
+        max_retries=1,
+        now_fn=clock.now,
+        sleep_fn=clock.sleep,
+    )
+
+    for _ in range(10):
+        rows = fetcher.fetch_with_retry("daily", {"trade_date": "20260215"})
+        assert rows[0]["channel"] == "fallback"
+
+    assert counters["primary"] == 2
+    health = fetcher.channel_health_snapshot()
+    assert health["primary"]["ejected"] is True
+    assert health["primary"]["ejections"] == 1
+    assert health["primary"]["error_rate_ewma"] > health["fallback"]["error_rate_ewma"]
+
+    primary_fails["value"] = False
+    clock.current += 61.0
+    channels = [
+        fetcher.fetch_with_retry("daily", {"trade_date": "20260215"})[0]["channel"]
+        for _ in range(3)
+    ]
+
+    assert "primary" in channels
+    assert fetcher.channel_health_snapshot()["primary"]["ejected"] is False
+
+
+def test_fetcher_failover_schedule_keeps_primary_first(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """默认 failover 模式保持主路优先，健康时不分流到兜底通道。"""
+    counters = {"primary": 0, "fallback": 0}
+    _install_dual_channel_fakes(monkeypatch, counters, primary_fails={"value": False})
+    env_file = tmp_path / ".env.fetcher.failover"
+    env_file.write_text(
+        "ENVIRONMENT=test\n"
+        "TUSHARE_PRIMARY_TOKEN=trial_token\n"
+        "TUSHARE_PRIMARY_SDK_PROVIDER=tinyshare\n"
+        "TUSHARE_FALLBACK_TOKEN=official_token\n"
+        "TUSHARE_FALLBACK_SDK_PROVIDER=tushare\n"
+        "TUSHARE_RATE_LIMIT_PER_MIN=0\n",
+        encoding="utf-8",
+    )
+    fetcher = TuShareFetcher(config=Config.from_env(env_file=str(env_file)), max_retries=1)
+
+    for _ in range(4):
+        fetcher.fetch_with_retry("daily", {"trade_date": "20260215"})
+
+    assert fetcher.channel_schedule == "failover"
+    assert counters == {"primary": 4, "fallback": 0}
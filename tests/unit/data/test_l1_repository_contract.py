@@ -2,19 +2,23 @@
 L1 数据采集流水线契约测试。
 
 覆盖：正常采集落盘、缺失交易日历处理、休市日处理、
-低频数据集月内去重、index_daily 必填 ts_code 回退等场景。
+低频数据集月内去重、index_daily 必填 ts_code 回退、数据集并发拉取，
+以及窗口区间采集（按行数上限分块、按 trade_date 拆分落盘）等场景。
 """
 from __future__ import annotations
 
 import json
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
 import duckdb
 
 from src.config.config import Config
-from src.data.fetcher import TuShareFetcher
-from src.data.l1_pipeline import run_l1_collection
+from src.data.fetcher import SimulatedTuShareClient, TuShareFetcher
+from src.data.l1_pipeline import run_l1_collection, run_l1_window_collection
+from src.data.repositories.daily import DailyRepository
 
 
 class MissingTradeCalClient:
@@ -89,13 +93,44 @@ class StrictIndexDailyClient:
         raise ValueError(f"unsupported api: {api_name}")
 
 
-def _build_config(tmp_path: Path) -> Config:
+class InFlightProbeClient(StrictIndexDailyClient):
+    """记录同时在途的接口调用数，用于验证数据集并发拉取。"""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def call(self, api_name: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.05)
+            return super().call(api_name, params)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TruncatingClient(SimulatedTuShareClient):
+    """模拟接口单次返回行数上限：超过 row_cap 的结果被截断。"""
+    def __init__(self, row_cap: int) -> None:
+        self.row_cap = row_cap
+        self.range_calls: list[tuple[str, str]] = []
+
+    def call(self, api_name: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        if "start_date" in params and api_name == "daily":
+            self.range_calls.append((str(params["start_date"]), str(params["end_date"])))
+        return super().call(api_name, params)[: self.row_cap]
+
+
+def _build_config(tmp_path: Path, extra: str = "") -> Config:
     """构建测试用临时 Config，数据路径指向 tmp_path。"""
     env_file = tmp_path / ".env.s0b"
     data_path = tmp_path / "eq_data"
     env_file.write_text(
         f"DATA_PATH={data_path}\n"
-        "ENVIRONMENT=test\n",
+        "ENVIRONMENT=test\n" + extra,
         encoding="utf-8",
     )
     return Config.from_env(env_file=str(env_file))
@@ -211,3 +246,129 @@ def test_l1_collection_fallbacks_when_index_daily_requires_ts_code(tmp_path: Pat
 
     assert result.has_error is False
     assert result.raw_counts["raw_index_daily"] > 0
+
+
+def test_l1_collection_fetches_datasets_concurrently_with_stable_outputs(tmp_path: Path) -> None:
+    """数据集接口调用应并发发出，且计数/错误输出顺序与完成顺序无关。"""
+    config = _build_config(tmp_path, "TUSHARE_FETCH_CONCURRENCY=4\n")
+    client = InFlightProbeClient()
+
+    result = run_l1_collection(
+        trade_date="20260215",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(client=client, max_retries=1),
+    )
+
+    assert result.has_error is False
+    assert client.max_in_flight >= 2
+    assert list(result.raw_counts) == [
+        "raw_daily",
+        "raw_daily_basic",
+        "raw_index_daily",
+        "raw_index_member",
+        "raw_index_classify",
+        "raw_stock_basic",
+        "raw_trade_cal",
+        "raw_limit_list",
+    ]
+    assert all(count > 0 for count in result.raw_counts.values())
+
+
+def test_l1_collection_serial_when_fetch_concurrency_is_one(tmp_path: Path) -> None:
+    """TUSHARE_FETCH_CONCURRENCY=1 时退化为串行拉取。"""
+    config = _build_config(tmp_path, "TUSHARE_FETCH_CONCURRENCY=1\n")
+    client = InFlightProbeClient()
+
+    result = run_l1_collection(
+        trade_date="20260215",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(client=client, max_retries=1),
+    )
+
+    assert result.has_error is False
+    assert client.max_in_flight == 1
+
+
+def test_l1_window_collection_fetches_each_api_once_per_window(tmp_path: Path) -> None:
+    """窗口采集应对区间接口整窗拉取一次，再按 trade_date 拆分落盘并逐日评估门禁。"""
+    config = _build_config(tmp_path, "TUSHARE_RANGE_ROW_CAP=100000\n")
+    fetcher = TuShareFetcher(max_retries=1)
+
+    result = run_l1_window_collection(
+        start_date="20260209",
+        end_date="20260215",
+        source="tushare",
+        config=config,
+        fetcher=fetcher,
+    )
+
+    assert result.has_error is False
+    assert result.trade_dates == ("20260209", "20260210", "20260211", "20260212", "20260213")
+    calls_by_api: dict[str, int] = {}
+    for item in fetcher.retry_report:
+        calls_by_api[item.api_name] = calls_by_api.get(item.api_name, 0) + 1
+    assert calls_by_api["daily"] == 1
+    assert calls_by_api["daily_basic"] == 1
+    assert calls_by_api["limit_list"] == 1
+    assert calls_by_api["trade_cal"] == 1
+    assert [item.trade_date for item in result.day_results] == list(result.trade_dates)
+    assert all(item.raw_counts["raw_daily"] == 31 for item in result.day_results)
+    assert (result.artifacts_dir / "raw_counts.json").exists()
+    assert (result.day_results[0].artifacts_dir / "l1_quality_gate_report.md").exists()
+
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        per_day = connection.execute(
+            "SELECT trade_date, COUNT(*) FROM raw_daily GROUP BY trade_date ORDER BY trade_date"
+        ).fetchall()
+        gate_days = connection.execute(
+            "SELECT COUNT(DISTINCT trade_date) FROM data_readiness_gate"
+        ).fetchone()[0]
+    assert [(str(day), int(count)) for day, count in per_day] == [
+        (day, 31) for day in result.trade_dates
+    ]
+    assert gate_days == 5
+
+    rerun = run_l1_window_collection(
+        start_date="20260209",
+        end_date="20260215",
+        source="tushare",
+        config=config,
+        fetcher=TuShareFetcher(max_retries=1),
+    )
+    assert rerun.has_error is False
+    assert rerun.raw_counts["raw_index_member"] == 0
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        total = connection.execute("SELECT COUNT(*) FROM raw_daily").fetchone()[0]
+    assert total == 31 * 5
+
+
+def test_range_fetch_splits_chunks_when_row_cap_truncates(tmp_path: Path) -> None:
+    """单次返回触及行数上限时应缩小区间重取，按实测每日行数分块，不丢数据。"""
+    config = _build_config(tmp_path)
+    client = TruncatingClient(row_cap=70)
+    repository = DailyRepository(config)
+    repository.range_rows_per_day_hint = 1
+
+    rows = repository.fetch_range(
+        trade_dates=["20260209", "20260210", "20260211", "20260212", "20260213"],
+        fetcher=TuShareFetcher(client=client, max_retries=1),
+        row_cap=70,
+    )
+
+    assert rows.num_rows == 31 * 5
+    assert sorted(set(rows.column("trade_date").to_pylist())) == [
+        "20260209",
+        "20260210",
+        "20260211",
+        "20260212",
+        "20260213",
+    ]
+    assert client.range_calls == [
+        ("20260209", "20260213"),
+        ("20260209", "20260210"),
+        ("20260211", "20260212"),
+        ("20260213", "20260213"),
+    ]
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
-from src.data.l2_pipeline import _build_industry_snapshot_sw31, _build_market_snapshot
+from src.data.l2_pipeline import (
+    _build_industry_snapshot_sw31,
+    _build_market_snapshot,
+    _winsorized_median,
+)
 
 
 def test_market_snapshot_uses_pct_chg_and_counts_touched_limit_up_with_z() -> None:
@@ -89,3 +94,95 @@ def test_industry_snapshot_sw31_falls_back_to_previous_valuation_when_sample_sma
     assert row.industry_pe_ttm == 15.0
     assert row.industry_pb == 1.8
     assert row.top5_pct_chg[0] == 8.0
+
+
+def test_industry_snapshot_sw31_partitions_match_per_industry_reference() -> None:
+    rng = np.random.default_rng(7)
+    stock_count = 240
+    codes = [f"{index:06d}" for index in range(1, stock_count + 1)]
+    ts_codes = [f"{code}.SZ" for code in codes]
+    # 大量并列涨幅（涨停价位）用于校验 top5 排序口径；部分 stock_code 为空需由 ts_code 推导
+    pct = rng.choice([10.0, 10.0, 9.99, 5.0, -3.0, 0.0], stock_count)
+    daily = pd.DataFrame(
+        {
+            "ts_code": ts_codes,
+            "stock_code": [code if index % 7 else "" for index, code in enumerate(codes)],
+            "open": rng.random(stock_count) * 20.0,
+            "close": rng.random(stock_count) * 20.0,
+            "pct_chg": pct,
+            "amount": rng.random(stock_count) * 1e8,
+            "vol": rng.random(stock_count) * 1e6,
+        }
+    )
+    industry_codes = ["801010", "801020", "801030"]
+    sw31_classify = pd.DataFrame(
+        {
+            "index_code": [f"{code}.SI" for code in industry_codes],
+            "industry_code": industry_codes,
+            "industry_name": ["行业A", "行业B", "行业C"],
+        }
+    )
+    # 每 11 只中 1 只已调出（out_date 早于交易日），不参与映射
+    sw31_member = pd.DataFrame(
+        {
+            "index_code": [f"{industry_codes[index % 3]}.SI" for index in range(stock_count)],
+            "stock_code": codes,
+            "in_date": ["20100101"] * stock_count,
+            "out_date": ["20200101" if index % 11 == 0 else "" for index in range(stock_count)],
+        }
+    )
+    limit_list = pd.DataFrame(
+        {
+            "ts_code": [ts_codes[index] for index in range(0, stock_count, 3)],
+            "limit_type": ["U" if index % 2 else "D" for index in range(0, stock_count, 3)],
+        }
+    )
+    daily_basic = pd.DataFrame(
+        {
+            "ts_code": ts_codes,
+            "pe_ttm": rng.lognormal(3.0, 1.0, stock_count),
+            "pb": rng.lognormal(0.5, 0.5, stock_count),
+        }
+    )
+
+    snapshots, audit = _build_industry_snapshot_sw31(
+        trade_date="20260213",
+        daily=daily,
+        limit_list=limit_list,
+        daily_basic=daily_basic,
+        sw31_classify=sw31_classify,
+        sw31_member=sw31_member,
+        classify_snapshot_trade_date="20260213",
+        member_snapshot_trade_date="20260213",
+        flat_threshold_ratio=0.01,
+        previous_valuation_by_industry={},
+    )
+
+    assert audit["uses_sw31"] is True
+    assert [row.industry_code for row in snapshots] == industry_codes
+    active = sw31_member[sw31_member["out_date"] == ""]
+    industry_by_stock = dict(
+        zip(active["stock_code"], active["index_code"].str[:6], strict=True)
+    )
+    daily["industry_code"] = daily["ts_code"].str[:6].map(industry_by_stock)
+    limit_list["industry_code"] = limit_list["ts_code"].str[:6].map(industry_by_stock)
+    daily_basic["industry_code"] = daily_basic["ts_code"].str[:6].map(industry_by_stock)
+    for row in snapshots:
+        # 参考口径：逐行业布尔过滤
+        subset = daily[daily["industry_code"] == row.industry_code]
+        ranking = subset.sort_values("pct_chg", ascending=False).head(5)
+        limits = limit_list[limit_list["industry_code"] == row.industry_code]
+        basic = daily_basic[daily_basic["industry_code"] == row.industry_code]
+        assert row.stock_count == len(subset)
+        assert row.rise_count == int((subset["pct_chg"] > 0.0).sum())
+        assert row.industry_close == float(subset["close"].mean())
+        assert row.industry_amount == float(subset["amount"].sum())
+        assert row.top5_codes == ranking["ts_code"].str[:6].tolist()
+        assert row.limit_up_count == int((limits["limit_type"] == "U").sum())
+        assert row.limit_down_count == int((limits["limit_type"] == "D").sum())
+        assert row.top5_limit_up == int(
+            (
+                limits["ts_code"].str[:6].isin(row.top5_codes) & (limits["limit_type"] == "U")
+            ).sum()
+        )
+        assert row.industry_pb == _winsorized_median(basic["pb"])
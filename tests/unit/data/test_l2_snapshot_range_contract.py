@@ -0,0 +1,232 @@
+"""
+L2 区间批量快照契约测试（run_l2_snapshot_range）。
+
+覆盖：区间批处理与逐日 run_l2_snapshot 结果一致（含 20 日成交额波动、行业 PE/PB
+结转兜底、月内成分快照选择）、快照在单个事务内写入、每个交易日都有门禁决策、
+缺失日线的交易日记入失败列表。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.config.config import Config
+from src.data import l2_pipeline
+from src.data.l2_pipeline import run_l2_snapshot, run_l2_snapshot_range
+from src.db.helpers import WriteSession
+
+_TRADE_DATES = [f"202601{day:02d}" for day in range(5, 31)] + ["20260202", "20260203"]
+_INDUSTRY_COUNT = 6
+_STOCKS_PER_INDUSTRY = 9
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    """构建测试用临时 Config（每个实例独立数据目录）。"""
+    env_file = tmp_path / f".env.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _seed_inputs(db_path: Path, *, skip_daily: set[str] = frozenset()) -> None:
+    """预埋多交易日 L1 数据：部分交易日缺失估值，成分快照按月更新。"""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    classify_rows: list[tuple[object, ...]] = []
+    member_rows: list[tuple[object, ...]] = []
+    daily_rows: list[tuple[object, ...]] = []
+    basic_rows: list[tuple[object, ...]] = []
+    limit_rows: list[tuple[object, ...]] = []
+    calendar_rows: list[tuple[object, ...]] = []
+
+    for idx in range(_INDUSTRY_COUNT):
+        classify_rows.append(
+            (
+                f"801{idx + 100:03d}.SI",
+                f"行业{idx + 1}",
+                "L1",
+                f"{idx + 1:06d}",
+                "SW2021",
+                "20251231",
+            )
+        )
+    for member_date, shift in (("20251231", 0), ("20260201", 1)):
+        for number in range(_INDUSTRY_COUNT * _STOCKS_PER_INDUSTRY):
+            industry = (number // _STOCKS_PER_INDUSTRY + shift) % _INDUSTRY_COUNT
+            ts_code = f"{number + 1:06d}.SZ"
+            member_rows.append(
+                (f"801{industry + 100:03d}.SI", ts_code, "20200101", "", member_date, ts_code)
+            )
+
+    for day_index, trade_date in enumerate(_TRADE_DATES):
+        calendar_rows.append((trade_date, 1))
+        if trade_date in skip_daily:
+            continue
+        for number in range(_INDUSTRY_COUNT * _STOCKS_PER_INDUSTRY):
+            stock_code = f"{number + 1:06d}"
+            open_price = 10.0 + number * 0.3 + day_index * 0.05
+            change = ((number * 7 + day_index * 3) % 23 - 11) * 0.01
+            close_price = open_price * (1.0 + change)
+            amount = close_price * (400000 + number * 9000 + day_index * 17000)
+            daily_rows.append(
+                (
+                    f"{stock_code}.SZ",
+                    stock_code,
+                    trade_date,
+                    open_price,
+                    max(open_price, close_price) * 1.01,
+                    min(open_price, close_price) * 0.99,
+                    close_price,
+                    open_price,
+                    amount,
+                )
+            )
+            # 每隔几日整体缺失估值，触发行业 PE/PB 沿用上一交易日
+            if day_index % 4 != 3:
+                basic_rows.append(
+                    (
+                        f"{stock_code}.SZ",
+                        stock_code,
+                        trade_date,
+                        12.0 + number + day_index * 0.1,
+                        1.5 + number * 0.05,
+                    )
+                )
+            if change >= 0.09:
+                limit_rows.append((f"{stock_code}.SZ", stock_code, trade_date, "U"))
+            elif change <= -0.1:
+                limit_rows.append((f"{stock_code}.SZ", stock_code, trade_date, "D"))
+
+    with duckdb.connect(str(db_path)) as connection:
+        frames = {
+            "raw_index_classify": pd.DataFrame(
+                classify_rows,
+                columns=[
+                    "index_code", "industry_name", "level", "industry_code", "src", "trade_date",
+                ],
+            ),
+            "raw_index_member": pd.DataFrame(
+                member_rows,
+                columns=["index_code", "con_code", "in_date", "out_date", "trade_date", "ts_code"],
+            ),
+            "raw_daily": pd.DataFrame(
+                daily_rows,
+                columns=[
+                    "ts_code", "stock_code", "trade_date", "open", "high", "low", "close",
+                    "pre_close", "amount",
+                ],
+            ),
+            "raw_daily_basic": pd.DataFrame(
+                basic_rows, columns=["ts_code", "stock_code", "trade_date", "pe_ttm", "pb"]
+            ),
+            "raw_limit_list": pd.DataFrame(
+                limit_rows, columns=["ts_code", "stock_code", "trade_date", "limit_type"]
+            ),
+            "raw_trade_cal": pd.DataFrame(calendar_rows, columns=["trade_date", "is_open"]),
+        }
+        for table_name, frame in frames.items():
+            connection.register("incoming", frame)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+
+
+def _read_table(config: Config, table_name: str) -> pd.DataFrame:
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        frame = connection.execute(f"SELECT * FROM {table_name}").df()
+    sort_columns = (
+        ["trade_date", "industry_code"] if "industry_code" in frame.columns else ["trade_date"]
+    )
+    return (
+        frame.drop(columns=["created_at"], errors="ignore")
+        .sort_values(sort_columns)
+        .reset_index(drop=True)
+    )
+
+
+def test_range_matches_sequential_daily_runs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """区间批处理产出的市场 / 行业快照与逐日执行完全一致。"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(l2_pipeline, "L2_RANGE_CHUNK_TRADE_DAYS", 7)
+    sequential_config = _build_config(tmp_path, "sequential")
+    range_config = _build_config(tmp_path, "range")
+    for config in (sequential_config, range_config):
+        _seed_inputs(Path(config.duckdb_dir) / "emotionquant.duckdb")
+
+    for trade_date in _TRADE_DATES:
+        run_l2_snapshot(
+            trade_date=trade_date, source="tushare", config=sequential_config, strict_sw31=False
+        )
+
+    sessions: list[WriteSession] = []
+    original_write_frame = WriteSession.write_frame
+
+    def _tracking_write_frame(self: WriteSession, table_name: str, *args, **kwargs):  # type: ignore[no-untyped-def]
+        # 快照写入时外层事务已开启，且全部来自同一会话
+        if table_name in {"market_snapshot", "industry_snapshot"}:
+            assert self._transaction_depth >= 1
+            sessions.append(self)
+        return original_write_frame(self, table_name, *args, **kwargs)
+
+    monkeypatch.setattr(WriteSession, "write_frame", _tracking_write_frame)
+    result = run_l2_snapshot_range(
+        start_date=_TRADE_DATES[0],
+        end_date=_TRADE_DATES[-1],
+        source="tushare",
+        config=range_config,
+        strict_sw31=False,
+    )
+
+    assert result.trade_dates == _TRADE_DATES
+    assert result.failed_trade_dates == []
+    assert result.market_snapshot_count == len(_TRADE_DATES)
+    assert result.industry_snapshot_count == len(_TRADE_DATES) * _INDUSTRY_COUNT
+    assert len(sessions) == 2 and sessions[0] is sessions[1]
+
+    for table_name in ("market_snapshot", "industry_snapshot"):
+        expected = _read_table(sequential_config, table_name)
+        actual = _read_table(range_config, table_name)
+        pd.testing.assert_frame_equal(actual, expected)
+
+    industry = _read_table(range_config, "industry_snapshot")
+    carried = industry[industry["trade_date"] == _TRADE_DATES[3]]
+    assert (carried["industry_pe_ttm"] > 0.0).all()
+    market = _read_table(range_config, "market_snapshot")
+    assert (market["amount_volatility"].iloc[20:] != 0.0).all()
+    gates = _read_table(range_config, "data_readiness_gate")
+    assert gates["trade_date"].tolist() == _TRADE_DATES
+    report = json.loads(result.range_report_path.read_text(encoding="utf-8"))
+    assert report["trade_date_count"] == len(_TRADE_DATES)
+
+
+def test_range_records_missing_daily_as_failed_date(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """开市日缺少 raw_daily 时该日记 P0 并阻断门禁，其余交易日正常写入。"""
+    monkeypatch.chdir(tmp_path)
+    config = _build_config(tmp_path, "gap")
+    missing_date = _TRADE_DATES[3]
+    _seed_inputs(Path(config.duckdb_dir) / "emotionquant.duckdb", skip_daily={missing_date})
+
+    result = run_l2_snapshot_range(
+        start_date=_TRADE_DATES[0],
+        end_date=_TRADE_DATES[6],
+        source="tushare",
+        config=config,
+        strict_sw31=False,
+    )
+
+    assert result.failed_trade_dates == [missing_date]
+    assert result.has_error
+    assert result.market_snapshot_count == 6
+    gates = _read_table(config, "data_readiness_gate").set_index("trade_date")
+    assert gates.loc[missing_date, "status"] == "blocked"
+    assert missing_date not in set(_read_table(config, "market_snapshot")["trade_date"])
@@ -0,0 +1,252 @@
+"""
+全市场逐日聚合表契约测试（market_daily_agg）。
+
+覆盖：raw_daily 落盘时同事务增量维护聚合行（重写交易日整体替换）、增量结果与
+全量重建一致、升级库首次建表时从 raw_daily 全量补齐、聚合表范围窄于 raw_daily
+或范围内缺交易日时读取方回退现算、bulk_download 写 raw_daily 同事务维护聚合行、
+L2 成交额历史 / 验证层未来收益读聚合表且与 raw_daily 现算一致、eq rebuild-market-agg 命令。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from scripts.data.bulk_download import PersistentDuckDBWriter
+from src.algorithms.validation.pipeline import _load_market_future_returns
+from src.config.config import Config
+from src.data.l2_pipeline import _load_market_amount_history, _load_recent_market_amounts
+from src.data.market_daily_agg import (
+    MARKET_DAILY_AGG_TABLE,
+    market_daily_agg_available,
+    rebuild_market_daily_agg,
+)
+from src.data.repositories.daily import DailyRepository
+from src.pipeline.main import main
+
+_TRADE_DATES = [f"202602{day:02d}" for day in range(2, 14)]
+
+
+def _build_config(tmp_path: Path, *, l1_backend: str = "duckdb") -> tuple[Config, Path]:
+    """构建测试用临时 Config。"""
+    env_file = tmp_path / ".env.market_agg"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n"
+        f"STORAGE_BACKEND_L1={l1_backend}\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file)), env_file
+
+
+def _daily_rows(trade_date: str, *, shift: float = 0.0) -> pa.Table:
+    day = _TRADE_DATES.index(trade_date)
+    closes = [10.0 + day * 0.1 + shift, 20.0 - day * 0.2, 5.0 + shift, None]
+    pct_chg = [1.5, -0.8, 0.0, None]
+    amounts = [1000.0 + day, None, 300.0 * (day + 1), 50.0]
+    return pa.table(
+        {
+            "trade_date": [trade_date] * 4,
+            "ts_code": ["000001.SZ", "000002.SZ", "000003.SZ", "000004.SZ"],
+            "stock_code": ["000001", "000002", "000003", "000004"],
+            "close": pa.array(closes, type=pa.float64()),
+            "pct_chg": pa.array(pct_chg, type=pa.float64()),
+            "amount": pa.array(amounts, type=pa.float64()),
+        }
+    )
+
+
+def _read_agg(database_path: Path) -> pd.DataFrame:
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        return connection.execute(
+            f"SELECT * FROM {MARKET_DAILY_AGG_TABLE} ORDER BY trade_date"
+        ).df()
+
+
+def test_daily_save_maintains_aggregate_incrementally(tmp_path: Path) -> None:
+    """raw_daily 每次落盘刷新涉及交易日的聚合行，重写交易日整体替换，与全量重建一致。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    for trade_date in _TRADE_DATES:
+        repository.save_to_database(_daily_rows(trade_date))
+    repository.save_to_database(_daily_rows(_TRADE_DATES[3], shift=1.0))
+
+    incremental = _read_agg(repository.database_path)
+    assert incremental["trade_date"].tolist() == _TRADE_DATES
+    row = incremental.set_index("trade_date").loc[_TRADE_DATES[3]]
+    assert row["stock_count"] == 4
+    assert row["total_amount"] == pytest.approx(1003.0 + 1200.0 + 50.0)
+    assert row["mean_close"] == pytest.approx((11.3 + 19.4 + 6.0) / 3.0)
+    assert row["mean_pct_chg"] == pytest.approx((1.5 - 0.8 + 0.0) / 3.0)
+    assert (row["pct_chg_count"], row["rise_count"], row["fall_count"]) == (3, 1, 1)
+
+    result = rebuild_market_daily_agg(config=config)
+    assert (result.trade_date_count, result.start_date, result.end_date) == (
+        len(_TRADE_DATES),
+        _TRADE_DATES[0],
+        _TRADE_DATES[-1],
+    )
+    pd.testing.assert_frame_equal(_read_agg(repository.database_path), incremental)
+
+
+def test_parquet_backend_keeps_aggregate_in_duckdb(tmp_path: Path) -> None:
+    """parquet 后端 raw_daily 只落湖，聚合表仍写入 DuckDB 供读取方使用。"""
+    config, _ = _build_config(tmp_path, l1_backend="parquet")
+    repository = DailyRepository(config)
+    repository.save_to_database(_daily_rows(_TRADE_DATES[0]))
+
+    frame = _read_agg(repository.database_path)
+    assert frame["trade_date"].tolist() == [_TRADE_DATES[0]]
+    assert frame["total_amount"].iloc[0] == pytest.approx(1000.0 + 300.0 + 50.0)
+
+
+def test_readers_match_raw_daily_fallback(tmp_path: Path) -> None:
+    """L2 成交额历史与验证层未来收益读聚合表，结果与缺表时 raw_daily 现算一致。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    for trade_date in _TRADE_DATES:
+        repository.save_to_database(_daily_rows(trade_date))
+    database_path = repository.database_path
+    with duckdb.connect(str(database_path)) as connection:
+        connection.execute(
+            "CREATE TABLE mss_panorama AS "
+            "SELECT trade_date, 50.0 + row_number() OVER (ORDER BY trade_date) AS mss_score "
+            f"FROM (SELECT DISTINCT trade_date FROM {MARKET_DAILY_AGG_TABLE})"
+        )
+
+    def _read_all() -> tuple[object, ...]:
+        with duckdb.connect(str(database_path), read_only=True) as connection:
+            recent = _load_recent_market_amounts(connection, trade_date=_TRADE_DATES[-1])
+            history = _load_market_amount_history(connection, end_date=_TRADE_DATES[-2])
+        future = _load_market_future_returns(
+            database_path=database_path, trade_date=_TRADE_DATES[-1]
+        )
+        return recent, history, future
+
+    recent, history, future = _read_all()
+    assert history[0] == _TRADE_DATES[:-1]
+    assert recent == list(reversed(history[1]))
+    assert len(future) == len(_TRADE_DATES) - 5
+
+    with duckdb.connect(str(database_path)) as connection:
+        connection.execute(f"DROP TABLE {MARKET_DAILY_AGG_TABLE}")
+    fallback_recent, fallback_history, fallback_future = _read_all()
+    assert recent == pytest.approx(fallback_recent)
+    assert history[0] == fallback_history[0]
+    assert history[1] == pytest.approx(fallback_history[1])
+    pd.testing.assert_frame_equal(future, fallback_future)
+
+
+def _seed_raw_daily(database_path: Path, trade_dates: list[str]) -> None:
+    # 模拟升级前的库：只有 raw_daily，没有聚合表
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    frame = pa.concat_tables([_daily_rows(trade_date) for trade_date in trade_dates])
+    with duckdb.connect(str(database_path)) as connection:
+        connection.register("incoming", frame)
+        connection.execute("CREATE TABLE raw_daily AS SELECT * FROM incoming")
+        connection.unregister("incoming")
+
+
+def test_first_write_on_upgraded_database_backfills_aggregate(tmp_path: Path) -> None:
+    """升级库首次写 raw_daily 时聚合表从 raw_daily 全量补齐，而非只含本批交易日。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    _seed_raw_daily(repository.database_path, _TRADE_DATES[:-1])
+
+    repository.save_to_database(_daily_rows(_TRADE_DATES[-1]))
+
+    backfilled = _read_agg(repository.database_path)
+    assert backfilled["trade_date"].tolist() == _TRADE_DATES
+    rebuild_market_daily_agg(config=config)
+    pd.testing.assert_frame_equal(_read_agg(repository.database_path), backfilled)
+
+
+def test_narrow_aggregate_falls_back_to_raw_daily(tmp_path: Path) -> None:
+    """聚合表交易日范围窄于 raw_daily 时不可用，L2 成交额历史回退 raw_daily 现算。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    for trade_date in _TRADE_DATES:
+        repository.save_to_database(_daily_rows(trade_date))
+    database_path = repository.database_path
+    with duckdb.connect(str(database_path)) as connection:
+        assert market_daily_agg_available(connection)
+        connection.execute(
+            f"DELETE FROM {MARKET_DAILY_AGG_TABLE} WHERE trade_date < ?", [_TRADE_DATES[-1]]
+        )
+        assert not market_daily_agg_available(connection)
+        history = _load_market_amount_history(connection, end_date=_TRADE_DATES[-1])
+    assert history[0] == _TRADE_DATES
+
+
+def test_aggregate_with_gap_falls_back_to_raw_daily(tmp_path: Path) -> None:
+    """聚合表首尾交易日覆盖 raw_daily 但中间缺交易日时同样不可用。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    for trade_date in _TRADE_DATES:
+        repository.save_to_database(_daily_rows(trade_date))
+    with duckdb.connect(str(repository.database_path)) as connection:
+        connection.execute(
+            f"DELETE FROM {MARKET_DAILY_AGG_TABLE} WHERE trade_date = ?", [_TRADE_DATES[1]]
+        )
+        assert not market_daily_agg_available(connection)
+        history = _load_market_amount_history(connection, end_date=_TRADE_DATES[-1])
+    assert history[0] == _TRADE_DATES
+
+
+def test_bulk_download_raw_daily_maintains_aggregate(tmp_path: Path) -> None:
+    """bulk_download 写 raw_daily 经 write_market_daily_agg 同事务维护聚合行。"""
+    config, _ = _build_config(tmp_path)
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    writer = PersistentDuckDBWriter(database_path)
+    try:
+        for trade_date in _TRADE_DATES[:3]:
+            writer.write_batch("raw_daily", _daily_rows(trade_date).to_pylist())
+        writer.write_batch("raw_daily", _daily_rows(_TRADE_DATES[1], shift=1.0).to_pylist())
+        writer.write_batch("raw_daily_basic", [{"trade_date": _TRADE_DATES[0], "pe": 1.0}])
+    finally:
+        writer.close()
+
+    written = _read_agg(database_path)
+    assert written["trade_date"].tolist() == _TRADE_DATES[:3]
+    rebuild_market_daily_agg(config=config)
+    pd.testing.assert_frame_equal(_read_agg(database_path), written)
+
+
+def test_main_rebuild_market_agg_command(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """eq rebuild-market-agg 按区间从 raw_daily 重算聚合表并输出统计。"""
+    config, env_file = _build_config(tmp_path)
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    frame = pa.concat_tables([_daily_rows(trade_date) for trade_date in _TRADE_DATES])
+    with duckdb.connect(str(database_path)) as connection:
+        connection.register("incoming", frame)
+        connection.execute("CREATE TABLE raw_daily AS SELECT * FROM incoming")
+        connection.unregister("incoming")
+
+    exit_code = main(
+        [
+            "--env-file",
+            str(env_file),
+            "rebuild-market-agg",
+            "--start-date",
+            _TRADE_DATES[2],
+            "--end-date",
+            _TRADE_DATES[5],
+        ]
+    )
+
+    assert exit_code == 0
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload == {
+        "end_date": _TRADE_DATES[5],
+        "event": "market_daily_agg_rebuilt",
+        "start_date": _TRADE_DATES[2],
+        "trade_date_count": 4,
+    }
+    assert _read_agg(database_path)["trade_date"].tolist() == _TRADE_DATES[2:6]
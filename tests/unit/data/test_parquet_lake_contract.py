@@ -0,0 +1,154 @@
+"""
+Parquet 湖分区布局契约测试。
+
+覆盖：L1 落盘为 year/month 分区的日增量文件、同日重写整体替换、清单按交易日裁剪、
+月度合并（含旧版平铺文件迁移）后数据不变且每日一个 row group、
+L3 按交易日追加而非覆盖、eq compact-parquet 命令。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.config.config import Config
+from src.data.repositories.daily import DailyRepository
+from src.db.parquet_lake import (
+    PARQUET_MANIFEST_NAME,
+    compact_lake_table,
+    lake_files,
+    load_manifest,
+    read_lake_table,
+    write_trade_date_partitions,
+)
+from src.pipeline.main import main
+
+
+def _build_config(tmp_path: Path) -> tuple[Config, Path]:
+    """构建测试用临时 Config，返回 (config, env 文件路径)。"""
+    env_file = tmp_path / ".env.parquet_lake"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file)), env_file
+
+
+def _daily_rows(trade_date: str, closes: list[float]) -> pa.Table:
+    return pa.table(
+        {
+            "trade_date": [trade_date] * len(closes),
+            "stock_code": [f"{index:06d}" for index in range(len(closes), 0, -1)],
+            "close": closes,
+        }
+    )
+
+
+def test_save_to_parquet_writes_hive_partitions_and_replaces_same_day(tmp_path: Path) -> None:
+    """L1 落盘为 year=YYYY/month=MM/{trade_date}.parquet，同日重写整体替换。"""
+    config, _ = _build_config(tmp_path)
+    repository = DailyRepository(config)
+    repository.save_to_parquet(_daily_rows("20260130", [1.0, 2.0]))
+    table_dir = repository.save_to_parquet(_daily_rows("20260202", [3.0]))
+    repository.save_to_parquet(_daily_rows("20260202", [4.0, 5.0, 6.0]))
+
+    assert (table_dir / "year=2026" / "month=01" / "20260130.parquet").exists()
+    assert (table_dir / "year=2026" / "month=02" / "20260202.parquet").exists()
+    assert read_lake_table(table_dir).num_rows == 5
+    february = read_lake_table(table_dir, start_date="20260201", end_date="20260228")
+    assert sorted(february.column("close").to_pylist()) == [4.0, 5.0, 6.0]
+    assert [path.name for path in lake_files(table_dir, start_date="20260201")] == [
+        "20260202.parquet"
+    ]
+
+
+def test_compaction_merges_month_and_keeps_data(tmp_path: Path) -> None:
+    """月度合并：旧版平铺文件与日增量文件合并为排序后的 part 文件，每日一个 row group。"""
+    table_dir = tmp_path / "l1" / "raw_daily"
+    table_dir.mkdir(parents=True)
+    # 旧版布局 {table}/{trade_date}.parquet
+    pq.write_table(_daily_rows("20260202", [1.0, 2.0]), table_dir / "20260202.parquet")
+    write_trade_date_partitions(table_dir, _daily_rows("20260203", [3.0, 4.0, 5.0]))
+    write_trade_date_partitions(table_dir, _daily_rows("20260302", [6.0]))
+    before = read_lake_table(table_dir).sort_by([("trade_date", "ascending")])
+
+    result = compact_lake_table(table_dir)
+
+    assert result.months_compacted == 2
+    assert result.files_merged == 3
+    assert result.files_after == 2
+    merged_path = table_dir / "year=2026" / "month=02" / "part-202602.parquet"
+    assert not (table_dir / "20260202.parquet").exists()
+    metadata = pq.read_metadata(merged_path)
+    assert metadata.num_row_groups == 2
+    merged = pq.read_table(merged_path)
+    assert merged.column("trade_date").to_pylist() == ["20260202"] * 2 + ["20260203"] * 3
+    assert merged.slice(0, 2).column("stock_code").to_pylist() == ["000001", "000002"]
+    after = read_lake_table(table_dir).sort_by([("trade_date", "ascending")])
+    assert sorted(after.to_pylist(), key=str) == sorted(before.to_pylist(), key=str)
+
+    # 合并后重写某日：合并文件中该日数据被移除，以新日增量文件为准
+    write_trade_date_partitions(table_dir, _daily_rows("20260203", [9.0]))
+    day = read_lake_table(table_dir, start_date="20260203", end_date="20260203")
+    assert day.column("close").to_pylist() == [9.0]
+    assert read_lake_table(table_dir).num_rows == 4
+
+
+def test_manifest_is_rebuilt_when_missing(tmp_path: Path) -> None:
+    """清单缺失或损坏时扫描目录重建。"""
+    table_dir = tmp_path / "l2" / "market_snapshot"
+    write_trade_date_partitions(table_dir, _daily_rows("20260202", [1.0]))
+    (table_dir / PARQUET_MANIFEST_NAME).write_text("{broken", encoding="utf-8")
+
+    manifest = load_manifest(table_dir)
+
+    assert manifest["files"]["year=2026/month=02/20260202.parquet"]["rows"] == 1
+    saved = json.loads((table_dir / PARQUET_MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert saved["files"].keys() == manifest["files"].keys()
+
+
+def test_l3_frames_append_by_trade_date(tmp_path: Path) -> None:
+    """L3 结果按交易日追加：新交易日不覆盖历史，不含 trade_date 列时按参数补列。"""
+    table_dir = tmp_path / "l3" / "quality_gate_report"
+    write_trade_date_partitions(
+        table_dir, pd.DataFrame([{"status": "PASS"}]), trade_date="20260202"
+    )
+    write_trade_date_partitions(
+        table_dir, pd.DataFrame([{"status": "WARN"}]), trade_date="20260203"
+    )
+    write_trade_date_partitions(table_dir, pd.DataFrame([]), trade_date="20260203")
+
+    assert read_lake_table(table_dir).to_pylist() == [
+        {"status": "PASS", "trade_date": "20260202"}
+    ]
+
+
+def test_main_compact_parquet_command(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """eq compact-parquet 合并各层表目录并输出统计。"""
+    config, env_file = _build_config(tmp_path)
+    table_dir = Path(config.parquet_path) / "l1" / "raw_daily"
+    for trade_date in ("20260202", "20260203"):
+        write_trade_date_partitions(table_dir, _daily_rows(trade_date, [1.0]))
+
+    exit_code = main(["--env-file", str(env_file), "compact-parquet", "--layer", "l1"])
+
+    assert exit_code == 0
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload["event"] == "parquet_compaction"
+    assert payload["tables"] == [
+        {
+            "files_after": 1,
+            "files_merged": 2,
+            "layer": "l1",
+            "months_compacted": 1,
+            "rows_written": 2,
+            "table": "raw_daily",
+        }
+    ]
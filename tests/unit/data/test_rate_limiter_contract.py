@@ -0,0 +1,159 @@
+"""
+通道令牌桶限流契约测试。
+
+覆盖：多个 fetcher 共享令牌桶时的合计限速、突发容量、并发预约顺序、
+host 范围跨实例（文件状态）共享，以及进程级共享注册表复用。
+"""
+from __future__ import annotations
+
+import threading
+import types
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src.config.config import Config
+from src.data.fetcher import TuShareFetcher
+from src.data.rate_limiter import (
+    ChannelRateLimiter,
+    TokenBucket,
+    build_channel_rate_limiter,
+    shared_channel_rate_limiter,
+)
+
+
+class FakeClock:
+    """模拟时钟，用于测试限流逻辑而无需真实等待。"""
+    def __init__(self) -> None:
+        self.current = 0.0
+        self.sleeps: list[float] = []
+
+    def now(self) -> float:
+        return self.current
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.current += seconds
+
+
+def _install_fake_tushare(monkeypatch: pytest.MonkeyPatch) -> None:
+    class FakeProApi:
+        def daily(self, **_: Any) -> list[dict[str, Any]]:
+            return [{"ts_code": "000001.SZ", "trade_date": "20260215"}]
+
+    fake_tushare = types.SimpleNamespace(pro_api=lambda _token: FakeProApi())
+    monkeypatch.setitem(__import__("sys").modules, "tushare", fake_tushare)
+
+
+def _write_env(tmp_path: Path, name: str, extra: str = "") -> Config:
+    env_file = tmp_path / name
+    env_file.write_text(
+        "ENVIRONMENT=test\n"
+        "TUSHARE_PRIMARY_TOKEN=official_token\n"
+        "TUSHARE_PRIMARY_SDK_PROVIDER=tushare\n"
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "TUSHARE_RATE_LIMIT_PER_MIN=30\n" + extra,
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def test_fetchers_sharing_rate_limiter_are_paced_jointly(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """两个 fetcher 共享令牌桶时，合计调用速率不得超过通道配额。"""
+    _install_fake_tushare(monkeypatch)
+    config = _write_env(tmp_path, ".env.shared")
+    clock = FakeClock()
+    limiter = build_channel_rate_limiter(config, now_fn=clock.now, sleep_fn=clock.sleep)
+    worker_a = TuShareFetcher(config=config, max_retries=1, rate_limiter=limiter)
+    worker_b = TuShareFetcher(config=config, max_retries=1, rate_limiter=limiter)
+
+    worker_a.fetch_with_retry("daily", {"trade_date": "20260215"})
+    worker_b.fetch_with_retry("daily", {"trade_date": "20260215"})
+    worker_a.fetch_with_retry("daily", {"trade_date": "20260215"})
+
+    assert clock.sleeps == [pytest.approx(2.0), pytest.approx(2.0)]
+    stats = limiter.snapshot()["primary"]
+    assert stats["acquired"] == 3
+    assert stats["waited"] == 2
+    assert stats["wait_seconds_total"] == pytest.approx(4.0)
+
+
+def test_token_bucket_burst_allows_immediate_calls_then_paces() -> None:
+    """burst=3 时前 3 次调用立即放行，之后按稳态速率逐个放行。"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_min=60, burst=3, now_fn=clock.now, sleep_fn=clock.sleep)
+
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3:] == [pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_token_bucket_refills_while_idle() -> None:
+    """空闲期间令牌按速率回补，但不超过突发容量。"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_min=60, burst=2, now_fn=clock.now, sleep_fn=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.current += 10.0
+
+    waits = [bucket.acquire() for _ in range(3)]
+
+    assert waits == [0.0, 0.0, pytest.approx(1.0)]
+
+
+def test_token_bucket_serves_concurrent_waiters_in_reservation_order() -> None:
+    """并发取令牌时每个等待者得到互不重叠的放行时刻（公平排队，不超发）。"""
+    lock = threading.Lock()
+    reserved_waits: list[float] = []
+
+    def _record_sleep(seconds: float) -> None:
+        with lock:
+            reserved_waits.append(seconds)
+
+    bucket = TokenBucket(rate_per_min=600, burst=1, now_fn=lambda: 0.0, sleep_fn=_record_sleep)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(reserved_waits) == [pytest.approx(0.1 * idx) for idx in range(1, 8)]
+    assert bucket.acquired_count == 8
+
+
+def test_host_scope_shares_bucket_state_across_limiter_instances(tmp_path: Path) -> None:
+    """host 范围下状态写入文件，独立实例（模拟不同进程）共享同一配额。"""
+    clock = FakeClock()
+    state_dir = tmp_path / "rate_limit"
+    process_a = ChannelRateLimiter(
+        {"primary": 30}, state_dir=state_dir, now_fn=clock.now, sleep_fn=clock.sleep
+    )
+    process_b = ChannelRateLimiter(
+        {"primary": 30}, state_dir=state_dir, now_fn=clock.now, sleep_fn=clock.sleep
+    )
+
+    assert process_a.acquire("primary") == 0.0
+    assert process_b.acquire("primary") == pytest.approx(2.0)
+    assert list(state_dir.glob("tushare_primary*.bucket"))
+
+
+def test_shared_channel_rate_limiter_reuses_instance_per_config(tmp_path: Path) -> None:
+    """相同配置返回同一个进程级令牌桶；限速配置不同则隔离。"""
+    config = _write_env(tmp_path, ".env.registry")
+    other = _write_env(tmp_path, ".env.registry.other", "TUSHARE_RATE_LIMIT_BURST=4\n")
+
+    assert shared_channel_rate_limiter(config) is shared_channel_rate_limiter(config)
+    assert shared_channel_rate_limiter(other) is not shared_channel_rate_limiter(config)
+    assert shared_channel_rate_limiter(config).rate_per_min("primary") == 30
+
+
+def test_invalid_rate_limit_scope_is_rejected(tmp_path: Path) -> None:
+    """非法的限流共享范围应直接报错，避免静默退化为不共享。"""
+    config = _write_env(tmp_path, ".env.scope", "TUSHARE_RATE_LIMIT_SCOPE=cluster\n")
+
+    with pytest.raises(ValueError, match="tushare_rate_limit_scope"):
+        build_channel_rate_limiter(config)
@@ -0,0 +1,116 @@
+"""
+L1 列式记录批次契约测试。
+
+覆盖：TuShare 字段补全的列式实现与原逐行口径一致、同一 Arrow Table 同时落
+DuckDB 与按 trade_date 分区的 Parquet、fetcher 不支持列式拉取时按 list[dict] 转换。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config.config import Config
+from src.data.record_batch import (
+    as_arrow_table,
+    count_by_trade_date,
+    fetch_table,
+    fill_blank_column,
+    normalize_tushare_fields,
+)
+from src.data.repositories.daily import DailyRepository
+
+
+def _build_config(tmp_path: Path) -> Config:
+    """构建测试用临时 Config。"""
+    env_file = tmp_path / ".env.record_batch"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def test_normalize_tushare_fields_fills_trade_date_and_codes() -> None:
+    """trade_cal 以 cal_date 补 trade_date；行情接口以请求日期补空 trade_date 并补 stock_code。"""
+    trade_cal = normalize_tushare_fields(
+        as_arrow_table(pd.DataFrame([{"cal_date": "20260220", "is_open": 1}])),
+        api_name="trade_cal",
+        request_params={"start_date": "20260201", "end_date": "20260228"},
+    )
+    assert trade_cal.column("trade_date").to_pylist() == ["20260220"]
+
+    daily = normalize_tushare_fields(
+        as_arrow_table(
+            [
+                {"ts_code": "000001.SZ", "trade_date": "", "close": 10.0},
+                {"ts_code": "600000.SH", "trade_date": "20260219", "stock_code": "600000"},
+            ]
+        ),
+        api_name="daily",
+        request_params={"trade_date": "20260220"},
+    )
+    assert daily.column("trade_date").to_pylist() == ["20260220", "20260219"]
+    assert daily.column("stock_code").to_pylist() == ["000001", "600000"]
+
+    member = normalize_tushare_fields(
+        as_arrow_table([{"index_code": "801010.SI", "con_code": "000002.SZ"}]),
+        api_name="index_member",
+        request_params={"trade_date": "20260220"},
+    )
+    assert member.column("ts_code").to_pylist() == ["000002.SZ"]
+    assert member.column("stock_code").to_pylist() == ["000002"]
+    assert member.column("trade_date").to_pylist() == ["20260220"]
+
+
+def test_fill_blank_column_only_replaces_missing_values() -> None:
+    """快照 trade_date 回填只覆盖 null / 空白串，不改动已有值。"""
+    table = pa.table({"trade_date": ["", None, "20260219"], "value": [1, 2, 3]})
+    filled = fill_blank_column(table, "trade_date", "20260220")
+    assert filled.column("trade_date").to_pylist() == ["20260220", "20260220", "20260219"]
+    added = fill_blank_column(pa.table({"value": [1]}), "trade_date", "20260220")
+    assert added.column("trade_date").to_pylist() == ["20260220"]
+
+
+def test_one_arrow_table_persists_to_duckdb_and_parquet(tmp_path: Path) -> None:
+    """同一 Arrow Table 写入 DuckDB 并按 trade_date 拆分 Parquet，行数一致。"""
+    repository = DailyRepository(_build_config(tmp_path))
+    table = pa.table(
+        {
+            "trade_date": ["20260219", "20260219", "20260220"],
+            "stock_code": ["000001", "000002", "000001"],
+            "close": [10.0, 11.0, 10.5],
+        }
+    )
+
+    assert repository.save_to_database(table) == 3
+    table_dir = repository.save_to_parquet(table)
+
+    assert count_by_trade_date(table) == {"20260219": 2, "20260220": 1}
+    assert sorted(path.name for path in table_dir.rglob("*.parquet")) == [
+        "20260219.parquet",
+        "20260220.parquet",
+    ]
+    assert pq.read_table(table_dir / "year=2026" / "month=02" / "20260219.parquet").num_rows == 2
+    with duckdb.connect(str(repository.database_path), read_only=True) as connection:
+        rows = connection.execute(
+            "SELECT trade_date, COUNT(*) FROM raw_daily GROUP BY trade_date ORDER BY trade_date"
+        ).fetchall()
+    assert rows == [("20260219", 2), ("20260220", 1)]
+
+
+def test_fetch_table_falls_back_to_row_fetcher() -> None:
+    """fetcher 仅提供 fetch_with_retry 时按 list[dict] 转为 Arrow Table。"""
+
+    class _RowFetcher:
+        def fetch_with_retry(self, api_name: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+            return [{"trade_date": params["trade_date"], "api": api_name}]
+
+    table = fetch_table(_RowFetcher(), "daily", {"trade_date": "20260220"})
+    assert isinstance(table, pa.Table)
+    assert table.to_pylist() == [{"trade_date": "20260220", "api": "daily"}]
@@ -0,0 +1,268 @@
+"""
+个股滚动状态契约测试（stock_rolling_state / stock_rolling_daily）。
+
+覆盖：环形缓冲区的新高 / 新低 / 连续涨停口径（含停牌不中断）、状态表往返后继续推进
+结果不变、逐日增量推进与整段重建一致、L2 快照字段与逐股回看 100 日的朴素实现一致、
+rebuild-rolling-state 命令。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config.config import Config
+from src.data.l2_pipeline import run_l2_snapshot, update_stock_rolling_state
+from src.data.rolling_state import ROLLING_WINDOW_DAYS, StockRollingState
+from src.pipeline.main import main
+
+_STOCK_COUNT = 12
+_TRADE_DATES = [
+    day.strftime("%Y%m%d") for day in pd.bdate_range("2025-06-02", periods=ROLLING_WINDOW_DAYS + 12)
+]
+_SUSPENDED = {("000003", _TRADE_DATES[-4]), ("000003", _TRADE_DATES[-3])}
+
+
+def _build_config(tmp_path: Path) -> tuple[Config, Path]:
+    """构建测试用临时 Config，返回 (config, env 文件路径)。"""
+    env_file = tmp_path / ".env.rolling_state"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file)), env_file
+
+
+def _raw_frames() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """随机游走行情：末段制造连续涨停、新高 / 新低，000003 在末段停牌两日。"""
+    rng = np.random.default_rng(7)
+    daily_rows: list[dict[str, object]] = []
+    limit_rows: list[dict[str, object]] = []
+    closes = np.full(_STOCK_COUNT, 10.0)
+    for day_index, trade_date in enumerate(_TRADE_DATES):
+        steps = rng.normal(0.0, 0.02, _STOCK_COUNT)
+        tail = day_index >= len(_TRADE_DATES) - 8
+        if tail:
+            steps[:4] = 0.1
+            steps[4] = -0.1
+        closes = closes * (1.0 + steps)
+        for number in range(_STOCK_COUNT):
+            stock_code = f"{number + 1:06d}"
+            if (stock_code, trade_date) in _SUSPENDED:
+                continue
+            daily_rows.append(
+                {
+                    "ts_code": f"{stock_code}.SZ",
+                    "trade_date": trade_date,
+                    "open": float(closes[number]),
+                    "close": float(closes[number]),
+                    "pct_chg": float(steps[number] * 100.0),
+                    "amount": 1.0e6,
+                    "vol": 1.0e4,
+                }
+            )
+            if tail and number < 4 and (number, day_index % 3) != (1, 0):
+                limit_rows.append(
+                    {"ts_code": f"{stock_code}.SZ", "trade_date": trade_date, "limit_type": "U"}
+                )
+    return pd.DataFrame(daily_rows), pd.DataFrame(limit_rows)
+
+
+def _seed_raw(db_path: Path, *, trade_dates: list[str] | None = None) -> None:
+    daily, limit_list = _raw_frames()
+    if trade_dates is not None:
+        daily = daily[daily["trade_date"].isin(trade_dates)]
+        limit_list = limit_list[limit_list["trade_date"].isin(trade_dates)]
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(db_path)) as connection:
+        for table_name, frame in (("raw_daily", daily), ("raw_limit_list", limit_list)):
+            connection.register("incoming", frame)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+
+
+def _read_rolling_daily(db_path: Path) -> pd.DataFrame:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        frame = connection.execute("SELECT * FROM stock_rolling_daily").df()
+    return frame.sort_values(["trade_date", "stock_code"]).reset_index(drop=True)
+
+
+def _naive_market_fields(trade_date: str) -> dict[str, object]:
+    """逐股回看历史的朴素实现（口径参照 rolling_state 模块文档）。"""
+    daily, limit_list = _raw_frames()
+    daily["stock_code"] = daily["ts_code"].str[:6]
+    limit_up = set(zip(limit_list["ts_code"].str[:6], limit_list["trade_date"], strict=True))
+    previous_date = _TRADE_DATES[_TRADE_DATES.index(trade_date) - 1]
+    fields = {
+        "new_100d_high_count": 0,
+        "new_100d_low_count": 0,
+        "continuous_limit_up_2d": 0,
+        "continuous_limit_up_3d_plus": 0,
+        "continuous_new_high_2d_plus": 0,
+    }
+    yesterday_limit_up_pct: list[float] = []
+    for stock_code, history in daily.groupby("stock_code"):
+        history = history[history["trade_date"] <= trade_date].sort_values("trade_date")
+        if history.empty or history["trade_date"].iloc[-1] != trade_date:
+            continue
+        closes = history["close"].tolist()
+        dates = history["trade_date"].tolist()
+
+        def is_new_high(closes: list[float], position: int) -> bool:
+            prior = closes[max(0, position - ROLLING_WINDOW_DAYS) : position]
+            return len(prior) == ROLLING_WINDOW_DAYS and closes[position] > max(prior)
+
+        today = len(closes) - 1
+        prior = closes[max(0, today - ROLLING_WINDOW_DAYS) : today]
+        if len(prior) == ROLLING_WINDOW_DAYS:
+            fields["new_100d_high_count"] += int(closes[today] > max(prior))
+            fields["new_100d_low_count"] += int(closes[today] < min(prior))
+        limit_streak = 0
+        while today - limit_streak >= 0 and (stock_code, dates[today - limit_streak]) in limit_up:
+            limit_streak += 1
+        high_streak = 0
+        while today - high_streak >= 0 and is_new_high(closes, today - high_streak):
+            high_streak += 1
+        fields["continuous_limit_up_2d"] += int(limit_streak == 2)
+        fields["continuous_limit_up_3d_plus"] += int(limit_streak >= 3)
+        fields["continuous_new_high_2d_plus"] += int(high_streak >= 2)
+        if len(dates) >= 2 and dates[-2] == previous_date and (stock_code, previous_date) in limit_up:
+            yesterday_limit_up_pct.append(float(history["pct_chg"].iloc[-1]))
+    fields["yesterday_limit_up_today_avg_pct"] = (
+        float(np.mean(yesterday_limit_up_pct)) if yesterday_limit_up_pct else 0.0
+    )
+    return fields
+
+
+def test_ring_buffer_flags_streaks_and_round_trip() -> None:
+    """窗口满后才判新高 / 新低；停牌不中断连续涨停；状态表往返后继续推进结果一致。"""
+    state = StockRollingState(window=3)
+    for trade_date, close in (("20260102", 10.0), ("20260105", 11.0), ("20260106", 9.0)):
+        flags = state.advance(trade_date, stock_codes=["A"], closes=[close], limit_up=[False])
+        assert not flags["is_new_100d_high"].any()
+    flags = state.advance(
+        "20260107", stock_codes=["A", "B", "B"], closes=[12.0, 5.0, 0.0], limit_up=[True, True, True]
+    )
+    # B 的两行中最后一行收盘价无效，视为当日无行情
+    assert flags["stock_code"].tolist() == ["A"]
+    assert flags["is_new_100d_high"].tolist() == [True]
+    assert flags["limit_up_streak"].tolist() == [1]
+
+    restored = StockRollingState.from_frame(state.to_frame(), window=3)
+    # A 于 20260108 停牌，20260109 复牌再涨停：连续涨停计数延续，但不属于昨日涨停
+    for current in (state, restored):
+        current.advance("20260108", stock_codes=["C"], closes=[3.0], limit_up=[False])
+        flags = current.advance("20260109", stock_codes=["A"], closes=[8.5], limit_up=[True])
+        assert flags["limit_up_streak"].tolist() == [2]
+        assert flags["prev_limit_up"].tolist() == [False]
+        assert flags["is_new_100d_low"].tolist() == [True]
+    pd.testing.assert_frame_equal(restored.to_frame(), state.to_frame())
+    flags = state.advance("20260112", stock_codes=["A"], closes=[8.6], limit_up=[False])
+    assert flags["prev_limit_up"].tolist() == [True]
+    assert flags["limit_up_streak"].tolist() == [0]
+    with pytest.raises(ValueError, match="already advanced"):
+        state.advance("20260112", stock_codes=["A"], closes=[8.7], limit_up=[False])
+
+
+def test_incremental_updates_match_rebuild(tmp_path: Path) -> None:
+    """逐日增量推进与整段重建的逐日判定一致；回补更早行情后自动从头重放；
+    更早 end_date 的重建不覆盖已落库的更新状态。"""
+    config, _ = _build_config(tmp_path)
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    _seed_raw(db_path, trade_dates=_TRADE_DATES[5:])
+
+    first = update_stock_rolling_state(
+        config=config, start_date=_TRADE_DATES[-10], end_date=_TRADE_DATES[-10]
+    )
+    assert first.rebuilt
+    for trade_date in _TRADE_DATES[-9:]:
+        result = update_stock_rolling_state(config=config, start_date=trade_date, end_date=trade_date)
+        assert not result.rebuilt
+        assert result.replayed_trade_dates == 1
+    again = update_stock_rolling_state(
+        config=config, start_date=_TRADE_DATES[5], end_date=_TRADE_DATES[-1]
+    )
+    assert again.replayed_trade_dates == 0
+    incremental = _read_rolling_daily(db_path)
+
+    # 回补前 5 个交易日：区间内出现缺失判定且早于状态日 → 从头重放
+    _seed_raw(db_path)
+    backfilled = update_stock_rolling_state(
+        config=config, start_date=_TRADE_DATES[0], end_date=_TRADE_DATES[-1]
+    )
+    assert backfilled.rebuilt
+    assert backfilled.replayed_trade_dates == len(_TRADE_DATES)
+    assert backfilled.as_of_trade_date == _TRADE_DATES[-1]
+    rebuilt = _read_rolling_daily(db_path)
+    assert set(rebuilt["trade_date"]) == set(_TRADE_DATES)
+    assert rebuilt["is_new_100d_high"].any()
+
+    (tmp_path / "fresh").mkdir()
+    fresh_config, _ = _build_config(tmp_path / "fresh")
+    fresh_db = Path(fresh_config.duckdb_dir) / "emotionquant.duckdb"
+    _seed_raw(fresh_db, trade_dates=_TRADE_DATES[5:])
+    update_stock_rolling_state(
+        config=fresh_config, start_date=_TRADE_DATES[-1], end_date=_TRADE_DATES[-1], rebuild=True
+    )
+    pd.testing.assert_frame_equal(_read_rolling_daily(fresh_db), incremental)
+
+    # 以更早的 end_date 重建：只重写判定结果，已落库的最新状态不回退
+    older = update_stock_rolling_state(
+        config=config, start_date=_TRADE_DATES[-5], end_date=_TRADE_DATES[-5], rebuild=True
+    )
+    assert older.state_persisted is False
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        stored_as_of = connection.execute(
+            "SELECT DISTINCT as_of_trade_date FROM stock_rolling_state WHERE state_scope = 'latest'"
+        ).fetchall()
+    assert stored_as_of == [(_TRADE_DATES[-1],)]
+    pd.testing.assert_frame_equal(_read_rolling_daily(db_path), rebuilt)
+
+
+def test_l2_snapshot_fields_match_naive_lookback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """L2 市场快照的滚动字段与逐股回看 100 日的朴素实现一致。"""
+    monkeypatch.chdir(tmp_path)
+    config, _ = _build_config(tmp_path)
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    _seed_raw(db_path)
+
+    for trade_date in _TRADE_DATES[-3:]:
+        run_l2_snapshot(trade_date=trade_date, source="tushare", config=config, strict_sw31=False)
+        with duckdb.connect(str(db_path), read_only=True) as connection:
+            row = connection.execute(
+                "SELECT * FROM market_snapshot WHERE trade_date = ?", [trade_date]
+            ).df().iloc[0]
+        expected = _naive_market_fields(trade_date)
+        actual = {key: row[key] for key in expected}
+        assert actual == pytest.approx(expected)
+    assert expected["continuous_limit_up_3d_plus"] > 0
+
+
+def test_main_rebuild_rolling_state_command(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    """eq rebuild-rolling-state 从 raw_daily 首日重放到指定交易日并输出统计。"""
+    config, env_file = _build_config(tmp_path)
+    _seed_raw(Path(config.duckdb_dir) / "emotionquant.duckdb")
+
+    exit_code = main(
+        ["--env-file", str(env_file), "rebuild-rolling-state", "--end-date", _TRADE_DATES[20]]
+    )
+
+    assert exit_code == 0
+    payload = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert payload == {
+        "as_of_trade_date": _TRADE_DATES[20],
+        "daily_rows": 21 * _STOCK_COUNT,
+        "event": "rolling_state_rebuilt",
+        "replayed_trade_dates": 21,
+        "state_persisted": True,
+        "stock_count": _STOCK_COUNT,
+    }
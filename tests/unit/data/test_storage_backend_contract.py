@@ -0,0 +1,154 @@
+"""
+分层存储后端契约测试（STORAGE_BACKEND_L1/L2/L3）。
+
+覆盖：parquet 后端 L1 只落 Parquet 湖且读取走同名视图、hybrid 合并 Parquet 湖与
+数据库独有交易日、其它进程持有写锁时 Parquet 视图仍可读、回测价格读取按配置走视图、
+非法后端取值报错。
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+from src.backtest.pipeline import _read_price_frame
+from src.config.config import Config
+from src.data.repositories.daily import DailyRepository
+from src.db.helpers import table_exists
+from src.db.storage_backend import open_read_connection, storage_backend
+
+
+def _build_config(tmp_path: Path, *, l1_backend: str) -> Config:
+    """构建测试用临时 Config。"""
+    env_file = tmp_path / ".env.storage_backend"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n"
+        f"STORAGE_BACKEND_L1={l1_backend}\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _daily_rows(trade_date: str, closes: list[float]) -> pa.Table:
+    return pa.table(
+        {
+            "trade_date": [trade_date] * len(closes),
+            "ts_code": [f"{index:06d}.SZ" for index in range(1, len(closes) + 1)],
+            "stock_code": [f"{index:06d}" for index in range(1, len(closes) + 1)],
+            "open": closes,
+            "high": closes,
+            "low": closes,
+            "close": closes,
+        }
+    )
+
+
+def _daily_counts(connection: duckdb.DuckDBPyConnection) -> list[tuple[str, int]]:
+    return connection.execute(
+        "SELECT trade_date, COUNT(*) FROM raw_daily GROUP BY trade_date ORDER BY trade_date"
+    ).fetchall()
+
+
+def test_parquet_backend_skips_duckdb_and_reads_views(tmp_path: Path) -> None:
+    """parquet 后端：L1 写入不建 DuckDB 表，读取连接以视图暴露 Parquet 湖。"""
+    config = _build_config(tmp_path, l1_backend="parquet")
+    repository = DailyRepository(config)
+    assert repository.save_to_database(_daily_rows("20260202", [1.0, 2.0])) == 2
+    repository.save_to_database(_daily_rows("20260203", [3.0]))
+
+    database_path = repository.database_path
+    if database_path.exists():
+        with duckdb.connect(str(database_path), read_only=True) as connection:
+            assert not table_exists(connection, "raw_daily")
+    assert repository.count_by_trade_date("20260202") == 2
+
+    with open_read_connection(database_path, config=config) as connection:
+        assert table_exists(connection, "raw_daily")
+        assert _daily_counts(connection) == [("20260202", 2), ("20260203", 1)]
+    with open_read_connection(
+        database_path, config=config, start_date="20260203", end_date="20260203"
+    ) as connection:
+        assert _daily_counts(connection) == [("20260203", 1)]
+
+    frame = _read_price_frame(
+        database_path=database_path,
+        start_date="20260201",
+        end_date="20260228",
+        config=config,
+    )
+    assert frame["close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_hybrid_backend_merges_lake_with_database_only_dates(tmp_path: Path) -> None:
+    """hybrid 后端：Parquet 湖已覆盖的交易日取 Parquet，其余交易日取 DuckDB 表。"""
+    config = _build_config(tmp_path, l1_backend="hybrid")
+    repository = DailyRepository(config)
+    repository.save_to_database(_daily_rows("20260202", [1.0, 2.0]))
+    repository.save_to_database(_daily_rows("20260203", [3.0]))
+    # 仅 20260203 进入 Parquet 湖，且 Parquet 版本与数据库版本不同
+    repository.save_to_parquet(_daily_rows("20260203", [30.0, 31.0]))
+
+    with open_read_connection(repository.database_path, config=config) as connection:
+        assert _daily_counts(connection) == [("20260202", 2), ("20260203", 2)]
+        closes = connection.execute(
+            "SELECT close FROM raw_daily WHERE trade_date = '20260203' ORDER BY close"
+        ).fetchall()
+    assert closes == [(30.0,), (31.0,)]
+
+
+_HOLD_WRITE_SCRIPT = """
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+connection = duckdb.connect(sys.argv[1])
+Path(sys.argv[2]).write_text("held", encoding="utf-8")
+time.sleep(float(sys.argv[3]))
+connection.close()
+"""
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX only")
+def test_parquet_views_readable_while_database_write_locked(tmp_path: Path) -> None:
+    """其它进程持有数据库写锁时，直连只读失败，Parquet 视图仍可查询。"""
+    config = _build_config(tmp_path, l1_backend="parquet")
+    repository = DailyRepository(config)
+    repository.save_to_database(_daily_rows("20260202", [1.0, 2.0]))
+    database_path = repository.database_path
+    database_path.parent.mkdir(parents=True, exist_ok=True)
+    duckdb.connect(str(database_path)).close()
+
+    marker = tmp_path / "write_lock_held"
+    holder = subprocess.Popen(
+        [sys.executable, "-c", _HOLD_WRITE_SCRIPT, str(database_path), str(marker), "5"],
+    )
+    try:
+        deadline = time.monotonic() + 30.0
+        while not marker.exists():
+            assert holder.poll() is None, "write lock holder exited early"
+            assert time.monotonic() < deadline, "write lock holder did not start"
+            time.sleep(0.02)
+        with pytest.raises(duckdb.IOException):
+            duckdb.connect(str(database_path), read_only=True)
+        with open_read_connection(database_path, config=config) as connection:
+            assert _daily_counts(connection) == [("20260202", 2)]
+    finally:
+        holder.kill()
+        holder.wait()
+
+
+def test_invalid_storage_backend_is_rejected(tmp_path: Path) -> None:
+    """非法后端取值抛出 ValueError；未传配置时默认 duckdb。"""
+    config = _build_config(tmp_path, l1_backend="sqlite")
+    with pytest.raises(ValueError, match="unsupported storage backend"):
+        storage_backend(config, "l1")
+    assert storage_backend(None, "l1") == "duckdb"
@@ -0,0 +1,137 @@
+"""
+写会话（WriteSession）契约测试。
+
+覆盖：多仓储写入复用单连接、批次事务整体回滚、表结构缓存下的补列、
+persist_by_trade_date 复用会话时的幂等写入、通用写会话 / 写连接持有进程间写入锁。
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.config.config import Config
+from src.data.repositories.daily import DailyRepository
+from src.data.repositories.daily_basic import DailyBasicRepository
+from src.data.repositories.limit_list import LimitListRepository
+from src.db.helpers import open_write_connection, open_write_session, persist_by_trade_date
+from src.db.process_lock import duckdb_lock_wait_snapshot, read_duckdb_lock_holder
+
+
+def _build_config(tmp_path: Path) -> Config:
+    """构建测试用临时 Config。"""
+    env_file = tmp_path / ".env.write_session"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def test_repository_writes_share_one_connection_in_session(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """同一写会话内多个仓储写入只建立一次 DuckDB 连接。"""
+    config = _build_config(tmp_path)
+    original_connect = duckdb.connect
+    connects: list[str] = []
+
+    def _counting_connect(path: str, *args: Any, **kwargs: Any) -> duckdb.DuckDBPyConnection:
+        connects.append(str(path))
+        return original_connect(path, *args, **kwargs)
+
+    monkeypatch.setattr(duckdb, "connect", _counting_connect)
+    daily = DailyRepository(config)
+    rows = [{"trade_date": "20260220", "stock_code": "000001", "close": 10.0}]
+
+    with daily.open_write_session() as session:
+        assert daily.save_to_database(rows, session=session) == 1
+        assert DailyBasicRepository(config).save_to_database(rows, session=session) == 1
+        assert LimitListRepository(config).save_to_database(rows, session=session) == 1
+        assert daily.save_to_database(rows, session=session) == 1
+
+    assert len(connects) == 1
+    assert session.transactions == 4
+    with original_connect(str(daily.database_path), read_only=True) as connection:
+        count = connection.execute("SELECT COUNT(*) FROM raw_daily").fetchone()[0]
+    assert count == 1
+
+
+def test_session_batch_rolls_back_all_tables_on_failure(tmp_path: Path) -> None:
+    """batch() 内任一写入失败时整批回滚，已写入的其它表也不生效。"""
+    database_path = tmp_path / "eq.duckdb"
+    frame = pd.DataFrame([{"trade_date": "20260220", "value": 1.0}])
+    with open_write_session(database_path) as session:
+        session.write_frame("table_a", frame)
+        with pytest.raises(RuntimeError, match="boom"):
+            with session.batch():
+                session.write_frame("table_a", frame.assign(value=2.0))
+                session.write_frame("table_b", frame)
+                raise RuntimeError("boom")
+
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        values = connection.execute("SELECT value FROM table_a").fetchall()
+        tables = {
+            str(row[0])
+            for row in connection.execute(
+                "SELECT table_name FROM information_schema.tables"
+            ).fetchall()
+        }
+    assert values == [(1.0,)]
+    assert "table_b" not in tables
+
+
+def test_session_adds_new_columns_and_replaces_trade_date_partition(tmp_path: Path) -> None:
+    """缓存命中后遇到新列仍会补列；同 trade_date 重写为整体替换。"""
+    database_path = tmp_path / "eq.duckdb"
+    with open_write_session(database_path) as session:
+        persist_by_trade_date(
+            database_path=database_path,
+            table_name="scores",
+            frame=pd.DataFrame([{"trade_date": "20260220", "code": "a", "score": 1.0}]),
+            trade_date="20260220",
+            session=session,
+        )
+        persist_by_trade_date(
+            database_path=database_path,
+            table_name="scores",
+            frame=pd.DataFrame(
+                [
+                    {"trade_date": "20260220", "code": "a", "score": 2.0, "rank": 1},
+                    {"trade_date": "20260220", "code": "b", "score": 3.0, "rank": 2},
+                ]
+            ),
+            trade_date="20260220",
+            session=session,
+        )
+
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        rows = connection.execute(
+            "SELECT code, score, rank FROM scores ORDER BY code"
+        ).fetchall()
+    assert rows == [("a", 2.0, 1), ("b", 3.0, 2)]
+
+
+def test_generic_write_session_holds_interprocess_lock(tmp_path: Path) -> None:
+    """open_write_session / open_write_connection 期间持有进程间写入锁，退出后释放。"""
+    database_path = tmp_path / "eq_data" / "duckdb" / "emotionquant.duckdb"
+    frame = pd.DataFrame([{"trade_date": "20260105", "value": 1.0}])
+    before = duckdb_lock_wait_snapshot()
+
+    with open_write_session(database_path) as session:
+        assert read_duckdb_lock_holder(database_path)["pid"] == str(os.getpid())
+        session.write_frame("lock_probe", frame, trade_date="20260105")
+    assert read_duckdb_lock_holder(database_path) == {}
+
+    with open_write_connection(database_path) as connection:
+        assert read_duckdb_lock_holder(database_path)["pid"] == str(os.getpid())
+        assert connection.execute("SELECT COUNT(*) FROM lock_probe").fetchone()[0] == 1
+    persist_by_trade_date(
+        database_path=database_path, table_name="lock_probe", frame=frame, trade_date="20260105"
+    )
+    assert duckdb_lock_wait_snapshot()["acquired"] - before["acquired"] == 3
@@ -0,0 +1,155 @@
+"""
+单写入服务（eq writer）契约测试。
+
+覆盖：服务运行时各写入路径自动改走服务并组提交、batch 请求整体生效或整体失败、
+组内失败请求不影响同组其它请求、服务未运行 / 套接字失效时回退直连写入。
+"""
+from __future__ import annotations
+
+import json
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.config.config import Config
+from src.data.repositories.daily import DailyRepository
+from src.db.helpers import WriteSession, open_write_session, persist_by_trade_date
+from src.db.writer_client import (
+    RemoteWriteSession,
+    WritePart,
+    WriterClient,
+    WriterServiceError,
+    connect_writer,
+    writer_socket_path,
+)
+from src.db.writer_service import IngestionWriterService
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="AF_UNIX socket required")
+
+
+def _build_config(tmp_path: Path) -> tuple[Config, Path]:
+    """构建测试用临时 Config，返回 (config, env 文件路径)。"""
+    env_file = tmp_path / ".env.writer"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / 'eq_data'}\n"
+        "ENVIRONMENT=test\n"
+        "DUCKDB_WRITER_GROUP_COMMIT_MS=300\n"
+        "DUCKDB_WRITER_IDLE_CLOSE_MS=0\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file)), env_file
+
+
+def _start_writer_process(env_file: Path) -> tuple[subprocess.Popen[str], dict[str, object]]:
+    """以子进程运行 eq writer，等到输出启动事件后返回。"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.pipeline.main", "--env-file", str(env_file), "writer"],
+        cwd=str(Path(__file__).resolve().parents[3]),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout is not None
+    started = json.loads(process.stdout.readline())
+    assert started["event"] == "duckdb_writer_started"
+    return process, started
+
+
+def _stop_writer_process(process: subprocess.Popen[str]) -> dict[str, object]:
+    """SIGINT 优雅停止服务，返回停止事件中的统计。"""
+    process.send_signal(signal.SIGINT)
+    stdout, _ = process.communicate(timeout=30)
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def test_writes_route_through_running_writer_with_group_commit(tmp_path: Path) -> None:
+    """服务运行时并发写入经服务组提交，确认返回后数据已落库。"""
+    config, env_file = _build_config(tmp_path)
+    database_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    process, _ = _start_writer_process(env_file)
+    try:
+        session_context = open_write_session(database_path)
+        with session_context as session:
+            assert isinstance(session, RemoteWriteSession)
+
+        def _write(index: int) -> int:
+            trade_date = f"202602{index + 10:02d}"
+            frame = pd.DataFrame([{"trade_date": trade_date, "code": "a", "score": float(index)}])
+            return persist_by_trade_date(
+                database_path=database_path,
+                table_name="scores",
+                frame=frame,
+                trade_date=trade_date,
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert sum(executor.map(_write, range(8))) == 8
+        rows = [{"trade_date": "20260220", "stock_code": "000001", "close": 10.0}]
+        assert DailyRepository(config).save_to_database(rows) == 1
+    finally:
+        stats = _stop_writer_process(process)
+
+    assert stats["requests"] == 9
+    assert stats["failed_requests"] == 0
+    assert int(stats["commits"]) < 9
+    assert int(stats["max_group_size"]) > 1
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        score_count = connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        daily_count = connection.execute("SELECT COUNT(*) FROM raw_daily").fetchone()[0]
+    assert score_count == 8
+    assert daily_count == 1
+
+
+def test_failed_request_is_isolated_and_batch_is_atomic(tmp_path: Path) -> None:
+    """同组中出错的请求整体不生效，且不影响同组其它请求。"""
+    database_path = tmp_path / "eq.duckdb"
+    good = pd.DataFrame([{"trade_date": "20260220", "value": 1.0}])
+    with IngestionWriterService(database_path, group_commit_ms=300, idle_close_ms=0) as service:
+        client = WriterClient(service.socket_path)
+
+        def _submit_bad() -> None:
+            session = RemoteWriteSession(client)
+            with session.batch():
+                session.write_frame("table_ok", good)
+                session.write_frame("bad table", good)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            bad = executor.submit(_submit_bad)
+            time.sleep(0.05)
+            ok = executor.submit(client.submit, [WritePart(table_name="table_b", frame=good)])
+            assert ok.result()["rows"] == 1
+            with pytest.raises(WriterServiceError):
+                bad.result()
+        stats = service.stats()
+
+    assert stats["failed_requests"] == 1
+    with duckdb.connect(str(database_path), read_only=True) as connection:
+        tables = {
+            str(row[0])
+            for row in connection.execute(
+                "SELECT table_name FROM information_schema.tables"
+            ).fetchall()
+        }
+    assert "table_b" in tables
+    assert "table_ok" not in tables
+
+
+def test_falls_back_to_direct_write_without_running_writer(tmp_path: Path) -> None:
+    """服务未运行或套接字失效时 open_write_session 直连写入。"""
+    database_path = tmp_path / "eq.duckdb"
+    assert connect_writer(database_path) is None
+    socket_path = writer_socket_path(database_path)
+    socket_path.write_text("", encoding="utf-8")
+    try:
+        assert connect_writer(database_path) is None
+        with open_write_session(database_path) as session:
+            assert isinstance(session, WriteSession)
+            session.write_frame("table_a", pd.DataFrame([{"trade_date": "20260220", "v": 1}]))
+    finally:
+        socket_path.unlink()
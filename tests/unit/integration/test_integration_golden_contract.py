@@ -0,0 +1,254 @@
+"""
+集成推荐黄金输出契约测试（run_integrated_daily 列式实现）。
+
+黄金文件由逐股循环实现对同一组合成输入生成，覆盖四种集成模式 × 两组市场状态：
+行业映射缺失 / 失效 / 未来生效、行业无 IRS 记录、回避行业降权、非法方向与等级、
+风险收益比不足 / 缺失、价格缺失 / 为零 / 贴近涨跌停、无 raw_daily 表、
+无 opportunity_grade 列。逐列比对限额后的推荐行与关闭限额时的全部候选行。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+import src.integration.pipeline as integration_pipeline
+from src.config.config import Config
+from src.integration.pipeline import run_integrated_daily
+
+TRADE_DATE = "20260212"
+STOCK_COUNT = 48
+MODES = ("top_down", "bottom_up", "dual_verify", "complementary")
+SCENARIOS = {
+    "hot": {
+        "mss": (72.5, 85.0, "emergence", "up"),
+        "gate": ("PASS", 0.9),
+        "with_raw_daily": True,
+        "with_grade": True,
+    },
+    "cold": {
+        "mss": (41.25, 50.0, "unknown", "down"),
+        "gate": ("WARN", 0.5),
+        "with_raw_daily": False,
+        "with_grade": False,
+    },
+}
+GOLDEN_PATH = (
+    Path(__file__).resolve().parents[2]
+    / "fixtures"
+    / "integration"
+    / "integrated_recommendation_golden.json"
+)
+
+
+def _build_config(tmp_path: Path, name: str) -> Config:
+    env_file = tmp_path / f".env.integration_golden.{name}"
+    env_file.write_text(
+        f"DATA_PATH={tmp_path / name}\n"
+        "ENVIRONMENT=test\n",
+        encoding="utf-8",
+    )
+    return Config.from_env(env_file=str(env_file))
+
+
+def _stock_code(index: int) -> str:
+    return f"{600000 + index:06d}"
+
+
+def _pas_rows(with_grade: bool) -> pd.DataFrame:
+    grades = ["S", "A", "B", "C", "D", "", " a", "X"]
+    directions = ["bullish", "bearish", "neutral", "sideways"]
+    rows: list[dict[str, object]] = []
+    for index in range(STOCK_COUNT):
+        risk_reward: float | None = 1.0 + (index % 6) * 0.35
+        if index % 10 == 3:
+            risk_reward = 0.8
+        elif index == 17:
+            risk_reward = None
+        pas_score: float | None = round(20.0 + (index * 37) % 80 + (index % 7) * 0.12345, 4)
+        if index % 9 == 0:
+            pas_score = 66.6
+        elif index == 13:
+            pas_score = None
+        row: dict[str, object] = {
+            "trade_date": TRADE_DATE,
+            "stock_code": "" if index == 7 else _stock_code(index),
+            "ts_code": f"{_stock_code(index)}.SH",
+            "pas_score": pas_score,
+            "pas_direction": None if index == 21 else directions[index % 4],
+            "risk_reward_ratio": risk_reward,
+            "contract_version": "nc-v1",
+        }
+        if with_grade:
+            row["opportunity_grade"] = grades[index % 8]
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _raw_daily_rows() -> pd.DataFrame:
+    rows: list[dict[str, object]] = []
+    for index in range(STOCK_COUNT):
+        if index % 13 == 4:
+            continue
+        close: float | None = round(10.0 + index * 0.37, 4)
+        high = round(close * (1.0 if index % 5 == 0 else 1.05), 4)
+        low: float | None = round(close * (1.0 if index % 7 == 1 else 0.95), 4)
+        open_price = round(close * 0.99, 4)
+        if index == 29:
+            close = None
+        elif index == 31:
+            close = 0.0
+        if index == 33:
+            low = None
+        rows.append(
+            {
+                "trade_date": TRADE_DATE,
+                "stock_code": _stock_code(index),
+                "ts_code": f"{_stock_code(index)}.SH",
+                "open": open_price,
+                "high": high,
+                "low": low,
+                "close": close,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _member_rows() -> pd.DataFrame:
+    rows: list[dict[str, object]] = []
+    for index in range(STOCK_COUNT):
+        if index % 15 == 14:
+            continue
+        rows.append(
+            {
+                "trade_date": TRADE_DATE,
+                "con_code": f"{_stock_code(index)}.SH",
+                "index_code": f"IDX{index % 8}",
+                "in_date": "20270101" if index == 23 else "20200101",
+                "out_date": "20260101" if index == 22 else None,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _seed(config: Config, scenario: dict[str, object]) -> None:
+    mss_score, temperature, cycle, trend = scenario["mss"]
+    final_gate, position_cap_ratio = scenario["gate"]
+    tables = {
+        "mss_panorama": pd.DataFrame(
+            [
+                {
+                    "trade_date": TRADE_DATE,
+                    "mss_score": mss_score,
+                    "mss_temperature": temperature,
+                    "mss_cycle": cycle,
+                    "mss_trend": trend,
+                    "contract_version": "nc-v1",
+                    "created_at": "2026-02-12T00:00:00",
+                }
+            ]
+        ),
+        "irs_industry_daily": pd.DataFrame(
+            [
+                {
+                    "trade_date": TRADE_DATE,
+                    "industry_code": f"IND{k}",
+                    "industry_name": f"行业{k}",
+                    "irs_score": round(30.0 + k * 9.7, 4),
+                    "recommendation": ["STRONG_BUY", "BUY", "HOLD", "SELL", "AVOID"][k % 5],
+                    "allocation_advice": ["超配", "标配", "回避"][k % 3],
+                    "quality_flag": "normal",
+                    "contract_version": "nc-v1",
+                    "created_at": f"2026-02-12T00:00:{k:02d}",
+                }
+                for k in range(7)
+            ]
+        ),
+        "stock_pas_daily": _pas_rows(bool(scenario["with_grade"])),
+        "validation_gate_decision": pd.DataFrame(
+            [
+                {
+                    "trade_date": TRADE_DATE,
+                    "final_gate": final_gate,
+                    "contract_version": "nc-v1",
+                    "selected_weight_plan": "baseline",
+                    "position_cap_ratio": position_cap_ratio,
+                    "created_at": "2026-02-12T00:00:00",
+                }
+            ]
+        ),
+        "raw_index_member": _member_rows(),
+        # IDX7 映射到没有 IRS 记录的行业，回落到最新 IRS 行
+        "raw_index_classify": pd.DataFrame(
+            [
+                {
+                    "trade_date": TRADE_DATE,
+                    "index_code": f"IDX{k}",
+                    "industry_code": "IND_NO_IRS" if k == 7 else f"IND{k}",
+                    "industry_name": f"行业{k}",
+                }
+                for k in range(8)
+            ]
+        ),
+    }
+    if scenario["with_raw_daily"]:
+        tables["raw_daily"] = _raw_daily_rows()
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(db_path)) as connection:
+        for table_name, frame in tables.items():
+            connection.register("incoming", frame)
+            connection.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM incoming")
+            connection.unregister("incoming")
+
+
+def _columns(frame: pd.DataFrame) -> dict[str, list[object]]:
+    payload = {column: frame[column].tolist() for column in frame.columns if column != "created_at"}
+    return json.loads(json.dumps(payload, ensure_ascii=False))
+
+
+def _run_outputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> dict[str, object]:
+    outputs: dict[str, object] = {}
+    for name, scenario in SCENARIOS.items():
+        config = _build_config(tmp_path, name)
+        _seed(config, scenario)
+        for mode in MODES:
+            limited = run_integrated_daily(
+                trade_date=TRADE_DATE, config=config, integration_mode=mode
+            )
+            with monkeypatch.context() as patch:
+                patch.setattr(
+                    integration_pipeline, "_apply_recommendation_limits", lambda frame: frame
+                )
+                unlimited = run_integrated_daily(
+                    trade_date=TRADE_DATE, config=config, integration_mode=mode
+                )
+            outputs[f"{name}/{mode}"] = {
+                "rr_filtered_count": limited.rr_filtered_count,
+                "limited": _columns(limited.frame),
+                "unlimited": _columns(unlimited.frame),
+            }
+    return outputs
+
+
+def test_integrated_rows_match_golden_output(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """四种模式 × 两组市场状态的推荐行（限额前后）与黄金文件逐列一致。"""
+    golden = json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+    actual = _run_outputs(tmp_path, monkeypatch)
+
+    assert sorted(actual) == sorted(golden)
+    for key, expected in golden.items():
+        assert actual[key]["rr_filtered_count"] == expected["rr_filtered_count"], key
+        for part in ("limited", "unlimited"):
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(actual[key][part]),
+                pd.DataFrame(expected[part]),
+                obj=f"{key}/{part}",
+            )
+    assert len(golden["hot/top_down"]["limited"]["stock_code"]) == 20
+    assert len(golden["hot/top_down"]["unlimited"]["stock_code"]) > 20
@@ -0,0 +1,168 @@
+"""
+组合账本契约测试（portfolio_ledger）。
+
+覆盖：每日收盘写入账本行，次日期初现金 / 持仓取自账本且与全量回放执行结果一致；
+账本缺行时回退回放；verify 发现缺行 / 现金篡改，rebuild 回放后核对通过；
+`eq verify-ledger` 命令以退出码反映核对结果；账本与成交 / 持仓 / 风险事件同一事务写入，
+重跑较早交易日时其后账本行失效。
+"""
+from __future__ import annotations
+
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+import src.trading.pipeline as trading_pipeline
+from src.pipeline.main import main
+from src.trading import rebuild_portfolio_ledger, verify_portfolio_ledger
+from src.trading.ledger import PORTFOLIO_LEDGER_TABLE
+from src.trading.pipeline import run_paper_trade
+from tests.unit.trade_day_guard import latest_open_trade_days
+from tests.unit.trading.support import build_config, prepare_s4_inputs
+
+
+def _without_created_at(path: Path) -> pd.DataFrame:
+    frame = pd.read_parquet(path)
+    return frame.drop(columns=["created_at"]).reset_index(drop=True)
+
+
+def test_ledger_snapshots_replace_history_replay(tmp_path: Path) -> None:
+    """账本驱动的期初状态与回放一致，核对 / 重建闭环可发现并修复账本偏差。"""
+    config = build_config(tmp_path, ".env.s4.ledger")
+    dates = latest_open_trade_days(4)
+    _, day1, day2, day3 = dates
+    prepare_s4_inputs(config, dates, trade_date_for_s4=day1)
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+
+    results = [run_paper_trade(trade_date=day, mode="paper", config=config) for day in dates[1:]]
+    assert all(result.has_error is False for result in results)
+    assert [result.opening_state_source for result in results] == ["replay", "ledger", "ledger"]
+
+    verified = verify_portfolio_ledger(config=config, artifacts_dir=tmp_path / "verify")
+    assert verified.ok is True
+    assert verified.checked_trade_dates == 3
+
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        ledger = connection.execute(
+            f"SELECT trade_date, cash, position_count FROM {PORTFOLIO_LEDGER_TABLE} "
+            "ORDER BY trade_date"
+        ).df()
+    assert ledger["trade_date"].tolist() == [day1, day2, day3]
+    assert int(ledger["position_count"].iloc[0]) > 0
+
+    # 删除账本后同日重跑走全量回放，成交与持仓与账本驱动时一致
+    ledger_trades = _without_created_at(results[-1].trade_records_path)
+    ledger_positions = _without_created_at(results[-1].positions_path)
+    with duckdb.connect(str(db_path)) as connection:
+        connection.execute(f"DROP TABLE {PORTFOLIO_LEDGER_TABLE}")
+    replayed = run_paper_trade(trade_date=day3, mode="paper", config=config)
+    assert replayed.opening_state_source == "replay"
+    pd.testing.assert_frame_equal(_without_created_at(replayed.trade_records_path), ledger_trades)
+    pd.testing.assert_frame_equal(_without_created_at(replayed.positions_path), ledger_positions)
+
+    missing = verify_portfolio_ledger(config=config, artifacts_dir=tmp_path / "verify")
+    assert {item["trade_date"] for item in missing.mismatches} == {day1, day2}
+    assert {item["issue"] for item in missing.mismatches} == {"ledger_row_missing"}
+
+    rebuilt = rebuild_portfolio_ledger(config=config)
+    assert (rebuilt.trade_dates, rebuilt.first_trade_date, rebuilt.last_trade_date) == (
+        3,
+        day1,
+        day3,
+    )
+    assert verify_portfolio_ledger(config=config, artifacts_dir=tmp_path / "verify").ok is True
+
+    with duckdb.connect(str(db_path)) as connection:
+        connection.execute(
+            f"UPDATE {PORTFOLIO_LEDGER_TABLE} SET cash = cash + 100 WHERE trade_date = ?", [day2]
+        )
+    tampered = verify_portfolio_ledger(config=config, artifacts_dir=tmp_path / "verify")
+    assert [(item["trade_date"], item["issue"]) for item in tampered.mismatches] == [
+        (day2, "cash_mismatch")
+    ]
+    assert main(["--env-file", str(tmp_path / ".env.s4.ledger"), "verify-ledger"]) == 1
+
+
+def _day_rows(db_path: Path, trade_date: str) -> dict[str, pd.DataFrame]:
+    tables = ("trade_records", "positions", "risk_events", PORTFOLIO_LEDGER_TABLE)
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        return {
+            table: connection.execute(
+                f"SELECT * FROM {table} WHERE trade_date = ? ORDER BY ALL", [trade_date]
+            ).df()
+            for table in tables
+        }
+
+
+def test_failed_ledger_write_rolls_back_trade_tables(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """同日重跑写账本失败时，成交 / 持仓 / 风险事件随账本一起回滚，不留下错位行。"""
+    config = build_config(tmp_path, ".env.s4.ledger_atomic")
+    dates = latest_open_trade_days(3)
+    _, day1, day2 = dates
+    prepare_s4_inputs(config, dates, trade_date_for_s4=day1)
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    for day in (day1, day2):
+        assert run_paper_trade(trade_date=day, mode="paper", config=config).has_error is False
+    before = _day_rows(db_path, day2)
+    assert not before["trade_records"].empty
+
+    def _fail_ledger(*args: object, **kwargs: object) -> None:
+        raise RuntimeError("ledger_write_failed")
+
+    monkeypatch.setattr(trading_pipeline, "_utc_now_text", lambda: "2000-01-01T00:00:00+00:00")
+    monkeypatch.setattr(trading_pipeline, "write_ledger", _fail_ledger)
+    with pytest.raises(RuntimeError, match="ledger_write_failed"):
+        run_paper_trade(trade_date=day2, mode="paper", config=config)
+
+    after = _day_rows(db_path, day2)
+    for table, frame in before.items():
+        pd.testing.assert_frame_equal(after[table], frame, obj=table)
+
+
+def _ledger_cash(db_path: Path, trade_date: str) -> float | None:
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        row = connection.execute(
+            f"SELECT cash FROM {PORTFOLIO_LEDGER_TABLE} WHERE trade_date = ?", [trade_date]
+        ).fetchone()
+    return float(row[0]) if row else None
+
+
+def test_rerun_of_earlier_date_invalidates_later_ledger_rows(tmp_path: Path) -> None:
+    """重跑较早交易日后其后的账本行失效，下一交易日期初现金回退为与全量回放一致。"""
+    config = build_config(tmp_path, ".env.s4.ledger_rerun")
+    dates = latest_open_trade_days(4)
+    _, day1, day2, day3 = dates
+    prepare_s4_inputs(config, dates, trade_date_for_s4=day1)
+    db_path = Path(config.duckdb_dir) / "emotionquant.duckdb"
+    for day in (day1, day2):
+        assert run_paper_trade(trade_date=day, mode="paper", config=config).has_error is False
+    first_cash = _ledger_cash(db_path, day1)
+
+    # 改变 day1 信号（只保留评分最高的一条）后重跑 day1
+    with duckdb.connect(str(db_path)) as connection:
+        connection.execute(
+            "DELETE FROM integrated_recommendation WHERE trade_date = ? AND stock_code NOT IN ("
+            "SELECT stock_code FROM integrated_recommendation WHERE trade_date = ? "
+            "ORDER BY final_score DESC, stock_code LIMIT 1)",
+            [day1, day1],
+        )
+    rerun = run_paper_trade(trade_date=day1, mode="paper", config=config)
+    assert rerun.has_error is False
+    assert _ledger_cash(db_path, day1) != first_cash
+    assert _ledger_cash(db_path, day2) is None
+
+    result = run_paper_trade(trade_date=day3, mode="paper", config=config)
+    assert result.opening_state_source == "replay"
+    replayed_cash = trading_pipeline._read_available_cash(
+        db_path, day3, float(config.backtest_initial_cash)
+    )
+    with duckdb.connect(str(db_path), read_only=True) as connection:
+        opening_cash = connection.execute(
+            f"SELECT opening_cash FROM {PORTFOLIO_LEDGER_TABLE} WHERE trade_date = ?", [day3]
+        ).fetchone()[0]
+    assert opening_cash == round(replayed_cash, 4)
+